@@ -0,0 +1,151 @@
+# admin_web/admission.py
+# -------------------------------------------------------
+# 🚦 Admission control לפריימים מטלפונים — תקציב פר-מפיק לפי עומס הצינור
+# -------------------------------------------------------
+# budget = {"fps", "max_width", "jpeg_q", "level"}:
+#   • fps — תקציב הצומת (INGEST_NODE_FPS) מחולק בין המפיקים הפעילים, בתקרת
+#     קצב ה-MJPEG של ה-streamer ו-INGEST_MAX_FPS, כפול מקדם העומס.
+#   • max_width / jpeg_q — מדרגות איכות (ADMISSION_LEVELS); CPU גבוה → מדרגה למטה,
+#     CPU נמוך לאורך זמן → מדרגה למעלה (היסטרזיס, לכל היותר שינוי אחד לשנייה).
+# admit(producer) — token bucket פר-מפיק בקצב התקציב; פריים מעבר לתקציב נדחה
+#   לפני קריאת הגוף / פענוח / העתקה, והמפיק מקבל את התקציב העדכני בתשובה.
+# -------------------------------------------------------
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import psutil  # type: ignore
+    psutil.cpu_percent(interval=None)  # חימום — הקריאה הראשונה מחזירה 0
+except Exception:
+    psutil = None  # type: ignore
+
+__all__ = ["AdmissionController", "ADMISSION", "ADMISSION_LEVELS"]
+
+INGEST_MAX_FPS = float(os.getenv("INGEST_MAX_FPS", "30"))
+INGEST_NODE_FPS = float(os.getenv("INGEST_NODE_FPS", "120"))
+ADMISSION_CPU_HIGH = float(os.getenv("ADMISSION_CPU_HIGH", "85"))
+ADMISSION_CPU_LOW = float(os.getenv("ADMISSION_CPU_LOW", "60"))
+ADMISSION_IDLE_SEC = float(os.getenv("ADMISSION_IDLE_SEC", "10"))
+
+# (max_width, jpeg_q, fps_factor) — מדרגה 0 = איכות מלאה
+ADMISSION_LEVELS: List[Tuple[int, float, float]] = [
+    (1280, 0.80, 1.0),
+    (960, 0.75, 0.8),
+    (640, 0.70, 0.6),
+    (480, 0.60, 0.5),
+]
+
+
+def _streamer_fps_cap() -> float:
+    try:
+        from app.ui.video import get_streamer  # type: ignore
+        fps = float(getattr(get_streamer(), "encode_fps", 0) or 0)
+        return fps if fps > 0 else INGEST_MAX_FPS
+    except Exception:
+        return INGEST_MAX_FPS
+
+
+def _cpu_percent() -> Optional[float]:
+    if psutil is None:
+        return None
+    try:
+        return float(psutil.cpu_percent(interval=None))
+    except Exception:
+        return None
+
+
+class _Bucket:
+    __slots__ = ("tokens", "ts", "seen", "admitted", "rejected")
+
+    def __init__(self, now: float, tokens: float):
+        self.tokens = tokens
+        self.ts = now
+        self.seen = now
+        self.admitted = 0
+        self.rejected = 0
+
+
+class AdmissionController:
+    def __init__(self, node_fps: float = INGEST_NODE_FPS, max_fps: float = INGEST_MAX_FPS,
+                 fps_cap: Callable[[], float] = _streamer_fps_cap,
+                 load: Callable[[], Optional[float]] = _cpu_percent,
+                 burst: float = 2.0):
+        self.node_fps = float(node_fps)
+        self.max_fps = float(max_fps)
+        self._fps_cap = fps_cap
+        self._load = load
+        self.burst = float(burst)
+        self.level = 0
+        self.cpu: Optional[float] = None
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, _Bucket] = {}
+        self._next_eval = 0.0
+        self._cap = max_fps
+
+    # ---- עומס ----
+    def _evaluate(self, now: float) -> None:
+        """פעם בשנייה לכל היותר: דגימת CPU, עדכון מדרגה, ניקוי מפיקים שקטים."""
+        if now < self._next_eval:
+            return
+        self._next_eval = now + 1.0
+        self._cap = self._fps_cap()
+        cpu = self._load()
+        self.cpu = cpu
+        if cpu is not None:
+            if cpu >= ADMISSION_CPU_HIGH and self.level < len(ADMISSION_LEVELS) - 1:
+                self.level += 1
+            elif cpu <= ADMISSION_CPU_LOW and self.level > 0:
+                self.level -= 1
+        for k in [k for k, b in self._buckets.items() if now - b.seen > ADMISSION_IDLE_SEC]:
+            del self._buckets[k]
+
+    def _budget_locked(self) -> Dict[str, Any]:
+        width, q, factor = ADMISSION_LEVELS[self.level]
+        active = max(1, len(self._buckets))
+        fps = min(self.max_fps, self._cap, self.node_fps / active) * factor
+        return {"fps": round(max(1.0, fps), 1), "max_width": width, "jpeg_q": q, "level": self.level}
+
+    def budget(self, producer: Optional[str] = None) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._evaluate(now)
+            if producer is not None and producer not in self._buckets:
+                self._buckets[producer] = _Bucket(now, self.burst)
+            return self._budget_locked()
+
+    # ---- קבלה ----
+    def admit(self, producer: str) -> Tuple[bool, Dict[str, Any]]:
+        """(מותר?, תקציב). זול — בלי I/O; לקרוא לפני קריאת/פענוח הפריים."""
+        now = time.monotonic()
+        with self._lock:
+            self._evaluate(now)
+            b = self._buckets.get(producer)
+            if b is None:
+                b = self._buckets[producer] = _Bucket(now, self.burst)
+            budget = self._budget_locked()
+            b.tokens = min(self.burst, b.tokens + (now - b.ts) * budget["fps"])
+            b.ts = now
+            b.seen = now
+            if b.tokens >= 1.0:
+                b.tokens -= 1.0
+                b.admitted += 1
+                return True, budget
+            b.rejected += 1
+            return False, budget
+
+    def forget(self, producer: str) -> None:
+        with self._lock:
+            self._buckets.pop(producer, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"level": self.level, "cpu": self.cpu, "budget": self._budget_locked(),
+                    "producers": {k: {"admitted": b.admitted, "rejected": b.rejected}
+                                  for k, b in self._buckets.items()}}
+
+
+ADMISSION = AdmissionController()
@@ -20,6 +20,8 @@ import os, math, random, time, json, threading
 from typing import Any, Dict, List, Optional, Tuple, Callable
 from pathlib import Path
 
+from core.event_bus import BUS
+
 # ─────────────────────────────────────────────────────────────
 # לוגינג
 # ─────────────────────────────────────────────────────────────
@@ -270,11 +272,12 @@ def detect_once(raw_metrics: Dict[str, Any],
     except Exception as e:
         logger.warning(f"[UI] failed to apply ui names: {e}")
 
-    # שמירה למסך + Persist אם יש
+    # שמירה למסך + BUS("report") (persister/forwarders) + Persist אם יש
     try:
         set_last_report(report)
     except Exception:
         pass
+    BUS.publish("report", report)
     try:
         if callable(persist_cb):
             persist_cb(report)  # type: ignore
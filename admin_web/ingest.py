@@ -0,0 +1,78 @@
+# admin_web/ingest.py
+# -------------------------------------------------------
+# 📥 Batched ingest — הרבה payloads בבקשה אחת (/api/payload_push/batch)
+# -------------------------------------------------------
+# • גוף NDJSON (שורה = payload; application/x-ndjson) או מערך JSON.
+# • פריט פגום נדחה לבד (rejected[]) ולא מפיל את כל הבאץ'.
+# • ל-state החי נכנס רק החדש ביותר (לפי ts) — השאר כבר ישנים כשהם מגיעים.
+# • ?queue=1 — כל הפריטים, לפי סדר ts, מתפרסמים ב-BUS("ingest") (core.event_bus)
+#   לצרכנים שצריכים כל פריים (מנוע / הקלטה). ה-state החי לא מנוי ל-ingest —
+#   אליו מגיע רק החדש ביותר, ורק אם הוא באמת חדש מהשמור.
+# -------------------------------------------------------
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+__all__ = ["INGEST_BATCH_MAX", "BatchTooLarge", "parse_batch", "newest_index", "enqueue_all"]
+
+INGEST_BATCH_MAX = int(os.getenv("INGEST_BATCH_MAX", "256"))
+
+
+class BatchTooLarge(ValueError):
+    """יותר מ-INGEST_BATCH_MAX פריטים בבקשה אחת."""
+
+
+def parse_batch(raw: bytes, limit: int = INGEST_BATCH_MAX) -> Tuple[List[Tuple[int, Any]], List[Dict[str, Any]]]:
+    """
+    raw → ([(index, obj)], [rejected]).
+    מערך JSON אם הגוף מתחיל ב-'[', אחרת NDJSON (שורות ריקות מדולגות).
+    """
+    items: List[Tuple[int, Any]] = []
+    rejected: List[Dict[str, Any]] = []
+    body = (raw or b"").strip()
+    if not body:
+        return items, rejected
+    if body[:1] == b"[":
+        try:
+            arr = json.loads(body)
+        except ValueError:
+            rejected.append({"i": None, "err": "invalid_json"})
+            return items, rejected
+        if len(arr) > limit:
+            raise BatchTooLarge(len(arr))
+        return list(enumerate(arr)), rejected
+
+    lines = [ln for ln in body.split(b"\n") if ln.strip()]
+    if len(lines) > limit:
+        raise BatchTooLarge(len(lines))
+    for i, ln in enumerate(lines):
+        try:
+            items.append((i, json.loads(ln)))
+        except ValueError:
+            rejected.append({"i": i, "err": "invalid_json"})
+    return items, rejected
+
+
+def _ts(d: Dict[str, Any]) -> float:
+    ts = d.get("ts")
+    return float(ts) if isinstance(ts, (int, float)) else 0.0
+
+
+def newest_index(bodies: List[Dict[str, Any]]) -> Optional[int]:
+    """אינדקס ה-payload עם ה-ts הגבוה (בשוויון — האחרון בבאץ')."""
+    best: Optional[int] = None
+    for i, d in enumerate(bodies):
+        if best is None or _ts(d) >= _ts(bodies[best]):
+            best = i
+    return best
+
+
+def enqueue_all(bodies: List[Dict[str, Any]], bus: Any = None) -> int:
+    """כל ה-payloads לפי סדר ts → BUS("ingest"). מחזיר כמה פורסמו."""
+    if bus is None:
+        from core.event_bus import BUS as bus  # type: ignore
+    for d in sorted(bodies, key=_ts):
+        bus.publish("ingest", d)
+    return len(bodies)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# admin_web/payload_delta.py — 🧩 Delta-encoding ל-payload החי
+# -----------------------------------------------------------------------------
+# לקוח ששולח את הגרסה האחרונה שיש לו (since) מקבל רק את המפתחות שהשתנו:
+#
+#   keyframe:  {"v": 812, "key": true, "full": {...payload...}}
+#   delta:     {"v": 815, "base": 812, "set": {"/metrics/knee_left_deg": 91.2, ...},
+#               "del": ["/objdet/tracks"]}
+#
+# • נתיבים בפורמט JSON Pointer (RFC 6901: "~"→"~0", "/"→"~1") — מפתחות עם נקודה
+#   (למשל "video.width" ב-metrics) עוברים בלי עמימות.
+# • רשימות הן ערך עלה (landmarks נשלחים כמקשה אחת כשמשהו בהם זז).
+# • landmarks מכומתים (x/y/z ל-DELTA_LM_DECIMALS, visibility ל-2 ספרות) — גם
+#   חוסך בתים וגם מעלים ריצוד שלא רואים בדשבורד (אין שינוי = אין שליחה).
+# • כל החישובים ממוטמנים על ה-PayloadSnapshot (derive) — delta לזוג גרסאות
+#   מחושב פעם אחת ומשותף לכל הלקוחות עם אותו בסיס.
+# • keyframe מחזורי: פעם ב-DELTA_KEYFRAME_EVERY גרסאות כל לקוח מקבל מצב מלא,
+#   וגם כשהבסיס שלו כבר לא בהיסטוריה.
+# =============================================================================
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from admin_web.state import PayloadSnapshot, get_payload_snapshot_at
+
+try:
+    from core.payload import PAYLOAD_VERSION  # type: ignore
+except Exception:
+    PAYLOAD_VERSION = "1.2.0"
+
+__all__ = ["flatten", "unflatten", "apply_delta", "keyframe", "delta", "encode", "encode_bytes"]
+
+DELTA_KEYFRAME_EVERY = max(1, int(os.getenv("DELTA_KEYFRAME_EVERY", "50")))
+DELTA_LM_DECIMALS = int(os.getenv("DELTA_LM_DECIMALS", "4"))
+
+_LM_COORDS = ("x", "y", "z")
+_LM_SCORES = ("visibility", "v", "presence")
+
+
+# ----------------------- JSON Pointer -----------------------
+def _esc(k: Any) -> str:
+    return str(k).replace("~", "~0").replace("/", "~1")
+
+
+def _unesc(k: str) -> str:
+    return k.replace("~1", "/").replace("~0", "~")
+
+
+def flatten(d: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """dict מקונן → {"/a/b": leaf}. dict ריק נשמר כעלה (כדי שלא ייעלם)."""
+    out: Dict[str, Any] = {}
+    for k, v in d.items():
+        path = f"{prefix}/{_esc(k)}"
+        if isinstance(v, dict) and v:
+            out.update(flatten(v, path))
+        else:
+            out[path] = v
+    return out
+
+
+def unflatten(flat: Dict[str, Any]) -> Dict[str, Any]:
+    root: Dict[str, Any] = {}
+    for path, v in flat.items():
+        parts = [_unesc(p) for p in path.split("/")[1:]]
+        node = root
+        for p in parts[:-1]:
+            nxt = node.get(p)
+            if not isinstance(nxt, dict):
+                nxt = node[p] = {}
+            node = nxt
+        node[parts[-1]] = v
+    return root
+
+
+def apply_delta(flat: Dict[str, Any], msg: Dict[str, Any]) -> Dict[str, Any]:
+    """צד לקוח (Python): מעדכן מצב שטוח לפי keyframe/delta ומחזיר אותו."""
+    if msg.get("key"):
+        flat.clear()
+        flat.update(flatten(msg.get("full") or {}))
+        return flat
+    for p in msg.get("del") or ():
+        flat.pop(p, None)
+    flat.update(msg.get("set") or {})
+    return flat
+
+
+# ----------------------- quantization -----------------------
+def _quantize_points(v: Any) -> Any:
+    if not isinstance(v, list) or not v or not isinstance(v[0], dict):
+        return v
+    out = []
+    for pt in v:
+        if not isinstance(pt, dict):
+            out.append(pt)
+            continue
+        q = dict(pt)
+        for k in _LM_COORDS:
+            if isinstance(q.get(k), float):
+                q[k] = round(q[k], DELTA_LM_DECIMALS)
+        for k in _LM_SCORES:
+            if isinstance(q.get(k), float):
+                q[k] = round(q[k], 2)
+        out.append(q)
+    return out
+
+
+def _prepared(d: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(d)
+    out.setdefault("payload_version", PAYLOAD_VERSION)
+    mp = out.get("mp")
+    if isinstance(mp, dict) and "landmarks" in mp:
+        out["mp"] = dict(mp, landmarks=_quantize_points(mp.get("landmarks")))
+    hands = out.get("hands")
+    if isinstance(hands, list):
+        out["hands"] = [_quantize_points(h) for h in hands]
+    return out
+
+
+def _flat(snap: PayloadSnapshot) -> Dict[str, Any]:
+    return snap.derive("delta_flat", lambda d: flatten(_prepared(d)))
+
+
+# ----------------------- encode -----------------------
+def keyframe(snap: PayloadSnapshot) -> Dict[str, Any]:
+    return snap.derive("delta_key", lambda d: {"v": snap.version, "key": True, "full": _prepared(d)})
+
+
+def delta(snap: PayloadSnapshot, base: PayloadSnapshot) -> Dict[str, Any]:
+    """השינויים מ-base ל-snap (ממוטמן על snap לפי גרסת הבסיס)."""
+    def _build(_d: Dict[str, Any]) -> Dict[str, Any]:
+        new, old = _flat(snap), _flat(base)
+        sets = {p: v for p, v in new.items() if p not in old or old[p] != v}
+        dels: List[str] = [p for p in old if p not in new]
+        return {"v": snap.version, "base": base.version, "set": sets, "del": dels}
+    return snap.derive(f"delta:{base.version}", _build)
+
+
+def _needs_keyframe(snap: PayloadSnapshot, since: Optional[int]) -> bool:
+    if since is None or since <= 0 or since > snap.version:
+        return True
+    # גבול keyframe מחזורי עבר מאז הבסיס של הלקוח
+    return (snap.version // DELTA_KEYFRAME_EVERY) != (since // DELTA_KEYFRAME_EVERY)
+
+
+def encode(snap: PayloadSnapshot, since: Optional[int] = None) -> Dict[str, Any]:
+    if not _needs_keyframe(snap, since):
+        base = get_payload_snapshot_at(int(since))  # type: ignore[arg-type]
+        if base is not None:
+            return delta(snap, base)
+    return keyframe(snap)
+
+
+def encode_bytes(snap: PayloadSnapshot, since: Optional[int] = None) -> bytes:
+    """כמו encode, מסוריאל פעם אחת לכל (גרסה, בסיס)."""
+    msg = encode(snap, since)
+    key = "delta_key_json" if msg.get("key") else f"delta_json:{msg['base']}"
+    return snap.derive(key, lambda _d: json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
@@ -6,7 +6,7 @@ Endpoints:
 - POST /api/exercise/score        → דוח יחיד (רצוי מרנטיים; אחרת דמו תקין לפורמט ה-UI)
 - POST /api/exercise/simulate     → סימולציית סטים/חזרות (דוחות מלאים לפורמט ה-UI)
 - GET  /api/exercise/diag         → סטטוס קצר
-- GET  /api/exercise/diag/stream  → SSE דיאגנוסטי
+- GET  /api/exercise/diag/stream  → SSE דיאגנוסטי (fan-out: כל לקוח מקבל כל אירוע; Last-Event-ID)
 
 הקובץ מחזיר תמיד אובייקט בפורמט ה-UI שלך:
 {
@@ -23,10 +23,12 @@ Endpoints:
 }
 """
 from __future__ import annotations
-import json, time, math, random, queue
+import os, json, time, math, random
 from typing import Any, Dict, List, Optional, Tuple
 from flask import Blueprint, jsonify, request, Response, stream_with_context
 
+from core.pubsub import BroadcastHub, HubFull, parse_last_event_id
+
 bp = Blueprint("exercise", __name__)
 
 # ------------------------------- Utils -------------------------------
@@ -242,14 +244,15 @@ def api_exercise_simulate():
 
 # ------------------------------ Diagnostics ------------------------------
 
-_diag_q: "queue.Queue[str]" = queue.Queue(maxsize=200)
+# hub משותף: טבעת + cursor לכל לקוח (במקום Queue אחד שכל לקוח "גונב" ממנו)
+DIAG_HUB = BroadcastHub(
+    "exercise_diag",
+    capacity=int(os.getenv("DIAG_STREAM_RING", "200")),
+    max_subscribers=int(os.getenv("DIAG_STREAM_MAX_CLIENTS", "16")),
+)
 
-def _q_put(s: str) -> None:
-    try:
-        _diag_q.put_nowait(s)
-    except Exception:
-        # queue full; drop
-        pass
+def _q_put(s: str, key: Optional[str] = None) -> None:
+    DIAG_HUB.publish(s, key=key)
 
 @bp.route("/api/exercise/diag", methods=["GET"])
 def api_exercise_diag():
@@ -270,22 +273,27 @@ def api_exercise_diag():
 @bp.route("/api/exercise/diag/stream")
 def api_exercise_diag_stream():
     ping_ms = int(request.args.get("ping_ms", "15000"))
+    try:
+        sub = DIAG_HUB.subscribe(last_event_id=parse_last_event_id(request.headers, request.args))
+    except HubFull:
+        return jsonify({"ok": False, "error": "too_many_subscribers"}), 503
     rt = _get_runtime()
     _q_put(json.dumps({"ts": time.time(), "event": "open", "runtime": "present" if rt else "absent"}))
 
     def _gen():
-        last_ping = time.time()
-        while True:
-            # periodic ping
-            now = time.time()
-            if now - last_ping >= (ping_ms / 1000.0):
-                last_ping = now
-                yield f"data: {json.dumps({'ts': now, 'event': 'ping'})}\n\n"
-            # drain queue
-            try:
-                msg = _diag_q.get(timeout=0.25)
-                yield f"data: {msg}\n\n"
-            except Exception:
-                pass
-
-    return Response(stream_with_context(_gen()), mimetype="text/event-stream")
+        try:
+            last_ping = time.time()
+            while True:
+                # periodic ping (פרטי לכל לקוח — לא עובר דרך ה-hub)
+                now = time.time()
+                if now - last_ping >= (ping_ms / 1000.0):
+                    last_ping = now
+                    yield f"data: {json.dumps({'ts': now, 'event': 'ping'})}\n\n"
+                for frame in sub.next_frames(timeout=0.25):
+                    yield frame
+        finally:
+            sub.close()
+
+    resp = Response(stream_with_context(_gen()), mimetype="text/event-stream")
+    resp.call_on_close(sub.close)  # גם אם הגנרטור לא התחיל
+    return resp
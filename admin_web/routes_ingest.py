@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+"""
+admin_web/routes_ingest.py — 📷 ערוץ ingest מתמשך לפריימים (במקום POST לכל פריים)
+-------------------------------------------------------------------------------
+WS   /ws/ingest            WebSocket (flask-sock, אופציונלי) — הודעה בינארית = רשומה אחת
+POST /api/ingest_stream    בקשה אחת ארוכה (chunked / octet-stream) עם רשומות ברצף
+POST /api/ingest_landmarks landmarks מהמכשיר (pose על הטלפון) — בלי JPEG/MediaPipe בשרת
+GET  /api/ingest/flow      המלצת קצב נוכחית (לערוץ chunked / לקוחות בלי WS)
+GET  /api/ingest/stats     מונים לכל הערוצים
+
+רשומה (big-endian):  u32 jpeg_len | f64 client_ts_ms | jpeg bytes
+הודעות שרת→לקוח (WS, טקסט JSON):
+  {"t":"flow","ack":<seq>,"window":W,"max_fps":F,"max_width":PX,"jpeg_q":Q,"dropped":D}
+  • window — כמה פריימים מותר שיהיו "בדרך" בלי ack (credits).
+  • max_fps / max_width / jpeg_q — תקציב המפיק מ-admin_web.admission (עומס הצינור);
+    פריים מעבר לתקציב נזרק לפני פענוח/העתקה (over_budget).
+  • פריים עם client_ts ישן מהאחרון שהתקבל — נזרק (dropped) ולא מפוענח.
+
+POST /api/ingest_frame הישן (routes_video) נשאר כ-fallback.
+
+/api/ingest_landmarks — גוף JSON (אובייקט אחד או מערך לפי סדר זמן):
+  {"client":"phone-1", "ts_ms":..., "w":1280, "h":720, "mirror_x":false,
+   "pose":[33 × {x,y,z,visibility}] | בלוק q16, "hands":[{"label":"left","points":[...21]}],
+   "exercise_id":"squat.bodyweight"?}
+  • KinematicsComputer נפרד לכל client (הפילטרים הטמפורליים הם מצב פר-מתאמן);
+    ts_ms של המכשיר הוא בסיס הזמן של הפילטרים, ופריים עם ts_ms שאינו חדש מהאחרון — נזרק.
+  • רק הפריים האחרון בבקשה מתפרסם ל-state; ?queue=1 — בנוסף כולם, לפי הסדר, ל-BUS("ingest").
+  • ?analyze=1 (או exercise_id) — run_once על המדדים של הפריים האחרון, הדו"ח בתשובה.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Blueprint, jsonify, request
+
+try:
+    from core.logs import logger  # type: ignore
+except Exception:
+    import logging
+    logger = logging.getLogger("ingest")
+
+try:
+    from app.ui.video import get_streamer  # type: ignore
+except Exception:
+    get_streamer = None  # type: ignore
+
+from admin_web import stream_slots
+from admin_web.admission import ADMISSION
+from core.landmark_codec import decode_points
+
+# WebSocket אופציונלי (pip install flask-sock) — בלעדיו נשארים chunked + POST
+try:
+    from flask_sock import Sock  # type: ignore
+    sock = Sock()
+except Exception:
+    Sock = None  # type: ignore
+    sock = None
+
+bp_ingest = Blueprint("ingest", __name__)
+
+INGEST_WINDOW = max(1, int(os.getenv("INGEST_WINDOW", "2")))
+INGEST_MAX_FRAME_BYTES = int(os.getenv("INGEST_MAX_FRAME_BYTES", str(4 * 1024 * 1024)))
+INGEST_FLOW_EVERY_SEC = float(os.getenv("INGEST_FLOW_EVERY_SEC", "1.0"))
+INGEST_LM_MAX_CLIENTS = int(os.getenv("INGEST_LM_MAX_CLIENTS", "64"))
+INGEST_LM_MAX_BATCH = int(os.getenv("INGEST_LM_MAX_BATCH", "64"))
+
+HEADER = struct.Struct(">Id")
+
+
+class BadRecord(ValueError):
+    """רשומה קצרה/גדולה מדי."""
+
+
+def pack_record(jpeg: bytes, ts_ms: float) -> bytes:
+    """רשומה אחת (לבדיקות ולמפיקים ב-Python)."""
+    return HEADER.pack(len(jpeg), float(ts_ms)) + jpeg
+
+
+def unpack_record(buf: bytes) -> Tuple[float, bytes]:
+    """הודעת WS אחת → (client_ts_ms, jpeg)."""
+    if len(buf) < HEADER.size:
+        raise BadRecord("short_header")
+    n, ts = HEADER.unpack_from(buf)
+    if n > INGEST_MAX_FRAME_BYTES or len(buf) - HEADER.size != n:
+        raise BadRecord("bad_length")
+    if not math.isfinite(ts):
+        raise BadRecord("bad_ts")  # NaN היה משבית את בדיקת הפריים הישן לתמיד
+    return ts, bytes(buf[HEADER.size:])
+
+
+def iter_records(stream) -> Iterator[Tuple[float, bytes]]:
+    """רשומות ברצף מתוך stream (request.stream) עד EOF."""
+    while True:
+        head = _read_exact(stream, HEADER.size)
+        if head is None:
+            return
+        n, ts = HEADER.unpack(head)
+        if n > INGEST_MAX_FRAME_BYTES:
+            raise BadRecord("bad_length")
+        if not math.isfinite(ts):
+            raise BadRecord("bad_ts")
+        body = _read_exact(stream, n)
+        if body is None:
+            raise BadRecord("truncated")
+        yield ts, body
+
+
+def _read_exact(stream, n: int) -> Optional[bytes]:
+    chunks = []
+    left = n
+    while left > 0:
+        b = stream.read(left)
+        if not b:
+            if left == n:
+                return None
+            raise BadRecord("truncated")
+        chunks.append(b)
+        left -= len(b)
+    return b"".join(chunks)
+
+
+# ----------------------- ערוצים פעילים + קצב -----------------------
+_CHANNELS_LOCK = threading.Lock()
+_CHANNELS: Dict[int, "IngestChannel"] = {}
+_ids = itertools.count(1)
+
+
+class IngestChannel:
+    """
+    מצב ערוץ אחד (טלפון אחד). לא תלוי transport — WS וה-chunked קוראים ל-handle();
+    flow() בונה את הודעת ה-ack/קצב.
+    """
+
+    def __init__(self, kind: str, ingest: Optional[Callable[[bytes], Any]] = None,
+                 producer: Optional[str] = None):
+        self.id = next(_ids)
+        self.kind = kind
+        self.producer = producer or f"{kind}:{self.id}"
+        self._ingest = ingest
+        self.seq = 0
+        self.frames = 0
+        self.dropped = 0
+        self.over_budget = 0
+        self.errors = 0
+        self.bytes = 0
+        self.last_ts_ms = float("-inf")
+        self.opened = time.time()
+        self._flow_due = 0.0
+        self._budget: Dict[str, Any] = {}
+
+    def __enter__(self) -> "IngestChannel":
+        with _CHANNELS_LOCK:
+            _CHANNELS[self.id] = self
+        self._budget = ADMISSION.budget(self.producer)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        with _CHANNELS_LOCK:
+            _CHANNELS.pop(self.id, None)
+        ADMISSION.forget(self.producer)
+
+    def _sink(self) -> Callable[[bytes], Any]:
+        if self._ingest is None:
+            if get_streamer is None:
+                raise RuntimeError("streamer_unavailable")
+            self._ingest = get_streamer().ingest_jpeg
+        return self._ingest
+
+    def handle(self, ts_ms: float, jpeg: bytes) -> None:
+        self.seq += 1
+        if not (ts_ms >= self.last_ts_ms) or len(jpeg) < 10:  # NaN נכשל גם כאן
+            # הגיע באיחור (כבר יש חדש ממנו) / ריק — לא מפענחים
+            self.dropped += 1
+            return
+        ok, self._budget = ADMISSION.admit(self.producer)
+        if not ok:
+            # מעבר לתקציב — לא מפענחים ולא מעתיקים; הלקוח יקבל את התקציב ב-flow
+            self.dropped += 1
+            self.over_budget += 1
+            return
+        self.last_ts_ms = ts_ms
+        self._sink()(jpeg)
+        self.frames += 1
+        self.bytes += len(jpeg)
+
+    def flow(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """הודעת flow; בלי force — רק אם התקציב השתנה או שעבר INGEST_FLOW_EVERY_SEC."""
+        now = time.monotonic()
+        budget = ADMISSION.budget(self.producer)
+        changed = budget != self._budget
+        if not force and not changed and now < self._flow_due:
+            return None
+        self._budget = budget
+        self._flow_due = now + INGEST_FLOW_EVERY_SEC
+        return {"t": "flow", "ack": self.seq, "window": INGEST_WINDOW, "max_fps": budget["fps"],
+                "max_width": budget["max_width"], "jpeg_q": budget["jpeg_q"], "dropped": self.dropped}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"id": self.id, "kind": self.kind, "frames": self.frames, "dropped": self.dropped,
+                "over_budget": self.over_budget, "errors": self.errors, "bytes": self.bytes, "age_sec": round(time.time() - self.opened, 1)}
+
+
+# ----------------------- Landmarks ingest -----------------------
+class _Athlete:
+    __slots__ = ("kin", "lock", "frames", "dropped", "last_ts_ms")
+
+    def __init__(self, kin: Any):
+        self.kin = kin
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.dropped = 0
+        self.last_ts_ms = 0.0
+
+
+_ATHLETES_LOCK = threading.Lock()
+_ATHLETES: "OrderedDict[str, _Athlete]" = OrderedDict()
+
+
+def _athlete(client: str) -> _Athlete:
+    """KinematicsComputer לכל client (LRU עד INGEST_LM_MAX_CLIENTS)."""
+    with _ATHLETES_LOCK:
+        a = _ATHLETES.get(client)
+        if a is not None:
+            _ATHLETES.move_to_end(client)
+            return a
+    from core.kinematics import KinematicsComputer  # כבד (numpy/filters) — רק כשצריך
+    a = _Athlete(KinematicsComputer())
+    with _ATHLETES_LOCK:
+        a = _ATHLETES.setdefault(client, a)
+        while len(_ATHLETES) > INGEST_LM_MAX_CLIENTS:
+            _ATHLETES.popitem(last=False)
+    return a
+
+
+def _mp_block(pose: Any, mirror_x: bool) -> Optional[Dict[str, Any]]:
+    """mp.landmarks מנורמל (לשלד ב-UI) — אותה צורה שהמנוע המקומי מפרסם."""
+    if isinstance(pose, dict) and pose.get("fmt"):
+        # בלוק q16 → הצורה הרגילה; ה-state שומר רק mp.landmarks (הקידוד חוזר בשכבת התעבורה)
+        try:
+            pose = decode_points(pose)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if not isinstance(pose, list):
+        return None
+    lms: List[Dict[str, float]] = []
+    for p in pose:
+        if isinstance(p, dict):
+            x, y, v = p.get("x"), p.get("y"), p.get("visibility", 1.0)
+        elif isinstance(p, (list, tuple)) and len(p) >= 2:
+            x, y, v = p[0], p[1], (p[3] if len(p) > 3 else 1.0)
+        else:
+            continue
+        try:
+            lms.append({"x": min(1.0, max(0.0, float(x))), "y": min(1.0, max(0.0, float(y))),
+                        "visibility": min(1.0, max(0.0, float(v)))})
+        except (TypeError, ValueError):
+            continue
+    return {"landmarks": lms, "mirror_x": mirror_x}
+
+
+def landmarks_to_payload(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    פריים landmarks אחד → payload מלא (kinematics + mp) כמו מנוע המצלמה.
+    None — הפריים ישן מהאחרון שעובד ל-client הזה (כמו IngestChannel.handle).
+    """
+    client = str(item.get("client") or "default")[:64]
+    w = int(item.get("w") or item.get("width") or 0) or 1280
+    h = int(item.get("h") or item.get("height") or 0) or 720
+    ts_ms = item.get("ts_ms")
+    ts_ms = float(ts_ms) if isinstance(ts_ms, (int, float)) else time.time() * 1000.0
+
+    a = _athlete(client)
+    with a.lock:
+        if a.frames and ts_ms <= a.last_ts_ms:
+            a.dropped += 1
+            return None
+        payload: Dict[str, Any] = a.kin.compute_from_landmarks((h, w), item.get("pose"), item.get("hands"),
+                                                               ts_ms=ts_ms)
+        a.frames += 1
+        a.last_ts_ms = ts_ms
+
+    mp = _mp_block(item.get("pose"), bool(item.get("mirror_x", False)))
+    if mp:
+        payload["mp"] = mp
+    payload["ts_ms"] = int(ts_ms)
+    payload["ts"] = ts_ms / 1000.0
+    payload["client"] = client
+    payload["source"] = "landmarks"
+    return payload
+
+
+# ----------------------- Routes -----------------------
+def ws_reply(ch: IngestChannel, msg: Any) -> Optional[Dict[str, Any]]:
+    """
+    הודעת WS אחת → התשובה ללקוח (None — אין מה לשלוח).
+    כל כשל בפריים (רשומה פגומה, streamer_unavailable, פענוח) חוזר כ-{"t":"error"} עם ack —
+    הלקוח מקבל את ה-credit בחזרה והחיבור נשאר פתוח.
+    """
+    if isinstance(msg, str):
+        return None  # הודעות טקסט מהלקוח (hello/ping) — אין מה לעשות בהן כרגע
+    try:
+        ts_ms, jpeg = unpack_record(msg)
+        ch.handle(ts_ms, jpeg)
+    except BadRecord as e:
+        ch.seq += 1
+        ch.dropped += 1
+        return {"t": "error", "err": str(e), "ack": ch.seq}
+    except Exception as e:
+        ch.dropped += 1
+        ch.errors += 1
+        if ch.errors <= 3 or ch.errors % 100 == 0:
+            logger.warning("[ingest] ws frame failed (errors={}): {}", ch.errors, e)
+        return {"t": "error", "err": str(e) or type(e).__name__, "ack": ch.seq}
+    # ack לכל פריים — מחזיר credit ללקוח
+    return ch.flow(force=True)
+
+
+if sock is not None:
+    @sock.route("/ws/ingest", bp=bp_ingest)
+    def ws_ingest(ws):
+        # טלפון מחובר מחזיק ת'רד לכל חייו — מקום במאגר המשותף, ומעבר לתקרה error + retry_ms
+        slot = stream_slots.acquire_slot("ws_ingest")
+        if slot is None:
+            msg = stream_slots.busy_message("ws_ingest")
+            ws.send(json.dumps({"t": "error", "err": msg["error"], "retry_ms": msg["retry_ms"]}))
+            return
+        try:
+            with IngestChannel("ws") as ch:
+                ws.send(json.dumps(ch.flow(force=True)))
+                while True:
+                    msg = ws.receive()
+                    if msg is None:
+                        break
+                    reply = ws_reply(ch, msg)
+                    if reply is not None:
+                        ws.send(json.dumps(reply))
+                logger.info("[ingest] ws closed: {}", ch.stats())
+        finally:
+            slot.release()
+
+
+@bp_ingest.post("/api/ingest_stream")
+def api_ingest_stream():
+    """רשומות ברצף בבקשה אחת; התשובה (סיכום) נשלחת בסוף הזרם."""
+    slot = stream_slots.acquire_slot("chunked")
+    if slot is None:
+        return stream_slots.busy_response("chunked")
+    try:
+        return _ingest_stream_body()
+    finally:
+        slot.release()
+
+
+def _ingest_stream_body():
+    with IngestChannel("chunked") as ch:
+        try:
+            for ts_ms, jpeg in iter_records(request.stream):
+                ch.handle(ts_ms, jpeg)
+        except BadRecord as e:
+            return jsonify(ok=False, err=str(e), **ch.stats()), 400
+        except RuntimeError as e:
+            return jsonify(ok=False, err=str(e)), 500
+        body = ch.stats()
+        body.update(ch.flow(force=True) or {})
+        return jsonify(ok=True, **body), 200
+
+
+@bp_ingest.post("/api/ingest_landmarks")
+def api_ingest_landmarks():
+    data = request.get_json(silent=True)
+    items = data if isinstance(data, list) else [data]
+    items = [i for i in items if isinstance(i, dict) and i.get("pose") is not None]
+    if not items:
+        return jsonify(ok=False, err="no_landmarks"), 400
+    if len(items) > INGEST_LM_MAX_BATCH:
+        return jsonify(ok=False, err="batch_too_large", max=INGEST_LM_MAX_BATCH), 413
+
+    from admin_web.server import _server_side_schema_fixups  # lazy (server מייבא אותנו)
+    from admin_web.state import set_payload
+
+    items.sort(key=lambda i: i.get("ts_ms") if isinstance(i.get("ts_ms"), (int, float)) else 0)
+    try:
+        payloads = [_server_side_schema_fixups(p) for p in map(landmarks_to_payload, items) if p is not None]
+    except Exception as e:
+        logger.exception("[ingest] landmarks → kinematics failed")
+        return jsonify(ok=False, err="kinematics_failed", detail=str(e)), 500
+    dropped = len(items) - len(payloads)
+    if not payloads:
+        # הכול ישן מהאחרון שעובד — אין מה לפרסם
+        return jsonify(ok=True, frames=0, dropped=dropped), 200
+
+    last = payloads[-1]
+    snap = set_payload(last)
+    queued = 0
+    if request.args.get("queue", "0").lower() in ("1", "true", "yes"):
+        from admin_web.ingest import enqueue_all
+        queued = enqueue_all(payloads)  # BUS("ingest") — ה-state לא מנוי, רק last למעלה
+    body: Dict[str, Any] = {"ok": True, "frames": len(payloads), "dropped": dropped, "version": snap.version,
+                            "client": last.get("client"), "view_mode": last.get("view_mode")}
+    if queued:
+        body["queued"] = queued
+
+    ex_id = items[-1].get("exercise_id")
+    if ex_id or request.args.get("analyze", "0").lower() in ("1", "true", "yes"):
+        from admin_web.exercise_analyzer import detect_once
+        body["analysis"] = detect_once(last, exercise_id=ex_id if isinstance(ex_id, str) else None,
+                                       payload_version=str(last.get("payload_version") or "1.0"))
+    return jsonify(body), 200
+
+
+@bp_ingest.get("/api/ingest/flow")
+def api_ingest_flow():
+    budget = ADMISSION.budget()
+    return jsonify(ok=True, t="flow", window=INGEST_WINDOW, max_fps=budget["fps"],
+                   max_width=budget["max_width"], jpeg_q=budget["jpeg_q"], ws=sock is not None)
+
+
+@bp_ingest.get("/api/ingest/stats")
+def api_ingest_stats():
+    with _CHANNELS_LOCK:
+        chans = [c.stats() for c in _CHANNELS.values()]
+    with _ATHLETES_LOCK:
+        athletes = {k: {"frames": a.frames, "dropped": a.dropped, "last_ts_ms": a.last_ts_ms}
+                    for k, a in _ATHLETES.items()}
+    return jsonify(ok=True, ws=sock is not None, channels=chans, admission=ADMISSION.stats(), landmarks=athletes,
+                   streams=stream_slots.stats())
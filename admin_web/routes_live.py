@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+admin_web/routes_live.py — 📶 ערוץ סטטוס חי אחד (SSE) לכל דשבורד
+--------------------------------------------------------------
+במקום שכל עמוד יריץ setInterval על /payload, /api/video/status, /healthz,
+/readyz, /api/session/status ... — thread דוגם אחד בשרת בונה כל topic בקצב
+שלו, מפרסם רק כשהגרסה השתנתה, וכל לקוח מקבל את העדכונים בחיבור SSE יחיד.
+
+GET /api/live/stream   ?topics=payload,video,od,health,ready,session
+                       &rate_<topic>=ms   (קצב מקסימלי ללקוח; לא מהיר מקצב הדגימה)
+                       &ping_ms=15000
+                       &payload=delta     (payload כ-keyframe/delta — ראה payload_delta)
+     אירועים:  event: <topic> / id: <seq> / data: <json>
+               event: payload_delta (במצב delta; id = גרסת ה-payload)
+     בחיבור נשלח מיד המצב הנוכחי של כל topic.
+GET /api/live/stats    מונים: מנויים, דגימות, פרסומים לכל topic
+
+עקרונות:
+• payload — גרסה = PayloadSnapshot.version, והגוף הוא אותם bytes ממוטמנים של /payload.
+• שאר ה-topics — "גרסה" משתנה רק כשהגוף משתנה (ts לא נספר; גילים מעוגלים לשנייה).
+• הדגימה רצה רק כשיש מנויים; בלי צופים ה-thread נעצר אחרי LIVE_IDLE_STOP_SEC.
+• לקוח איטי: עדכונים ממתינים מתמזגים לפי topic (נשלח רק האחרון).
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Blueprint, Response, jsonify, request
+
+from admin_web import stream_slots
+from core.pubsub import BroadcastHub, HubFull, sse_frame
+
+try:
+    from core.logs import logger  # type: ignore
+except Exception:
+    import logging
+    logger = logging.getLogger("live")
+
+bp_live = Blueprint("live", __name__)
+
+# קצב דגימה בשרת לכל topic (ms) — ENV: LIVE_<TOPIC>_MS
+_DEFAULT_PERIOD_MS = {"payload": 200, "video": 1000, "od": 1000, "health": 2000, "ready": 5000, "session": 1000}
+LIVE_PERIOD_MS = {t: int(os.getenv(f"LIVE_{t.upper()}_MS", str(ms))) for t, ms in _DEFAULT_PERIOD_MS.items()}
+LIVE_MAX_CLIENTS = int(os.getenv("LIVE_MAX_CLIENTS", "32"))
+LIVE_IDLE_STOP_SEC = float(os.getenv("LIVE_IDLE_STOP_SEC", "10"))
+LIVE_PING_MS = int(os.getenv("LIVE_PING_MS", "15000"))
+
+# שדות שלא נחשבים "שינוי" (ts) או שמעוגלים לפני השוואה (גילים ברזולוציית שנייה)
+_VOLATILE_KEYS = {"ts", "now"}
+_COARSE_KEYS = {"payload_age_sec": 1.0, "age_sec": 1.0, "uptime_sec": 60.0}
+
+
+# ----------------------- מקורות ה-topics -----------------------
+def _payload_snapshot():
+    try:
+        from admin_web.server import _current_snapshot  # type: ignore
+        return _current_snapshot()
+    except Exception:
+        from admin_web.state import get_payload_snapshot
+        snap = get_payload_snapshot()
+        return snap if snap else None
+
+
+def _payload_bytes(d: Dict[str, Any]) -> bytes:
+    try:
+        from admin_web.server import _with_payload_defaults  # type: ignore
+        return _with_payload_defaults(d)
+    except Exception:
+        return json.dumps(d, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _video() -> Dict[str, Any]:
+    from admin_web.routes_video import _video_status_data
+    return _video_status_data()
+
+
+def _od() -> Dict[str, Any]:
+    from admin_web.state import get_od_snapshot, get_od_status
+    out = get_od_snapshot()
+    st = get_od_status()
+    out.update({"enabled": st.get("enabled"), "latency_ms": st.get("latency_ms"), "count": st.get("count")})
+    if st.get("enabled"):
+        out["running"] = True
+        out["fps"] = st.get("fps", out.get("fps"))
+    return out
+
+
+def _health() -> Dict[str, Any]:
+    from admin_web.routes_system import _healthz_data
+    return _healthz_data()
+
+
+def _ready() -> Dict[str, Any]:
+    from admin_web.routes_system import _readyz_data
+    return _readyz_data()[0]
+
+
+def _session() -> Dict[str, Any]:
+    from admin_web.routes_system import _session_status_data
+    return _session_status_data()
+
+
+_FETCHERS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "video": _video, "od": _od, "health": _health, "ready": _ready, "session": _session,
+}
+TOPICS: Tuple[str, ...] = tuple(_DEFAULT_PERIOD_MS.keys())
+
+
+def _signature(obj: Any) -> Any:
+    """הגוף בלי שדות תנודתיים — להשוואת "האם השתנה"."""
+    if isinstance(obj, dict):
+        out = {}
+        for k, v in obj.items():
+            if k in _VOLATILE_KEYS:
+                continue
+            q = _COARSE_KEYS.get(k)
+            if q and isinstance(v, (int, float)):
+                v = round(v / q)
+            out[k] = _signature(v)
+        return out
+    if isinstance(obj, list):
+        return [_signature(v) for v in obj]
+    return obj
+
+
+# ----------------------- Sampler -----------------------
+class _TopicState:
+    __slots__ = ("name", "period", "due", "version", "sig", "frame", "samples", "published")
+
+    def __init__(self, name: str, period_ms: int):
+        self.name = name
+        self.period = max(0.05, period_ms / 1000.0)
+        self.due = 0.0
+        self.version: Any = None
+        self.sig: Optional[str] = None
+        self.frame: Optional[str] = None   # מסגרת SSE אחרונה (למצטרפים חדשים)
+        self.samples = 0
+        self.published = 0
+
+
+class LiveSampler:
+    """thread יחיד שדוגם topics ומפרסם ל-hub רק כשהגרסה משתנה."""
+
+    def __init__(self, hub: BroadcastHub, periods_ms: Dict[str, int]):
+        self.hub = hub
+        self.topics = {t: _TopicState(t, ms) for t, ms in periods_ms.items()}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def ensure_running(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            for t in self.topics.values():
+                t.due = 0.0
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="LiveSampler")
+            self._thread.start()
+
+    def _loop(self) -> None:
+        idle_since: Optional[float] = None
+        while True:
+            now = time.monotonic()
+            if self.hub.gate.active == 0:
+                idle_since = idle_since or now
+                if now - idle_since >= LIVE_IDLE_STOP_SEC:
+                    with self._lock:
+                        if self.hub.gate.active == 0:
+                            self._thread = None
+                            return
+            else:
+                idle_since = None
+            for t in self.topics.values():
+                if now >= t.due:
+                    t.due = now + t.period
+                    try:
+                        self.sample(t.name)
+                    except Exception as e:
+                        logger.debug(f"[live] sample {t.name} failed: {e!r}")
+            nxt = min(t.due for t in self.topics.values())
+            time.sleep(min(0.5, max(0.01, nxt - time.monotonic())))
+
+    def sample(self, name: str) -> bool:
+        """דוגם topic אחד; מחזיר True אם פורסמה גרסה חדשה."""
+        t = self.topics[name]
+        t.samples += 1
+        if name == "payload":
+            snap = _payload_snapshot()
+            if snap is None or snap.version == t.version:
+                return False
+            t.version = snap.version
+            data = snap.derive("payload_route", _payload_bytes).decode("utf-8")
+        else:
+            body = _FETCHERS[name]()
+            sig = json.dumps(_signature(body), sort_keys=True, default=str)
+            if sig == t.sig:
+                return False
+            t.sig = sig
+            t.version = (t.version or 0) + 1
+            data = json.dumps(body, ensure_ascii=False, separators=(",", ":"), default=str)
+        seq = self.hub.publish(data, event=name, key=name)
+        t.frame = sse_frame(data, name, seq)
+        t.published += 1
+        return True
+
+    def current_frames(self, topics) -> List[str]:
+        return [self.topics[t].frame for t in topics if self.topics[t].frame]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "topics": {t.name: {"period_ms": int(t.period * 1000), "version": t.version,
+                                "samples": t.samples, "published": t.published}
+                       for t in self.topics.values()},
+        }
+
+
+LIVE_HUB = BroadcastHub("live", capacity=256, max_subscribers=LIVE_MAX_CLIENTS,
+                        coalesce_after=len(TOPICS) * 4)
+SAMPLER = LiveSampler(LIVE_HUB, LIVE_PERIOD_MS)
+
+
+# ----------------------- Routes -----------------------
+def _parse_topics(raw: Optional[str]) -> List[str]:
+    if not raw:
+        return list(TOPICS)
+    out = [t.strip() for t in raw.split(",") if t.strip() in SAMPLER.topics]
+    return out or list(TOPICS)
+
+
+@bp_live.get("/api/live/stream")
+def api_live_stream():
+    topics = _parse_topics(request.args.get("topics"))
+    rates: Dict[str, float] = {}
+    for t in topics:
+        try:
+            ms = int(request.args.get(f"rate_{t}") or 0)
+        except ValueError:
+            ms = 0
+        rates[t] = max(ms, LIVE_PERIOD_MS[t]) / 1000.0
+    try:
+        ping_ms = max(1000, int(request.args.get("ping_ms") or LIVE_PING_MS))
+    except ValueError:
+        ping_ms = LIVE_PING_MS
+
+    delta_mode = request.args.get("payload") == "delta"
+
+    # כל SSE מחזיק ת'רד gthread לכל חייו — מקום במאגר המשותף (ראה stream_slots)
+    slot = stream_slots.acquire_slot("live")
+    if slot is None:
+        return stream_slots.busy_response("live")
+    try:
+        sub = LIVE_HUB.subscribe()
+    except HubFull:
+        slot.release()
+        return jsonify(ok=False, error="too_many_subscribers"), 503
+    SAMPLER.ensure_running()
+
+    def _close() -> None:
+        sub.close()
+        slot.release()
+
+    def gen():
+        client_v: Optional[int] = None  # גרסת ה-payload האחרונה שנשלחה ללקוח (delta)
+
+        def _payload_delta_frame() -> Optional[str]:
+            nonlocal client_v
+            from admin_web.payload_delta import encode_bytes
+            snap = _payload_snapshot()
+            if snap is None or snap.version == client_v:
+                return None
+            data = encode_bytes(snap, client_v).decode("utf-8")
+            client_v = snap.version
+            return sse_frame(data, "payload_delta", snap.version)
+
+        try:
+            # מצב נוכחי מיד (לא מחכים לשינוי הבא)
+            pending: Dict[str, str] = {}
+            for t in topics:
+                fr = SAMPLER.topics[t].frame
+                if fr:
+                    pending[t] = fr
+            last_sent: Dict[str, float] = {}
+            last_out = time.monotonic()
+            while True:
+                now = time.monotonic()
+                for t in list(pending):
+                    if now - last_sent.get(t, 0.0) >= rates[t]:
+                        fr = pending.pop(t)
+                        if delta_mode and t == "payload":
+                            fr = _payload_delta_frame()
+                            if fr is None:
+                                continue
+                        yield fr
+                        last_sent[t] = now
+                        last_out = now
+                if (now - last_out) * 1000.0 >= ping_ms:
+                    yield ":ping\n\n"
+                    last_out = now
+                for e in sub.next_entries(timeout=0.1 if pending else 0.5):
+                    if isinstance(e, str):
+                        # דילוג בטבעת — משלימים מהמצב הנוכחי של כל topic
+                        for t in topics:
+                            fr = SAMPLER.topics[t].frame
+                            if fr:
+                                pending[t] = fr
+                    elif e.event in rates:
+                        pending[e.event] = e.frame
+        finally:
+            _close()
+
+    resp = Response(gen(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    resp.call_on_close(_close)
+    return resp
+
+
+@bp_live.get("/api/live/stats")
+def api_live_stats():
+    return jsonify(ok=True, hub=LIVE_HUB.stats(), sampler=SAMPLER.stats(),
+                   streams=stream_slots.stats()), 200
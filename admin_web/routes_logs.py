@@ -10,7 +10,9 @@
 # • GET  /api/logs/download  → הורדת הלוגים כקובץ טקסט
 #
 # הערות:
-# - הפלט ב-/api/logs נשמר בפורמט {items, total, now} כדי לא לשבור את ה-UI.
+# - הפלט ב-/api/logs נשמר בפורמט {items, total, now} כדי לא לשבור את ה-UI,
+#   ובנוסף cursor (seq אחרון) — הלקוח שולח after=<cursor> בפולינג הבא.
+# - הקריאה היא cursor על LOG_RING (core/logs) — בלי העתקת הבאפר ובלי תור משותף.
 # - מגבלות ופרמטרי ברירת מחדל נשלטים דרך ENV.
 # -------------------------------------------------------
 
@@ -19,13 +21,13 @@ import os
 import io
 import json
 import time
-from typing import Any, Dict, List
-from queue import Empty
+from typing import List
 
 from flask import Blueprint, Response, jsonify, request, send_file
 
 # מבני נתונים ולוגר מגיעים מהשכבה המשותפת
-from core.logs import LOG_BUFFER, LOG_QUEUE, logger
+from core.logs import LOG_RING, logger
+from core.pubsub import HubFull, SubscriberGate, parse_last_event_id
 
 bp_logs = Blueprint("logs", __name__)
 
@@ -34,6 +36,10 @@ LOGS_API_MAX_ITEMS   = int(os.getenv("LOGS_API_MAX_ITEMS", "400"))
 LOG_STREAM_INIT_MAX  = int(os.getenv("LOG_STREAM_INIT_MAX", "50"))
 LOG_STREAM_BURST_MAX = int(os.getenv("LOG_STREAM_BURST_MAX", "20"))
 LOG_STREAM_PING_MS   = int(os.getenv("LOG_STREAM_PING_MS", "15000"))
+LOG_STREAM_MAX_CLIENTS = int(os.getenv("LOG_STREAM_MAX_CLIENTS", "16"))
+
+# תקרת לקוחות SSE במקביל (כל אחד מחזיק thread של השרת)
+_STREAM_GATE = SubscriberGate(LOG_STREAM_MAX_CLIENTS)
 
 # -------------------------------------------------------
 # 📄 /api/logs — החזרת לוגים קיימים (עם סינון מאז timestamp)
@@ -42,11 +48,16 @@ LOG_STREAM_PING_MS   = int(os.getenv("LOG_STREAM_PING_MS", "15000"))
 def api_logs():
     """
     מחזיר לוגים, עם תמיכה בפרמטרים:
+      - after: seq אחרון שהלקוח ראה (cursor; עדיף על since)
       - since / since_ts: unix ts צף (שניות) להחזרת חדשים בלבד
       - level: INFO/DEBUG/WARNING/ERROR (קייס-אינסנסיטיב)
       - max / limit: מספר מקסימלי של פריטים (חסום ל-LOGS_API_MAX_ITEMS)
-    הפורמט נשמר: {items, total, now}
+    הפורמט נשמר: {items, total, now} + cursor
     """
+    try:
+        after = int(request.args.get("after") or 0)
+    except ValueError:
+        after = 0
     try:
         since = float(request.args.get("since") or request.args.get("since_ts") or 0.0)
     except ValueError:
@@ -59,12 +70,14 @@ def api_logs():
         limit = LOGS_API_MAX_ITEMS
     limit = max(1, min(limit, LOGS_API_MAX_ITEMS))
 
-    buf_list: List[Dict[str, Any]] = list(LOG_BUFFER)
-    items = [x for x in buf_list if x.get("ts", 0) > since and (not level or x.get("level") == level)]
-    if len(items) > limit:
-        items = items[-limit:]
+    cursor = LOG_RING.last_seq
+    if after:
+        recs = LOG_RING.read(after, level=level or None, limit=limit, tail=True)
+    else:
+        recs = LOG_RING.read_since_ts(since, level=level or None, limit=limit)
+    items = [r.to_dict() for r in recs]
 
-    return jsonify(items=items, total=len(buf_list), now=time.time())
+    return jsonify(items=items, total=len(LOG_RING), now=time.time(), cursor=cursor)
 
 # -------------------------------------------------------
 # 📡 /api/logs/stream — סטרימינג חי (SSE) עם באפר התחלתִי
@@ -77,6 +90,8 @@ def api_logs_stream():
       - init: כמה פריטים אחרונים לשלוח מיד (<= LOG_STREAM_INIT_MAX)
       - burst: כמה פריטים לכל מחזור משיכה מהתור (<= LOG_STREAM_BURST_MAX, לפחות 1)
       - ping_ms: כל כמה מילישניות לשלוח :ping אם אין תנועה (>= 1000)
+    Last-Event-ID (header או ?last_event_id=): המשך מה-seq האחרון שהלקוח ראה
+    במקום init. לקוח שנפל מאחורי הטבעת מקבל event: gap עם מספר הדילוגים.
     """
     try:
         init = int(request.args.get("init") or LOG_STREAM_INIT_MAX)
@@ -96,34 +111,65 @@ def api_logs_stream():
         ping_ms = LOG_STREAM_PING_MS
     ping_ms = max(1000, ping_ms)
 
+    last_event_id = parse_last_event_id(request.headers, request.args)
+    try:
+        _STREAM_GATE.acquire()
+    except HubFull:
+        return jsonify(ok=False, error="too_many_subscribers"), 503
+
+    released = []
+
+    def _release() -> None:
+        # idempotent: נקרא מה-finally של הגנרטור וגם מ-call_on_close
+        if not released:
+            released.append(True)
+            _STREAM_GATE.release()
+
+    def _event(rec) -> str:
+        return f"id: {rec.seq}\ndata: {json.dumps(rec.to_dict(), ensure_ascii=False)}\n\n"
+
     def gen():
-        # באפר פתיחה — שולחים n פריטים אחרונים כדי ליישר מצב לקוח
-        if LOG_BUFFER and init:
-            for item in list(LOG_BUFFER)[-init:]:
-                yield f"data: {json.dumps(item, ensure_ascii=False)}\n\n"
-
-        last_ping = time.time()
-        while True:
-            sent = 0
-            try:
-                timeout = max(0.1, ping_ms / 1000.0)
-                while sent < burst:
-                    item = LOG_QUEUE.get(timeout=timeout if sent == 0 else 0.001)
-                    yield f"data: {json.dumps(item, ensure_ascii=False)}\n\n"
-                    sent += 1
-                    last_ping = time.time()
-            except Empty:
-                # אין פריטים כרגע — שלח ping כדי לשמור חיבור חי לפי ping_ms
-                if (time.time() - last_ping) * 1000.0 >= ping_ms:
-                    yield ":ping\n\n"
-                    last_ping = time.time()
-            except GeneratorExit:
-                break
-            except Exception:
-                # לא מפילים סטרים על חריגות מזדמנות
-                pass
-
-    return Response(gen(), mimetype="text/event-stream")
+        try:
+            if last_event_id is not None:
+                cursor = min(last_event_id, LOG_RING.last_seq)
+            else:
+                # באפר פתיחה — שולחים n פריטים אחרונים כדי ליישר מצב לקוח
+                cursor = LOG_RING.last_seq
+                if init:
+                    for rec in LOG_RING.read(limit=init, tail=True):
+                        yield _event(rec)
+                        cursor = rec.seq
+
+            last_ping = time.time()
+            timeout = max(0.1, ping_ms / 1000.0)
+            while True:
+                try:
+                    if LOG_RING.wait(cursor, timeout=timeout):
+                        first = LOG_RING.first_seq()
+                        if cursor + 1 < first:
+                            yield f"event: gap\ndata: {json.dumps({'skipped': first - cursor - 1})}\n\n"
+                            cursor = first - 1
+                        # cursor פרטי לכל לקוח — כל לקוח מקבל כל רשומה
+                        for rec in LOG_RING.read(cursor, limit=burst, tail=False):
+                            yield _event(rec)
+                            cursor = rec.seq
+                        last_ping = time.time()
+                        continue
+                    # אין פריטים כרגע — שלח ping כדי לשמור חיבור חי לפי ping_ms
+                    if (time.time() - last_ping) * 1000.0 >= ping_ms:
+                        yield ":ping\n\n"
+                        last_ping = time.time()
+                except GeneratorExit:
+                    raise
+                except Exception:
+                    # לא מפילים סטרים על חריגות מזדמנות
+                    time.sleep(0.1)
+        finally:
+            _release()
+
+    resp = Response(gen(), mimetype="text/event-stream")
+    resp.call_on_close(_release)
+    return resp
 
 # -------------------------------------------------------
 # 🧹 /api/logs/clear — ניקוי הלוגים
@@ -131,18 +177,11 @@ def api_logs_stream():
 @bp_logs.post("/api/logs/clear")
 def api_logs_clear():
     """
-    מנקה את LOG_BUFFER ואת התור LOG_QUEUE.
-    מחזיר ok=True וכמות פריטים שהתור ניקה כדי לעזור לדיאגנוסטיקה.
+    מנקה את LOG_RING (ה-seq ממשיך לעלות, כך ש-cursors של לקוחות נשארים תקפים).
+    מחזיר ok=True וכמות הפריטים שנוקו כדי לעזור לדיאגנוסטיקה.
     """
-    LOG_BUFFER.clear()
-    cleared = 0
-    while True:
-        try:
-            LOG_QUEUE.get_nowait()
-            cleared += 1
-        except Empty:
-            break
-    logger.info(f"LOGS CLEARED via /api/logs/clear (queue items cleared: {cleared})")
+    cleared = LOG_RING.clear()
+    logger.info(f"LOGS CLEARED via /api/logs/clear (items cleared: {cleared})")
     return jsonify(ok=True, cleared_queue=cleared)
 
 # -------------------------------------------------------
@@ -156,10 +195,10 @@ def api_logs_download():
     """
     lines: List[str] = []
     now_fallback = time.time()
-    for i in LOG_BUFFER:
-        ts = i.get("ts", now_fallback)
-        lvl = i.get("level", "INFO")
-        msg = i.get("msg", "")
+    for rec in LOG_RING.read():
+        ts = rec.ts or now_fallback
+        lvl = rec.level or "INFO"
+        msg = rec.msg
         t = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
         lines.append(f"[{t}] [{lvl}] {msg}")
     payload = "\n".join(lines).encode("utf-8")
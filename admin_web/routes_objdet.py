@@ -2,8 +2,10 @@
 """
 routes_objdet.py — Object Detection API routes (browser-ingest friendly)
 ------------------------------------------------------------------------
-• עובד מול Buffer גנרי של פריימים ב-admin_web.state (push_frame_np/get_frame)
-• ללא תלות ב-OpenCV/VideoManager. אם Ultralytics לא מותקן → fallback devnull
+• backend יחיד: ObjectDetectionEngine (אותו מנוע/worker של האפליקציה הראשית, get_od_engine).
+  אין מנוע רשום ו-ENABLE_LOCAL_YOLO_WORKER=1 → /start בונה מנוע מה-YAML ומפעיל את ה-worker
+  שלו במצב pull מעל ה-Buffer הגנרי ב-admin_web.state (push_frame_np/get_frame).
+• ללא תלות ב-OpenCV/VideoManager; בחירת הספק (yolov8/onnx/devnull) — במנוע.
 • endpoints:
     GET  /api/objdet/status
     GET  /api/objdet/config
@@ -29,18 +31,10 @@ except Exception:
 
 # ---------- Frame buffer (מקור צילום גנרי) ----------
 from admin_web.state import (
-    is_frame_ready, get_frame, get_od_engine, get_frame_provider_name,
+    is_frame_ready, get_frame, get_od_engine, set_od_engine, get_frame_provider_name,
     update_od_status
 )
 
-# ---------- YOLO (אופציונלי) ----------
-try:
-    from ultralytics import YOLO
-    _ULTRA_OK = True
-except Exception:
-    YOLO = None
-    _ULTRA_OK = False
-
 # ---------- YAML (לא חובה, רק לקונפיג) ----------
 try:
     import yaml
@@ -68,7 +62,7 @@ OBJDET_STATUS_LOCK = threading.Lock()
 OBJDET_STATUS: Dict[str, Any] = {
     "running": False,
     "error": "",
-    "provider": "yolov8" if _ULTRA_OK else "devnull",
+    "provider": "none",
     "weights": "",
     "device": "cpu",
     "imgsz": 640,
@@ -77,8 +71,7 @@ OBJDET_STATUS: Dict[str, Any] = {
     "source": "",
     "fps": 0.0,
 }
-_OBJDET_WORKER_THREAD: Optional[threading.Thread] = None
-_OBJDET_WORKER_STOP = threading.Event()
+_OWNED_ENGINE: Any = None  # מנוע שנבנה ע"י /api/objdet/start (לא של האפליקציה הראשית)
 
 # ---------- Utils ----------
 _PRESET2IMGSZ = {"320p": 320, "384p": 384, "416p": 416, "480p": 480, "640p": 640}
@@ -120,132 +113,94 @@ def _load_cfg(yml_path: str, profile: str | None) -> Dict[str, Any]:
         "classes": data.get("classes") or ["barbell", "dumbbell"],
     }
 
-def _to_payload(frame, dets: List[Tuple[int,int,int,int,float,int]], model_names, clslist):
-    """ממיר תוצאות YOLO ל-payload בסיסי (לא תלוי ב-OpenCV)."""
-    try:
-        import numpy as np  # רק לבדוק טיפוס
-        if frame is None or not isinstance(frame, np.ndarray):
-            h, w = 720, 1280
-        else:
-            h, w = frame.shape[:2]
-    except Exception:
-        h, w = 720, 1280
-
-    objects = []
-    for (x1,y1,x2,y2,conf,cls_id) in dets:
-        label = None
-        if isinstance(model_names, dict):
-            label = model_names.get(cls_id)
-        if not label and isinstance(clslist, (list, tuple)) and 0 <= cls_id < len(clslist):
-            label = clslist[cls_id]
-        if not label:
-            label = str(cls_id)
-        objects.append({
-            "label": label,
-            "conf": float(conf),
-            "bbox": {"x1": int(x1), "y1": int(y1), "x2": int(x2), "y2": int(y2)}
-        })
-
-    return {
-        "frame": {"w": w, "h": h, "mirrored": False, "ts_ms": _now_ms()},
-        "mp": {"landmarks": []},
-        "metrics": {},
-        "objdet": {
-            "frame": {"w": w, "h": h, "mirrored": False, "ts_ms": _now_ms()},
-            "objects": objects,
-            "tracks": [],
-            "detector_state": {"ok": True, "err": "", "provider": OBJDET_STATUS.get("provider","yolov8"), "fps": OBJDET_STATUS.get("fps",0.0)},
-        },
-        "ts": time.time(),
-    }
+def _env_patch() -> Dict[str, Any]:
+    """עקיפות ENV (OBJDET_CONF/IOU/IMGSZ/PERIOD_MS) כ-patch ל-update_simple של המנוע."""
+    patch: Dict[str, Any] = {}
+    if OBJDET_CONF >= 0: patch["confidence_threshold"] = OBJDET_CONF
+    if OBJDET_IOU >= 0:  patch["overlap"] = OBJDET_IOU
+    if OBJDET_IMGSZ:
+        preset = _imgsz_to_preset(OBJDET_IMGSZ)
+        if preset: patch["input_size"] = preset
+    if OBJDET_PERIOD_MS: patch["detection_rate_ms"] = max(60, OBJDET_PERIOD_MS)
+    return patch
+
+class _StateFrameSource:
+    """מקור pull ל-worker: הפריים האחרון מה-buffer (RGB) → BGR; אותו פריים לא מוחזר פעמיים."""
+    def __init__(self):
+        self._last = None
+
+    def __call__(self):
+        if not is_frame_ready():
+            return None
+        frame = get_frame()
+        if frame is None or frame is self._last:
+            return None
+        self._last = frame
+        try:
+            import numpy as np
+            return np.ascontiguousarray(frame[..., ::-1])
+        except Exception:
+            return frame
 
-# ---------- Local YOLO worker (קורא פריימים מה-state buffer) ----------
-def _objdet_worker():
+def _on_engine_result(res) -> None:
+    """listener של ה-worker: כרטיס הסטטוס ב-UI + OBJDET_STATUS."""
+    eng = _OWNED_ENGINE or get_od_engine()
+    st = eng.worker_stats() if eng is not None else {}
+    provider = (res.payload.get("detector_state") or {}).get("provider") or "unknown"
     with OBJDET_STATUS_LOCK:
-        OBJDET_STATUS.update({"running": False, "error": ""})
-
-    if not _ULTRA_OK:
-        with OBJDET_STATUS_LOCK:
-            OBJDET_STATUS.update({"error": "ultralytics_not_installed"})
-        logger.error("[ObjDet Worker] Ultralytics not installed")
-        return
-
-    cfg = _load_cfg(OBJDET_YAML, OBJDET_PROFILE or None)
-    weights = cfg["weights"]
-    imgsz   = OBJDET_IMGSZ or cfg["imgsz"]
-    conf    = OBJDET_CONF if OBJDET_CONF >= 0 else cfg["conf"]
-    iou     = OBJDET_IOU  if OBJDET_IOU  >= 0 else cfg["iou"]
-    device  = cfg["device"]
-    clslist = cfg["classes"]
-
-    if not weights or not os.path.exists(weights):
-        msg = f"weights_not_found: {weights}"
+        OBJDET_STATUS["fps"] = st.get("fps", 0.0)
+        OBJDET_STATUS["source"] = get_frame_provider_name() or "unknown"
+    update_od_status({"enabled": True, "fps": st.get("fps", 0.0), "latency_ms": res.latency_ms or 0,
+                      "count_inc": 1, "provider": str(provider)})
+
+def _start_local_engine():
+    """בונה מנוע מה-YAML, רושם אותו ב-state ומפעיל worker במצב pull. מחזיר (engine, error)."""
+    global _OWNED_ENGINE
+    try:
+        from core.object_detection.engine import ObjectDetectionEngine
+        yml = OBJDET_YAML if os.path.exists(OBJDET_YAML) else "core/object_detection/object_detection.yaml"
+        eng = ObjectDetectionEngine.from_yaml(yml)
+        patch = _env_patch()
+        if patch:
+            eng.update_simple(patch)
+    except Exception as e:
+        logger.exception("[ObjDet] engine build failed")
         with OBJDET_STATUS_LOCK:
-            OBJDET_STATUS.update({"error": msg})
-        logger.error(f"[ObjDet Worker] {msg}")
-        return
-
-    model = YOLO(weights).to(device)
+            OBJDET_STATUS.update({"running": False, "error": f"engine_init_failed: {e}"})
+        return None, str(e)
+
+    eng.add_result_listener(_on_engine_result)
+    eng.start_worker(source=_StateFrameSource())
+    _OWNED_ENGINE = eng
+    set_od_engine(eng)
+    det = eng.detector_cfg
     with OBJDET_STATUS_LOCK:
         OBJDET_STATUS.update({
             "running": True, "error": "",
-            "weights": weights, "device": device,
-            "imgsz": imgsz, "conf": conf, "iou": iou,
+            "provider": getattr(det, "provider", "unknown"),
+            "weights": getattr(det, "weights", "") or getattr(det, "local_model", "") or "",
+            "device": getattr(det, "device", None) or "cpu",
+            "imgsz": int((getattr(det, "extra", None) or {}).get("imgsz", 640) or 640),
+            "conf": float(getattr(det, "threshold", 0.15)),
+            "iou": float(getattr(det, "overlap", 0.50)),
             "source": get_frame_provider_name() or "unknown",
-            "provider": "yolov8"
         })
-    logger.info(f"[ObjDet Worker] YOLO loaded | weights={weights} | device={device} | imgsz={imgsz}")
-
-    period_ms = max(60, OBJDET_PERIOD_MS)
-    frames_processed = 0
-
-    while not _OBJDET_WORKER_STOP.is_set():
-        # פריים מה-buffer (לא מפעילים מצלמה)
-        if not is_frame_ready():
-            time.sleep(0.1)
-            continue
-        frame = get_frame()
-        if frame is None:
-            time.sleep(0.01)
-            continue
-
-        t0 = time.time()
-        try:
-            # Ultralytics מקבל גם numpy RGB וגם PIL.Image
-            res = model.predict(source=frame, imgsz=imgsz, conf=conf, iou=iou, device=device, verbose=False)[0]
-        except Exception as e:
-            logger.warning(f"[ObjDet Worker] YOLO predict failed: {e}")
-            time.sleep(0.1)
-            continue
-
-        dets: List[Tuple[int,int,int,int,float,int]] = []
-        try:
-            if res.boxes is not None and len(res.boxes) > 0:
-                xyxy = res.boxes.xyxy.cpu().numpy()
-                confs= res.boxes.conf.cpu().numpy()
-                clss = res.boxes.cls.cpu().numpy().astype(int)
-                for (x1,y1,x2,y2), c, cl in zip(xyxy, confs, clss):
-                    dets.append((int(x1), int(y1), int(x2), int(y2), float(c), int(cl)))
-        except Exception:
-            pass
-
-        # כאן אפשר לפרסם את ה-payload ל-/payload אם תרצה; כרגע אנחנו רק שומרים סטטוס
-        payload = _to_payload(frame, dets, getattr(model, "names", {}), clslist)
-        # עדכון סטטוס (UI card)
-        elapsed_ms = (time.time() - t0) * 1000.0
-        fps = 1000.0 / max(1.0, elapsed_ms)
-        with OBJDET_STATUS_LOCK:
-            OBJDET_STATUS["fps"] = round(fps, 2)
-            OBJDET_STATUS["source"] = get_frame_provider_name() or "unknown"
-        update_od_status({"enabled": True, "fps": fps, "latency_ms": int(elapsed_ms), "count_inc": 1, "provider": "yolov8"})
-
-        # קצב
-        sleep_ms = max(0.0, period_ms - elapsed_ms)
-        time.sleep(sleep_ms / 1000.0)
-
+    return eng, None
+
+def _stop_local_engine() -> bool:
+    global _OWNED_ENGINE
+    eng, _OWNED_ENGINE = _OWNED_ENGINE, None
+    if eng is None:
+        return False
+    eng.remove_result_listener(_on_engine_result)
+    eng.stop()
+    if get_od_engine() is eng:
+        set_od_engine(None)
     with OBJDET_STATUS_LOCK:
         OBJDET_STATUS.update({"running": False, "error": "stopped"})
-    logger.info(f"[ObjDet Worker] Stopped (processed {frames_processed} frames)")
+    update_od_status({"enabled": False})
+    logger.info("[ObjDet] local engine stopped")
+    return True
 
 # =================== API Routes ===================
 
@@ -253,15 +208,16 @@ def _objdet_worker():
 def objdet_status():
     """
     מחזיר סטטוס של מנוע ה-OD.
-    מעדיף מנוע חי שמגיע מהאפליקציה הראשית (get_od_engine),
-    אחרת — ה-worker המקומי.
+    מנוע חי (של האפליקציה הראשית או זה שהופעל ב-/start) — כולל סטטיסטיקות ה-worker;
+    אחרת — סטטוס ברירת מחדל.
     """
     eng = get_od_engine()
     if eng is not None:
         try:
             rp = eng.get_runtime_params()
+            ws = eng.worker_stats() if hasattr(eng, "worker_stats") else {}
             out = {
-                "running": True, "error": "",
+                "running": bool(ws.get("running", True)), "error": "",
                 "provider": rp.get("profile") or rp.get("provider") or "unknown",
                 "device": rp.get("device", "cpu"),
                 "imgsz": _PRESET2IMGSZ.get(str(rp.get("input_size") or ""),
@@ -271,6 +227,7 @@ def objdet_status():
                 "source": get_frame_provider_name() or "",
                 "fps": float(rp.get("fps", 0.0)),
                 "yaml": OBJDET_YAML,
+                "worker": ws,
             }
             return jsonify(out), 200
         except Exception as e:
@@ -367,35 +324,33 @@ def api_objdet_config_post():
 
 @objdet_bp.route("/api/objdet/start", methods=["POST"])
 def objdet_start():
-    """מפעיל worker מקומי של YOLO (רק אם ENABLE_LOCAL_YOLO_WORKER=1)."""
-    if not ENABLE_LOCAL_YOLO_WORKER:
-        return jsonify(ok=False, error="local_worker_disabled_by_default"), 400
-
-    with OBJDET_STATUS_LOCK:
-        if OBJDET_STATUS.get("running"):
+    """
+    מפעיל את ה-worker של המנוע. מנוע רשום (האפליקציה הראשית) → מוודא שה-worker שלו רץ.
+    אין מנוע → בונה מנוע מקומי (רק אם ENABLE_LOCAL_YOLO_WORKER=1).
+    """
+    eng = get_od_engine()
+    if eng is not None:
+        if eng.worker_running:
             return jsonify(ok=False, error="already_running"), 400
+        eng.start_worker()
+        return jsonify(ok=True, status="started")
 
-    _OBJDET_WORKER_STOP.clear()
-
-    def runner():
-        try:
-            _objdet_worker()
-        except Exception:
-            with OBJDET_STATUS_LOCK:
-                OBJDET_STATUS.update({"running": False, "error": "worker_crash"})
-            logger.exception("[ObjDet Worker] crashed")
+    if not ENABLE_LOCAL_YOLO_WORKER:
+        return jsonify(ok=False, error="local_worker_disabled_by_default"), 400
 
-    t = threading.Thread(target=runner, daemon=True)
-    t.start()
-    logger.info("[ObjDet Worker] Started via /api/objdet/start")
+    eng, err = _start_local_engine()
+    if eng is None:
+        return jsonify(ok=False, error=err or "engine_init_failed"), 500
+    logger.info("[ObjDet] local engine worker started via /api/objdet/start")
     return jsonify(ok=True, status="started")
 
 
 @objdet_bp.route("/api/objdet/stop", methods=["POST"])
 def objdet_stop():
-    """עוצר את ה-worker המקומי (אם רץ)."""
-    _OBJDET_WORKER_STOP.set()
-    return jsonify(ok=True, status="stopping")
+    """עוצר את המנוע המקומי (אם הופעל ב-/start); מנוע של האפליקציה הראשית נשאר בשליטתה."""
+    if _stop_local_engine():
+        return jsonify(ok=True, status="stopped")
+    return jsonify(ok=True, status="not_owned" if get_od_engine() is not None else "not_running")
 
 
 # ---------- Legacy (תאימות לאחור) ----------
@@ -435,14 +390,16 @@ def api_od_config_post():
         os.environ["OBJDET_PERIOD_MS"]= str(int(body["period_ms"]))
         globals()["OBJDET_PERIOD_MS"] = int(body["period_ms"])
 
-    # אם ה-worker רץ — נאפס את הלופ שלו כך שייקח את ההגדרות החדשות
-    with OBJDET_STATUS_LOCK:
-        running = bool(OBJDET_STATUS.get("running"))
-    if running:
-        _OBJDET_WORKER_STOP.set()
-        time.sleep(0.2)
-        _OBJDET_WORKER_STOP.clear()
-        t = threading.Thread(target=_objdet_worker, daemon=True)
-        t.start()
+    # מנוע חי — ההגדרות נכנסות מיד (ה-worker קורא period/threshold בכל טיק)
+    eng = get_od_engine()
+    if eng is not None:
+        keys = {"threshold": "confidence_threshold", "overlap": "overlap",
+                "imgsz": "input_size", "period_ms": "detection_rate_ms"}
+        env = _env_patch()
+        patch = {v: env[v] for k, v in keys.items() if k in body and v in env}
+        try:
+            eng.update_simple(patch)
+        except Exception as e:
+            logger.warning(f"/api/od/config POST (engine) failed: {e}")
 
     return jsonify(ok=True, applied=True), 200
@@ -10,8 +10,16 @@ GET  /health              (alias ל-/healthz)
 GET  /ping                (בדיקת חיים לייט)
 GET  /readyz
 GET  /api/health
-GET  /api/system
+GET  /api/system                (הדגימה האחרונה מה-collector; ?history=N מוסיף סדרות)
+GET  /api/system/history        (?n=&fields=cpu,ram,proc_cpu,... לספארקליינים)
 GET  /api/diagnostics
+GET  /api/diagnostics/profile       (sampling profiler: ?seconds=&hz=&format=json|collapsed)
+GET  /api/diagnostics/heap          (tracemalloc status)
+POST /api/diagnostics/heap/start    {frames}
+POST /api/diagnostics/heap/stop
+POST /api/diagnostics/heap/snapshot {label}
+GET  /api/diagnostics/heap/diff     (?a=&b=&top=&group=module|filename|lineno|traceback)
+POST /api/diagnostics/heap/periodic {minutes, top, group, frames} | {"stop": true}
 GET  /api/session/status
 GET  /api/exercise/diag
 """
@@ -21,10 +29,17 @@ import os
 import time
 from typing import Any, Dict, Tuple
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify, request
 
 bp_system = Blueprint("system", __name__)
 
+# מעקב heap רציף מעליית השרת (import מפעיל את מצב ה-periodic)
+if os.getenv("HEAP_TRACE_ON_START", "0") == "1":
+    try:
+        import core.system.heap  # type: ignore  # noqa: F401
+    except Exception:
+        pass
+
 # =========================================================
 #  Utilities — lazy imports to avoid circular dependencies
 # =========================================================
@@ -129,8 +144,8 @@ def version():
     }), 200
 
 
-@bp_system.get("/healthz")
-def healthz():
+def _healthz_data() -> Dict[str, Any]:
+    """גוף /healthz (משמש גם את ערוץ ה-live)."""
     try:
         get_snapshot = _get_snapshot()
         snap = get_snapshot() or {}
@@ -162,16 +177,21 @@ def healthz():
 
         gpu_av = bool((snap.get("gpu") or {}).get("available", False))
         ok = (age < 3.0)
-        return jsonify({
+        return {
             "ok": ok,
             "payload": {"age_sec": round(age, 3), "present": bool(payload)},
             "video": {"opened": opened, "running": running},
             "gpu": {"available": gpu_av},
             "system": {"ok": bool(snap.get("ok", True))},
             "ts": int(now)
-        }), 200
+        }
     except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 200
+        return {"ok": False, "error": str(e)}
+
+
+@bp_system.get("/healthz")
+def healthz():
+    return jsonify(_healthz_data()), 200
 
 
 # --------- Aliases ל תאימות כלים/סקריפטים ---------
@@ -187,8 +207,8 @@ def ping():
     return jsonify(ok=True, ts=int(time.time())), 200
 
 
-@bp_system.get("/readyz")
-def readyz():
+def _readyz_data() -> Tuple[Dict[str, Any], int]:
+    """(גוף, קוד HTTP) של /readyz."""
     try:
         # Templates & static existence
         try:
@@ -213,12 +233,18 @@ def readyz():
 
         ok = all([t_ok, s_ok, snap_ok, streamer_ok])
         code = 200 if ok else 503
-        return jsonify({
+        return {
             "ok": ok, "templates": t_ok, "static": s_ok,
             "system_monitor": snap_ok, "streamer_available": streamer_ok
-        }), code
+        }, code
     except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 503
+        return {"ok": False, "error": str(e)}, 503
+
+
+@bp_system.get("/readyz")
+def readyz():
+    body, code = _readyz_data()
+    return jsonify(body), code
 
 
 @bp_system.get("/api/health")
@@ -227,15 +253,49 @@ def api_health():
     return jsonify(ok=True, version=APP_VERSION, uptime_sec=round(time.time() - START_TS, 1)), 200
 
 
+def _history_len(raw: str) -> int:
+    """ערך ?history= / ?n= → מספר דגימות בטווח 1..MONITOR_HISTORY; ValueError אם אינו מספר שלם."""
+    try:
+        from core.system.monitor import MONITOR_HISTORY  # type: ignore
+    except Exception:
+        MONITOR_HISTORY = 120
+    return max(1, min(int(str(raw).strip()), MONITOR_HISTORY))
+
+
 @bp_system.get("/api/system")
 def api_system():
+    n = request.args.get("history")
+    if n:
+        try:
+            n = _history_len(n)
+        except ValueError:
+            return jsonify(ok=False, error="bad_params", detail="history must be an integer"), 400
     try:
         get_snapshot = _get_snapshot()
-        return jsonify(get_snapshot())
+        snap = get_snapshot()
+        if n:
+            from core.system.monitor import get_history  # type: ignore
+            snap = dict(snap)
+            snap["history"] = get_history(n)
+        return jsonify(snap)
     except Exception as e:
         return jsonify({"ok": False, "error": f"system_api failure: {e}"}), 500
 
 
+@bp_system.get("/api/system/history")
+def api_system_history():
+    try:
+        n = _history_len(request.args.get("n", "60"))
+    except ValueError:
+        return jsonify(ok=False, error="bad_params", detail="n must be an integer"), 400
+    try:
+        from core.system.monitor import get_history  # type: ignore
+        fields = [f.strip() for f in (request.args.get("fields") or "").split(",") if f.strip()] or None
+        return jsonify(ok=True, **get_history(n, fields)), 200
+    except Exception as e:
+        return jsonify(ok=False, error=str(e)), 500
+
+
 @bp_system.get("/api/diagnostics")
 def api_diagnostics():
     diag: Dict[str, Any] = {"ok": True, "errors": [], "warnings": []}
@@ -283,8 +343,116 @@ def api_diagnostics():
         return jsonify(ok=False, error=str(e)), 500
 
 
-@bp_system.get("/api/session/status")
-def api_session_status():
+@bp_system.get("/api/diagnostics/profile")
+def api_diagnostics_profile():
+    """
+    דוגם את כל ה-threads למשך seconds בקצב hz (חוסם את הבקשה עד הסוף).
+    פרמטרים: seconds, hz, top, depth, thread (substring), idle=1, format=json|collapsed
+    פרופיל אחד בכל רגע — בקשה מקבילה מקבלת 409.
+    """
+    try:
+        from core.system import profiler  # type: ignore
+    except Exception as e:
+        return jsonify(ok=False, error=f"profiler_unavailable: {e}"), 500
+
+    args = request.args
+    try:
+        seconds = float(args.get("seconds", "5"))
+        hz = int(args.get("hz", str(profiler.PROFILE_DEFAULT_HZ)))
+        top = int(args.get("top", "30"))
+        depth = int(args.get("depth", str(profiler.PROFILE_MAX_DEPTH)))
+    except ValueError:
+        return jsonify(ok=False, error="bad_params"), 400
+    include_idle = args.get("idle", "0") in ("1", "true", "True")
+    fmt = (args.get("format") or "json").lower()
+
+    res = profiler.profile(seconds, hz, include_idle=include_idle, max_depth=depth,
+                           top=top, thread_filter=args.get("thread") or None)
+    if not res.get("ok"):
+        return jsonify(res), 409
+    if fmt == "collapsed":
+        return Response(res["collapsed"] + "\n", mimetype="text/plain; charset=utf-8")
+    return jsonify(res), 200
+
+
+def _heap_mod():
+    from core.system import heap  # type: ignore
+    return heap
+
+
+@bp_system.get("/api/diagnostics/heap")
+def api_heap_status():
+    try:
+        return jsonify(ok=True, **_heap_mod().status()), 200
+    except Exception as e:
+        return jsonify(ok=False, error=str(e)), 500
+
+
+@bp_system.post("/api/diagnostics/heap/start")
+def api_heap_start():
+    j = request.get_json(silent=True) or {}
+    try:
+        heap = _heap_mod()
+        return jsonify(ok=True, **heap.start(int(j.get("frames", heap.HEAP_DEFAULT_FRAMES)))), 200
+    except Exception as e:
+        return jsonify(ok=False, error=str(e)), 500
+
+
+@bp_system.post("/api/diagnostics/heap/stop")
+def api_heap_stop():
+    try:
+        return jsonify(ok=True, **_heap_mod().stop()), 200
+    except Exception as e:
+        return jsonify(ok=False, error=str(e)), 500
+
+
+@bp_system.post("/api/diagnostics/heap/snapshot")
+def api_heap_snapshot():
+    j = request.get_json(silent=True) or {}
+    label = j.get("label") or request.args.get("label")
+    try:
+        return jsonify(ok=True, **_heap_mod().snapshot(label)), 200
+    except RuntimeError as e:
+        return jsonify(ok=False, error=str(e)), 409
+    except Exception as e:
+        return jsonify(ok=False, error=str(e)), 500
+
+
+@bp_system.get("/api/diagnostics/heap/diff")
+def api_heap_diff():
+    args = request.args
+    try:
+        top = int(args.get("top", "20"))
+    except ValueError:
+        top = 20
+    try:
+        res = _heap_mod().diff(args.get("a") or None, args.get("b") or None,
+                               top=top, group=args.get("group", "module"))
+        return jsonify(res), 200
+    except KeyError as e:
+        return jsonify(ok=False, error=f"snapshot_not_found: {e.args[0] if e.args else ''}"), 404
+    except Exception as e:
+        return jsonify(ok=False, error=str(e)), 500
+
+
+@bp_system.post("/api/diagnostics/heap/periodic")
+def api_heap_periodic():
+    j = request.get_json(silent=True) or {}
+    try:
+        heap = _heap_mod()
+        if j.get("stop"):
+            heap.stop_periodic()
+            return jsonify(ok=True, **heap.status()), 200
+        st = heap.start_periodic(minutes=float(j.get("minutes", 10)), top=int(j.get("top", 10)),
+                                 group=str(j.get("group", "module")),
+                                 frames=int(j.get("frames", heap.HEAP_DEFAULT_FRAMES)))
+        return jsonify(ok=True, **st), 200
+    except Exception as e:
+        return jsonify(ok=False, error=str(e)), 500
+
+
+def _session_status_data() -> Dict[str, Any]:
+    """גוף /api/session/status."""
     import time as _t
     fps = 0.0
     size = (0, 0)
@@ -318,14 +486,19 @@ def api_session_status():
     except Exception:
         pass
     w, h = (int(size[0]), int(size[1])) if isinstance(size, (tuple, list)) and len(size) >= 2 else (0, 0)
-    return jsonify({
+    return {
         "opened": opened,
         "running": running,
         "fps": float(fps),
         "size": [w, h],
         "source": source,
         "ts": _t.time(),
-    }), 200
+    }
+
+
+@bp_system.get("/api/session/status")
+def api_session_status():
+    return jsonify(_session_status_data()), 200
 
 
 @bp_system.get("/api/exercise/diag")
@@ -37,6 +37,8 @@ except Exception as e:
     get_streamer = None  # type: ignore
     logger.error("❌ cannot import app.ui.video.get_streamer: %r", e)
 
+from admin_web.admission import ADMISSION
+
 video_bp = Blueprint("video", __name__)
 
 # ===== Optional integrations (upload-from-file via FFmpeg) =====
@@ -221,10 +223,17 @@ def api_ingest_frame():
     """
     ingest JPEG (raw או multipart field='frame').
     אופציונלי: X-Ingest-Token לכפילות עתידית (כרגע לא נבדק אם לא סופק).
+    X-Producer-Id (או כתובת ה-IP) — מפתח התקציב ב-admin_web.admission; פריים מעבר
+    לתקציב נדחה ב-429 לפני קריאת הגוף, והתשובה (200/429) כוללת budget עדכני.
     """
     token = request.headers.get("X-Ingest-Token", "")
     _len_hint = request.headers.get("Content-Length", "unknown")
 
+    producer = request.headers.get("X-Producer-Id") or request.remote_addr or "anon"
+    admitted, budget = ADMISSION.admit(f"post:{producer}")
+    if not admitted:
+        return jsonify(ok=False, error="over_budget", budget=budget), 429
+
     b = _read_request_bytes()
     if (b is None) or (len(b) < 10):
         logger.warning("⚠️ ingest_frame: empty/invalid body (len_hint=%s, token=%s)", _len_hint, "*" * len(token))
@@ -239,16 +248,15 @@ def api_ingest_frame():
         s.ingest_jpeg(b)
         logger.debug("ingest_frame: %d bytes | fps=~%s | size=%s",
                      len(b), getattr(s, "last_fps", lambda: None)(), getattr(s, "last_frame_size", lambda: None)())
-        return jsonify(ok=True), 200
+        return jsonify(ok=True, budget=budget), 200
     except Exception:
         logger.exception("❌ ingest_frame exception")
         return jsonify(ok=False, error="ingest_failed"), 500
 
 
-@video_bp.get("/api/video/status")
-def api_video_status():
+def _video_status_data() -> Dict[str, Any]:
     """
-    סטטוס וידאו מאוחד:
+    סטטוס וידאו מאוחד (גוף /api/video/status; משמש גם את ערוץ ה-live):
     - mode: 'file' (סטרים מקובץ) או 'camera' (ingest)
     - opened/running/fps/size: ממצב הסטרימר (ingest)
     - payload_age_sec: גיל payload האחרון (אם יש)
@@ -308,8 +316,12 @@ def api_video_status():
     logger.debug("[video] status | mode=%s opened=%s running=%s fps=%.2f size=%s age=%s ffmpeg=%s",
                  out["mode"], out["opened"], out["running"], out["fps"], out["size"],
                  out["payload_age_sec"], _safe_json(out.get("ffmpeg")))
+    return out
 
-    return jsonify(out), 200
+
+@video_bp.get("/api/video/status")
+def api_video_status():
+    return jsonify(_video_status_data()), 200
 
 
 @video_bp.post("/api/video/stop")
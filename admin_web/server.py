@@ -3,8 +3,12 @@
 server.py — Admin UI + API (Browser-only video ingest)
 ------------------------------------------------------
 • Flask (דשבורד, וידאו, לוגים כ-Blueprint) — /video/stream.mjpg
-• /payload ו-/api/payload_last
+• /payload ו-/api/payload_last (+ /api/payload/delta?since=<v> — רק מה שהשתנה)
+  ?lm=q16|b64 — landmarks בקידוד קומפקטי (core.landmark_codec) במקום רשימת dicts
+• /api/payload_push/batch — NDJSON של הרבה payloads (רק החדש נשמר; ?queue=1 → BUS("ingest"))
+• /api/live/stream — ערוץ SSE אחד לסטטוסים (payload/video/od/health/session)
 • סטרים MJPEG דרך admin_web.routes_video (ingest מהדפדפן)
+  ערוץ ingest מתמשך: /ws/ingest (WebSocket) או /api/ingest_stream (chunked) — routes_ingest
 • Upload-Video (FFmpeg) אופציונלי
 • נקודות בריאות (/ping, /healthz) תמיד קיימות גם אם bp_system לא נטען
 """
@@ -48,6 +52,18 @@ try:
 except Exception:
     bp_exercise = None  # type: ignore
 
+# Live status stream (SSE מרוכז לדשבורד)
+try:
+    from admin_web.routes_live import bp_live
+except Exception:
+    bp_live = None  # type: ignore
+
+# Frame ingest channel (WS / chunked — במקום POST לכל פריים)
+try:
+    from admin_web.routes_ingest import bp_ingest
+except Exception:
+    bp_ingest = None  # type: ignore
+
 # System/health/diagnostics (אם קיים יחשוף /healthz בעצמו)
 try:
     from admin_web.routes_system import bp_system
@@ -67,20 +83,24 @@ try:
 except Exception:
     PAYLOAD_VERSION = "1.2.0"
 
-# ===== payload משותף (אם אין state, נשתמש במשתנה פנימי) =====
-try:
-    from admin_web.state import get_payload as get_shared_payload  # type: ignore
-except Exception:
-    def get_shared_payload() -> Dict[str, Any]:
-        return {}
+# ===== payload משותף (snapshot מגורסן; אם ריק — LAST_PAYLOAD מ-/api/payload_push) =====
+from admin_web.state import PayloadSnapshot, get_payload_snapshot
+from core.landmark_codec import parse_format as parse_lm_format
+from admin_web import ingest
 
 # ===== Persist (DB) — אתחול בלבד =====
 try:
-    from db.persist import AVAILABLE as DB_PERSIST_AVAILABLE, init as db_persist_init
+    from db.persist import AVAILABLE as DB_PERSIST_AVAILABLE, init as db_persist_init, subscribe_reports
 except Exception as _e:
     DB_PERSIST_AVAILABLE = False
     def db_persist_init(*args, **kwargs):  # type: ignore
         logger.info(f"[persist] not available ({_e})")
+    def subscribe_reports(*args, **kwargs):  # type: ignore
+        return None
+
+# PERSIST_REPORTS=1 → כל דו"ח ב-BUS("report") נשמר ל-DB ברקע (מנוי אחד לתהליך)
+PERSIST_REPORTS = os.getenv("PERSIST_REPORTS", "0") == "1"
+_REPORT_PERSISTER = None
 
 # ===== Config =====
 APP_VERSION = os.getenv("APP_VERSION", "dev")
@@ -99,6 +119,7 @@ _NOW_MS = lambda: int(time.time() * 1000)
 
 LAST_PAYLOAD_LOCK = threading.Lock()
 LAST_PAYLOAD: Optional[Dict[str, Any]] = None
+LAST_PAYLOAD_SNAP: Optional[PayloadSnapshot] = None  # אותו LAST_PAYLOAD, מגורסן
 
 START_TS = time.time()
 
@@ -165,6 +186,63 @@ def normalize_payload(raw: Dict[str, Any]) -> Dict[str, Any]:
     return res
 
 
+def _payload_last_bytes(d: Dict[str, Any]) -> bytes:
+    out = dict(d)
+    out.setdefault("payload_version", PAYLOAD_VERSION)
+    return json.dumps(out, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _metrics_bytes(d: Dict[str, Any]) -> bytes:
+    # normalize_payload (כולל _flatten_dict) רץ פעם אחת לגרסה, לא לכל poll
+    return json.dumps({"ok": True, **normalize_payload(d)}, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def _compact_view(build, fmt: str):
+    """עוטף build כך שבלוק mp יישלח בקידוד קומפקטי (core.landmark_codec)."""
+    from core.landmark_codec import compact_mp
+
+    def _build(d: Dict[str, Any]) -> bytes:
+        mp = d.get("mp")
+        if isinstance(mp, dict):
+            frame = d.get("frame") if isinstance(d.get("frame"), dict) else {}
+            wh = (d.get("w") or frame.get("w"), d.get("h") or frame.get("h"))
+            d = dict(d, mp=compact_mp(mp, fmt, frame_wh=wh))
+        return build(d)
+    return _build
+
+
+def _current_snapshot() -> Optional[PayloadSnapshot]:
+    """ה-snapshot הפעיל: state (מהמנוע) ואם ריק — האחרון מ-/api/payload_push."""
+    snap = get_payload_snapshot()
+    if snap:
+        return snap
+    push = LAST_PAYLOAD_SNAP
+    return push if push else None
+
+
+def _with_payload_defaults(d: Dict[str, Any]) -> bytes:
+    out = dict(d)
+    out.setdefault("objdet", _get_empty_objdet_payload())
+    out.setdefault("payload_version", PAYLOAD_VERSION)
+    return json.dumps(out, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _snapshot_response(snap: PayloadSnapshot, view: str, build, variant: str = "") -> Response:
+    """
+    מחזיר את התצוגה view של snap (מחושבת פעם אחת לגרסה) עם ETag;
+    If-None-Match תואם → 304 בלי גוף. variant — ייצוג חלופי (lm=q16) עם ETag משלו,
+    כדי שמטמון שמחזיק את הצורה הרגילה לא יקבל 304 על הקומפקטית (ולהפך).
+    """
+    if snap.matches(request.headers.get("If-None-Match"), variant):
+        resp = Response(status=304)
+    else:
+        resp = Response(snap.derive(view, build), mimetype="application/json")
+    resp.headers["ETag"] = snap.variant_etag(variant)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
 def _coerce_scalar(x):
     if isinstance(x, list) and len(x) == 1:
         x = x[0]
@@ -306,6 +384,10 @@ def create_app() -> Flask:
     if ENABLE_HEARTBEAT:
         threading.Thread(target=_background_log_heartbeat, daemon=True).start()
 
+    global _REPORT_PERSISTER
+    if PERSIST_REPORTS and _REPORT_PERSISTER is None:
+        _REPORT_PERSISTER = subscribe_reports()
+
     # ----- Register blueprints -----
     app.register_blueprint(video_bp)
     if upload_video_bp is not None:
@@ -320,6 +402,10 @@ def create_app() -> Flask:
         app.register_blueprint(bp_exercise)
     if bp_system is not None:
         app.register_blueprint(bp_system)
+    if bp_live is not None:
+        app.register_blueprint(bp_live)
+    if bp_ingest is not None:
+        app.register_blueprint(bp_ingest)
 
     # ----- Jinja helpers (חובה לטמפלטים כמו base.html, dashboard.html) -----
     @app.context_processor
@@ -444,19 +530,13 @@ def create_app() -> Flask:
     @app.route("/payload", methods=["GET"])
     def payload_route():
         try:
-            shared = get_shared_payload()
-            if isinstance(shared, dict) and shared:
-                out = dict(shared)
-                out.setdefault("objdet", _get_empty_objdet_payload())
-                out.setdefault("payload_version", PAYLOAD_VERSION)
-                return jsonify(out)
-            with LAST_PAYLOAD_LOCK:
-                live = LAST_PAYLOAD.copy() if isinstance(LAST_PAYLOAD, dict) else None
-            if isinstance(live, dict) and live:
-                out = dict(live)
-                out.setdefault("objdet", _get_empty_objdet_payload())
-                out.setdefault("payload_version", PAYLOAD_VERSION)
-                return jsonify(out)
+            snap = _current_snapshot()
+            if snap is not None:
+                lm = parse_lm_format(request.args.get("lm"))
+                if lm:
+                    return _snapshot_response(snap, f"payload_route:{lm}", _compact_view(_with_payload_defaults, lm),
+                                              variant=lm)
+                return _snapshot_response(snap, "payload_route", _with_payload_defaults)
             out = {"frame": {"w": None, "h": None, "ts_ms": 0, "mirrored": False},
                    "mp": {"landmarks": []}, "metrics": {},
                    "objdet": _get_empty_objdet_payload(),
@@ -471,18 +551,43 @@ def create_app() -> Flask:
     @app.route("/api/payload_last", methods=["GET"])
     def api_payload_last():
         try:
-            shared = get_shared_payload()
-            out = dict(shared) if isinstance(shared, dict) else {}
-            if not out:
-                with LAST_PAYLOAD_LOCK:
-                    out = dict(LAST_PAYLOAD) if isinstance(LAST_PAYLOAD, dict) else {}
-            if not out:
+            snap = _current_snapshot()
+            if snap is None:
                 return jsonify({"ok": False, "error": "no_payload"}), 200
-            out.setdefault("payload_version", PAYLOAD_VERSION)
-            return jsonify(out), 200
+            lm = parse_lm_format(request.args.get("lm"))
+            if lm:
+                return _snapshot_response(snap, f"payload_last:{lm}", _compact_view(_payload_last_bytes, lm),
+                                          variant=lm)
+            return _snapshot_response(snap, "payload_last", _payload_last_bytes)
         except Exception as e:
             return jsonify({"ok": False, "error": str(e)}), 500
 
+    @app.route("/api/payload/delta", methods=["GET"])
+    def api_payload_delta():
+        """
+        ?since=<v> → רק המפתחות שהשתנו מאז גרסה v (או keyframe מלא; ראה payload_delta).
+        since == הגרסה הנוכחית → 304.
+        """
+        try:
+            from admin_web.payload_delta import encode_bytes
+            snap = _current_snapshot()
+            if snap is None:
+                return jsonify({"ok": False, "error": "no_payload"}), 200
+            try:
+                since = int(request.args.get("since") or 0)
+            except ValueError:
+                since = 0
+            if since == snap.version:
+                resp = Response(status=304)
+            else:
+                resp = Response(encode_bytes(snap, since or None), mimetype="application/json")
+            resp.headers["ETag"] = snap.etag
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+        except Exception as e:
+            logger.exception("Error in /api/payload/delta")
+            return jsonify({"ok": False, "error": str(e)}), 500
+
     # ----- OD ingest -----
     REQUIRED_KEYS = ("detections",)
     MAX_DETS = int(os.getenv("MAX_DETECTIONS", "500"))
@@ -490,7 +595,7 @@ def create_app() -> Flask:
     def _is_finite_number(x: Any) -> bool:
         return isinstance(x, (int, float)) and math.isfinite(x)
 
-    def _validate_od_payload(d: Any):
+    def _validate_od_payload(d: Any, trial_dump: bool = True):
         if not isinstance(d, dict) or not d:
             return ("empty_payload", None)
         missing = [k for k in REQUIRED_KEYS if k not in d]
@@ -510,12 +615,37 @@ def create_app() -> Flask:
                 bb = det["bbox"]
                 if (not isinstance(bb, list)) or (len(bb) != 4) or (not all(_is_finite_number(v) for v in bb)):
                     return ("bad_bbox", i)
-        try:
-            json.dumps(d, allow_nan=False)
-        except ValueError:
-            return ("non_finite_values", None)
+        if trial_dump:
+            try:
+                json.dumps(d, allow_nan=False)
+            except ValueError:
+                return ("non_finite_values", None)
         return None
 
+    def _prepare_push_body(data: Any, trial_dump: bool = True):
+        """fixups + ולידציה → (body, None) או (None, (err, detail))."""
+        if not isinstance(data, dict):
+            return None, ("empty_payload", None)
+        body = _server_side_schema_fixups(dict(data))
+        err = _validate_od_payload(body, trial_dump=trial_dump)
+        if err:
+            return None, err
+        body.setdefault("payload_version", PAYLOAD_VERSION)
+        if "objdet" not in body:
+            body["objdet"] = _get_empty_objdet_payload()
+        return body, None
+
+    def _store_last_payload(body: Dict[str, Any]) -> bool:
+        """LAST_PAYLOAD ← body, אלא אם כבר שמור payload חדש ממנו (ts)."""
+        with LAST_PAYLOAD_LOCK:
+            cur = LAST_PAYLOAD
+            if cur is not None and _finite(cur.get("ts")) and _finite(body.get("ts")) \
+                    and float(body["ts"]) < float(cur["ts"]):
+                return False
+            globals()["LAST_PAYLOAD"] = body
+            globals()["LAST_PAYLOAD_SNAP"] = PayloadSnapshot(body)
+        return True
+
     @app.route("/api/payload_push", methods=["POST"])
     def payload_push():
         raw = request.get_data(cache=False, as_text=True)
@@ -545,31 +675,62 @@ def create_app() -> Flask:
         if data is None:
             return jsonify(ok=False, err="invalid_json"), 400
 
-        body = _server_side_schema_fixups(dict(data))
-        err = _validate_od_payload(body)
+        body, err = _prepare_push_body(data)
         if err:
             name, detail = err
             code = 413 if name == "too_many_detections" else 400
             return jsonify(ok=False, err=name, detail=detail), code
 
-        body.setdefault("payload_version", PAYLOAD_VERSION)
-        if "objdet" not in body:
-            body["objdet"] = _get_empty_objdet_payload()
         with LAST_PAYLOAD_LOCK:
             globals()["LAST_PAYLOAD"] = body
+            globals()["LAST_PAYLOAD_SNAP"] = PayloadSnapshot(body)
 
         return jsonify(ok=True, stored=True, ts=time.time()), 200
 
+    @app.route("/api/payload_push/batch", methods=["POST"])
+    def payload_push_batch():
+        """
+        NDJSON / מערך JSON של payloads עם ts. ולידציה במעבר אחד;
+        רק החדש ביותר נשמר כ-LAST_PAYLOAD. ?queue=1 — כולם ל-BUS("ingest") לפי סדר ts,
+        והחדש ביותר ל-BUS("payload") (ה-state החי) רק אם נשמר — באץ' ישן לא דורס.
+        """
+        try:
+            items, rejected = ingest.parse_batch(request.get_data(cache=False))
+        except ingest.BatchTooLarge as e:
+            return jsonify(ok=False, err="batch_too_large", detail=e.args[0],
+                           max=ingest.INGEST_BATCH_MAX), 413
+
+        bodies: List[Dict[str, Any]] = []
+        for i, data in items:
+            # _sanitize_numbers_inplace כבר החליף NaN/Inf — אין צורך ב-json.dumps ניסיוני לכל פריט
+            body, err = _prepare_push_body(data, trial_dump=False)
+            if err:
+                rejected.append({"i": i, "err": err[0], "detail": err[1]})
+            else:
+                bodies.append(body)
+        if not bodies:
+            return jsonify(ok=False, err="no_valid_payloads", rejected=rejected), 400
+
+        newest = bodies[ingest.newest_index(bodies)]
+        stored = _store_last_payload(newest)
+        queued = 0
+        if request.args.get("queue", "0").lower() in ("1", "true", "yes"):
+            from core.event_bus import BUS
+            queued = ingest.enqueue_all(bodies, BUS)
+            if stored:
+                BUS.publish("payload", newest)
+
+        return jsonify(ok=True, accepted=len(bodies), rejected=rejected, stored=stored,
+                       newest_ts=newest.get("ts"), queued=queued, ts=time.time()), 200
+
     # ----- Metrics -----
     @app.route("/api/metrics", methods=["GET"])
     def api_metrics():
         try:
-            src = get_shared_payload()
-            if not src:
-                with LAST_PAYLOAD_LOCK:
-                    src = (LAST_PAYLOAD or {})
-            norm = normalize_payload(src if isinstance(src, dict) else {})
-            return jsonify(ok=True, **norm), 200
+            snap = _current_snapshot()
+            if snap is None:
+                return jsonify(ok=True, **normalize_payload({})), 200
+            return _snapshot_response(snap, "metrics", _metrics_bytes)
         except Exception as e:
             logger.exception("Error in /api/metrics")
             return jsonify(ok=False, error=str(e)), 500
@@ -0,0 +1,275 @@
+# admin_web/shm_state.py
+# -------------------------------------------------------
+# 🧠 Shared-memory backend ל-state החי — כמה workers של gunicorn על אותו מצב
+# -------------------------------------------------------
+# STATE_BACKEND=shm מפעיל; אחרת SHARED=None וה-state נשאר globals של התהליך.
+#
+#   SHARED.payload  — VersionedBlob: JSON של ה-payload האחרון + גרסה גלובלית
+#   SHARED.status   — VersionedBlob: JSON של סטטוס ה-OD
+#   SHARED.frames   — BlobRing: פריים RGB אחרון (push_frame_np/get_frame)
+#   SHARED.jpeg     — BlobRing: JPEG אחרון של ה-streamer (MJPEG בכל worker)
+#
+# seqlock: הכותב מעלה seq לאי-זוגי → כותב → מעלה לזוגי. הקורא מעתיק ובודק ש-seq
+#   זהה וזוגי לפני ואחרי — בלי נעילה בצד הקריאה; קריאה שנחתכה פשוט חוזרת.
+# כותבים מכמה תהליכים מסודרים ב-flock על קובץ נעילה (+ Lock בתוך התהליך).
+# הגרסה נגזרת ממונה משותף → ETag/delta עקביים בין workers.
+# הסגמנטים לא מנותקים אוטומטית ביציאת worker (resource_tracker) — unlink() במפורש.
+# -------------------------------------------------------
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+try:
+    import fcntl  # type: ignore
+except Exception:  # Windows — כותב יחיד לכל segment
+    fcntl = None  # type: ignore
+
+try:
+    from core.logs import logger  # type: ignore
+except Exception:
+    import logging
+    logger = logging.getLogger("shm_state")
+
+__all__ = ["SHARED", "SharedState", "VersionedBlob", "BlobRing", "STATE_BACKEND"]
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").strip().lower()
+STATE_SHM_PREFIX = os.getenv("STATE_SHM_PREFIX", "bp_state")
+STATE_SHM_PAYLOAD_BYTES = int(os.getenv("STATE_SHM_PAYLOAD_BYTES", str(1 << 20)))
+STATE_SHM_STATUS_BYTES = int(os.getenv("STATE_SHM_STATUS_BYTES", str(64 << 10)))
+STATE_SHM_FRAME_SLOTS = int(os.getenv("STATE_SHM_FRAME_SLOTS", "3"))
+STATE_SHM_FRAME_BYTES = int(os.getenv("STATE_SHM_FRAME_BYTES", str(1280 * 720 * 3)))
+STATE_SHM_JPEG_BYTES = int(os.getenv("STATE_SHM_JPEG_BYTES", str(1 << 20)))
+
+_MAGIC = 0x42505354  # "BPST"
+_SEG_HDR = struct.Struct("<IIQ")       # magic, epoch, counter (גרסה / ראש הטבעת)
+_REG_HDR = struct.Struct("<QQId4I")    # seq, version, length, ts, meta[4]
+_SEQ = struct.Struct("<Q")
+
+
+class _Segment:
+    """segment משותף בשם קבוע: מצטרף אם קיים, יוצר אם לא."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            created = True
+        except FileExistsError:
+            self.shm = shared_memory.SharedMemory(name=name, create=False)
+            created = False
+        _untrack(self.shm)
+        if self.shm.size < size:
+            self.shm.close()
+            raise ValueError(f"shm {name!r} is {self.shm.size} bytes, need {size} (STATE_SHM_* mismatch)")
+        self.buf = self.shm.buf
+        if created:
+            _SEG_HDR.pack_into(self.buf, 0, _MAGIC, int(time.time()) & 0xFFFFFFFF, 0)
+        self._tlock = threading.Lock()
+        self._fd: Optional[int] = None
+        if fcntl is not None:
+            self._fd = os.open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+
+    @property
+    def epoch(self) -> int:
+        return _SEG_HDR.unpack_from(self.buf, 0)[1]
+
+    @property
+    def counter(self) -> int:
+        return _SEQ.unpack_from(self.buf, 8)[0]
+
+    @counter.setter
+    def counter(self, v: int) -> None:
+        _SEQ.pack_into(self.buf, 8, v)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        with self._tlock:
+            if self._fd is None:
+                yield
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self.buf = None  # type: ignore
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # memoryview חי אצל קורא — ה-mapping ישתחרר עם התהליך
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def unlink(self) -> None:
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self.shm._name, "shared_memory")  # unlink() מבטל רישום
+        except Exception:
+            pass
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    """resource_tracker מנתק segment כשתהליך שנגע בו יוצא — לא רצוי כשה-workers מתחלפים."""
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+
+
+class _SeqRegion:
+    """אזור seqlock בתוך segment: header קבוע + עד capacity בתים."""
+
+    def __init__(self, seg: _Segment, off: int, capacity: int):
+        self.seg = seg
+        self.off = off
+        self.capacity = capacity
+        self._data = off + _REG_HDR.size
+
+    def seq(self) -> int:
+        return _SEQ.unpack_from(self.seg.buf, self.off)[0]
+
+    def write(self, data: Any, version: int, ts: float, meta: Tuple[int, int, int, int] = (0, 0, 0, 0)) -> int:
+        """לקרוא תחת seg.locked(). data = bytes-like; מחזיר את ה-seq החדש (זוגי)."""
+        mv = memoryview(data).cast("B")
+        n = mv.nbytes
+        if n > self.capacity:
+            raise ValueError(f"{n} bytes > region capacity {self.capacity}")
+        buf = self.seg.buf
+        s = self.seq()
+        s += s & 1  # כותב שקרס באמצע השאיר seq אי-זוגי
+        _SEQ.pack_into(buf, self.off, s + 1)
+        _REG_HDR.pack_into(buf, self.off, s + 1, version, n, ts, *meta)
+        buf[self._data:self._data + n] = mv
+        _SEQ.pack_into(buf, self.off, s + 2)
+        return s + 2
+
+    def read(self, retries: int = 16) -> Optional[Tuple[int, int, float, Tuple[int, ...], bytes]]:
+        """(seq, version, ts, meta, data) עקבי, או None אם ריק/הכותב לא שחרר."""
+        buf = self.seg.buf
+        for _ in range(retries):
+            s1, version, n, ts, *meta = _REG_HDR.unpack_from(buf, self.off)
+            if s1 & 1:
+                time.sleep(0)
+                continue
+            if s1 == 0:
+                return None
+            data = bytes(buf[self._data:self._data + min(n, self.capacity)])
+            if self.seq() == s1:
+                return s1, version, ts, tuple(meta), data
+        return None
+
+
+class VersionedBlob:
+    """ערך יחיד (JSON וכו') עם גרסה מונוטונית משותפת לכל הכותבים."""
+
+    def __init__(self, name: str, capacity: int):
+        self.seg = _Segment(name, _SEG_HDR.size + _REG_HDR.size + capacity)
+        self.region = _SeqRegion(self.seg, _SEG_HDR.size, capacity)
+
+    @property
+    def tag(self) -> str:
+        return format(self.seg.epoch, "x")
+
+    def seq(self) -> int:
+        return self.region.seq()
+
+    def publish(self, build: Callable[[int], Any]) -> Tuple[int, int]:
+        """build(version) → bytes; נבנה ונכתב תחת הנעילה. מחזיר (version, seq)."""
+        with self.seg.locked():
+            version = self.seg.counter + 1
+            seq = self.region.write(build(version), version, time.time())
+            self.seg.counter = version
+            return version, seq
+
+    def read(self) -> Optional[Tuple[int, int, float, bytes]]:
+        r = self.region.read()
+        if r is None:
+            return None
+        seq, version, ts, _meta, data = r
+        return seq, version, ts, data
+
+
+class BlobRing:
+    """טבעת של slots לערך "האחרון" (פריים): הכותב לא דורס את ה-slot שהקורא מעתיק עכשיו."""
+
+    def __init__(self, name: str, slots: int, slot_bytes: int):
+        slots = max(2, int(slots))
+        reg = _REG_HDR.size + slot_bytes
+        self.seg = _Segment(name, _SEG_HDR.size + slots * reg)
+        self.slot_bytes = slot_bytes
+        self.slots = [_SeqRegion(self.seg, _SEG_HDR.size + i * reg, slot_bytes) for i in range(slots)]
+
+    def head(self) -> int:
+        """מספר הפריים האחרון שנכתב (0 = ריק) — קריאה זולה לבדיקת "יש חדש?"."""
+        return self.seg.counter
+
+    def write(self, data: Any, meta: Tuple[int, int, int, int] = (0, 0, 0, 0), ts: Optional[float] = None) -> int:
+        with self.seg.locked():
+            n = self.seg.counter + 1
+            self.slots[n % len(self.slots)].write(data, n, time.time() if ts is None else ts, meta)
+            self.seg.counter = n
+            return n
+
+    def latest(self) -> Optional[Tuple[int, float, Tuple[int, ...], bytes]]:
+        """(n, ts, meta, data) של הפריים האחרון; אם הכותב עקף את ה-slot באמצע — מנסים שוב."""
+        for _ in range(4):
+            n = self.head()
+            if n == 0:
+                return None
+            r = self.slots[n % len(self.slots)].read()
+            if r is not None and r[1] == n:
+                return n, r[2], r[3], r[4]
+        return None
+
+
+class SharedState:
+    def __init__(self, prefix: str = STATE_SHM_PREFIX, *,
+                 payload_bytes: int = STATE_SHM_PAYLOAD_BYTES, status_bytes: int = STATE_SHM_STATUS_BYTES,
+                 frame_slots: int = STATE_SHM_FRAME_SLOTS, frame_bytes: int = STATE_SHM_FRAME_BYTES,
+                 jpeg_bytes: int = STATE_SHM_JPEG_BYTES):
+        self.prefix = prefix
+        self.payload = VersionedBlob(f"{prefix}_payload", payload_bytes)
+        self.status = VersionedBlob(f"{prefix}_status", status_bytes)
+        self.frames = BlobRing(f"{prefix}_frames", frame_slots, frame_bytes)
+        self.jpeg = BlobRing(f"{prefix}_jpeg", frame_slots, jpeg_bytes)
+
+    def _segments(self):
+        return (self.payload.seg, self.status.seg, self.frames.seg, self.jpeg.seg)
+
+    def close(self) -> None:
+        for s in self._segments():
+            s.close()
+
+    def unlink(self) -> None:
+        for s in self._segments():
+            s.unlink()
+
+
+def _open_shared() -> Optional[SharedState]:
+    if STATE_BACKEND != "shm":
+        return None
+    try:
+        st = SharedState()
+        logger.info(f"[STATE] shared-memory backend prefix={STATE_SHM_PREFIX} pid={os.getpid()}")
+        return st
+    except Exception as e:
+        logger.warning(f"[STATE] shared-memory backend unavailable ({e}) — per-process state")
+        return None
+
+
+SHARED: Optional[SharedState] = _open_shared()
@@ -4,11 +4,17 @@
 # -----------------------------------------------------------------------------
 # מה הקובץ עושה?
 # 1) set_payload / get_payload  — צילום מצב חי (payload) שמגיע מהמנוע.
+#    get_payload_snapshot       — גרסה immutable (version/ETag/JSON ממוטמן).
+#    (מנוי inline ל-core.event_bus.BUS topic "payload")
 # 2) add_log / get_logs...      — מאגר טבעתי של לוגים אחרונים ל-/api/logs.
 # 3) set_od_engine / ...        — גשר קל למנוע זיהוי אובייקטים (OD) אם חי.
 # 4) update_od_status / ...     — סטטוס מהיר ל-UI (FPS/latency/ספירה/ספק).
 # 5) push_frame_np / get_frame  — Buffer גנרי לפריימים RGB מכל מקור (דפדפן/קובץ/RTSP).
 #
+# STATE_BACKEND=shm (admin_web/shm_state.py): payload, סטטוס OD ופריים אחרון עוברים גם
+# דרך shared memory — כל worker של gunicorn כותב/קורא את אותו מצב חי. לוגים ומנוע OD
+# נשארים מקומיים לתהליך.
+#
 # עקרונות:
 # • הכל בזיכרון (in-memory), thread-safe, ללא תלות ב-Flask/OpenCV.
 # • החתימות פשוטות וחסינות — השכבות העליונות לא צריכות לדעת מקור צילום.
@@ -17,17 +23,18 @@
 
 from __future__ import annotations
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional
 from collections import deque
-from threading import Lock
+from threading import Lock, RLock
 from time import time
-from copy import deepcopy
+import itertools
+import json
 import os
 import math
 
 __all__ = [
     # Payload
-    "set_payload", "get_payload",
+    "set_payload", "get_payload", "get_payload_snapshot", "get_payload_snapshot_at", "PayloadSnapshot",
     # Logs
     "add_log", "get_logs", "clear_logs", "get_logs_since",
     # Object Detection Engine bridge
@@ -61,9 +68,74 @@ except Exception:
 # 1) PAYLOAD — צילום מצב חי מהמנוע (לשימוש /payload, UI, דוחות)
 # =============================================================================
 
-_last_payload: Dict[str, Any] = {"ts": 0, "pixels": {}, "metrics": {}}
+# -----------------------------------------------------------------------------
+# Snapshot מגורסן (copy-on-write)
+# • set_payload מפרסם אובייקט חדש לפי reference — בלי deepcopy לכל פריים.
+# • הקוראים מקבלים את אותו אובייקט (zero-copy) ומתייחסים אליו כ-read-only;
+#   מי שצריך לשנות — מחליף מפתחות ב-dict חדש (dict(x)) ולא משנה in-place.
+# • JSON מסוריאל פעם אחת לגרסה; תצוגות נגזרות (metrics שטוח וכו') ממוטמנות
+#   לפי גרסה דרך derive(). ה-ETag נגזר מהגרסה → 304 לפולרים כשאין שינוי.
+# -----------------------------------------------------------------------------
+
+_BOOT_TAG = format(int(time() * 1000) & 0xFFFFFFFF, "x")  # ETag לא מתנגש אחרי restart
+_versions = itertools.count(1)
+
+try:
+    from admin_web.shm_state import SHARED as _SHM
+except Exception:
+    _SHM = None
+
+
+class PayloadSnapshot:
+    """צילום payload בלתי-משתנה (בהסכמה) עם מטמון JSON/תצוגות לפי גרסה."""
+
+    __slots__ = ("version", "data", "created_ts", "etag", "_derived", "_lock")
+
+    def __init__(self, data: Dict[str, Any], version: Optional[int] = None, tag: str = _BOOT_TAG):
+        self.version = int(version if version is not None else next(_versions))
+        self.data = data
+        self.created_ts = time()
+        self.etag = f'"{tag}-{self.version}"'
+        self._derived: Dict[str, Any] = {}
+        self._lock = RLock()  # derive מקונן (תצוגה שנשענת על תצוגה אחרת) מותר
+
+    def derive(self, key: str, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        """מחשב fn(data) פעם אחת לגרסה (לפי key) ומחזיר את התוצאה הממוטמנת."""
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = fn(self.data)
+            return self._derived[key]
+
+    def json_bytes(self) -> bytes:
+        return self.derive("json", lambda d: json.dumps(d, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    def variant_etag(self, variant: str = "") -> str:
+        """ETag של ייצוג חלופי של אותה גרסה (למשל lm=q16) — שונה מה-ETag של הצורה הרגילה."""
+        return f'{self.etag[:-1]}.{variant}"' if variant else self.etag
+
+    def matches(self, if_none_match: Optional[str], variant: str = "") -> bool:
+        """True אם ה-If-None-Match של הלקוח תואם לגרסה הזו (ולייצוג variant) (→ 304)."""
+        if not if_none_match:
+            return False
+        etag = self.variant_etag(variant)
+        tags = [t.strip() for t in str(if_none_match).split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    def __bool__(self) -> bool:
+        return bool(self.data)
+
+
+_EMPTY_PAYLOAD: Dict[str, Any] = {"ts": 0, "pixels": {}, "metrics": {}}
+_last_snapshot = PayloadSnapshot(_EMPTY_PAYLOAD, version=0)
 _payload_lock = Lock()
 
+# גרסאות אחרונות (בסיס ל-delta של לקוחות שמפגרים בכמה פריימים)
+_PAYLOAD_HISTORY = deque(maxlen=max(2, int(os.getenv("PAYLOAD_HISTORY", "32"))))
+
 # תקרות הגנה לגודל אובייקטים שמוחזרים ל-Frontend
 _MAX_LANDMARKS = 99
 _MAX_OBJECTS   = 256
@@ -85,6 +157,7 @@ def _sanitize_payload(p: Dict[str, Any]) -> Dict[str, Any]:
     # mp.landmarks — ודא רשימה וקיצוץ
     mp = out.get("mp")
     if isinstance(mp, dict):
+        mp = dict(mp)  # copy-on-write: לא נוגעים ב-dict של המפיק
         lms = mp.get("landmarks")
         if isinstance(lms, list) and len(lms) > _MAX_LANDMARKS:
             mp["landmarks"] = lms[:_MAX_LANDMARKS]
@@ -102,6 +175,7 @@ def _sanitize_payload(p: Dict[str, Any]) -> Dict[str, Any]:
             "detector_state": {"ok": False, "err": "no_detection_engine", "provider": "none", "fps": 0.0},
         }
     else:
+        od = dict(od)
         objs = od.get("objects")
         if isinstance(objs, list) and len(objs) > _MAX_OBJECTS:
             od["objects"] = objs[:_MAX_OBJECTS]
@@ -115,35 +189,103 @@ def _sanitize_payload(p: Dict[str, Any]) -> Dict[str, Any]:
     return out
 
 
-def set_payload(payload: Dict[str, Any]) -> None:
+def set_payload(payload: Dict[str, Any]) -> PayloadSnapshot:
     """
-    שומר בזיכרון את הפיילוד האחרון שהגיע מהמנוע.
-    • Thread-safe
-    • עושה deepcopy כדי למנוע שינוי מבחוץ
+    מפרסם payload חדש כ-snapshot מגורסן.
+    • Thread-safe; החלפת reference אחת תחת lock
+    • copy-on-write: העותק העליון (וכל בלוק שהסניטציה נוגעת בו) חדש; שאר
+      המבנים המקוננים עוברים לבעלות ה-state — המפיק לא משנה אותם in-place אחרי הפרסום
     """
     if not isinstance(payload, dict):
-        return
-    safe = _sanitize_payload(payload)
-    snap = deepcopy(safe)
+        return _last_snapshot
+    data = _sanitize_payload(payload)
+    if _SHM is not None:
+        snap = _shm_publish_payload(data)
+    else:
+        snap = PayloadSnapshot(data)
     with _payload_lock:
-        globals()["_last_payload"] = snap
+        globals()["_last_snapshot"] = snap
+        _PAYLOAD_HISTORY.append(snap)
     if _HAS_LOGGER:
         try:
-            logger.debug(f"[STATE:set_payload] ts_ms={snap.get('ts_ms')} view={snap.get('view_mode')}")
+            logger.debug(f"[STATE:set_payload] v={snap.version} ts_ms={snap.data.get('ts_ms')} view={snap.data.get('view_mode')}")
         except Exception:
             pass
+    return snap
+
+
+def get_payload_snapshot() -> PayloadSnapshot:
+    """הצילום האחרון כפי שהוא (zero-copy, read-only) — כולל version/etag/json_bytes()."""
+    if _SHM is not None:
+        _shm_pull_payload()
+    return _last_snapshot
+
+
+def get_payload_snapshot_at(version: int) -> Optional[PayloadSnapshot]:
+    """snapshot לפי גרסה מתוך ההיסטוריה הקצרה (None אם כבר נשר)."""
+    with _payload_lock:
+        for snap in reversed(_PAYLOAD_HISTORY):
+            if snap.version == version:
+                return snap
+    return None
 
 
 def get_payload() -> Dict[str, Any]:
-    """מחזיר deepcopy של המצב האחרון (אי-אפשר לשנות לנו את הזיכרון בטעות)."""
+    """
+    עותק עליון (shallow) של המצב האחרון — אפשר להחליף בו מפתחות בבטחה,
+    אבל בלוקים מקוננים משותפים עם ה-snapshot: להעתיק (dict(x)) לפני שינוי.
+    """
+    return dict(get_payload_snapshot().data)
+
+
+# ---- shared memory (STATE_BACKEND=shm) ----
+_shm_seen = {"payload": 0, "status": 0, "frame": 0}
+
+
+def _shm_publish_payload(data: Dict[str, Any]) -> PayloadSnapshot:
+    """גרסה מהמונה המשותף (ETag/delta עקביים בין workers); JSON נכתב פעם אחת ומשמש גם מקומית."""
+    box: Dict[str, PayloadSnapshot] = {}
+
+    def _build(version: int) -> bytes:
+        box["snap"] = PayloadSnapshot(data, version, tag=_SHM.payload.tag)
+        return box["snap"].json_bytes()
+
+    try:
+        _v, seq = _SHM.payload.publish(_build)
+        _shm_seen["payload"] = seq
+    except ValueError as e:  # payload גדול מהאזור — נשאר מקומי בלבד
+        if _HAS_LOGGER:
+            logger.warning(f"[STATE:shm] payload not shared: {e}")
+    return box.get("snap") or PayloadSnapshot(data)
+
+
+def _shm_pull_payload() -> None:
+    """worker קורא: אם כותב אחר פרסם גרסה חדשה — snapshot מה-JSON המשותף (בלי סריאליזציה חוזרת)."""
+    if _SHM.payload.seq() == _shm_seen["payload"]:
+        return
+    r = _SHM.payload.read()
+    if r is None:
+        return
+    seq, version, _ts, blob = r
     with _payload_lock:
-        snap = deepcopy(_last_payload)
-    if _HAS_LOGGER:
+        _shm_seen["payload"] = seq
+        if _last_snapshot.version == version and _last_snapshot.etag.startswith(f'"{_SHM.payload.tag}-'):
+            return
         try:
-            logger.debug(f"[STATE:get_payload] has={bool(snap)} ts_ms={snap.get('ts_ms')}")
-        except Exception:
-            pass
-    return snap
+            snap = PayloadSnapshot(json.loads(blob), version, tag=_SHM.payload.tag)
+        except ValueError:
+            return
+        snap._derived["json"] = blob
+        globals()["_last_snapshot"] = snap
+        _PAYLOAD_HISTORY.append(snap)
+
+
+# מנוי inline ל-BUS("payload") — המנוע מפרסם, ה-state מתעדכן באותו ת'רד (זול: סניטציה + swap)
+try:
+    from core.event_bus import BUS as _BUS
+    _BUS.subscribe("payload", set_payload, name="admin_state", inline=True)
+except Exception:
+    pass
 
 
 # =============================================================================
@@ -316,11 +458,25 @@ def update_od_status(patch: Dict[str, Any]) -> None:
         if "provider" in patch and isinstance(patch["provider"], str):
             _od_status["provider"] = patch["provider"] or _od_status.get("provider", "unknown")
         _od_status["last_update_ts"] = now
+        if _SHM is not None:
+            blob = json.dumps(_od_status).encode("utf-8")
+            try:
+                _shm_seen["status"] = _SHM.status.publish(lambda _v: blob)[1]
+            except ValueError:
+                pass
 
 
 def get_od_status() -> Dict[str, Any]:
     """מצב ל-UI. אם לא עודכן לאחרונה — מחזירים את המצב כפי שהוא (stale זה בסדר לתצוגה)."""
     with _od_status_lock:
+        if _SHM is not None and _SHM.status.seq() != _shm_seen["status"]:
+            r = _SHM.status.read()
+            if r is not None:
+                _shm_seen["status"] = r[0]
+                try:
+                    _od_status.update(json.loads(r[3]))
+                except ValueError:
+                    pass
         return dict(_od_status)
 
 
@@ -368,16 +524,41 @@ def push_frame_np(frame) -> None:
     with _FRAME_LOCK:
         _LAST_FRAME = frame
         _LAST_PUSH_TS = _time.time()
+        if _SHM is not None and _np is not None and getattr(frame, "ndim", 0) == 3:
+            try:
+                arr = _np.ascontiguousarray(frame, dtype=_np.uint8)
+                h, w, c = arr.shape
+                _shm_seen["frame"] = _SHM.frames.write(arr, (h, w, c, 0), _LAST_PUSH_TS)
+            except ValueError:
+                pass  # גדול מה-slot (STATE_SHM_FRAME_BYTES) — נשאר מקומי
+
+
+def _shm_pull_frame() -> None:
+    """לקרוא תחת _FRAME_LOCK. פריים חדש מ-worker אחר → np.ndarray read-only על עותק."""
+    global _LAST_FRAME, _LAST_PUSH_TS
+    if _np is None or _SHM.frames.head() == _shm_seen["frame"]:
+        return
+    r = _SHM.frames.latest()
+    if r is None:
+        return
+    n, ts, (h, w, c, _k), data = r
+    _shm_seen["frame"] = n
+    _LAST_FRAME = _np.frombuffer(data, dtype=_np.uint8).reshape(h, w, c)
+    _LAST_PUSH_TS = ts
 
 
 def get_frame() -> _Optional["__import__('numpy').ndarray"]:  # טיפוס ידידותי לעורכים
     with _FRAME_LOCK:
+        if _SHM is not None:
+            _shm_pull_frame()
         return _LAST_FRAME
 
 
 def is_frame_ready(stale_secs: float = 3.0) -> bool:
     """האם יש פריים “טרי” (דחוף ב-stale_secs האחרונות)?"""
     with _FRAME_LOCK:
+        if _SHM is not None:
+            _shm_pull_frame()
         if _LAST_FRAME is None:
             return False
         return (_time.time() - _LAST_PUSH_TS) <= stale_secs
@@ -1,4 +1,4 @@
-/* static/js/capture_sender.js — Capture מהדפדפן → /api/ingest_frame */
+/* static/js/capture_sender.js — Capture מהדפדפן → FrameChannel (/ws/ingest; fallback /api/ingest_frame) */
 (function () {
   'use strict';
 
@@ -81,11 +81,14 @@
     cEl.width = vw; cEl.height = vh; if (rLbl) rLbl.textContent = `${vw}×${vh}`;
   }
 
-  function draw(){
+  function draw(maxWidth){
     const ctx = cEl.getContext('2d', { willReadFrequently:true });
-    const vw = vEl.videoWidth || cEl.width;
-    const vh = vEl.videoHeight || cEl.height;
-    cEl.width = vw; cEl.height = vh;
+    const sw = vEl.videoWidth || cEl.width;
+    const sh = vEl.videoHeight || cEl.height;
+    // max_width מתקציב השרת — מקטינים כבר כאן, לפני הקידוד
+    const k = (maxWidth && sw > maxWidth) ? maxWidth / sw : 1;
+    const vw = Math.round(sw * k), vh = Math.round(sh * k);
+    if (cEl.width !== vw || cEl.height !== vh){ cEl.width = vw; cEl.height = vh; }
     ctx.save();
     if (chkMir && chkMir.checked){ ctx.scale(-1,1); ctx.drawImage(vEl,-vw,0,vw,vh); }
     else { ctx.drawImage(vEl,0,0,vw,vh); }
@@ -102,51 +105,61 @@
     }catch(_){}
   }
 
+  function renderStatus(j){
+    if (j?.frame?.age_ms != null && latEl) latEl.textContent = j.frame.age_ms;
+  }
   async function pingStatus(){
     try{
       const r = await fetch('/api/video/status', { cache:'no-store' });
       if (!r.ok) return;
-      const j = await r.json();
-      if (j?.frame?.age_ms != null && latEl) latEl.textContent = j.frame.age_ms;
+      renderStatus(await r.json());
     }catch(_){}
   }
 
+  async function openChannel(){
+    const token = (inTok?.value||'').trim();
+    if (window.FrameChannel) return FrameChannel.open({ token });
+    return { kind:'post', maxFps:0, rttMs:null, closed:false, canSend:()=>true, close(){},
+      async send(blob){
+        const headers = { 'Content-Type':'image/jpeg' }; if (token) headers['X-Ingest-Token']=token;
+        const r = await fetch('/api/ingest_frame', { method:'POST', headers, body:blob, keepalive:true });
+        if (!r.ok) throw new Error(`${r.status} ${r.statusText}`);
+      } };
+  }
+
   async function loop(){
-    const endpoint = '/api/ingest_frame';
     const targetFps = Math.max(1, Math.min(60, parseInt(inFps?.value||'15',10)));
-    const frameInterval = 1000 / targetFps;
     const quality = Math.max(40, Math.min(95, parseInt(inQ?.value||'80',10))) / 100;
 
-    setState(`SENDING @ ${targetFps} FPS`);
+    let ch = await openChannel();
+    setState(`SENDING @ ${targetFps} FPS (${ch.kind})`);
     while (sending){
       const t0 = performance.now();
+      // השרת מגביל קצב (max_fps) — לא מצלמים/מקודדים פריימים שיידחו ממילא
+      const fps = Math.min(targetFps, ch.maxFps || targetFps);
       try {
-        draw();
-        const blob = await new Promise(res => cEl.toBlob(res,'image/jpeg', quality));
-        const ab = await blob.arrayBuffer();
-        const headers = { 'Content-Type':'image/jpeg' };
-        const tok = (inTok?.value||'').trim(); if (tok) headers['X-Ingest-Token']=tok;
-
-        const r = await fetch(endpoint, { method:'POST', headers, body:ab, keepalive:true });
-        if (!r.ok){
-          let msg = `${r.status} ${r.statusText}`;
-          try{ const j = await r.json(); if (j?.error) msg += ` | ${j.error}`; }catch(_){}
-          throw new Error(msg);
+        if (ch.closed) { ch = await openChannel(); setState(`SENDING @ ${targetFps} FPS (${ch.kind})`); }
+        if (ch.canSend()){
+          draw(ch.maxWidth);
+          const q = ch.jpegQ ? Math.min(quality, ch.jpegQ) : quality;
+          const blob = await new Promise(res => cEl.toBlob(res,'image/jpeg', q));
+          const res = await ch.send(blob, Date.now());
+          if (ch.rttMs != null && latEl) latEl.textContent = ch.rttMs;
+          if (!(res && res.skipped)){
+            sentCount += 1; if (sentEl) sentEl.textContent = String(sentCount);
+            updateTx();
+          }
+          setErr('');
         }
-        const j = await r.json();
-        const ts = j.ts_ms || 0;
-        if (ts && latEl) latEl.textContent = Math.max(0, Date.now() - ts);
-
-        sentCount += 1; if (sentEl) sentEl.textContent = String(sentCount);
-        updateTx(); setErr('');
       } catch(e){
         console.warn('send error', e);
         setErr('שליחת פריים נכשלה: ' + (e?.message || e));
         await sleep(200);
       }
-      const wait = Math.max(0, frameInterval - (performance.now()-t0));
+      const wait = Math.max(0, 1000 / fps - (performance.now()-t0));
       if (wait>0) await sleep(wait);
     }
+    ch.close();
     setState('IDLE');
   }
 
@@ -186,5 +199,6 @@
   })();
 
   window.addEventListener('beforeunload', ()=>{ sending=false; try{ if(stream){ stream.getTracks().forEach(t=>t.stop()); } }catch(_){ } });
-  setInterval(pingStatus, 1500);
+  if (window.LiveStatus) LiveStatus.on('video', renderStatus);
+  else setInterval(pingStatus, 1500);
 })();
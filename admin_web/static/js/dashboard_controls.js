@@ -170,10 +170,10 @@
     finally { disableBtns(false); }
   }
 
-  // ---------- Poll לסטטוס + התאוששות ----------
-  async function tickStatus() {
+  // ---------- סטטוס (ערוץ live) + התאוששות ----------
+  async function tickStatus(st) {
     try {
-      const st = await apiStatus();
+      if (!st) st = await apiStatus();
       const running = !!st.running;
       setMetrics(st.fps, st.size);
       if (running) {
@@ -190,7 +190,12 @@
     } catch (_) { /* שקט */ }
   }
 
-  function startStatusTimer() { if (statusTimer) clearInterval(statusTimer); statusTimer = setInterval(tickStatus, 2000); }
+  function startStatusTimer() {
+    if (statusTimer) return;
+    statusTimer = true;
+    if (window.LiveStatus) LiveStatus.on("video", st => tickStatus(st));
+    else setInterval(tickStatus, 2000);
+  }
 
   // אירועים
   btnStart && btnStart.addEventListener("click", startFlow);
@@ -200,23 +205,16 @@
   setDots({ camRunning: false, viewShown: false });
   setMetrics(null, null);
   startStatusTimer();
-  tickStatus();
   syncHeights();
 
   // =========================
   // אינדיקציות מערכת (תחתון)
   // =========================
-  async function pollVideoIndicators(){
-    // MJPEG
-    checkStreamHeaders(800).then(h=>{
-      setDot(ind.camDot, ind.camText, !!h.ok, "תקין", "כבוי/לא זמין");
-    });
-
-    // נתוני וידאו
+  function renderVideoIndicators(s){
+    // MJPEG זמין כשהסטרימר פתוח/רץ (בלי לפתוח זרם HEAD כל 2 שניות)
+    setDot(ind.camDot, ind.camText, !!(s && (s.opened || s.running)), "תקין", "כבוי/לא זמין");
     try{
-      const r = await fetch("/api/video/status", { cache:"no-store" });
-      if (!r.ok) throw 0;
-      const s = await r.json();
+      if (!s) throw 0;
       setText(ind.fps,  (s.fps!=null? s.fps : "—"));
       setText(ind.size, (Array.isArray(s.size)? (s.size[0]+"×"+s.size[1]) : "—"));
       setText(ind.up,   (s.uptime_sec!=null? Math.floor(s.uptime_sec/60)+" דק׳" : "—"));
@@ -237,11 +235,9 @@
     return Math.abs(Math.atan2(dx, dy)*180/Math.PI);
   }
 
-  async function pollPayloadIndicators(){
+  function renderPayloadIndicators(j){
     try{
-      const r = await fetch("/payload", { cache:"no-store" });
-      if (!r.ok) throw 0;
-      const j = await r.json();
+      if (!j) throw 0;
       setDot(ind.payDot, ind.payText, true, "תקין", "כבוי/לא זמין");
 
       const m = j.measurements || {};
@@ -261,11 +257,9 @@
   }
 
   // OD: ירוק "תקין" כשפועל (מכסה פורמטים שונים)
-  async function pollODIndicators(){
+  function renderODIndicators(s){
     try{
-      const r = await fetch("/api/od/status", { cache:"no-store" });
-      if (!r.ok) throw 0;
-      const s = await r.json();
+      if (!s) throw 0;
 
       const running = !!(s.running || s.ok || s.enabled || s.active || (s.status && String(s.status).toLowerCase()==="running"));
       setDot(ind.odDot, ind.odText, running, "תקין", "כבוי/לא זמין");
@@ -283,12 +277,13 @@
     }
   }
 
-  // פולינג קל
-  setInterval(pollVideoIndicators, 2000);
-  setInterval(pollPayloadIndicators, 700);
-  setInterval(pollODIndicators, 2000);
-
-  // הפעלה ראשונה
-  pollVideoIndicators(); pollPayloadIndicators(); pollODIndicators();
+  // עדכונים מערוץ ה-live (נשלחים רק כשמשהו השתנה)
+  if (window.LiveStatus) {
+    LiveStatus.on("video",   renderVideoIndicators);
+    LiveStatus.on("payload", renderPayloadIndicators, { rate_ms: 500 });
+    LiveStatus.on("od",      renderODIndicators);
+  } else {
+    renderVideoIndicators(null); renderPayloadIndicators(null); renderODIndicators(null);
+  }
 
 })();
@@ -135,10 +135,9 @@
     }catch{}
   }
 
-  // ---------- Status Poll ----------
-  async function pollStatus(){
+  // ---------- Status (ערוץ live) ----------
+  function renderStatus(s){
     try{
-      const s = await fetch('/api/session/status',{cache:'no-store'}).then(r=>r.ok?r.json():null).catch(()=>null);
       if(s){
         el.dot?.classList.toggle('connected', !!(s.opened || s.running));
         el.vidFps.textContent    = s.fps!=null? s.fps : '—';
@@ -149,16 +148,10 @@
       }
     }catch(_){ el.dot?.classList.remove('connected'); }
   }
-  pollStatus(); setInterval(pollStatus, 2000);
 
-  // ---------- Health/Ready Poll ----------
-  async function pollHealth(){
+  // ---------- Health/Ready (ערוץ live) ----------
+  function renderHealth(h){
     try{
-      const [h, r] = await Promise.all([
-        fetch('/healthz',{cache:'no-store'}).then(x=>x.ok?x.json():null).catch(()=>null),
-        fetch('/readyz',{cache:'no-store'}).then(x=>x.ok?x.json():null).catch(()=>null),
-      ]);
-
       if(h){
         const ok = !!h.ok;
         el.healthDot?.classList.toggle('connected', ok);
@@ -169,7 +162,13 @@
         el.healthDot?.classList.remove('connected');
         el.healthInfo.textContent = '—';
       }
-
+    }catch(_){
+      el.healthDot?.classList.remove('connected');
+      el.healthInfo.textContent = '—';
+    }
+  }
+  function renderReady(r){
+    try{
       if(r){
         const ok = !!r.ok;
         el.readyDot?.classList.toggle('connected', ok);
@@ -181,13 +180,15 @@
         el.readyInfo.textContent = '—';
       }
     }catch(_){
-      el.healthDot?.classList.remove('connected');
       el.readyDot?.classList.remove('connected');
-      el.healthInfo.textContent = '—';
       el.readyInfo.textContent = '—';
     }
   }
-  pollHealth(); setInterval(pollHealth, 4000);
+  if (window.LiveStatus){
+    LiveStatus.on('session', renderStatus);
+    LiveStatus.on('health',  renderHealth);
+    LiveStatus.on('ready',   renderReady);
+  }
 
   // ---------- Gauges (SVG donuts) ----------
   function makeGauge(root, label){
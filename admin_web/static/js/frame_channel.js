@@ -0,0 +1,127 @@
+// admin_web/static/js/frame_channel.js
+// -------------------------------------------------------
+// 📷 FrameChannel — ערוץ ingest מתמשך לפריימי JPEG (ראה admin_web/routes_ingest.py)
+//
+// שימוש:
+//   const ch = await FrameChannel.open({ token });
+//   if (ch.canSend()) await ch.send(blob, Date.now());
+//   ch.maxFps / ch.maxWidth / ch.jpegQ → תקציב המפיק מהשרת (admission) —
+//                לא לשלוח מהר/גדול/איכותי מזה; מתעדכן בכל flow / תשובת POST
+//   ch.rttMs   → זמן עד ack של הפריים האחרון (WS בלבד)
+//   ch.kind    → 'ws' | 'post'
+//   ch.close()
+//
+// • WS: הודעה בינארית = u32 len | f64 client_ts_ms | jpeg (big-endian).
+//   השרת מחזיר {"t":"flow","ack","window","max_fps","max_width","jpeg_q"} — לא שולחים יותר
+//   מ-window פריימים בלי ack (מצלמה מהירה מרשת איטית = דילוג בצד הלקוח).
+// • אם אין WebSocket בשרת (flask-sock לא מותקן) — POST /api/ingest_frame כמו קודם;
+//   429 over_budget אינו שגיאה — send() מחזיר {skipped:true} והתקציב מתעדכן.
+// -------------------------------------------------------
+(function () {
+  if (window.FrameChannel) return;
+
+  const POST_URL = '/api/ingest_frame';
+  const WS_OPEN_TIMEOUT_MS = 3000;
+  const MAX_BUFFERED = 2 * 1024 * 1024;
+
+  function header(len, tsMs) {
+    const h = new ArrayBuffer(12);
+    const dv = new DataView(h);
+    dv.setUint32(0, len);
+    dv.setFloat64(4, tsMs);
+    return h;
+  }
+
+  function applyBudget(ch, b) {
+    if (!b) return;
+    if (b.max_fps || b.fps) ch.maxFps = b.max_fps || b.fps;
+    if (b.max_width) ch.maxWidth = b.max_width;
+    if (b.jpeg_q) ch.jpegQ = b.jpeg_q;
+  }
+
+  function postChannel(token) {
+    let inflight = 0;
+    const producer = 'tab-' + Math.random().toString(36).slice(2, 10);
+    return {
+      kind: 'post', maxFps: 0, maxWidth: 0, jpegQ: 0, rttMs: null,
+      canSend() { return inflight === 0; },
+      async send(blob) {
+        inflight++;
+        const t0 = performance.now();
+        try {
+          const headers = { 'Content-Type': 'image/jpeg', 'X-Producer-Id': producer };
+          if (token) headers['X-Ingest-Token'] = token;
+          const r = await fetch(POST_URL, { method: 'POST', headers, body: blob, keepalive: true });
+          if (r.status === 429) {
+            try { applyBudget(this, (await r.json()).budget); } catch (_) {}
+            return { skipped: true };
+          }
+          if (!r.ok) {
+            let msg = `${r.status} ${r.statusText}`;
+            try { const j = await r.json(); if (j && j.error) msg += ` | ${j.error}`; } catch (_) {}
+            throw new Error(msg);
+          }
+          this.rttMs = Math.round(performance.now() - t0);
+          try { applyBudget(this, (await r.json()).budget); } catch (_) {}
+          return { skipped: false };
+        } finally { inflight--; }
+      },
+      close() {},
+    };
+  }
+
+  function wsChannel(token) {
+    return new Promise((resolve, reject) => {
+      const proto = location.protocol === 'https:' ? 'wss' : 'ws';
+      const qs = token ? ('?token=' + encodeURIComponent(token)) : '';
+      let ws;
+      try { ws = new WebSocket(`${proto}://${location.host}/ws/ingest${qs}`); }
+      catch (e) { reject(e); return; }
+      ws.binaryType = 'arraybuffer';
+
+      const sentAt = {};   // seq → performance.now()
+      const ch = {
+        kind: 'ws', maxFps: 0, maxWidth: 0, jpegQ: 0, rttMs: null, window: 1, seq: 0, ack: 0, dropped: 0, closed: false,
+        canSend() {
+          return !this.closed && ws.readyState === 1
+            && (this.seq - this.ack) < this.window && ws.bufferedAmount < MAX_BUFFERED;
+        },
+        async send(blob, tsMs) {
+          if (this.closed) throw new Error('channel closed');
+          this.seq++;
+          sentAt[this.seq] = performance.now();
+          ws.send(new Blob([header(blob.size, tsMs), blob]));
+          return { skipped: false };
+        },
+        close() { this.closed = true; try { ws.close(); } catch (_) {} },
+      };
+
+      const timer = setTimeout(() => { try { ws.close(); } catch (_) {} reject(new Error('ws timeout')); }, WS_OPEN_TIMEOUT_MS);
+      ws.onmessage = ev => {
+        let m; try { m = JSON.parse(ev.data); } catch (_) { return; }
+        if (m.t !== 'flow' && m.t !== 'error') return;
+        applyBudget(ch, m);
+        if (m.window) ch.window = m.window;
+        if (m.dropped != null) ch.dropped = m.dropped;
+        if (m.ack != null && m.ack >= ch.ack) {
+          if (sentAt[m.ack] != null) ch.rttMs = Math.round(performance.now() - sentAt[m.ack]);
+          for (let s = ch.ack; s <= m.ack; s++) delete sentAt[s];
+          ch.ack = m.ack;
+        }
+        if (m.t === 'flow' && timer) { clearTimeout(timer); resolve(ch); }
+      };
+      ws.onerror = () => { clearTimeout(timer); reject(new Error('ws error')); };
+      ws.onclose = () => { ch.closed = true; clearTimeout(timer); reject(new Error('ws closed')); };
+    });
+  }
+
+  async function open(opts) {
+    const token = ((opts && opts.token) || '').trim();
+    if (window.WebSocket) {
+      try { return await wsChannel(token); } catch (e) { console.warn('FrameChannel: WS unavailable, using POST', e); }
+    }
+    return postChannel(token);
+  }
+
+  window.FrameChannel = { open };
+})();
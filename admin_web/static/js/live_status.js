@@ -0,0 +1,136 @@
+// admin_web/static/js/live_status.js
+// -------------------------------------------------------
+// 📶 LiveStatus — חיבור SSE יחיד לעמוד (/api/live/stream) במקום setInterval לכל endpoint
+//
+// שימוש:
+//   LiveStatus.on('payload', p => ..., { rate_ms: 500 });
+//   LiveStatus.on('video'|'od'|'health'|'ready'|'session', s => ...);
+//   LiveStatus.last('video')  → הערך האחרון שהתקבל (או undefined)
+//
+// • כל ה-topics שנרשמו עד DOMContentLoaded יוצאים בחיבור אחד; רישום מאוחר
+//   ל-topic חדש פותח מחדש את החיבור פעם אחת.
+// • השרת שולח רק כשהגרסה השתנתה — אין עדכון = אין שינוי.
+// • payload מגיע כ-delta (רק מפתחות שהשתנו + keyframe מחזורי) ומורכב כאן
+//   חזרה לאובייקט מלא — המנויים תמיד מקבלים payload שלם.
+// • אם אין EventSource / השרת דחה (503) — נופלים לפולינג ישן לאותם topics.
+// -------------------------------------------------------
+(function () {
+  if (window.LiveStatus) return;
+
+  const FALLBACK = {
+    payload: ['/payload', 700],
+    video:   ['/api/video/status', 2000],
+    od:      ['/api/objdet/status', 2000],
+    health:  ['/healthz', 2000],
+    ready:   ['/readyz', 4000],
+    session: ['/api/session/status', 2000],
+  };
+
+  const subs = {};     // topic → [cb]
+  const last = {};     // topic → data
+  const rates = {};    // topic → ms (המינימום שביקשו)
+  let es = null, esTopics = '', timer = null, ready = false;
+  const polls = {};    // topic → intervalId (fallback)
+
+  // ---- payload delta (JSON Pointer paths; ראה admin_web/payload_delta.py) ----
+  let flat = null;
+  const unesc = k => k.replace(/~1/g, '/').replace(/~0/g, '~');
+  function flatten(obj, prefix, out) {
+    for (const k of Object.keys(obj)) {
+      const v = obj[k], p = prefix + '/' + String(k).replace(/~/g, '~0').replace(/\//g, '~1');
+      if (v && typeof v === 'object' && !Array.isArray(v) && Object.keys(v).length) flatten(v, p, out);
+      else out[p] = v;
+    }
+    return out;
+  }
+  function unflatten(f) {
+    const root = {};
+    for (const path of Object.keys(f)) {
+      const parts = path.split('/').slice(1).map(unesc);
+      let node = root;
+      for (let i = 0; i < parts.length - 1; i++) {
+        if (!node[parts[i]] || typeof node[parts[i]] !== 'object' || Array.isArray(node[parts[i]])) node[parts[i]] = {};
+        node = node[parts[i]];
+      }
+      node[parts[parts.length - 1]] = f[path];
+    }
+    return root;
+  }
+  function applyDelta(msg) {
+    if (msg.key) flat = flatten(msg.full || {}, '', {});
+    else {
+      if (!flat) return;  // delta בלי keyframe — מחכים ל-keyframe
+      (msg.del || []).forEach(p => { delete flat[p]; });
+      Object.assign(flat, msg.set || {});
+    }
+    emit('payload', unflatten(flat));
+  }
+
+  function emit(topic, data) {
+    last[topic] = data;
+    for (const cb of (subs[topic] || [])) { try { cb(data); } catch (_) {} }
+  }
+
+  function startPolling() {
+    Object.keys(subs).forEach(topic => {
+      if (polls[topic] || !FALLBACK[topic]) return;
+      const [url, ms] = FALLBACK[topic];
+      const tick = () => fetch(url, { cache: 'no-store' })
+        .then(r => r.json()).then(j => emit(topic, j)).catch(() => {});
+      tick();
+      polls[topic] = setInterval(tick, Math.max(ms, rates[topic] || 0));
+    });
+  }
+
+  function stopPolling() {
+    Object.keys(polls).forEach(t => { clearInterval(polls[t]); delete polls[t]; });
+  }
+
+  function connect() {
+    const topics = Object.keys(subs).sort();
+    if (!topics.length) return;
+    if (!window.EventSource) { startPolling(); return; }
+    const key = topics.join(',');
+    if (es && esTopics === key && es.readyState !== 2) return;
+    if (es) { try { es.close(); } catch (_) {} }
+    const qs = new URLSearchParams({ topics: key, payload: 'delta' });
+    topics.forEach(t => { if (rates[t]) qs.set('rate_' + t, rates[t]); });
+    esTopics = key;
+    flat = null;
+    es = new EventSource('/api/live/stream?' + qs.toString());
+    topics.forEach(t => es.addEventListener(t, ev => {
+      try { emit(t, JSON.parse(ev.data)); } catch (_) {}
+    }));
+    es.addEventListener('payload_delta', ev => {
+      try { applyDelta(JSON.parse(ev.data)); } catch (_) {}
+    });
+    es.onopen = stopPolling;
+    es.onerror = () => {
+      // EventSource מתחבר מחדש לבד; אם נסגר סופית (למשל 503) — פולינג ונסיון חוזר
+      if (es && es.readyState === 2) {
+        startPolling();
+        setTimeout(connect, 15000);
+      }
+    };
+  }
+
+  function schedule() {
+    if (!ready) return;
+    clearTimeout(timer);
+    timer = setTimeout(connect, 50);
+  }
+
+  function on(topic, cb, opts) {
+    (subs[topic] = subs[topic] || []).push(cb);
+    if (opts && opts.rate_ms) rates[topic] = Math.min(rates[topic] || Infinity, opts.rate_ms);
+    if (topic in last) { try { cb(last[topic]); } catch (_) {} }
+    if (Object.keys(polls).length) startPolling();
+    else schedule();
+  }
+
+  function init() { ready = true; schedule(); }
+  if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', init);
+  else init();
+
+  window.LiveStatus = { on, last: t => last[t] };
+})();
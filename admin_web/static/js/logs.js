@@ -47,6 +47,7 @@
   /** @type {{ts:number, level:string, msg:string, repeat?:number}[]} */
   let rows = [];
   let lastTs = 0;
+  let lastSeq = 0;   // cursor מהשרת (seq) — מונע כפילויות בין SSE לפולינג
 
   // ספריות רינדור
   let renderScheduled = false;
@@ -223,6 +224,10 @@
   function pushRows(arr) {
     let added = 0;
     for (const r of arr) {
+      if (typeof r.seq === 'number') {
+        if (r.seq <= lastSeq) continue;
+        lastSeq = r.seq;
+      }
       const level = normalizeLevel(r.level);
       const msg = r.msg || '';
       if (shouldIgnore(level, msg)) continue;
@@ -247,7 +252,9 @@
 
   // ---------- Polling (fallback) ----------
   async function pollOnce() {
-    const url = '/api/logs?since=' + encodeURIComponent(lastTs || 0);
+    const url = lastSeq
+      ? '/api/logs?after=' + encodeURIComponent(lastSeq)
+      : '/api/logs?since=' + encodeURIComponent(lastTs || 0);
     const res = await fetch(url, { cache: 'no-store' });
     if (!res.ok) throw new Error('HTTP ' + res.status);
     const data = await res.json();
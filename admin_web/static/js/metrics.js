@@ -271,9 +271,9 @@
     if(!r.ok) throw new Error(r.statusText);
     return r.json();
   }
-  async function tick(){
+  function render(payload){
+    if(!payload) return;
     try{
-      const payload = await fetchPayload();
       const flat = flatten(payload);
 
       paintSection('sec-posture', flat);
@@ -291,6 +291,9 @@
         $('rawDataJSON').textContent = JSON.stringify(payload, null, 2);
       }
     }catch(_e){ /* שקט */ }
+  }
+  async function tick(){
+    try{ render(await fetchPayload()); }catch(_e){ /* שקט */ }
     finally{ setTimeout(tick, forceNow? 50 : REFRESH); forceNow=false; }
   }
 
@@ -298,18 +301,21 @@
   $('q')?.addEventListener('input', ()=>{/* table רענון בטיק הבא */});
   $('toggleRawData')?.addEventListener('click', ()=> $('rawDataBox')?.classList.toggle('hidden'));
   $('toggle_show_raw')?.addEventListener('change', ()=>{/* יתעדכן בטיק הבא */});
-  $('btnCheckNow')?.addEventListener('click', ()=>{ forceNow=true; });
+  $('btnCheckNow')?.addEventListener('click', ()=>{ forceNow=true; rerender(); });
   $('btnToggleConf')?.addEventListener('click', (e)=>{
     showConfidence=!showConfidence;
     e.target.classList.toggle('ghost', !showConfidence);
-    forceNow = true; // הצג/הסתר מיידית את באדג'י האמון
+    forceNow = true; rerender(); // הצג/הסתר מיידית את באדג'י האמון
   });
   $('btnToggleSkeleton')?.addEventListener('click', (e)=>{
     const wrap = $('skeleton_wrap');
     const isHidden = wrap?.classList.toggle('hidden');
     e.target.classList.toggle('ghost', !!isHidden);
-    // הווידג'ט עצמו מבצע polling עצמאי (skeleton_widget.js על .bp-skeleton)
+    // הווידג'ט עצמו מתעדכן לבד (skeleton_widget.js על .bp-skeleton)
   });
 
-  tick();
+  // ערוץ live: עדכון רק כשה-payload השתנה; בלי EventSource — polling כמו קודם
+  function rerender(){ if (window.LiveStatus) render(LiveStatus.last('payload')); }
+  if (window.LiveStatus) LiveStatus.on('payload', render, { rate_ms: REFRESH });
+  else tick();
 })();
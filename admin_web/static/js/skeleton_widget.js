@@ -6,6 +6,8 @@
    • OVERLAY_MIN_CHANGE להפחתת ריצודים במספרים על הקשתות.
    • throttle לסטטוס/טבלת המדידות.
    • טבלת המדידות בצבעים ניטרליים בלבד (ללא ירוק/אדום).
+   • מפענח landmarks קומפקטיים (mp.landmarks_q / mp.hands_q — core/landmark_codec.py),
+     למשל data-endpoint="/payload?lm=b64". חשוף גם כ-window.BPLandmarks.decode.
    שימוש:
    <div class="bp-skeleton" data-endpoint="/payload" data-autostart="true">
      <input type="checkbox" class="bp-skel-toggle">
@@ -94,9 +96,17 @@
     function stop(){ setStatus("כבוי"); if (raf) cancelAnimationFrame(raf); raf=null; clear(); }
     if (enabled) start(); else stop();
 
-    // ----- data polling -----
+    // ----- data: ערוץ live משותף כשמדובר ב-/payload, אחרת polling -----
+    let liveHooked = false;
     async function poll(){
       if (!enabled) return;
+      if (endpoint === "/payload" && window.LiveStatus) {
+        if (!liveHooked) {
+          liveHooked = true;
+          LiveStatus.on("payload", p => { if (enabled) lastRaw = p; }, { rate_ms: 200 });
+        }
+        return;
+      }
       try {
         const r = await fetch(endpoint, { cache: "no-store" });
         if (r.ok) lastRaw = await r.json();
@@ -284,7 +294,8 @@
       wrist_right:    m("wrist_flex_ext_right_deg"),
     };
 
-    const mp = raw?.mp || raw?.mediapipe || null;
+    let mp = raw?.mp || raw?.mediapipe || null;
+    if (mp && (mp.landmarks_q || mp.hands_q)) mp = expandCompactMp(mp);
     if (mp && mp.mirror_x == null) mp.mirror_x = mirrored;
 
     return {
@@ -300,6 +311,37 @@
     };
   }
 
+  // ---------------- Compact landmarks (q16 / q16b64) ----------------
+  // q16:    {fmt:"q16", n, xy:[x0,y0,...] uint16, v:[...] uint8}
+  // q16b64: {fmt:"q16b64", n, b64} — n×(x,y) uint16 LE ואחריהם n×uint8 visibility
+  function decodeLandmarksQ(enc){
+    if (!enc || typeof enc !== "object") return [];
+    const n = enc.n|0, out = new Array(n);
+    let xy, v;
+    if (enc.fmt === "q16b64"){
+      const bin = atob(enc.b64 || ""), bytes = new Uint8Array(bin.length);
+      for (let i=0;i<bin.length;i++) bytes[i] = bin.charCodeAt(i);
+      const dv = new DataView(bytes.buffer);
+      xy = { get: i => dv.getUint16(i*2, true) };
+      v  = { get: i => bytes[n*4 + i] };
+    } else if (enc.fmt === "q16"){
+      xy = { get: i => enc.xy[i] };
+      v  = { get: i => enc.v[i] };
+    } else return [];
+    for (let i=0;i<n;i++){
+      out[i] = { x: xy.get(2*i)/65535, y: xy.get(2*i+1)/65535, visibility: v.get(i)/255 };
+    }
+    return out;
+  }
+  function expandCompactMp(mp){
+    const out = Object.assign({}, mp);
+    if (mp.landmarks_q && !Array.isArray(mp.landmarks)) out.landmarks = decodeLandmarksQ(mp.landmarks_q);
+    if (Array.isArray(mp.hands_q) && !Array.isArray(mp.hands)) out.hands = mp.hands_q.map(decodeLandmarksQ);
+    delete out.landmarks_q; delete out.hands_q;
+    return out;
+  }
+  window.BPLandmarks = { decode: decodeLandmarksQ, expandMp: expandCompactMp };
+
   // ---------------- Math / Draw helpers ----------------
   function smoothAngles(a, ema){
     const out={}, keys=["shoulder_left","shoulder_right","elbow_left","elbow_right","hip_left","hip_right","knee_left","knee_right","wrist_left","wrist_right"];
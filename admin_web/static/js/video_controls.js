@@ -143,7 +143,13 @@
   if (btnStart) btnStart.addEventListener('click', startCamera);
   if (btnStop)  btnStop .addEventListener('click', stopCamera);
 
-  function init(){ refreshState(); setInterval(refreshState, 2000); }
+  function init(){
+    if (window.LiveStatus){
+      LiveStatus.on('video', function(s){ if (s && (s.ok || (typeof s.opened !== 'undefined'))) renderStatus(s); });
+    } else {
+      refreshState(); setInterval(refreshState, 2000);
+    }
+  }
   if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', init);
   else init();
 })();
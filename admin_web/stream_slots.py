@@ -0,0 +1,88 @@
+# admin_web/stream_slots.py
+# -------------------------------------------------------
+# 🧵 תקרה משותפת לחיבורים ארוכים (SSE / WebSocket / chunked)
+# -------------------------------------------------------
+# עם gthread (gunicorn --threads N) כל SSE פתוח / טלפון על /ws/ingest מחזיק ת'רד
+# לכל אורך החיבור. בלי תקרה — כמה טאבים וטלפונים מרעיבים את כל שאר הבקשות,
+# כולל /healthz. לכן כל החיבורים הארוכים חולקים מאגר אחד:
+#   STREAM_SLOTS_MAX = WEB_THREADS − STREAM_RESERVED_THREADS (ברירת מחדל 8 − 3 = 5)
+# מעבר לתקרה: 503 + Retry-After + retry_ms (SSE / chunked) או הודעת error ב-WS.
+#
+# שימוש:
+#   slot = acquire_slot("live")
+#   if slot is None:
+#       return busy_response("live")
+#   ...  slot.release() ב-finally של הגנרטור וגם ב-call_on_close (אידמפוטנטי)
+# -------------------------------------------------------
+from __future__ import annotations
+
+import math
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from flask import jsonify
+
+from core.pubsub import HubFull, SubscriberGate
+
+__all__ = ["STREAM_SLOTS", "STREAM_SLOTS_MAX", "STREAM_RETRY_MS", "StreamSlot",
+           "acquire_slot", "busy_response", "busy_message", "stats"]
+
+WEB_THREADS = int(os.getenv("WEB_THREADS", "8"))                        # ה---threads של gunicorn
+STREAM_RESERVED_THREADS = int(os.getenv("STREAM_RESERVED_THREADS", "3"))  # נשארים לבקשות קצרות
+STREAM_SLOTS_MAX = int(os.getenv("STREAM_SLOTS_MAX", "0")) or max(1, WEB_THREADS - STREAM_RESERVED_THREADS)
+STREAM_RETRY_MS = int(os.getenv("STREAM_RETRY_MS", "5000"))
+
+STREAM_SLOTS = SubscriberGate(STREAM_SLOTS_MAX)
+_by_kind: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+class StreamSlot:
+    """מקום אחד במאגר; release() אידמפוטנטי."""
+
+    __slots__ = ("kind", "_gate", "_released")
+
+    def __init__(self, kind: str, gate: SubscriberGate):
+        self.kind = kind
+        self._gate = gate
+        self._released = False
+
+    def release(self) -> None:
+        with _lock:
+            if self._released:
+                return
+            self._released = True
+            _by_kind[self.kind] = max(0, _by_kind.get(self.kind, 0) - 1)
+        self._gate.release()
+
+
+def acquire_slot(kind: str) -> Optional[StreamSlot]:
+    """מקום לחיבור ארוך מסוג kind, או None כשהמאגר מלא."""
+    gate = STREAM_SLOTS
+    try:
+        gate.acquire()
+    except HubFull:
+        return None
+    with _lock:
+        _by_kind[kind] = _by_kind.get(kind, 0) + 1
+    return StreamSlot(kind, gate)
+
+
+def busy_message(kind: str) -> Dict[str, Any]:
+    return {"ok": False, "error": "too_many_streams", "kind": kind,
+            "max": STREAM_SLOTS.max_subscribers, "retry_ms": STREAM_RETRY_MS}
+
+
+def busy_response(kind: str):
+    """503 עם Retry-After (שניות) ו-retry_ms בגוף."""
+    resp = jsonify(busy_message(kind))
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(max(1, math.ceil(STREAM_RETRY_MS / 1000.0)))
+    return resp
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        by_kind = dict(_by_kind)
+    return {"active": STREAM_SLOTS.active, "max": STREAM_SLOTS.max_subscribers, "by_kind": by_kind}
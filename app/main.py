@@ -120,11 +120,11 @@ from core.mediapipe_runner import MediaPipeRunner  # ללא OpenCV
 from core.payload import ensure_schema
 
 # ---------- /payload bridge ----------
+# admin_web.state נרשם ל-BUS("payload") בעת import; הלולאה רק מפרסמת (לא חוסמת)
+from core.event_bus import BUS, start_forwarder
 try:
-    from admin_web.state import set_payload, set_od_engine  # type: ignore
+    from admin_web.state import set_od_engine  # type: ignore
 except Exception:
-    def set_payload(_p: Dict[str, Any]) -> None:  # type: ignore
-        pass
     def set_od_engine(_e) -> None:  # type: ignore
         pass
 
@@ -145,19 +145,13 @@ DEFAULT_MIRROR_X = True
 
 PUSH_PERIOD_MS   = int(os.getenv("PUSH_PERIOD_MS", "200"))
 SEND_HTTP_PUSH   = os.getenv("SEND_HTTP_PUSH", "0") == "1"
-_PUSH_ERR_STATE  = {"sig": None, "count": 0, "last": 0.0}
+# שרת מרוחק בלבד (…/api/payload_push/batch) — השרת המקומי כבר מקבל את ה-payload דרך BUS
+PUSH_URL         = os.getenv("PUSH_URL", "").strip()
 
 WATCHDOG_ENABLED     = True
 WATCHDOG_IDLE_SEC    = float(os.getenv("VIDEO_WATCHDOG_IDLE_SEC", "10"))
 WATCHDOG_CHECK_EVERY = 1.0
 
-# אופציונלי: requests (ל-payload_push מקומי)
-try:
-    import requests
-    _REQUESTS_AVAILABLE = True
-except Exception:
-    _REQUESTS_AVAILABLE = False
-
 
 def _init_logging_safe() -> None:
     if not _LOGS_AVAILABLE:
@@ -256,23 +250,6 @@ def _ensure_detections_block(payload: Dict[str, Any]) -> Dict[str, Any]:
     return payload
 
 
-def _dedup_push_error(name: str, detail: Any) -> None:
-    try:
-        sig = (name, bool(detail)); now = time.time()
-        if _PUSH_ERR_STATE["sig"] != sig or (now - _PUSH_ERR_STATE["last"] > 5.0):
-            cnt = _PUSH_ERR_STATE["count"]
-            _PUSH_ERR_STATE.update({"sig": sig, "count": 0, "last": now})
-            if name not in ("timeout", "payload_push timeout", "payload_push warning: timeout"):
-                msg = f"payload_push warning: {name}"
-                if detail is not None: msg += f" | detail={detail!r}"
-                if cnt: msg += f" | suppressed={cnt}"
-                logger.warning(msg)
-        else:
-            _PUSH_ERR_STATE["count"] += 1
-    except Exception:
-        pass
-
-
 # ======================= עטיפות סטרימר + Watchdog =======================
 def _safe_bool(x) -> bool:
     try:
@@ -351,10 +328,17 @@ class App:
         self.mpr: Optional[MediaPipeRunner] = None
 
         self.od_engine = None
-        self.od_last_update: float = 0.0
+        self.od_seen_version: int = 0
         self.od_period_ms: int = 250
 
-        self._last_push_ms: float = 0.0
+        self._forwarder = None
+        if SEND_HTTP_PUSH and not PUSH_URL:
+            logger.warning("SEND_HTTP_PUSH=1 without PUSH_URL — forwarder not started (local state uses BUS)")
+        elif SEND_HTTP_PUSH:
+            try:
+                self._forwarder = start_forwarder(PUSH_URL, period_ms=PUSH_PERIOD_MS)
+            except Exception as e:
+                logger.warning(f"payload forwarder unavailable: {e}")
 
         self._payload: Dict[str, Any] = {
             "ts_ms": int(self._time.time() * 1000),
@@ -468,9 +452,11 @@ class App:
             except Exception:
                 pass
             per = getattr(getattr(self.od_engine, "detector_cfg", object()), "period_ms", 250)
-            self.od_period_ms = max(200, int(per))
+            self.od_period_ms = int(per)
             self.od_engine.start()
-            logger.info(f"מנוע זיהוי אובייקטים הופעל (period={self.od_period_ms}ms)")
+            # worker ברקע — הקצב נקרא חי מ-detector_cfg.period_ms (מתעדכן מ-/api/objdet/config)
+            self.od_engine.start_worker()
+            logger.info(f"מנוע זיהוי אובייקטים הופעל (period={self.od_period_ms}ms, worker)")
             try:
                 set_od_engine(self.od_engine)
                 logger.info("OD engine registered to admin_web.state")
@@ -519,6 +505,9 @@ class App:
         logger.info("Shutting down…")
         self.running = False
 
+        if self._forwarder is not None:
+            self._forwarder.close()
+
         if self.mpr is not None:
             try: self.mpr.release()
             except Exception: pass
@@ -574,8 +563,7 @@ class App:
             meta["fps"] = float(self._fps_ema or 0.0)
             p["meta"] = meta
             self._payload_set(p)
-            try: set_payload(p)
-            except Exception: pass
+            BUS.publish("payload", p)
             self.root.after(LOOP_INTERVAL_MS, self._loop_once)
             return
 
@@ -609,6 +597,7 @@ class App:
         objdet_payload = self._process_object_detection(frame)
         if objdet_payload:
             payload["objdet"] = objdet_payload
+            BUS.publish("objdet", objdet_payload)
 
         # ---- mp.landmarks מנורמל ----
         try:
@@ -632,41 +621,34 @@ class App:
         meta["fps"] = float(self._fps_ema or 0.0)
         payload["meta"] = meta
 
-        # ---- דחיפת payload לזיכרון ----
+        # ---- פרסום payload: /payload מקומי + forwarder מרוחק (SEND_HTTP_PUSH) ברקע ----
         self._payload_set(payload)
-        try:
-            set_payload(payload)
-        except Exception:
-            pass
-
-        # >>> שליחת HTTP (אופציונלי)
-        now_ms = time.time() * 1000.0
-        if SEND_HTTP_PUSH and _REQUESTS_AVAILABLE and (now_ms - self._last_push_ms >= PUSH_PERIOD_MS):
-            self._last_push_ms = now_ms
-            try:
-                requests.post("http://127.0.0.1:5000/api/payload_push", json=payload, timeout=0.2)
-            except requests.Timeout:
-                _dedup_push_error("timeout", None)
-            except Exception as e:
-                _dedup_push_error("post_failed", str(e))
+        BUS.publish("payload", payload)
 
         import tkinter as tk  # מקומי
         self.root.after(LOOP_INTERVAL_MS, self._loop_once)
 
     # ---------- OD tick ----------
     def _process_object_detection(self, frame) -> Optional[Dict[str, Any]]:
+        """
+        מגיש את הפריים ל-worker של ה-OD (latest-wins, לא חוסם) ומחזיר payload
+        רק כשיש תוצאה חדשה; האינפרנס עצמו רץ ברקע בקצב period_ms של המנוע.
+        """
         if not self.od_engine or frame is None:
             return None
-        now_ms = time.time() * 1000
-        if (now_ms - self.od_last_update) < self.od_period_ms:
-            return None
-        self.od_last_update = now_ms
-        ts_ms = int(now_ms)
+        ts_ms = int(time.time() * 1000)
         try:
+            # נקודות ה-pose האחרונות → crops סביב ידיים/רגליים (כשה-OD במצב pose_roi);
+            # עם חותמת הזמן שלהן — כדי ש-OD_POSE_ROI_MAX_AGE_MS יזהה נקודות ישנות
+            kps, kps_hw, kps_ts = KINEMATICS.last_keypoints()
+            self.od_engine.set_pose_keypoints(kps, kps_hw, kps_ts)
             # ⚠️ חשוב: מעבירים את הפריים המקורי, בלי המרות צבע, כדי לשמור על עקביות מודל ה-OD
-            self.od_engine.update_frame(frame, ts_ms=ts_ms)
-            _tracks, raw_payload = self.od_engine.tick()
-            return self._convert_od_payload_for_frontend(raw_payload, frame.shape, ts_ms)
+            self.od_engine.submit_frame(frame, ts_ms=ts_ms)
+            res = self.od_engine.latest_result()
+            if res.version == self.od_seen_version:
+                return None
+            self.od_seen_version = res.version
+            return self._convert_od_payload_for_frontend(res.payload, res.frame_hw or frame.shape, res.ts_ms)
         except Exception as e:
             logger.warning(f"שגיאה בעיבוד זיהוי אובייקטים (ignored): {e}")
             h, w = frame.shape[:2] if hasattr(frame, "shape") else (720, 1280)
@@ -42,6 +42,12 @@ except Exception as e:
     PIL_OK = False
     logger.warning(f"PIL/numpy unavailable — {e!r}")
 
+# ===== Shared memory (STATE_BACKEND=shm) — JPEG אחרון משותף לכל ה-workers =====
+try:
+    from admin_web.shm_state import SHARED as _SHM  # type: ignore
+except Exception:
+    _SHM = None
+
 def _safe_now() -> float:
     try:
         return time.time()
@@ -85,6 +91,8 @@ class VideoStreamer:
         self._last_size: Optional[Tuple[int, int]] = None
         self._last_push_ts: float = 0.0
 
+        self._shm_seen: int = 0
+
         self._fps_win: List[float] = []
         self._last_fps: Optional[float] = None
 
@@ -122,6 +130,7 @@ class VideoStreamer:
     # -------- תאימות ל־routes_video --------
     def has_frames(self) -> bool:
         """בודק אם קיים פריים אחרון בזיכרון."""
+        self._pull_shared()
         return self._last_jpeg is not None
 
     def buffer_len(self) -> int:
@@ -173,6 +182,11 @@ class VideoStreamer:
         self._running = True
         self._last_push_ts = now
 
+        # מעל encode_fps — נזרק לפני probe/העתקה (המפיק אמור לכבד את תקציב ה-admission)
+        if self.encode_fps > 0 and now < self._next_encode_due:
+            return
+        self._next_encode_due = now + (1.0 / float(self.encode_fps)) if self.encode_fps > 0 else now
+
         if PIL_OK:
             try:
                 with Image.open(BytesIO(jpeg_bytes)) as im:  # type: ignore
@@ -180,22 +194,42 @@ class VideoStreamer:
             except Exception:
                 pass
 
-        if self.encode_fps > 0 and now < self._next_encode_due:
-            return
-        self._next_encode_due = now + (1.0 / float(self.encode_fps)) if self.encode_fps > 0 else now
-
         with self._cv:
             self._last_jpeg = bytes(jpeg_bytes)
+            if _SHM is not None:
+                w, h = self._last_size or (0, 0)
+                try:
+                    self._shm_seen = _SHM.jpeg.write(self._last_jpeg, (w, h, 0, 0), now)
+                except ValueError:
+                    pass  # גדול מה-slot (STATE_SHM_JPEG_BYTES)
             self._cv.notify_all()
 
         self._update_fps(now)
         logger.debug("Frame ingested | size=%d bytes | fps≈%s", len(jpeg_bytes), self._last_fps or 0)
 
+    def _pull_shared(self) -> None:
+        """worker שלא קיבל את הפריים בעצמו: JPEG חדש מה-ring המשותף (בדיקת head זולה)."""
+        if _SHM is None or _SHM.jpeg.head() == self._shm_seen:
+            return
+        r = _SHM.jpeg.latest()
+        if r is None:
+            return
+        n, ts, (w, h, _c, _k), data = r
+        with self._cv:
+            self._shm_seen = n
+            self._last_jpeg = data
+            if w and h:
+                self._last_size = (w, h)
+            self._last_push_ts = ts
+            self._opened = self._running = True
+            self._cv.notify_all()
+
     # -------- MJPEG generator --------
     def get_jpeg_generator(self):
         boundary = b"--frame"
         heartbeat = _safe_now() + 2.0
         while True:
+            self._pull_shared()
             with self._cv:
                 if self._last_jpeg is None:
                     self._cv.wait(timeout=0.5)
@@ -212,6 +246,7 @@ class VideoStreamer:
 
     # -------- Accessor for metrics worker --------
     def get_latest_jpeg(self) -> Optional[bytes]:
+        self._pull_shared()
         with self._lock:
             return bytes(self._last_jpeg) if self._last_jpeg is not None else None
 
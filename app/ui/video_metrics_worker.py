@@ -21,11 +21,12 @@ except Exception:
 
 from app.ui.video import get_streamer
 
+from core.event_bus import BUS
+
 try:
-    from admin_web.state import get_payload as _get_shared, set_payload as _set_shared  # type: ignore
+    from admin_web.state import get_payload as _get_shared  # type: ignore
 except Exception:
     def _get_shared() -> Dict[str, Any]: return {}
-    def _set_shared(_p: Dict[str, Any]) -> None: pass
 
 ENABLED = (os.getenv("VIDEO_METRICS_WORKER", "0") == "1")
 
@@ -51,14 +52,13 @@ def _analyze_jpeg(jpeg: bytes) -> Dict[str, Any]:
 
 def _merge_metrics_only(extra: Dict[str, Any]) -> None:
     base = _get_shared() or {}
-    m = base.get("metrics")
-    if not isinstance(m, dict):
-        m = {}
+    # בלוקים מקוננים משותפים עם ה-snapshot — מעתיקים לפני שינוי
+    m = dict(base["metrics"]) if isinstance(base.get("metrics"), dict) else {}
     m.update(extra or {})
     base["metrics"] = m
     base.setdefault("ts", time.time())
     base.setdefault("payload_version", base.get("payload_version", "1.2.0"))
-    _set_shared(base)
+    BUS.publish("payload", base)
 
 def _loop(interval: float = 0.25):
     s = get_streamer()
@@ -0,0 +1,192 @@
+# core/event_bus.py
+# -------------------------------------------------------
+# 🚌 EventBus — pub/sub בתוך התהליך עם topics קבועים
+# -------------------------------------------------------
+# topics: payload / objdet / report / log / ingest
+#   payload — ה-state החי (admin_state מנוי inline: כל אירוע = גרסה חדשה)
+#   ingest  — כל פריים מ-batch/landmarks עם ?queue=1, לפי סדר ts (מנוע / הקלטה);
+#             ה-state לא מנוי — פריים ישן לא דורס את החי
+#   log     — core.logs.LogRecord לכל רשומה שנכנסת ל-LOG_RING (read-only)
+#
+#   BUS.publish("payload", p)                     ← לולאת הפריימים; לעולם לא חוסם
+#   BUS.subscribe("payload", fn, inline=True)     ← fn(event) בת'רד של המפרסם (זול בלבד!)
+#   BUS.subscribe("report", fn)                   ← ת'רד משלו + תיבת דואר חסומה בגודל
+#   BUS.subscribe("payload", fn, batch=True)      ← fn([events...]) — כל מה שהצטבר
+#   start_forwarder(url)                          ← שליחת NDJSON מרוכזת לשרת מרוחק
+#
+# • תיבת דואר מלאה → האירוע הישן נזרק (dropped) — המפרסם לא מחכה לאף מנוי.
+# • אירועים משותפים לכל המנויים: read-only בהסכמה (כמו PayloadSnapshot).
+# • חריגה במנוי נספרת ונרשמת ללוג — לא מגיעה למפרסם.
+# -------------------------------------------------------
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    from core.logs import logger  # type: ignore
+except Exception:
+    import logging
+    logger = logging.getLogger("event_bus")
+
+__all__ = ["EventBus", "Subscriber", "BUS", "TOPICS", "start_forwarder"]
+
+TOPICS = ("payload", "objdet", "report", "log", "ingest")
+
+
+class Subscriber:
+    def __init__(self, bus: "EventBus", topic: str, handler: Callable[[Any], Any], name: str,
+                 inline: bool = False, batch: bool = False, maxlen: int = 256):
+        self.bus = bus
+        self.topic = topic
+        self.handler = handler
+        self.name = name
+        self.inline = inline
+        self.batch = batch
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self._q: Deque[Any] = deque(maxlen=max(1, int(maxlen)))
+        self._cv = threading.Condition(threading.Lock())
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        if not inline:
+            self._thread = threading.Thread(target=self._run, daemon=True, name=f"bus:{topic}:{name}")
+            self._thread.start()
+
+    # ---- מצד המפרסם ----
+    def _offer(self, event: Any) -> None:
+        if self.inline:
+            self._call(event)
+            return
+        with self._cv:
+            if len(self._q) == self._q.maxlen:
+                self.dropped += 1
+            self._q.append(event)
+            self._cv.notify()
+
+    # ---- מצד המנוי ----
+    def _call(self, arg: Any) -> None:
+        try:
+            self.handler(arg)
+            self.delivered += len(arg) if self.batch else 1
+        except Exception:
+            self.errors += 1
+            if self.errors <= 3 or self.errors % 100 == 0:
+                logger.exception(f"[bus] subscriber {self.topic}:{self.name} failed (errors={self.errors})")
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while not self._q and not self._closed:
+                    self._cv.wait()
+                if self._closed:
+                    return
+                if self.batch:
+                    item: Any = list(self._q)
+                    self._q.clear()
+                else:
+                    item = self._q.popleft()
+            self._call(item)
+
+    def close(self) -> None:
+        self.bus._remove(self)
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "inline": self.inline, "batch": self.batch, "queued": len(self._q),
+                "delivered": self.delivered, "dropped": self.dropped, "errors": self.errors}
+
+
+class EventBus:
+    def __init__(self, topics: Tuple[str, ...] = TOPICS):
+        self.topics = tuple(topics)
+        self._lock = threading.Lock()
+        # copy-on-write: publish קורא tuple בלי נעילה
+        self._subs: Dict[str, Tuple[Subscriber, ...]] = {t: () for t in self.topics}
+        self.published: Dict[str, int] = {t: 0 for t in self.topics}
+
+    def _check(self, topic: str) -> None:
+        if topic not in self._subs:
+            raise ValueError(f"unknown topic {topic!r} (expected one of {self.topics})")
+
+    def publish(self, topic: str, event: Any) -> int:
+        """מעביר event לכל המנויים של topic. מחזיר כמה מנויים קיבלו."""
+        self._check(topic)
+        subs = self._subs[topic]
+        self.published[topic] += 1
+        for s in subs:
+            s._offer(event)
+        return len(subs)
+
+    def subscribe(self, topic: str, handler: Callable[[Any], Any], *, name: Optional[str] = None,
+                  inline: bool = False, batch: bool = False, maxlen: int = 256) -> Subscriber:
+        self._check(topic)
+        sub = Subscriber(self, topic, handler, name or getattr(handler, "__name__", "sub"),
+                         inline=inline, batch=batch, maxlen=maxlen)
+        with self._lock:
+            self._subs[topic] = self._subs[topic] + (sub,)
+        return sub
+
+    def _remove(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subs[sub.topic] = tuple(s for s in self._subs[sub.topic] if s is not sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {t: {"published": self.published[t], "subscribers": [s.stats() for s in self._subs[t]]}
+                for t in self.topics}
+
+
+BUS = EventBus()
+
+
+# ----------------------- Remote forwarder -----------------------
+def start_forwarder(url: str, topic: str = "payload", *, period_ms: int = 200, max_batch: int = 64,
+                    timeout: float = 2.0, bus: Optional[EventBus] = None,
+                    post: Optional[Callable[[str, bytes, float], Any]] = None) -> Subscriber:
+    """
+    מנוי batch שמרכז אירועים ושולח אותם כ-NDJSON (POST /api/payload_push/batch)
+    לכל היותר פעם ב-period_ms. רץ בת'רד משלו — לולאת הפריימים לא מחכה ל-HTTP.
+    מעל max_batch בסבב — נשלחים האחרונים בלבד.
+    """
+    bus = bus or BUS
+    if post is None:
+        import requests  # type: ignore
+
+        def post(u: str, body: bytes, t: float) -> Any:
+            r = requests.post(u, data=body, timeout=t, headers={"Content-Type": "application/x-ndjson"})
+            r.raise_for_status()
+            return r
+
+    state = {"next": 0.0, "err": None, "err_count": 0, "err_ts": 0.0}
+
+    def _send(events: List[Any]) -> None:
+        wait = state["next"] - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        state["next"] = time.monotonic() + period_ms / 1000.0
+        events = events[-max_batch:]
+        body = "\n".join(json.dumps(e, ensure_ascii=False, separators=(",", ":"), default=str)
+                         for e in events).encode("utf-8") + b"\n"
+        try:
+            post(url, body, timeout)
+            state["err"] = None
+        except Exception as e:
+            # לוג אחד לכל סוג שגיאה לכל 5 שניות
+            sig = type(e).__name__
+            now = time.time()
+            if state["err"] != sig or now - state["err_ts"] > 5.0:
+                logger.warning(f"[bus] forward to {url} failed: {sig}: {e} (suppressed={state['err_count']})")
+                state.update(err=sig, err_ts=now, err_count=0)
+            else:
+                state["err_count"] += 1
+            # נבלע כאן: הלוג המרוכז למעלה מספיק (Subscriber._call היה רושם שוב עם traceback)
+            sub.errors += 1
+
+    sub = bus.subscribe(topic, _send, name=f"forward:{url}", batch=True, maxlen=max(max_batch, 8))
+    return sub
@@ -9,6 +9,7 @@
 # - כולל: spine_curvature_side + torso_forward_side_deg (מדדי צד)
 # - Gate/EMA דינמי/Outlier/Deadband מ-core/filters_config.py
 # - חדש: מדדי ראש (head_yaw/pitch/roll + confidence/ok) עם גארדים ייעודיים
+# - compute_from_landmarks: קלט landmarks מהמכשיר (landmark_input) במקום תוצאות MediaPipe
 # -------------------------------------------------------
 
 from __future__ import annotations
@@ -17,13 +18,14 @@ from typing import Dict, Tuple, Optional, List
 from collections import deque
 
 from ..geometry import average_visibility
-from ..signals import TemporalFilter, JitterMeter, LKGBuffer, HysteresisBool, now_ms
+from ..signals import TemporalFilter, JitterMeter, LKGBuffer, HysteresisBool, media_clock, now_ms
 from ..visibility import compute_if_visible, estimate_view, compute_visibility_gate
 from ..guards import (
     guard_joint_angle_deg, guard_signed_angle_deg, guard_number, guard_ratio,
     guard_head_signed_angle_deg, guard_confidence
 )
 from .pose_points import collect_pose_pixels, visibility_list, optional_pose2d, kps_from_pose, P
+from .landmark_input import results_from_landmarks
 from .joints import (
     compute_joint_angles,
     compute_torso,
@@ -224,6 +226,9 @@ class KinematicsComputer:
 
         self._frame_id = 0
 
+        # --- נקודות ה-pose האחרונות (לצרכנים חיצוניים, למשל crops של OD) ---
+        self._last_kps: Tuple[Dict[str, Tuple[float, float, float]], Tuple[int, int], int] = ({}, (0, 0), 0)
+
     @staticmethod
     def _delta_deg_simple(a: Optional[float], b: Optional[float]) -> Optional[float]:
         """הפרש חתום בין זוויות בטווח [-180, 180)."""
@@ -309,7 +314,27 @@ class KinematicsComputer:
 
     # ---------------------------- API ----------------------------
 
-    def compute(self, image_shape, results_pose, results_hands) -> Dict[str, object]:
+    def last_keypoints(self) -> Tuple[Dict[str, Tuple[float, float, float]], Tuple[int, int], int]:
+        """(kps, (h, w), ts_ms) של ה-compute האחרון; kps: name → (x, y, visibility) בפיקסלים."""
+        return self._last_kps
+
+    def compute_from_landmarks(self, image_shape, pose, hands=None, ts_ms=None) -> Dict[str, object]:
+        """
+        כמו compute(), אבל מ-landmarks מנורמלים שחושבו על המכשיר (בלי MediaPipe בשרת).
+        pose: 33 נקודות {x,y,z?,visibility?} / [x,y,z?,v?] / בלוק q16; hands: [{"label","points"}].
+        ts_ms: זמן הלכידה במכשיר — בסיס הזמן של הפילטרים (ולא זמן ההגעה לשרת).
+        """
+        results_pose, results_hands = results_from_landmarks(pose, hands)
+        return self.compute(image_shape, results_pose, results_hands, ts_ms=ts_ms)
+
+    def compute(self, image_shape, results_pose, results_hands, ts_ms=None) -> Dict[str, object]:
+        """ts_ms (אופציונלי): חותמת הפריים לפילטרים הטמפורליים; None → שעון המערכת."""
+        if ts_ms is None:
+            return self._compute(image_shape, results_pose, results_hands)
+        with media_clock(ts_ms):
+            return self._compute(image_shape, results_pose, results_hands)
+
+    def _compute(self, image_shape, results_pose, results_hands) -> Dict[str, object]:
         now = now_ms()
         self._frame_id += 1
         p = CONFIG.profile
@@ -325,6 +350,7 @@ class KinematicsComputer:
 
         # KPS for gates & scale
         kps = kps_from_pose(image_shape, results_pose)
+        self._last_kps = (kps, (frame_h, frame_w), now)
 
         # View estimation
         mode, view_score = estimate_view(kps, thr=p.visibility.conf_thr)
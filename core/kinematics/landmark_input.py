@@ -0,0 +1,119 @@
+# core/kinematics/landmark_input.py
+# -------------------------------------------------------
+# 📥 Landmark arrays → אובייקטים בצורת תוצאות MediaPipe
+#
+# KinematicsComputer.compute() קורא את התוצאות ב-duck typing:
+#   results_pose.pose_landmarks.landmark[i].x/.y/.z/.visibility
+#   results_hands.multi_hand_landmarks[i].landmark[j]
+#   results_hands.multi_handedness[i].classification[0].label
+# כאן בונים בדיוק את המבנה הזה מנתונים שהגיעו מהלקוח (pose על המכשיר),
+# כך שאין צורך בפענוח JPEG / MediaPipeRunner בשרת.
+#
+# פורמטים נתמכים לנקודה (מנורמל 0..1, כמו MediaPipe):
+#   {"x","y","z"?,"visibility"?}   |   [x, y, z?, visibility?]
+# ולרשימה שלמה — גם בלוק קומפקטי של core.landmark_codec ({"fmt":"q16",...}).
+# -------------------------------------------------------
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+__all__ = ["PoseResults", "HandsResults", "results_from_landmarks", "MIN_POSE_POINTS"]
+
+MIN_POSE_POINTS = 33  # PoseIdx מגיע עד 32
+
+
+class _Lm:
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x: float, y: float, z: float = 0.0, visibility: float = 1.0):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+
+class _LmList:
+    __slots__ = ("landmark",)
+
+    def __init__(self, landmark: List[_Lm]):
+        self.landmark = landmark
+
+
+class _Category:
+    __slots__ = ("label", "score")
+
+    def __init__(self, label: str, score: float = 1.0):
+        self.label = label
+        self.score = score
+
+
+class _Handedness:
+    __slots__ = ("classification",)
+
+    def __init__(self, label: str):
+        self.classification = [_Category(label)]
+
+
+class PoseResults:
+    """תחליף ל-results של mp.solutions.pose (רק pose_landmarks)."""
+    __slots__ = ("pose_landmarks",)
+
+    def __init__(self, points: List[_Lm]):
+        self.pose_landmarks = _LmList(points) if points else None
+
+
+class HandsResults:
+    """תחליף ל-results של mp.solutions.hands."""
+    __slots__ = ("multi_hand_landmarks", "multi_handedness")
+
+    def __init__(self, hands: List[Tuple[str, List[_Lm]]]):
+        self.multi_hand_landmarks = [_LmList(pts) for _, pts in hands] or None
+        self.multi_handedness = [_Handedness(label) for label, _ in hands] or None
+
+
+def _f(v: Any, default: float) -> float:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return default
+    return f if f == f else default
+
+
+def _points(raw: Any) -> List[_Lm]:
+    if isinstance(raw, dict) and raw.get("fmt"):
+        from core.landmark_codec import decode_points
+        raw = decode_points(raw)
+    out: List[_Lm] = []
+    for p in raw or []:
+        if isinstance(p, dict):
+            out.append(_Lm(_f(p.get("x"), 0.0), _f(p.get("y"), 0.0), _f(p.get("z"), 0.0),
+                           _f(p.get("visibility", p.get("v", 1.0)), 0.0)))
+        elif isinstance(p, (list, tuple)) and len(p) >= 2:
+            out.append(_Lm(_f(p[0], 0.0), _f(p[1], 0.0),
+                           _f(p[2], 0.0) if len(p) > 2 else 0.0,
+                           _f(p[3], 0.0) if len(p) > 3 else 1.0))
+        else:
+            out.append(_Lm(0.0, 0.0, 0.0, 0.0))
+    return out
+
+
+def results_from_landmarks(pose: Optional[Sequence[Any]],
+                           hands: Optional[Sequence[Any]] = None) -> Tuple[Optional[PoseResults], Optional[HandsResults]]:
+    """
+    pose: 33 נקודות (או בלוק קומפקטי); פחות מ-MIN_POSE_POINTS → אין pose.
+    hands: [{"label":"left"|"right","points":[21 נקודות]}, ...]
+    → (results_pose, results_hands) מוכנים ל-KinematicsComputer.compute.
+    """
+    pts = _points(pose) if pose else []
+    results_pose = PoseResults(pts) if len(pts) >= MIN_POSE_POINTS else None
+
+    hand_list: List[Tuple[str, List[_Lm]]] = []
+    for h in hands or []:
+        if not isinstance(h, dict):
+            continue
+        label = str(h.get("label") or h.get("handedness") or "").strip().capitalize()
+        hp = _points(h.get("points") or h.get("landmarks"))
+        if label in ("Left", "Right") and len(hp) >= 21:
+            hand_list.append((label, hp))
+    results_hands = HandsResults(hand_list) if hand_list else None
+    return results_pose, results_hands
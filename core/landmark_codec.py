@@ -0,0 +1,135 @@
+# core/landmark_codec.py
+# -------------------------------------------------------
+# 🦴 קידוד קומפקטי ל-landmarks (תעבורה בלבד)
+# -------------------------------------------------------
+# הצורה הרגילה: [{"x":0.51,"y":0.33,"visibility":0.98}, ...] — ~45 בתים לנקודה ב-JSON.
+# הצורה הקומפקטית (כל הקואורדינטות מנורמלות 0..1):
+#   q16     {"fmt":"q16", "n":33, "xy":[x0,y0,x1,y1,...], "v":[v0,v1,...]}
+#           x,y → uint16 (0..65535), visibility → uint8 (0..255)
+#   q16b64  {"fmt":"q16b64", "n":33, "b64":"..."}
+#           bytes = n×(x,y) uint16 little-endian ואחריהם n×uint8 visibility
+#
+# • הצורה הרגילה נשארת ב-state ולקוראים הישנים — הקידוד נעשה רק בשכבת התעבורה.
+# • שגיאת כימות: ~1.5e-5 בקואורדינטה (<0.03px ב-1920), ~0.002 ב-visibility.
+# • מפענח תואם: admin_web/static/js/skeleton_widget.js (decodeLandmarksQ).
+# -------------------------------------------------------
+from __future__ import annotations
+
+import base64
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+__all__ = ["encode_points", "decode_points", "compact_mp", "parse_format", "FORMATS"]
+
+FORMATS = ("q16", "q16b64")
+_Q16 = 65535
+_Q8 = 255
+
+
+def _q(v: Any, scale: int) -> int:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return 0
+    if not (f == f):  # NaN
+        return 0
+    f = 0.0 if f < 0.0 else (1.0 if f > 1.0 else f)
+    return int(f * scale + 0.5)
+
+
+def encode_points(points: List[Dict[str, Any]], fmt: str = "q16") -> Dict[str, Any]:
+    """רשימת נקודות {x,y,visibility} מנורמלות → בלוק קומפקטי."""
+    xy = array("H")
+    vis = array("B")
+    for p in points:
+        if isinstance(p, dict):
+            xy.append(_q(p.get("x"), _Q16))
+            xy.append(_q(p.get("y"), _Q16))
+            vis.append(_q(p.get("visibility", p.get("v", 1.0)), _Q8))
+        else:
+            xy.extend((0, 0))
+            vis.append(0)
+    n = len(vis)
+    if fmt == "q16b64":
+        if sys.byteorder != "little":
+            xy.byteswap()
+        raw = xy.tobytes() + vis.tobytes()
+        return {"fmt": "q16b64", "n": n, "b64": base64.b64encode(raw).decode("ascii")}
+    return {"fmt": "q16", "n": n, "xy": xy.tolist(), "v": vis.tolist()}
+
+
+def decode_points(enc: Dict[str, Any]) -> List[Dict[str, float]]:
+    """בלוק קומפקטי → רשימת {x,y,visibility} (ל-Python consumers ולבדיקות)."""
+    fmt = enc.get("fmt")
+    n = int(enc.get("n", 0))
+    if fmt == "q16b64":
+        raw = base64.b64decode(enc.get("b64", ""))
+        xy = array("H")
+        xy.frombytes(raw[: n * 4])
+        if sys.byteorder != "little":
+            xy.byteswap()
+        vis = list(raw[n * 4: n * 5])
+    elif fmt == "q16":
+        xy = enc.get("xy") or []
+        vis = enc.get("v") or []
+    else:
+        raise ValueError(f"unknown landmark format: {fmt!r}")
+    return [
+        {"x": xy[2 * i] / _Q16, "y": xy[2 * i + 1] / _Q16, "visibility": vis[i] / _Q8}
+        for i in range(n)
+    ]
+
+
+def _is_pixels(points: List[Any]) -> bool:
+    """True אם יש קואורדינטה מעבר ל-1 — הנקודות בפיקסלים ולא מנורמלות."""
+    for p in points:
+        if isinstance(p, dict):
+            for k in ("x", "y"):
+                v = p.get(k)
+                if isinstance(v, (int, float)) and v > 1.0 + 1e-6:
+                    return True
+    return False
+
+
+def _normalize(points: List[Any], w: float, h: float) -> List[Dict[str, Any]]:
+    return [dict(p, x=float(p.get("x") or 0.0) / w, y=float(p.get("y") or 0.0) / h)
+            if isinstance(p, dict) else p for p in points]
+
+
+def compact_mp(mp: Dict[str, Any], fmt: str = "q16",
+               frame_wh: Optional[Tuple[Any, Any]] = None) -> Dict[str, Any]:
+    """
+    עותק של בלוק mp שבו landmarks/hands מוחלפים ב-landmarks_q/hands_q.
+    לא משנה את המקור (בלוקים משותפים עם ה-snapshot).
+    ידיים בפיקסלים (mediapipe_runner) מנורמלות לפי frame_wh=(w,h) לפני הקידוד;
+    בלי גודל פריים הן נשארות בצורה הרגילה — clamp ל-0..1 היה משחית אותן.
+    """
+    out = dict(mp)
+    lms = out.get("landmarks")
+    if isinstance(lms, list) and lms and isinstance(lms[0], dict) and not _is_pixels(lms):
+        out["landmarks_q"] = encode_points(lms, fmt)
+        del out["landmarks"]
+    hands = out.get("hands")
+    if isinstance(hands, list) and hands and all(isinstance(h, list) for h in hands):
+        if any(_is_pixels(h) for h in hands):
+            try:
+                w, h = float(frame_wh[0]), float(frame_wh[1])  # type: ignore[index]
+            except (TypeError, ValueError, IndexError):
+                return out
+            if w <= 0 or h <= 0:
+                return out
+            hands = [_normalize(pts, w, h) for pts in hands]
+        out["hands_q"] = [encode_points(pts, fmt) for pts in hands]
+        del out["hands"]
+    return out
+
+
+def parse_format(value: Optional[str]) -> Optional[str]:
+    """ערך query (?lm=q16|b64|q16b64) → פורמט או None (צורה רגילה)."""
+    v = (value or "").strip().lower()
+    if v in ("b64", "q16b64"):
+        return "q16b64"
+    if v in ("q16", "compact", "1"):
+        return "q16"
+    return None
@@ -4,11 +4,11 @@
 # -------------------------------------------------------
 
 from __future__ import annotations
-import os, sys, time, re
+import os, sys, time, re, threading
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 from collections import deque, defaultdict
-from queue import Queue, Full
-from typing import Deque, Dict, Any, Optional, Tuple
+from typing import Deque, Dict, Any, Iterator, List, Optional, Tuple
 from loguru import logger as _logger
 
 # ============================ קונפיג בסיסי ============================
@@ -86,14 +86,190 @@ def _passes_od_filter(level_no: int, msg: str) -> bool:
         return False
     return True
 
-# ======================= זיכרון “חי” לדשבורד + תור SSE =======================
+# ======================= זיכרון “חי” לדשבורד (טבעת עם seq) =======================
+# כל רשומה מקבלת seq עולה מונוטוני. הקוראים (פולינג/SSE) מחזיקים cursor=seq
+# אחרון שראו ומקבלים רק מה שחדש — בלי להעתיק את כל הבאפר ובלי תור משותף.
+# • כתיבה: תחת lock קצר (append + עדכון אינדקס רמה + notify).
+# • קריאה: בלי lock — seq בתוך הרשומה מאמת שהתא לא נדרס בינתיים.
+# • אינדקס לכל רמה (רשימת seq ממוינת) → סינון level + since ב-O(log n).
+# • LOG_RING מפרסם כל LogRecord חדש גם ל-BUS("log") (core.event_bus) — אחרי שחרור
+#   ה-lock, עם שומר reentrancy: מנוי שכותב ללוג לא מפרסם שוב מתוך אותו ת'רד.
+
+LOG_RING_SIZE = int(os.getenv("LOG_RING_SIZE", "1500"))
+
+
+class LogRecord:
+    __slots__ = ("seq", "ts", "level", "msg", "tag", "repeat")
+
+    def __init__(self, seq: int, ts: float, level: str, msg: str, tag: str):
+        self.seq = seq
+        self.ts = ts
+        self.level = level
+        self.msg = msg
+        self.tag = tag
+        self.repeat = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"seq": self.seq, "ts": self.ts, "level": self.level, "msg": self.msg, "tag": self.tag}
+        if self.repeat:
+            d["repeat"] = self.repeat
+        return d
+
+
+_BUS_GUARD = threading.local()
+
+
+class LogRing:
+    """באפר טבעתי בגודל קבוע עם seq לכל רשומה ואינדקס לפי רמה."""
+
+    def __init__(self, capacity: int = LOG_RING_SIZE, bus_topic: Optional[str] = None, bus: Any = None):
+        self.capacity = max(16, int(capacity))
+        self.bus_topic = bus_topic   # None → לא מפרסם (טבעות מקומיות / בדיקות)
+        self._bus = bus              # None → core.event_bus.BUS (lazy: event_bus מייבא את המודול הזה)
+        self._slots: List[Optional[LogRecord]] = [None] * self.capacity
+        self._next = 1          # seq של הרשומה הבאה
+        self._base = 1          # seq ראשון אחרי clear()
+        self._by_level: Dict[str, List[int]] = {}
+        self._cond = threading.Condition(threading.Lock())
+
+    # ---- כתיבה ----
+    def append(self, ts: float, level: str, msg: str, tag: str) -> LogRecord:
+        level = sys.intern(level)
+        tag = sys.intern(tag)
+        with self._cond:
+            seq = self._next
+            rec = LogRecord(seq, ts, level, msg, tag)
+            self._slots[seq % self.capacity] = rec
+            self._next = seq + 1
+            idx = self._by_level.get(level)
+            if idx is None:
+                idx = self._by_level[level] = []
+            idx.append(seq)
+            if len(idx) > 2 * self.capacity:
+                # החלפת רפרנס (לא del in-place) — קורא מקבילי נשאר עם רשימה עקבית
+                self._by_level[level] = idx[bisect_left(idx, self.first_seq()):]
+            self._cond.notify_all()
+        if self.bus_topic is not None:
+            self._publish(rec)
+        return rec
+
+    def _publish(self, rec: LogRecord) -> None:
+        if getattr(_BUS_GUARD, "active", False):
+            return
+        bus = self._bus
+        if bus is None:
+            try:
+                from core.event_bus import BUS as bus  # type: ignore
+            except Exception:
+                self.bus_topic = None
+                return
+            self._bus = bus
+        _BUS_GUARD.active = True
+        try:
+            bus.publish(self.bus_topic, rec)
+        except Exception:
+            pass
+        finally:
+            _BUS_GUARD.active = False
+
+    def clear(self) -> int:
+        with self._cond:
+            n = len(self)
+            self._slots = [None] * self.capacity
+            self._base = self._next
+            self._by_level = {}
+            self._cond.notify_all()
+        return n
+
+    # ---- מצב ----
+    @property
+    def last_seq(self) -> int:
+        return self._next - 1
+
+    def first_seq(self) -> int:
+        return max(self._base, self._next - self.capacity)
+
+    def __len__(self) -> int:
+        return self._next - self.first_seq()
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def _get(self, seq: int) -> Optional[LogRecord]:
+        rec = self._slots[seq % self.capacity]
+        return rec if rec is not None and rec.seq == seq else None
+
+    def last(self) -> Optional[LogRecord]:
+        return self._get(self._next - 1)
+
+    # ---- קריאה ----
+    def read(self, after_seq: int = 0, level: Optional[str] = None,
+             limit: Optional[int] = None, tail: bool = True) -> List[LogRecord]:
+        """
+        רשומות עם seq > after_seq (ורמה == level אם ניתן).
+        tail=True → limit האחרונות (פולינג); tail=False → limit הראשונות (cursor של סטרים).
+        """
+        end = self._next
+        start = max(int(after_seq) + 1, self.first_seq())
+        if level:
+            idx = self._by_level.get(level.upper()) or []
+            i = max(bisect_right(idx, start - 1), 0)
+            j = bisect_left(idx, end, lo=i)
+            seqs = idx[i:j]
+            if limit is not None:
+                seqs = seqs[-limit:] if tail else seqs[:limit]
+        else:
+            if limit is not None:
+                if tail:
+                    start = max(start, end - limit)
+                else:
+                    end = min(end, start + limit)
+            seqs = range(start, end)
+        out: List[LogRecord] = []
+        for sq in seqs:
+            rec = self._get(sq)
+            if rec is not None:
+                out.append(rec)
+        return out
+
+    def seq_after_ts(self, ts: float) -> int:
+        """seq האחרון עם rec.ts <= ts (חיפוש בינארי; ts כמעט-מונוטוני)."""
+        lo, hi = self.first_seq(), self._next
+        while lo < hi:
+            mid = (lo + hi) // 2
+            rec = self._get(mid)
+            if rec is None or rec.ts <= ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def read_since_ts(self, ts: float, level: Optional[str] = None,
+                      limit: Optional[int] = None) -> List[LogRecord]:
+        return self.read(self.seq_after_ts(float(ts)) if ts else 0, level=level, limit=limit, tail=True)
+
+    def wait(self, after_seq: int, timeout: Optional[float] = None) -> bool:
+        """חוסם עד שיש רשומה עם seq > after_seq (או timeout). מחזיר האם יש חדש."""
+        if self._next - 1 > after_seq:
+            return True
+        with self._cond:
+            if self._next - 1 > after_seq:
+                return True
+            self._cond.wait(timeout)
+            return self._next - 1 > after_seq
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for rec in self.read():
+            yield rec.to_dict()
+
 
-LOG_BUFFER: Deque[Dict[str, Any]] = deque(maxlen=1500)
-LOG_QUEUE: Queue = Queue(maxsize=2000)
+LOG_RING = LogRing(LOG_RING_SIZE, bus_topic="log")
+LOG_BUFFER = LOG_RING  # תאימות: iter/len/clear כמו ה-deque הישן
 
 _last_item: Optional[Tuple[int,str,str]] = None  # (level_no, msg, tag)
 _last_item_ts: float = 0.0
 _last_item_repeats: int = 0
+_last_rec: Optional[LogRecord] = None
 
 _sampling_buckets: Dict[Tuple[str,str,Optional[str],int,str], Deque[float]] = defaultdict(lambda: deque())
 _noisy_buckets:    Dict[Tuple[str,int], Deque[float]] = defaultdict(lambda: deque())  # (OD_CODE, level_no) -> times
@@ -143,24 +319,9 @@ def _should_sample(rec) -> bool:
     except Exception:
         return True
 
-def _append_ui_item(item: Dict[str, Any]):
-    LOG_BUFFER.append(item)
-    try:
-        LOG_QUEUE.put_nowait(item)
-    except Full:
-        try:
-            for _ in range(50):
-                LOG_QUEUE.get_nowait()
-        except Exception:
-            pass
-        try:
-            LOG_QUEUE.put_nowait(item)
-        except Exception:
-            pass
-
 def _memory_sink(message):
     """Sink לדשבורד: סף רמה, סינון OD, דגימה, דה-דופ."""
-    global _last_item, _last_item_ts, _last_item_repeats
+    global _last_item, _last_item_ts, _last_item_repeats, _last_rec
     try:
         rec = message.record
         lvl_name = str(rec["level"].name).upper()
@@ -181,14 +342,11 @@ def _memory_sink(message):
 
         if DEDUP_ENABLED and _last_item and lvl_no == _last_item[0] and msg == _last_item[1] and tag == _last_item[2] and (ts - _last_item_ts) <= DEDUP_WINDOW_SEC:
             _last_item_repeats += 1
-            try:
-                if LOG_BUFFER:
-                    LOG_BUFFER[-1]["repeat"] = _last_item_repeats
+            if _last_rec is not None and LOG_RING.last() is _last_rec:
+                _last_rec.repeat = _last_item_repeats
                 return
-            except Exception:
-                pass
 
-        _append_ui_item({"ts": ts, "level": lvl_name, "msg": msg, "tag": tag})
+        _last_rec = LOG_RING.append(ts, lvl_name, msg, tag)
         _last_item = (lvl_no, msg, tag)
         _last_item_ts = ts
         _last_item_repeats = 0
@@ -306,7 +464,7 @@ def _start_runtime_monitors(interval_sec: float = 10.0):
             return False
 
         def _alerts_loop():
-            last_seen_ts = -1.0
+            cursor = LOG_RING.last_seq
             od_bad_rx = [
                 (re.compile(r"\[(OD15\d{2})]"), "OD payload/build failures"),  # כולל OD1502
                 (re.compile(r"\[(OD14\d{2})]"), "OD tracking issues"),        # כולל OD1402
@@ -318,12 +476,13 @@ def _start_runtime_monitors(interval_sec: float = 10.0):
             ]
             while True:
                 try:
-                    if LOG_BUFFER:
-                        latest = LOG_BUFFER[-1]
-                        ts = float(latest.get("ts", 0.0) or 0.0)
-                        if ts != last_seen_ts:
-                            last_seen_ts = ts
-                            msg = str(latest.get("msg", ""))
+                    # cursor על הטבעת — כל רשומה חדשה נבדקת (לא רק האחרונה)
+                    if LOG_RING.wait(cursor, timeout=5.0):
+                        for rec in LOG_RING.read(cursor, limit=200, tail=False):
+                            cursor = rec.seq
+                            msg = rec.msg
+                            if msg.startswith("🚨"):
+                                continue
                             # OD
                             if OD_ALERTS_ENABLED:
                                 code = _extract_od_code(msg) or ""
@@ -341,6 +500,7 @@ def _start_runtime_monitors(interval_sec: float = 10.0):
                                         if m and _should_alert(m.group(1) if m.groups() else "CAM"):
                                             logger.warning(f"🚨 CAM alert ({tag}): {msg}")
                                             break
+                        cursor = max(cursor, LOG_RING.first_seq() - 1)
                 except Exception:
                     pass
                 time.sleep(0.5)
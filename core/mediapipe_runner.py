@@ -5,7 +5,7 @@
 # מה הוא עושה?
 # • מקבל פריים RGB (np.ndarray) ומריץ MediaPipe Pose+Hands.
 # • שולח JSON של נקודות ל-admin_web.state.set_last_pose(...).
-# • בנוסף מזריק אל ה-payload השיתופי את mp.landmarks (0..1) לציור שלד בצד לקוח.
+# • בנוסף מזריק אל ה-payload השיתופי את mp.landmarks / mp.hands (0..1) לציור שלד בצד לקוח.
 # • לא מצייר, לא מקודד, לא נוגע ב-MJPEG. הווידאו זורם בנפרד.
 #
 # שימוש:
@@ -250,6 +250,16 @@ class MediaPipeRunner:
                                 base = _gp() or {}
                                 mpblk = dict(base.get("mp", {})) if isinstance(base.get("mp"), dict) else {}
                                 mpblk["landmarks"] = lm_norm
+                                # ידיים מנורמלות לצד ה-pose (ה-"hands" העליון למטה נשאר בפיקסלים)
+                                hands_norm = [
+                                    [{"x": max(0.0, min(1.0, float(q.x))), "y": max(0.0, min(1.0, float(q.y)))}
+                                     for q in hlm.landmark]
+                                    for hlm in (getattr(hands, "multi_hand_landmarks", None) or [])
+                                ] if hands else []
+                                if hands_norm:
+                                    mpblk["hands"] = hands_norm
+                                else:
+                                    mpblk.pop("hands", None)
                                 # אם הפריוויו שלך משתקף ב-UI — השאר True; אחרת שנה ל-False.
                                 mpblk.setdefault("mirror_x", True)
                                 base["mp"] = mpblk
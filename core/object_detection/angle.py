@@ -1,4 +1,13 @@
 # core/object_detection/angle.py
+# -----------------------------------------------------------------------------
+# זווית ציוד בתוך תיבה: Canny → PCA (ובמקרה הצורך Hough).
+# • compute_angle_for_box — תיבה בודדת (API המקורי).
+# • compute_angles_batch  — כל התיבות של טיק בבת אחת: אפור פעם אחת על האיחוד,
+#   PCA של כל ה-ROIs בפעולה מוקטרת אחת (מומנטים + eigen 2×2 סגור).
+# • AngleCache            — זווית לכל אובייקט לאורך טיקים; מחושבת מחדש רק כשהתיבה
+#   זזה/שינתה גודל מעבר לסף, כשהאיכות נמוכה או כשהמטמון התיישן. בין לבין —
+#   עדכון זול מהשינוי באלכסון התיבה.
+# -----------------------------------------------------------------------------
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Tuple, List, Any, Dict
@@ -34,8 +43,17 @@ class AngleConfig:
     hough_threshold: int = 30
     hough_min_line_len: int = 20
     hough_max_line_gap: int = 10
+    # מטמון לכל אובייקט (AngleCache)
+    cache_enabled: bool = True
+    cache_move_frac: float = 0.15        # הזזת מרכז ביחס לצלע הארוכה
+    cache_scale_frac: float = 0.15       # שינוי רוחב/גובה יחסי
+    cache_min_quality: float = 0.6      # איכות נמוכה מזו → חישוב מלא בכל טיק
+    cache_max_age: int = 15              # טיקים מקסימליים בין חישובים מלאים
     extra: Optional[Dict[str, Any]] = None
 
+_NONE = AngleResult(angle_deg=None, quality=0.0, ang_src="none")
+
+
 def compute_angle_for_box(
     frame_bgr: np.ndarray,
     box: Tuple[int, int, int, int],
@@ -99,6 +117,240 @@ def compute_angle_for_box(
     q = _edge_quality(edge_count, total_edge_px)
     return AngleResult(angle_deg=None, quality=q, ang_src="none")
 
+def compute_angles_batch(
+    frame_bgr: np.ndarray,
+    boxes: List[Tuple[int, int, int, int]],
+    cfg: Any,
+) -> List[AngleResult]:
+    """
+    כמו compute_angle_for_box לכל תיבה, בבאץ' אחד: המרה לאפור פעם אחת על איחוד
+    ה-ROIs (כשהן לא מוקטנות), ו-PCA לכל ה-ROIs יחד. התוצאות זהות עד דיוק float.
+    """
+    if frame_bgr is None or not hasattr(frame_bgr, "shape") or getattr(frame_bgr, "size", 0) == 0:
+        return [_NONE for _ in boxes]
+    max_roi_px = int(getattr(cfg, "max_roi_px", 320 * 320))
+    blur_kernel = int(getattr(cfg, "blur_kernel", 3))
+    canny_low = int(getattr(cfg, "canny_low", 50))
+    canny_high = int(getattr(cfg, "canny_high", 150))
+    edge_dilate_iter = int(getattr(cfg, "edge_dilate_iter", 0))
+    min_edge_pixels = int(getattr(cfg, "min_edge_pixels", 60))
+    pca_min_var_ratio = float(getattr(cfg, "pca_min_var_ratio", 0.65))
+    min_quality_for_angle = float(getattr(cfg, "min_quality_for_angle", 0.5))
+
+    H, W = frame_bgr.shape[:2]
+    out: List[AngleResult] = [_NONE] * len(boxes)
+    rects: List[Tuple[int, int, int, int, int]] = []
+    for i, box in enumerate(boxes):
+        if box is None:
+            continue
+        x1, y1, x2, y2 = _sanitize_box(box, W, H)
+        if x2 - x1 >= 2 and y2 - y1 >= 2:
+            rects.append((i, x1, y1, x2, y2))
+    if not rects:
+        return out
+
+    # אפור פעם אחת על האיחוד — רק ל-ROIs שלא מוקטנים, ורק אם האיחוד לא בזבזני
+    direct = [r for r in rects if max_roi_px <= 0 or (r[3] - r[1]) * (r[4] - r[2]) <= max_roi_px]
+    gray_u, ux1, uy1 = None, 0, 0
+    if direct:
+        ux1, uy1 = min(r[1] for r in direct), min(r[2] for r in direct)
+        ux2, uy2 = max(r[3] for r in direct), max(r[4] for r in direct)
+        if (ux2 - ux1) * (uy2 - uy1) <= 2 * sum((r[3] - r[1]) * (r[4] - r[2]) for r in direct):
+            gray_u = cv2.cvtColor(frame_bgr[uy1:uy2, ux1:ux2], cv2.COLOR_BGR2GRAY)
+
+    edge_maps: List[Tuple[int, np.ndarray, int]] = []
+    for i, x1, y1, x2, y2 in rects:
+        direct_roi = max_roi_px <= 0 or (x2 - x1) * (y2 - y1) <= max_roi_px
+        if gray_u is not None and direct_roi:
+            gray = gray_u[y1 - uy1:y2 - uy1, x1 - ux1:x2 - ux1]
+            edges, count = _edges_from_gray(gray, blur_kernel, canny_low, canny_high, edge_dilate_iter)
+        else:
+            roi, _scale = _extract_roi(frame_bgr, x1, y1, x2, y2, max_roi_px)
+            if getattr(roi, "size", 0) == 0:
+                continue
+            edges, count = _edge_map(roi, blur_kernel, canny_low, canny_high, edge_dilate_iter)
+        if count < min_edge_pixels:
+            out[i] = AngleResult(angle_deg=None, quality=_edge_quality(count, edges.size), ang_src="none")
+            continue
+        edge_maps.append((i, edges, count))
+
+    pca = _pca_batch([e for _i, e, _c in edge_maps], pca_min_var_ratio)
+    for (i, edges, count), (pca_angle, pca_q) in zip(edge_maps, pca):
+        if pca_angle is not None:
+            quality = _final_quality(pca_q, count, edges.size)
+            if quality >= min_quality_for_angle:
+                out[i] = AngleResult(angle_deg=_normalize_0_180(pca_angle), quality=quality, ang_src="pca")
+                continue
+        out[i] = _hough_or_none(edges, count, cfg, min_quality_for_angle)
+    return out
+
+
+def _hough_or_none(edges: np.ndarray, edge_count: int, cfg: Any, min_quality_for_angle: float) -> AngleResult:
+    if bool(getattr(cfg, "hough_enabled", True)):
+        h_angle, h_q = _angle_from_hough(
+            edges,
+            rho=float(getattr(cfg, "hough_rho", 1.0)),
+            theta=float(getattr(cfg, "hough_theta", np.pi / 180.0)),
+            threshold=int(getattr(cfg, "hough_threshold", 30)),
+            min_line_len=int(getattr(cfg, "hough_min_line_len", 20)),
+            max_line_gap=int(getattr(cfg, "hough_max_line_gap", 10)),
+        )
+        if h_angle is not None:
+            quality = _final_quality(h_q, edge_count, edges.size)
+            if quality >= min_quality_for_angle:
+                return AngleResult(angle_deg=_normalize_0_180(h_angle), quality=quality, ang_src="hough")
+    return AngleResult(angle_deg=None, quality=_edge_quality(edge_count, edges.size), ang_src="none")
+
+
+def _pca_batch(edge_maps: List[np.ndarray], pca_min_var_ratio: float) -> List[Tuple[Optional[float], float]]:
+    """_angle_from_pca לכל המפות יחד: מומנטים ב-bincount + eigen סגור של 2×2."""
+    if not edge_maps:
+        return []
+    xs_l, ys_l, seg_l = [], [], []
+    for k, e in enumerate(edge_maps):
+        ys, xs = np.nonzero(e)
+        xs_l.append(xs); ys_l.append(ys); seg_l.append(np.full(xs.size, k, dtype=np.intp))
+    xs = np.concatenate(xs_l).astype(np.float64)
+    ys = np.concatenate(ys_l).astype(np.float64)
+    seg = np.concatenate(seg_l)
+    K = len(edge_maps)
+    n = np.bincount(seg, minlength=K).astype(np.float64)
+    nn = np.maximum(n, 1.0)
+    mx = np.bincount(seg, xs, K) / nn
+    my = np.bincount(seg, ys, K) / nn
+    dx, dy = xs - mx[seg], ys - my[seg]
+    cxx = np.bincount(seg, dx * dx, K)
+    cyy = np.bincount(seg, dy * dy, K)
+    cxy = np.bincount(seg, dx * dy, K)
+    half = 0.5 * (cxx + cyy)
+    disc = np.sqrt((0.5 * (cxx - cyy)) ** 2 + cxy ** 2)
+    e0 = np.maximum(half + disc, 1e-9)
+    e1 = np.maximum(half - disc, 1e-9)
+    ratio = e0 / (e0 + e1)
+    ang = np.degrees(0.5 * np.arctan2(2.0 * cxy, cxx - cyy))
+    res: List[Tuple[Optional[float], float]] = []
+    for k in range(K):
+        r = float(ratio[k])
+        if n[k] < 2 or r < pca_min_var_ratio:
+            res.append((None, r))
+            continue
+        res.append((_normalize_0_180(float(ang[k])), float(max(0.0, min(1.0, (r - 0.5) / 0.5)))))
+    return res
+
+
+class AngleCache:
+    """
+    זווית לכל אובייקט לאורך טיקים. אובייקט = track id (keys) אם ניתן, אחרת שיוך
+    לתיבה של הטיק הקודם לפי IoU. חישוב מלא (בבאץ') רק לתיבות "שהגיע זמנן".
+    """
+
+    def __init__(self, cfg: Any, iou_min: float = 0.3):
+        self.cfg = cfg
+        self.iou_min = float(iou_min)
+        self._entries: List[Dict[str, Any]] = []
+        self.full = 0
+        self.reused = 0
+
+    def reset(self) -> None:
+        self._entries = []
+
+    def estimate(self, frame_bgr: np.ndarray, boxes: List[Tuple[int, int, int, int]],
+                 keys: Optional[List[Any]] = None) -> List[AngleResult]:
+        cfg = self.cfg
+        if not boxes:
+            self._entries = []
+            return []
+        if not bool(getattr(cfg, "cache_enabled", True)):
+            self.full += len(boxes)
+            return compute_angles_batch(frame_bgr, boxes, cfg)
+
+        prev = self._associate(boxes, keys)
+        due = [i for i, e in enumerate(prev) if not self._reusable(e, boxes[i])]
+        fresh = compute_angles_batch(frame_bgr, [boxes[i] for i in due], cfg) if due else []
+        results: List[Optional[AngleResult]] = [None] * len(boxes)
+        entries: List[Dict[str, Any]] = []
+        for i, r in zip(due, fresh):
+            results[i] = r
+        for i, box in enumerate(boxes):
+            e = prev[i]
+            if results[i] is None:
+                r = _incremental(e["res"], e["box"], box)
+                entries.append({"key": e["key"], "box": tuple(box), "res": r, "age": e["age"] + 1,
+                                "anchor": e["anchor"]})
+                results[i] = r
+            else:
+                k = keys[i] if keys is not None else None
+                entries.append({"key": k, "box": tuple(box), "res": results[i], "age": 0, "anchor": tuple(box)})
+        self.full += len(due)
+        self.reused += len(boxes) - len(due)
+        self._entries = entries
+        return results  # type: ignore[return-value]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.full + self.reused
+        return {"full": self.full, "reused": self.reused,
+                "hit_rate": round(self.reused / total, 3) if total else 0.0}
+
+    # ---- internals ----
+    def _associate(self, boxes, keys) -> List[Optional[Dict[str, Any]]]:
+        prev: List[Optional[Dict[str, Any]]] = [None] * len(boxes)
+        if not self._entries:
+            return prev
+        if keys is not None:
+            by_key = {e["key"]: e for e in self._entries if e["key"] is not None}
+            return [by_key.get(k) if k is not None else None for k in keys]
+        a = np.asarray([e["box"] for e in self._entries], dtype=np.float64).reshape(-1, 4)
+        b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        ix = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+        iy = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+        inter = ix * iy
+        area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+        area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        iou = inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+        used_a, used_b = set(), set()
+        flat = iou.ravel()
+        for k in np.argsort(-flat, kind="stable"):
+            if flat[k] < self.iou_min:
+                break
+            ai, bi = divmod(int(k), iou.shape[1])
+            if ai in used_a or bi in used_b:
+                continue
+            used_a.add(ai); used_b.add(bi)
+            prev[bi] = self._entries[ai]
+        return prev
+
+    def _reusable(self, e: Optional[Dict[str, Any]], box) -> bool:
+        if e is None:
+            return False
+        cfg = self.cfg
+        if e["age"] + 1 > int(getattr(cfg, "cache_max_age", 15)):
+            return False
+        if float(e["res"].quality) < float(getattr(cfg, "cache_min_quality", 0.6)):
+            return False
+        ax1, ay1, ax2, ay2 = e["anchor"]        # מול התיבה של החישוב המלא — לא מצטבר
+        x1, y1, x2, y2 = box
+        aw, ah = max(1.0, ax2 - ax1), max(1.0, ay2 - ay1)
+        w, h = max(1.0, x2 - x1), max(1.0, y2 - y1)
+        move = math.hypot((x1 + x2 - ax1 - ax2) * 0.5, (y1 + y2 - ay1 - ay2) * 0.5) / max(aw, ah)
+        scale = max(abs(w / aw - 1.0), abs(h / ah - 1.0))
+        return (move <= float(getattr(cfg, "cache_move_frac", 0.15))
+                and scale <= float(getattr(cfg, "cache_scale_frac", 0.15)))
+
+
+def _incremental(res: AngleResult, old_box, new_box) -> AngleResult:
+    """
+    עדכון זול: מוט דק בתיבה מיושרת-צירים נוטה בערך באלכסון שלה, כך ששינוי
+    atan2(h, w) בין התיבות מוזז לזווית השמורה (בכיוון השיפוע שלה).
+    """
+    if res.angle_deg is None:
+        return res
+    ow, oh = max(1.0, old_box[2] - old_box[0]), max(1.0, old_box[3] - old_box[1])
+    nw, nh = max(1.0, new_box[2] - new_box[0]), max(1.0, new_box[3] - new_box[1])
+    d = math.degrees(math.atan2(nh, nw) - math.atan2(oh, ow))
+    ang = res.angle_deg + (d if res.angle_deg < 90.0 else -d)
+    return AngleResult(angle_deg=_normalize_0_180(ang), quality=res.quality, ang_src="cached")
+
+
 def _sanitize_box(box: Tuple[int, int, int, int], w: int, h: int) -> Tuple[int, int, int, int]:
     x1, y1, x2, y2 = box
     x1 = max(0, min(int(x1), w - 1))
@@ -113,7 +365,7 @@ def _extract_roi(frame_bgr: np.ndarray, x1: int, y1: int, x2: int, y2: int, max_
     roi = frame_bgr[y1:y2, x1:x2]
     h, w = roi.shape[:2]
     scale = 1.0
-    if w * h > max_px and w > 0 and h > 0:
+    if max_px > 0 and w * h > max_px and w > 0 and h > 0:  # 0/שלילי = ללא הקטנה
         r = math.sqrt(max_px / float(w * h))
         nw, nh = max(1, int(w * r)), max(1, int(h * r))
         roi = cv2.resize(roi, (nw, nh), interpolation=cv2.INTER_AREA)
@@ -122,13 +374,17 @@ def _extract_roi(frame_bgr: np.ndarray, x1: int, y1: int, x2: int, y2: int, max_
 
 def _edge_map(roi_bgr: np.ndarray, blur_kernel: int, canny_low: int, canny_high: int,
               edge_dilate_iter: int) -> Tuple[np.ndarray, int]:
+    gray = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2GRAY)
+    return _edges_from_gray(gray, blur_kernel, canny_low, canny_high, edge_dilate_iter)
+
+def _edges_from_gray(gray: np.ndarray, blur_kernel: int, canny_low: int, canny_high: int,
+                     edge_dilate_iter: int) -> Tuple[np.ndarray, int]:
     blur_kernel = int(max(0, blur_kernel))
     if blur_kernel % 2 == 0 and blur_kernel > 0:
         blur_kernel += 1
     canny_low = int(max(0, canny_low))
     canny_high = int(max(canny_low + 1, canny_high))
 
-    gray = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2GRAY)
     if blur_kernel > 0:
         gray = cv2.GaussianBlur(gray, (blur_kernel, blur_kernel), 0)
     try:
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# ===============================================================
+# batching.py — שירות אינפרנס משותף עם micro-batching דינמי (ONNX)
+# מה הקובץ עושה:
+# 1) כמה זרמים (טלפונים / העלאות / פריימים רצופים של וידאו) מגישים טנזורים
+#    [1,3,H,W] דרך submit() ומקבלים Future.
+# 2) submit() מעתיק את הטנזור מיד ל-slot מוקצה מראש (מאגר slots לכל גודל קלט) —
+#    המגיש יכול לדרוס את ה-buffer שלו (Letterbox) ברגע ש-submit חזר.
+# 3) ת'רד יחיד אוסף את הממתינים לבאץ' — עד max_batch פריטים או max_wait_ms
+#    מהראשון — מעתיק ל-buffer קבוע [max_batch,3,H,W] ומריץ session.run אחד;
+#    ה-slots חוזרים למאגר (אין הקצאה לכל פריים אחרי החימום).
+# 4) הפלטים מפוצלים בחזרה ([i:i+1] לכל פלט) ונמסרים דרך ה-Futures.
+#
+# זרם יחיד לא משלם latency: אם רק מגיש אחד פעיל בשנייה האחרונה — הבאץ' יוצא מיד.
+# פריטים בגודל קלט שונה לא מתערבבים — כל באץ' בגודל אחד.
+#
+# שימוש:
+#   from core.object_detection.batching import shared_batcher
+#   b = shared_batcher(path, make_session)        # session + batcher אחד לכל מודל בתהליך
+#   out = b.submit(tensor, key=id(self)).result(timeout)   # [pred[i:i+1], ...]
+# מודל עם ממד batch קבוע (=1) → max_batch=1; המפיק מריץ ישירות על b.session.
+# ===============================================================
+
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from loguru import logger  # type: ignore
+except Exception:  # pragma: no cover
+    import logging
+    logger = logging.getLogger("od.batching")  # type: ignore
+
+__all__ = ["InferenceBatcher", "shared_batcher", "ONNX_BATCH_MAX", "ONNX_BATCH_WAIT_MS"]
+
+ONNX_BATCH_MAX = int(os.getenv("ONNX_BATCH_MAX", "1"))          # 1 = כבוי (run ישיר לכל פריים)
+ONNX_BATCH_WAIT_MS = float(os.getenv("ONNX_BATCH_WAIT_MS", "4"))
+_ACTIVE_WINDOW_S = 1.0
+
+
+class InferenceBatcher:
+    def __init__(self, session: Any, max_batch: int = ONNX_BATCH_MAX,
+                 max_wait_ms: float = ONNX_BATCH_WAIT_MS, name: str = "onnx"):
+        self.session = session
+        inp = session.get_inputs()[0]
+        self._inp_name = inp.name
+        dim0 = inp.shape[0] if inp.shape else None
+        self.max_batch = max(1, int(max_batch)) if not isinstance(dim0, int) else 1
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._q: Deque[Tuple[np.ndarray, Future, float]] = deque()
+        self._cv = threading.Condition()
+        self._seen: Dict[Any, float] = {}      # key → זמן הגשה אחרון (מגישים פעילים)
+        self._buf: Dict[Tuple[int, ...], np.ndarray] = {}
+        self._slots: Dict[Tuple[int, ...], List[np.ndarray]] = {}  # גודל קלט → slots פנויים
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._loop, name=f"batcher:{name}", daemon=True)
+        self._thread.start()
+
+    # ---- API ----
+    def submit(self, tensor: np.ndarray, key: Any = None) -> Future:
+        """tensor [1,3,H,W] או [3,H,W]; מועתק ל-slot פנימי לפני החזרה — מותר לדרוס אותו מיד."""
+        shape = tuple(tensor.shape[-3:])
+        with self._cv:
+            free = self._slots.get(shape)
+            slot = free.pop() if free else None
+        if slot is None:
+            slot = np.empty(shape, dtype=np.float32)  # המאגר גדל רק עד עומק התור המרבי
+        np.copyto(slot, tensor.reshape(shape))
+        fut: Future = Future()
+        now = time.monotonic()
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("batcher closed")
+            self._seen[key if key is not None else threading.get_ident()] = now
+            self._q.append((slot, fut, now))
+            self._cv.notify()
+        return fut
+
+    def close(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+        self._thread.join(timeout=1.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "batches": self.batches, "items": self.items,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "pending": len(self._q), "max_batch": self.max_batch}
+
+    # ---- worker ----
+    def _active(self, now: float) -> int:
+        for k in [k for k, t in self._seen.items() if now - t > _ACTIVE_WINDOW_S]:
+            del self._seen[k]
+        return len(self._seen)
+
+    def _take(self) -> Optional[List[Tuple[np.ndarray, Future, float]]]:
+        with self._cv:
+            while not self._q and not self._closed:
+                self._cv.wait()
+            if self._closed:
+                return None
+            deadline = self._q[0][2] + self.max_wait
+            while len(self._q) < self.max_batch and self._active(time.monotonic()) > 1:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cv.wait(left)
+            shape = self._q[0][0].shape[-3:]
+            batch, rest = [], deque()
+            while self._q and len(batch) < self.max_batch:
+                item = self._q.popleft()
+                (batch if item[0].shape[-3:] == shape else rest).append(item)
+            self._q.extendleft(reversed(rest))
+            return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            live = [it for it in batch if it[1].set_running_or_notify_cancel()]
+            shape = tuple(batch[0][0].shape)
+            buf = self._buf.get(shape)
+            if buf is None:
+                buf = self._buf[shape] = np.empty((self.max_batch,) + shape, dtype=np.float32)
+            n = len(live)
+            for i, (t, _f, _ts) in enumerate(live):
+                buf[i] = t
+            with self._cv:
+                self._slots.setdefault(shape, []).extend(t for t, _f, _ts in batch)
+            if not live:
+                continue
+            try:
+                outs = self.session.run(None, {self._inp_name: buf[:n]})
+                for i, (_t, f, _ts) in enumerate(live):
+                    f.set_result([o[i:i + 1] for o in outs])
+            except BaseException as e:
+                for _t, f, _ts in live:
+                    if not f.done():
+                        f.set_exception(e)
+            self.batches += 1
+            self.items += n
+
+
+_SHARED: Dict[str, InferenceBatcher] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_batcher(key: str, make_session: Callable[[], Any],
+                   max_batch: int = ONNX_BATCH_MAX, max_wait_ms: float = ONNX_BATCH_WAIT_MS) -> InferenceBatcher:
+    """batcher אחד לכל מודל (key = נתיב) בתהליך; make_session נקרא רק ביצירה הראשונה."""
+    with _SHARED_LOCK:
+        b = _SHARED.get(key)
+        if b is None:
+            b = _SHARED[key] = InferenceBatcher(make_session(), max_batch, max_wait_ms, name=os.path.basename(key))
+            logger.info("[ONNX] shared batcher {} max_batch={} wait_ms={}", key, b.max_batch, max_wait_ms)
+        return b
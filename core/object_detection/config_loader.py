@@ -210,6 +210,11 @@ class AngleConfig:
     max_roi_px: int = 0
     min_edge_pixels: int = 25
     pca_min_var_ratio: float = 0.8
+    cache_enabled: bool = True
+    cache_move_frac: float = 0.15
+    cache_scale_frac: float = 0.15
+    cache_min_quality: float = 0.6
+    cache_max_age: int = 15
     extra: Dict[str, Any] = field(default_factory=dict)
 
     @classmethod
@@ -241,6 +246,12 @@ def _tracker_config_from_dict(d: Dict[str, Any], *, strict: bool = False):
     for alt in ("hits", "appear", "appear_confirms", "confirm_hits"):
         if alt in src and "appear_hits" not in src:
             src["appear_hits"] = src.pop(alt)
+    for alt in ("conf_threshold", "score_threshold"):
+        if alt in src and "min_score" not in src:
+            src["min_score"] = src.pop(alt)
+    for alt in ("detect_every", "det_every_n"):
+        if alt in src and "detect_every_n" not in src:
+            src["detect_every_n"] = src.pop(alt)
     for alt in ("enforce_label", "label_match", "strict_label"):
         if alt in src and "enforce_label_match" not in src:
             src["enforce_label_match"] = src.pop(alt)
@@ -13,6 +13,11 @@ from typing import List, Tuple, Optional, Dict, Any
 
 import numpy as np  # frame_bgr: np.ndarray (BGR)
 
+try:
+    from .scale_scheduler import ScaleScheduler
+except Exception:
+    from core.object_detection.scale_scheduler import ScaleScheduler
+
 # ---------- Logging ----------
 try:
     from loguru import logger
@@ -219,6 +224,7 @@ class DetectorService:
     """
     API ל-ENGINE:
       - detect(frame_bgr, ts_ms=None) -> List[DetectionItem]
+      - detect_rois(frame_bgr, rois, ts_ms=None) -> List[DetectionItem]  (crops → קואורדינטות פריים)
       - state (property) -> DetectorState
       - apply_simple(dict) / update_simple(dict)
       - get_runtime_params() / get_health()
@@ -257,6 +263,11 @@ class DetectorService:
         # Tracker (אופציונלי)
         self._tracker: Optional[CentroidTracker] = CentroidTracker(ttl=10) if cfg.tracking_enabled else None
 
+        # Multi-scale (אופציונלי): גודל קלט לכל ריצה; הגדלים מחוממים מראש אצל ה-provider
+        self._track_hint: Optional[int] = None
+        self._scales: Optional[ScaleScheduler] = self._init_scales(cfg)
+        self._roi_imgsz: Optional[int] = self._init_roi_imgsz(cfg)
+
         # החלה ראשונית של simple.* (מצב פתיחה תואם YAML)
         self.apply_simple({
             "detection_rate_ms": cfg.period_ms,
@@ -287,23 +298,37 @@ class DetectorService:
             )
 
     def detect(self, frame_bgr: np.ndarray, ts_ms: Optional[int] = None) -> List[DetectionItem]:
+        return self._detect(frame_bgr, ts_ms, None)
+
+    def detect_rois(self, frame_bgr: np.ndarray, rois: List[BBox], ts_ms: Optional[int] = None) -> List[DetectionItem]:
+        """דיטקציה רק בתוך crops (למשל סביב ידיים/רגליים); התיבות חוזרות בקואורדינטות הפריים."""
+        return self._detect(frame_bgr, ts_ms, list(rois or []) or None)
+
+    def _detect(self, frame_bgr: np.ndarray, ts_ms: Optional[int], rois: Optional[List[BBox]]) -> List[DetectionItem]:
         if frame_bgr is None:
             logger.warning("[Detector] detect called with empty frame")
             return []
 
         h, w = frame_bgr.shape[:2]
         t0 = _now_ms()
-        logger.debug("[Detector] start w={} h={} thr={} ov={} max={} clip={} safe={}",
+        logger.debug("[Detector] start w={} h={} thr={} ov={} max={} clip={} safe={} rois={}",
                      w, h, self.cfg.threshold, self.cfg.overlap, self.cfg.max_objects,
-                     self.cfg.clip_to_frame, self.cfg.safe_mode_enabled)
+                     self.cfg.clip_to_frame, self.cfg.safe_mode_enabled, len(rois or []))
+        scales = self._scales if not rois else None
+        imgsz = scales.next_size() if scales is not None else None
         try:
-            raw = self._provider.detect(
-                frame_bgr=frame_bgr,
-                threshold=float(self.cfg.threshold),
-                overlap=float(self.cfg.overlap),
-                max_objects=int(self.cfg.max_objects),
-                timeout_ms=int(self.cfg.timeout_ms),
-            )
+            if rois:
+                raw = self._detect_crops(frame_bgr, rois)
+            else:
+                kw = {"imgsz": imgsz} if imgsz is not None else {}
+                raw = self._provider.detect(
+                    frame_bgr=frame_bgr,
+                    threshold=float(self.cfg.threshold),
+                    overlap=float(self.cfg.overlap),
+                    max_objects=int(self.cfg.max_objects),
+                    timeout_ms=int(self.cfg.timeout_ms),
+                    **kw,
+                )
             n_raw = len(raw or [])
 
             # Normalize/clip
@@ -330,6 +355,11 @@ class DetectorService:
                 cleaned = [d for d in cleaned if _normalize_token(d.label) in allowed_norm]
             n_after_labels = len(cleaned)
 
+            if scales is not None:
+                why = scales.observe(imgsz, cleaned, (h, w), expected=self._track_hint)
+                if why:
+                    logger.debug("[Detector] multiscale escalate size={} -> {} reason={}", imgsz, scales.size, why)
+
             # Tracking (optional)
             tracks: List[Track] = []
             if self._tracker is not None and self.cfg.tracking_enabled:
@@ -428,6 +458,28 @@ class DetectorService:
         with self._res_lock:
             return list(self._last_tracks)
 
+    def warmup(self) -> None:
+        """ריצת warmup בכל גודל קלט שמוגדר (ברירת מחדל / multiscale / crops) — לפני דיווח מוכנות."""
+        warm = getattr(self._provider, "warmup", None)
+        if warm is None:
+            return
+        t0 = _now_ms()
+        sizes = set(self._scales.sizes) if self._scales is not None else set()
+        if self._roi_imgsz:
+            sizes.add(int(self._roi_imgsz))
+        warm(None)
+        if sizes:
+            warm(sorted(sizes))
+        logger.info("DetectorService warmup done provider={} sizes={} in {}ms",
+                    getattr(self._provider, "name", self.cfg.provider), sorted(sizes) or "default", _now_ms() - t0)
+
+    def set_track_hint(self, n_tracked: Optional[int]) -> None:
+        """כמה אובייקטים הטרקר החיצוני ראה בדיטקציה הקודמת — פחות מזה בגודל קטן → הסלמה."""
+        self._track_hint = None if n_tracked is None else max(0, int(n_tracked))
+
+    def scale_stats(self) -> Optional[Dict[str, Any]]:
+        return None if self._scales is None else self._scales.stats()
+
     # --------- Internals ---------
     def _resolve_provider(self, cfg: ObjectDetectionConfig):
         """
@@ -474,6 +526,66 @@ class DetectorService:
         P = _get("DevNullProvider")
         return P(cfg) if P else None
 
+    def _init_scales(self, cfg: ObjectDetectionConfig) -> Optional[ScaleScheduler]:
+        """multiscale פעיל רק אם ה-provider מחמם לפחות שני גדלים (session/צורה לכל גודל)."""
+        try:
+            sched = ScaleScheduler.from_extra(cfg.extra)
+        except Exception as e:
+            logger.warning("multiscale config ignored: {}", e)
+            return None
+        warm = getattr(self._provider, "warmup", None)
+        if sched is None or warm is None:
+            return None
+        try:
+            sizes = warm(list(sched.sizes))
+        except Exception as e:
+            logger.warning("multiscale warmup failed -> fixed imgsz ({})", e)
+            return None
+        if len(sizes) < 2:
+            logger.warning("multiscale needs 2+ usable sizes, got {} -> fixed imgsz", sizes)
+            return None
+        if sizes != sched.sizes:
+            sched = ScaleScheduler(sizes, sched.probe_every, sched.low_conf, sched.small_px, sched.stable_n)
+        logger.info("multiscale on: sizes={} probe_every={} low_conf={} small_px={}",
+                    sched.sizes, sched.probe_every, sched.low_conf, sched.small_px)
+        return sched
+
+    def _init_roi_imgsz(self, cfg: ObjectDetectionConfig) -> Optional[int]:
+        """גודל קלט ל-crops: הגודל הקטן של multiscale, או extra.roi_imgsz אם ה-provider מחמם אותו."""
+        if self._scales is not None:
+            return self._scales.sizes[0]
+        try:
+            size = int((cfg.extra or {}).get("roi_imgsz") or 0)
+        except Exception:
+            size = 0
+        warm = getattr(self._provider, "warmup", None)
+        if size <= 0 or warm is None:
+            return None
+        try:
+            return size if size in warm([size]) else None
+        except Exception as e:
+            logger.warning("roi_imgsz warmup failed ({})", e)
+            return None
+
+    def _detect_crops(self, frame_bgr: np.ndarray, rois: List[BBox]) -> List[DetectionItem]:
+        """מריץ את ה-provider על כל crop (באץ' אחד אם יש detect_batch) וממפה את התיבות חזרה לפריים."""
+        crops = [frame_bgr[y1:y2, x1:x2] for (x1, y1, x2, y2) in rois]
+        kw = {"imgsz": self._roi_imgsz} if self._roi_imgsz else {}
+        args = dict(threshold=float(self.cfg.threshold), overlap=float(self.cfg.overlap),
+                    max_objects=int(self.cfg.max_objects), timeout_ms=int(self.cfg.timeout_ms), **kw)
+        batch = getattr(self._provider, "detect_batch", None)
+        if batch is not None and len(crops) > 1:
+            outs = batch(crops, **args)
+        else:
+            outs = [self._provider.detect(frame_bgr=c, **args) for c in crops]
+        raw: List[DetectionItem] = []
+        for (ox, oy, _x2, _y2), items in zip(rois, outs):
+            for it in items or []:
+                x1, y1, x2, y2 = it.box
+                raw.append(DetectionItem(label=it.label, score=float(it.score),
+                                         box=(int(x1) + ox, int(y1) + oy, int(x2) + ox, int(y2) + oy)))
+        return raw
+
     def _loop(self) -> None:
         while not self._stop.is_set():
             period = max(50, int(self.cfg.period_ms))
@@ -653,5 +765,10 @@ class DetectorService:
             "tracking_enabled": self.cfg.tracking_enabled,
             "allowed_labels": list(self.cfg.allowed_labels or []),
         }
+        if self._scales is not None:
+            rp["multiscale"] = self._scales.stats()
+        info = getattr(self._provider, "session_info", None)
+        if info:
+            rp["session"] = info
         logger.info("[Detector.runtime] {}", rp)
         return rp
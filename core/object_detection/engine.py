@@ -5,7 +5,8 @@
 # -------------------------------------------------------
 
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
 import time
 import math
 import threading
@@ -57,22 +58,50 @@ except Exception:
 # ייבוא יחסי/מוחלט
 try:
     from .detector import ObjectDetectionConfig, DetectorState, DetectionItem, DetectorService
-    from .angle import AngleResult, compute_angle_for_box, AngleConfig
+    from .angle import AngleResult, AngleCache, AngleConfig
     from .tracks import TrackerConfig, Tracker, Obs
     from .features import FeatureConfig, FeatureAugmentor
     from .config_loader import build_all_from_yaml
+    from .pose_roi import PoseROIPlanner
 except Exception:
     from core.object_detection.detector import ObjectDetectionConfig, DetectorState, DetectionItem, DetectorService
-    from core.object_detection.angle import AngleResult, compute_angle_for_box, AngleConfig
+    from core.object_detection.angle import AngleResult, AngleCache, AngleConfig
     from core.object_detection.tracks import TrackerConfig, Tracker, Obs
     from core.object_detection.features import FeatureConfig, FeatureAugmentor
     from core.object_detection.config_loader import build_all_from_yaml
+    from core.object_detection.pose_roi import PoseROIPlanner
+
+
+# Detect-every-N: דיטקטור כל N פריימים, Kalman ביניהם (0 = כבוי; ENV גובר על tracking.detect_every_n)
+OD_DETECT_EVERY_N = os.getenv("OD_DETECT_EVERY_N", "")
 
 
 def _now_ms() -> int:
     return int(time.time() * 1000)
 
 
+class ODResult:
+    """
+    תוצאת OD בגרסה (immutable): version עולה בכל אינפרנס שהסתיים.
+    הצרכן (לולאת ה-pose / ה-routes) מחזיק רפרנס ובודק version — בלי לחכות לאינפרנס.
+    """
+    __slots__ = ("version", "ts_ms", "frame_seq", "frame_hw", "tracks", "payload", "latency_ms", "done_ms")
+
+    def __init__(self, version: int, ts_ms: int, frame_seq: int, frame_hw: Optional[Tuple[int, int]],
+                 tracks: List[Any], payload: Dict[str, Any], latency_ms: Optional[int] = None):
+        self.version = version
+        self.ts_ms = ts_ms
+        self.frame_seq = frame_seq
+        self.frame_hw = frame_hw
+        self.tracks = tracks
+        self.payload = payload
+        self.latency_ms = latency_ms
+        self.done_ms = _now_ms()
+
+    def __repr__(self) -> str:
+        return f"ODResult(v={self.version}, seq={self.frame_seq}, objects={len(self.payload.get('objects') or [])})"
+
+
 class ObjectDetectionEngine:
     """
     Engine שמחבר את כל השכבות ומחזיר Payload אחיד.
@@ -123,6 +152,7 @@ class ObjectDetectionEngine:
         self.detector = DetectorService(self.detector_cfg)
         self.tracker = Tracker(self.trk_cfg)
         self.features = FeatureAugmentor(self.feat_cfg)
+        self._angles = AngleCache(self.ang_cfg)
 
         # מצב ריצה
         self._last_frame: Optional[Any] = None
@@ -131,19 +161,38 @@ class ObjectDetectionEngine:
         self._last_tracks: List[Any] = []
         self._started: bool = False
 
-        # Nonblocking
-        self._busy = False
+        # Worker קבוע: slot של פריים אחרון (latest-wins) + תוצאה בגרסה
         self._lock = threading.Lock()
+        self._cv = threading.Condition(self._lock)
+        self._run_lock = threading.Lock()         # tick() סינכרוני וה-worker לא מריצים detect במקביל
+        self._frame_seq = 0                        # פריימים שהוגשו
+        self._taken_seq = 0                        # הפריים האחרון שנלקח לעיבוד
+        self._result = ODResult(0, 0, 0, None, [], {})
+        self._worker: Optional[threading.Thread] = None
+        self._worker_stop = threading.Event()
+        self._worker_period_ms: Optional[int] = None
+        self._listeners: List[Callable[[ODResult], None]] = []
+        self._stats: Dict[str, Any] = {"submitted": 0, "processed": 0, "dropped": 0, "fps": 0.0}
 
         # עקיבה ברמת Engine – כבויה כברירת־מחדל
         self._engine_tracking_enabled = False
 
+        # Detect-every-N (Tracker + Kalman בין דיטקציות)
+        if OD_DETECT_EVERY_N.strip():
+            try: self.trk_cfg.detect_every_n = max(0, int(OD_DETECT_EVERY_N))
+            except ValueError: pass
+        self._skip_left = 0
+
+        # Pose-guided ROIs: דיטקציה רק סביב ידיים/רגליים, full-frame מחזורי (ENV OD_POSE_ROI)
+        self._pose_roi = PoseROIPlanner()
+
         # לוג איניט תמציתי
         od_event(
             "INFO", "OD1000", "Engine init",
             provider=getattr(self.detector_cfg, "provider", "?"),
             threshold=getattr(self.detector_cfg, "threshold", None),
             engine_tracking=self._engine_tracking_enabled,
+            detect_every_n=self._detect_every_n,
             det_period_ms=getattr(self.detector_cfg, "period_ms", None),
             max_objects=getattr(self.detector_cfg, "max_objects", None),
         )
@@ -162,15 +211,14 @@ class ObjectDetectionEngine:
                 self._started = True  # לא חוסמים tick
 
     def stop(self) -> None:
+        self.stop_worker()
         self._started = False
         logger.info("Engine stopped.")
 
     # -------- Public API --------
     def update_frame(self, frame_bgr: Any, ts_ms: Optional[int] = None) -> None:
         with od_span("OD1100", action="update_frame") as span:
-            with self._lock:
-                self._last_frame = frame_bgr
-                self._last_ts_ms = _now_ms() if ts_ms is None else ts_ms
+            self.submit_frame(frame_bgr, ts_ms)
             if frame_bgr is None:
                 od_fail("OD1101", "received None frame", ts_ms=self._last_ts_ms)
                 return
@@ -200,6 +248,18 @@ class ObjectDetectionEngine:
                 self._engine_tracking_enabled = bool(patch["tracking_enabled"])
         except Exception:
             pass
+        try:
+            if "detect_every_n" in (patch or {}):
+                self.trk_cfg.detect_every_n = max(0, int(patch["detect_every_n"]))
+                self._skip_left = 0
+            updated = dict(updated or {})
+            updated["detect_every_n"] = self._detect_every_n
+        except Exception:
+            pass
+        if "pose_roi" in (patch or {}):
+            self._pose_roi.enabled = bool(patch["pose_roi"])
+            self._pose_roi.reset()
+        updated["pose_roi"] = self._pose_roi.enabled
 
         return updated
 
@@ -208,6 +268,8 @@ class ObjectDetectionEngine:
             snap = self.detector.update_simple({})  # “patch” ריק כדי לקבל מצב נוכחי
             snap = dict(snap or {})
             snap.setdefault("tracking_enabled", bool(self._engine_tracking_enabled))
+            snap["detect_every_n"] = self._detect_every_n
+            snap["pose_roi"] = self._pose_roi.enabled
             if "safe_mode" not in snap:
                 snap["safe_mode"] = {
                     "enabled": bool(getattr(self.detector_cfg, "safe_mode_enabled", True)),
@@ -237,6 +299,8 @@ class ObjectDetectionEngine:
                 rp.setdefault("safe_mode.enabled", getattr(self.detector_cfg, "safe_mode_enabled", True))
                 rp.setdefault("safe_mode.top_k", getattr(self.detector_cfg, "safe_mode_top_k", 6))
                 rp.setdefault("tracking_enabled", bool(self._engine_tracking_enabled))
+                if self.worker_running:
+                    rp.setdefault("fps", round(float(self._stats["fps"]), 2))
                 return rp
         except Exception as e:
             logger.error("Engine.get_runtime_params failed: {}", e)
@@ -280,6 +344,8 @@ class ObjectDetectionEngine:
         with self._lock:
             frame = self._last_frame
             ts_ms = self._last_ts_ms or _now_ms()
+            seq = self._frame_seq
+            self._taken_seq = seq
 
         if frame is None:
             # פריים חסר באמת — זה כן שגיאה אמיתית
@@ -289,13 +355,68 @@ class ObjectDetectionEngine:
                 self._last_tracks, self._last_payload = [], payload
             return [], payload
 
-        # 1) Detect
+        res = self._run(frame, ts_ms, seq)
+        return res.tracks, res.payload
+
+    def _run(self, frame: Any, ts_ms: int, seq: int) -> ODResult:
+        """אינפרנס אחד + פרסום התוצאה בגרסה חדשה (משותף ל-tick ול-worker)."""
+        with self._run_lock:
+            tracks, payload, latency_ms = self._process(frame, ts_ms)
+            shp = getattr(frame, "shape", None)
+            hw = (int(shp[0]), int(shp[1])) if shp is not None and len(shp) >= 2 else None
+            with self._cv:
+                prev = self._result
+                res = ODResult(prev.version + 1, ts_ms, seq, hw, tracks, payload, latency_ms)
+                self._result = res
+                self._last_tracks, self._last_payload = tracks, payload
+                st = self._stats
+                st["processed"] += 1
+                if prev.version and res.done_ms > prev.done_ms:
+                    fps = 1000.0 / (res.done_ms - prev.done_ms)
+                    st["fps"] = fps if not st["fps"] else 0.2 * fps + 0.8 * st["fps"]
+                self._cv.notify_all()
+            listeners = tuple(self._listeners)
+        for fn in listeners:
+            try:
+                fn(res)
+            except Exception as e:
+                logger.warning("OD result listener failed (ignored): {}", e)
+        return res
+
+    @property
+    def _detect_every_n(self) -> int:
+        try:
+            return max(0, int(getattr(self.trk_cfg, "detect_every_n", 0) or 0))
+        except Exception:
+            return 0
+
+    def _process(self, frame: Any, ts_ms: int) -> Tuple[List[Any], Dict[str, Any], int]:
+        # 0) Detect-every-N: בין דיטקציות — חיזוי Kalman, אלא אם הביטחון דעך
+        n = self._detect_every_n
+        if n > 1:
+            if self._skip_left > 0 and not self.tracker.needs_detection():
+                self._skip_left -= 1
+                return self._propagate(frame, ts_ms)
+            self._skip_left = n - 1
+
+        # multi-scale: כמה מסלולים נראו בדיטקציה הקודמת — פחות מזה בגודל קטן → הסלמה
+        hint = getattr(self.detector, "set_track_hint", None)
+        if hint is not None and (self._engine_tracking_enabled or n > 0):
+            hint(sum(1 for t in self.tracker.tracks if getattr(t, "missed", 0) == 0))
+
+        # 1) Detect (crops סביב ידיים/רגליים כשיש pose טרי; אחרת כל הפריים)
+        rois = self._plan_rois(frame, ts_ms)
         det_t0 = time.time()
         with od_span("OD1200", ts_ms=ts_ms, profile=getattr(self.detector_cfg, "provider", "?")) as span:
             try:
-                det_items: List[DetectionItem] = self.detector.detect(frame, ts_ms=ts_ms)
+                if rois:
+                    det_items: List[DetectionItem] = self.detector.detect_rois(frame, rois, ts_ms=ts_ms)
+                else:
+                    det_items = self.detector.detect(frame, ts_ms=ts_ms)
                 det_ok = True
                 det_err = None
+                if self._pose_roi.enabled:
+                    self._pose_roi.note_result([d.box for d in det_items], rois, frame.shape[:2])
             except RuntimeError as e:
                 od_fail("OD1203", "runtime error during inference", err=str(e), provider=getattr(self.detector_cfg, "provider", "?"))
                 det_items, det_ok, det_err = [], False, f"detect_runtime:{type(e).__name__}"
@@ -326,17 +447,18 @@ class ObjectDetectionEngine:
         except Exception as _e:
             logger.warning("fallback synth failed: {}", _e)
 
-        # 2) Angle → Obs
-        obs_list: List[Obs] = []
-        for d in det_items:
-            angle_res: Optional[AngleResult] = None
-            try:
-                angle_res = compute_angle_for_box(frame, getattr(d, "box", None), self.ang_cfg)
-            except Exception as e:
-                od_event("WARNING", "OD1302", "compute_angle_for_box failed",
-                         label=getattr(d, "label", "?"), err=str(e))
-                angle_res = None
+        # 2) Angle → Obs (באץ' אחד לכל הטיק; מטמון לכל אובייקט — רק תיבות שזזו מחושבות מחדש)
+        angles: List[Optional[AngleResult]] = [None] * len(det_items)
+        idx = [i for i, d in enumerate(det_items) if getattr(d, "box", None) is not None]
+        try:
+            for i, r in zip(idx, self._angles.estimate(frame, [det_items[i].box for i in idx])):
+                angles[i] = r
+        except Exception as e:
+            od_event("WARNING", "OD1302", "angle estimation failed", detections=len(det_items), err=str(e))
+            self._angles.reset()
 
+        obs_list: List[Obs] = []
+        for d, angle_res in zip(det_items, angles):
             angle_src_val = None if angle_res is None else getattr(angle_res, "ang_src", None)
             obs_list.append(
                 Obs(
@@ -353,7 +475,7 @@ class ObjectDetectionEngine:
         with od_span("OD1400", ts_ms=ts_ms) as span:
             tracks: List[Any] = []
             try:
-                if self._engine_tracking_enabled:
+                if self._engine_tracking_enabled or n > 0:
                     tracks = self.tracker.update(obs_list, ts_ms=ts_ms)
                     # אם תרצה בעתיד — אפשר להחזיר DEBUG קצר:
                     # od_event("DEBUG", "OD1401", "tracking updated", tracks=len(tracks))
@@ -390,26 +512,168 @@ class ObjectDetectionEngine:
 
         # 5) Build payload (שקט כשאין אובייקטים)
         payload = self._build_payload(tracks, ts_ms, det_ok, det_err, det_latency_ms)
+        if rois:
+            payload["detector_state"]["rois"] = [list(r) for r in rois]
+        return tracks, payload, det_latency_ms
+
+    def _plan_rois(self, frame: Any, ts_ms: int) -> Optional[List[Tuple[int, int, int, int]]]:
+        if not self._pose_roi.enabled or not hasattr(self.detector, "detect_rois"):
+            return None
+        shp = getattr(frame, "shape", None)
+        if shp is None or len(shp) < 2:
+            return None
+        return self._pose_roi.plan((int(shp[0]), int(shp[1])), ts_ms)
+
+    def _propagate(self, frame: Any, ts_ms: int) -> Tuple[List[Any], Dict[str, Any], int]:
+        """פריים בלי דיטקטור: תיבות חזויות מה-Tracker (constant-velocity Kalman)."""
+        shp = getattr(frame, "shape", None)
+        size = (int(shp[1]), int(shp[0])) if shp is not None and len(shp) >= 2 else None
+        tracks: List[Any] = self.tracker.predict(ts_ms, frame_size=size)
+        try:
+            tracks = self.features.apply(tracks, ts_ms=ts_ms)
+        except Exception as e:
+            logger.warning("FeatureAugmentor.apply failed (ignored): {}", e)
+        payload = self._build_payload(tracks, ts_ms, True, None, 0)
+        payload["detector_state"]["predicted"] = True
+        return tracks, payload, 0
+
+    def set_pose_keypoints(self, kps: Optional[Dict[str, Any]], frame_hw: Optional[Tuple[int, int]] = None,
+                           ts_ms: Optional[int] = None) -> None:
+        """נקודות pose אחרונות (name → (x, y, vis) בפיקסלים) לתכנון crops; לא חוסם."""
+        self._pose_roi.set_keypoints(kps, frame_hw, _now_ms() if ts_ms is None else int(ts_ms))
+
+    # ------- Worker קבוע (latest-wins) -------
+    # הלולאה הראשית / ה-routes מגישים פריימים ב-submit_frame (רק החלפת רפרנס);
+    # ת'רד אחד לכל Engine לוקח את הפריים האחרון, לכל היותר פעם ב-period_ms,
+    # ומפרסם ODResult. פריים שהוחלף לפני שנלקח נספר כ-dropped.
+
+    def submit_frame(self, frame_bgr: Any, ts_ms: Optional[int] = None) -> int:
+        """מגיש פריים ל-slot (דורס את הקודם); מחזיר את מספר הפריים. לא חוסם."""
+        with self._cv:
+            if self._frame_seq > self._taken_seq:
+                self._stats["dropped"] += 1
+            self._last_frame = frame_bgr
+            self._last_ts_ms = _now_ms() if ts_ms is None else int(ts_ms)
+            self._frame_seq += 1
+            self._stats["submitted"] += 1
+            self._cv.notify_all()
+            return self._frame_seq
+
+    def start_worker(self, period_ms: Optional[int] = None,
+                     source: Optional[Callable[[], Any]] = None) -> None:
+        """
+        מפעיל את ה-worker (אידמפוטנטי). period_ms=None → detector_cfg.period_ms (מתעדכן חי).
+        source: אופציונלי — פונקציה שמחזירה את הפריים האחרון ממקור חיצוני (למשל
+        admin_web.state.get_frame) כשלא הוגש פריים; אותו אובייקט לא מעובד פעמיים.
+        """
         with self._lock:
-            self._last_tracks = tracks
-            self._last_payload = payload
-        return tracks, payload
-
-    # ------- Nonblocking -------
+            self._worker_period_ms = period_ms
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker_stop.clear()
+            self._worker = threading.Thread(target=self._worker_loop, args=(source,),
+                                            daemon=True, name="ODWorker")
+            self._worker.start()
+        od_event("INFO", "OD1050", "worker started", period_ms=period_ms, pull=source is not None)
+
+    def stop_worker(self, timeout: float = 2.0) -> None:
+        with self._cv:
+            t = self._worker
+            self._worker = None
+            self._worker_stop.set()
+            self._cv.notify_all()
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout)
+
+    @property
+    def worker_running(self) -> bool:
+        t = self._worker
+        return t is not None and t.is_alive()
+
+    def _period_s(self) -> float:
+        if self._detect_every_n > 1:
+            return 0.0  # כל פריים מעובד; עלות האינפרנס נשלטת ע"י N
+        per = self._worker_period_ms
+        if per is None:
+            per = getattr(self.detector_cfg, "period_ms", 200) or 0
+        return max(0.0, float(per)) / 1000.0
+
+    def _worker_loop(self, source: Optional[Callable[[], Any]]) -> None:
+        if not self._started:
+            self.start()
+        stop = self._worker_stop
+        next_due = 0.0
+        last_src: Any = None
+        while not stop.is_set():
+            left = next_due - time.monotonic()
+            if left > 0:
+                stop.wait(left)
+                continue
+            with self._cv:
+                if self._frame_seq == self._taken_seq and source is None:
+                    self._cv.wait(0.5)
+                    continue
+                frame, ts_ms, seq = self._last_frame, self._last_ts_ms, self._frame_seq
+                fresh = seq != self._taken_seq
+                self._taken_seq = seq
+            if not fresh:
+                try:
+                    frame = source()  # type: ignore[misc]
+                except Exception as e:
+                    logger.warning("OD worker source failed: {}", e)
+                    frame = None
+                if frame is None or frame is last_src:
+                    stop.wait(min(0.05, self._period_s() or 0.05))
+                    continue
+                last_src, ts_ms = frame, _now_ms()
+            if frame is None:
+                continue
+            next_due = time.monotonic() + self._period_s()
+            try:
+                self._run(frame, ts_ms or _now_ms(), seq)
+            except Exception as e:
+                logger.error("OD worker tick failed: {}", e)
+        logger.info("OD worker stopped (processed={})", self._stats["processed"])
 
     def tick_nonblocking(self) -> None:
-        if self._busy:
-            return
-        self._busy = True
-        threading.Thread(target=self._tick_worker, daemon=True, name="ODTick").start()
+        """תאימות: מוודא שה-worker רץ; הפריים שהוגש ב-update_frame יעובד ברקע."""
+        if not self.worker_running:
+            self.start_worker()
+
+    def latest_result(self) -> ODResult:
+        """התוצאה האחרונה (version=0 → עוד אין). לא חוסם."""
+        return self._result
+
+    def wait_result(self, after_version: int = 0, timeout: Optional[float] = None) -> Optional[ODResult]:
+        """ממתין לתוצאה עם version > after_version; None אם עבר ה-timeout."""
+        with self._cv:
+            if not self._cv.wait_for(lambda: self._result.version > after_version, timeout):
+                return None
+            return self._result
+
+    def add_result_listener(self, fn: Callable[[ODResult], None]) -> None:
+        """fn(result) נקרא בת'רד של ה-worker אחרי כל תוצאה — לשמור קצר."""
+        with self._lock:
+            if fn not in self._listeners:
+                self._listeners = self._listeners + [fn]
 
-    def _tick_worker(self) -> None:
-        try:
-            self.tick()
-        except Exception as e:
-            logger.error("tick_nonblocking worker failed: {}", e)
-        finally:
-            self._busy = False
+    def remove_result_listener(self, fn: Callable[[ODResult], None]) -> None:
+        with self._lock:
+            self._listeners = [f for f in self._listeners if f is not fn]
+
+    def worker_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st = dict(self._stats)
+        st["fps"] = round(float(st["fps"]), 2)
+        st["running"] = self.worker_running
+        st["version"] = self._result.version
+        st["latency_ms"] = self._result.latency_ms
+        st["angle_cache"] = self._angles.stats()
+        st["pose_roi"] = self._pose_roi.stats()
+        scales = getattr(self.detector, "scale_stats", None)
+        if scales is not None:
+            st["multiscale"] = scales()
+        return st
 
     def get_last_result(self) -> Tuple[List[Any], Dict[str, Any]]:
         with self._lock:
@@ -493,6 +757,8 @@ class ObjectDetectionEngine:
                 "quality": get("angle_quality", get("quality", None)),
                 "angle_src": get("angle_src", None),
                 "stale": get("stale", False),
+                "predicted": get("predicted", False),
+                "conf": get("conf", None),
                 "updated_at_ms": ts_ms,
             })
 
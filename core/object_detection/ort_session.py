@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# ===============================================================
+# ort_session.py — יצירת InferenceSession של ONNX Runtime עם אפשרויות מכווננות
+# מה הקובץ עושה:
+# 1) SessionOptions מה-OD config (detector.extra) או מ-ENV: intra/inter threads,
+#    execution mode, graph optimization level, memory arena / pattern, spinning.
+#    ברירת מחדל: חצי מהליבות (עד 4) ל-intra, 1 ל-inter, בלי spin — לא נלחמים ב-MediaPipe על ליבות.
+# 2) מטמון גרף מאופטם: בהפעלה הראשונה ORT שומר את הגרף אחרי האופטימיזציות
+#    (optimized_model_filepath); בהפעלות הבאות נטען הקובץ השמור עם ORT_DISABLE_ALL
+#    (offline mode) — cold start מהיר יותר. המפתח כולל את רמת האופטימיזציה וגרסת ORT;
+#    קובץ ישן מהמודל (mtime) או פגום — נבנה מחדש.
+#
+# שימוש:
+#   from core.object_detection.ort_session import make_session
+#   sess, info = make_session(ort, path, extra)     # info: threads / opt / cache / load_ms
+#
+# מפתחות extra (ENV בסוגריים):
+#   ort_intra_threads (ORT_INTRA_THREADS), ort_inter_threads (ORT_INTER_THREADS),
+#   ort_execution_mode: sequential|parallel (ORT_EXEC_MODE),
+#   ort_graph_opt: disable|basic|extended|all (ORT_GRAPH_OPT),
+#   ort_mem_arena / ort_mem_pattern / ort_spin: 0|1 (ORT_MEM_ARENA / ORT_MEM_PATTERN / ORT_ALLOW_SPINNING),
+#   ort_cache_dir: תיקייה | "off" (ORT_CACHE_DIR; ריק → <תיקיית המודל>/.ort_cache)
+# ===============================================================
+
+from __future__ import annotations
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from loguru import logger  # type: ignore
+except Exception:  # pragma: no cover
+    import logging
+    logger = logging.getLogger("od.ort_session")  # type: ignore
+
+__all__ = ["make_session", "session_options", "optimized_cache_path"]
+
+ORT_INTRA_THREADS = os.getenv("ORT_INTRA_THREADS", "")
+ORT_INTER_THREADS = os.getenv("ORT_INTER_THREADS", "1")
+ORT_EXEC_MODE = os.getenv("ORT_EXEC_MODE", "sequential")
+ORT_GRAPH_OPT = os.getenv("ORT_GRAPH_OPT", "all")
+ORT_MEM_ARENA = os.getenv("ORT_MEM_ARENA", "1")
+ORT_MEM_PATTERN = os.getenv("ORT_MEM_PATTERN", "1")
+ORT_ALLOW_SPINNING = os.getenv("ORT_ALLOW_SPINNING", "0")
+ORT_CACHE_DIR = os.getenv("ORT_CACHE_DIR", "")
+
+_OPT_LEVELS = {"disable": "ORT_DISABLE_ALL", "basic": "ORT_ENABLE_BASIC",
+               "extended": "ORT_ENABLE_EXTENDED", "all": "ORT_ENABLE_ALL"}
+_PROVIDERS = ["CPUExecutionProvider"]
+
+
+def _flag(v: Any) -> bool:
+    return str(v).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _default_intra() -> int:
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+def session_options(ort: Any, extra: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+    """SessionOptions + תקציר (לוג / runtime params)."""
+    ex = extra or {}
+    intra = int(ex.get("ort_intra_threads", ORT_INTRA_THREADS) or 0) or _default_intra()
+    inter = max(1, int(ex.get("ort_inter_threads", ORT_INTER_THREADS) or 1))
+    mode = str(ex.get("ort_execution_mode", ORT_EXEC_MODE) or "sequential").strip().lower()
+    opt = str(ex.get("ort_graph_opt", ORT_GRAPH_OPT) or "all").strip().lower()
+    if opt not in _OPT_LEVELS:
+        logger.warning("[ONNX] unknown ort_graph_opt={} -> all", opt)
+        opt = "all"
+    arena = _flag(ex.get("ort_mem_arena", ORT_MEM_ARENA))
+    pattern = _flag(ex.get("ort_mem_pattern", ORT_MEM_PATTERN))
+    spin = _flag(ex.get("ort_spin", ORT_ALLOW_SPINNING))
+
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = intra
+    so.inter_op_num_threads = inter
+    so.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if mode == "parallel"
+                         else ort.ExecutionMode.ORT_SEQUENTIAL)
+    so.graph_optimization_level = getattr(ort.GraphOptimizationLevel, _OPT_LEVELS[opt])
+    so.enable_cpu_mem_arena = arena
+    so.enable_mem_pattern = pattern
+    so.add_session_config_entry("session.intra_op.allow_spinning", "1" if spin else "0")
+    info = {"intra_threads": intra, "inter_threads": inter, "execution_mode": mode, "graph_opt": opt,
+            "mem_arena": arena, "mem_pattern": pattern, "spin": spin}
+    return so, info
+
+
+def optimized_cache_path(ort: Any, model_path: str, opt: str, extra: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """נתיב הגרף המאופטם במטמון, או None כשהמטמון כבוי / אין אופטימיזציה לשמור."""
+    d = str((extra or {}).get("ort_cache_dir", ORT_CACHE_DIR) or "").strip()
+    if d.lower() in ("off", "0", "none", "false") or opt == "disable":
+        return None
+    d = d or os.path.join(os.path.dirname(os.path.abspath(model_path)), ".ort_cache")
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    ver = str(getattr(ort, "__version__", "x")).replace(".", "_")
+    return os.path.join(d, f"{stem}.{opt}.ort{ver}.onnx")
+
+
+def make_session(ort: Any, model_path: str, extra: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+    """InferenceSession (CPU) עם האפשרויות מה-config; משתמש במטמון הגרף המאופטם אם קיים ועדכני."""
+    t0 = time.perf_counter()
+    so, info = session_options(ort, extra)
+    cache = optimized_cache_path(ort, model_path, info["graph_opt"], extra)
+    info["cache"] = "off"
+    sess = None
+    if cache is not None:
+        info["cache_path"] = cache
+        try:
+            fresh = os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(model_path)
+        except OSError:
+            fresh = False
+        if fresh:
+            so_cached, _ = session_options(ort, extra)
+            so_cached.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            try:
+                sess = ort.InferenceSession(cache, sess_options=so_cached, providers=_PROVIDERS)
+                info["cache"] = "hit"
+            except Exception as e:
+                logger.warning("[ONNX] optimized cache unusable ({}) -> rebuilding {}", e, cache)
+        if sess is None:
+            tmp = f"{cache}.{os.getpid()}.tmp.onnx"  # ORT מזהה פורמט לפי הסיומת
+            try:
+                os.makedirs(os.path.dirname(cache), exist_ok=True)
+                so.optimized_model_filepath = tmp
+                sess = ort.InferenceSession(model_path, sess_options=so, providers=_PROVIDERS)
+                os.replace(tmp, cache)  # אטומי — תהליך מקביל לא יקרא קובץ חלקי
+                info["cache"] = "saved"
+            except Exception as e:
+                logger.warning("[ONNX] could not save optimized graph to {} ({})", cache, e)
+                info["cache"] = "error"
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+    if sess is None:
+        so, _ = session_options(ort, extra)
+        sess = ort.InferenceSession(model_path, sess_options=so, providers=_PROVIDERS)
+    info["load_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    logger.info("[ONNX] session {} {}", os.path.basename(model_path), info)
+    return sess, info
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# ===============================================================
+# pose_roi.py — אזורי דיטקציה מונחי-pose (ידיים / רגליים)
+# מה הקובץ עושה:
+# 1) מקבל את נקודות ה-pose האחרונות (KinematicsComputer.last_keypoints) — name → (x, y, vis).
+# 2) בונה עד שני אזורים: סביב כפות הידיים (משקולות / מוט) וסביב כפות הרגליים
+#    (צלחות / קטלבל), בריפוד יחסי לרוחב הכתפיים; תיבות שנמצאו בדיטקציה הקודמת
+#    מצורפות לאזור הקרוב — מוט ארוך לא נחתך בקצה ה-crop.
+# 3) מעבר full-frame כל full_every דיטקציות, כשאין pose טרי, כשהאזורים מכסים את רוב
+#    הפריים, או כשתיבה נגעה בקצה פנימי של crop (אובייקט שנחתך) — בטיק הבא.
+#
+# שימוש:
+#   planner = PoseROIPlanner()
+#   planner.set_keypoints(kps, frame_hw, ts_ms)          # מהלולאה הראשית
+#   rois = planner.plan(frame_hw, ts_ms)                 # None → full-frame
+#   items = detector.detect_rois(frame, rois) if rois else detector.detect(frame)
+#   planner.note_result([d.box for d in items], rois, frame_hw)
+#
+# ENV: OD_POSE_ROI=1 מפעיל; OD_POSE_ROI_FULL_EVERY / _MAX_AGE_MS / _MIN_VIS / _PAD / _MAX_AREA.
+# ===============================================================
+
+from __future__ import annotations
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+__all__ = ["PoseROIPlanner", "rois_from_keypoints", "OD_POSE_ROI"]
+
+BBox = Tuple[int, int, int, int]
+
+OD_POSE_ROI = os.getenv("OD_POSE_ROI", "0").strip().lower() in ("1", "true", "yes", "on")
+OD_POSE_ROI_FULL_EVERY = int(os.getenv("OD_POSE_ROI_FULL_EVERY", "8"))
+OD_POSE_ROI_MAX_AGE_MS = int(os.getenv("OD_POSE_ROI_MAX_AGE_MS", "400"))
+OD_POSE_ROI_MIN_VIS = float(os.getenv("OD_POSE_ROI_MIN_VIS", "0.5"))
+OD_POSE_ROI_PAD = float(os.getenv("OD_POSE_ROI_PAD", "1.0"))          # × רוחב כתפיים
+OD_POSE_ROI_MAX_AREA = float(os.getenv("OD_POSE_ROI_MAX_AREA", "0.6"))  # מעל זה — full-frame זול באותה מידה
+
+_HANDS = ("left_wrist", "right_wrist", "left_index", "right_index", "left_pinky", "right_pinky",
+          "left_thumb", "right_thumb")
+_FEET = ("left_ankle", "right_ankle", "left_heel", "right_heel", "left_foot_index", "right_foot_index")
+_MIN_SIDE_PX = 64
+_EDGE_PX = 2
+
+
+def _pt(kps: Dict[str, Any], name: str, min_vis: float) -> Optional[Tuple[float, float]]:
+    p = kps.get(name)
+    if p is None or len(p) < 2:
+        return None
+    if len(p) >= 3 and p[2] is not None and float(p[2]) < min_vis:
+        return None
+    return float(p[0]), float(p[1])
+
+
+def _unit_px(kps: Dict[str, Any], frame_hw: Tuple[int, int], min_vis: float) -> float:
+    """קנה מידה של הגוף: רוחב כתפיים, אחרת 0.6 × אורך הגו, אחרת 12% מהפריים."""
+    ls, rs = _pt(kps, "left_shoulder", min_vis), _pt(kps, "right_shoulder", min_vis)
+    if ls and rs:
+        d = ((ls[0] - rs[0]) ** 2 + (ls[1] - rs[1]) ** 2) ** 0.5
+        if d >= 8:
+            return d
+    for s, h in (("left_shoulder", "left_hip"), ("right_shoulder", "right_hip")):
+        a, b = _pt(kps, s, min_vis), _pt(kps, h, min_vis)
+        if a and b:
+            return 0.6 * ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5
+    return 0.12 * max(frame_hw)
+
+
+def _group_box(pts: Sequence[Tuple[float, float]], pad: float, frame_hw: Tuple[int, int]) -> Optional[BBox]:
+    if not pts:
+        return None
+    h, w = frame_hw
+    xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+    x1, y1, x2, y2 = min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad
+    box = _clip((int(x1), int(y1), int(x2 + 0.5), int(y2 + 0.5)), w, h)
+    return box if box[2] > box[0] and box[3] > box[1] else None
+
+
+def _clip(b: BBox, w: int, h: int) -> BBox:
+    x1, y1, x2, y2 = b
+    if x2 - x1 < _MIN_SIDE_PX:  # crop זעיר → מרחיבים סביב המרכז
+        c = (x1 + x2) // 2
+        x1, x2 = c - _MIN_SIDE_PX // 2, c + _MIN_SIDE_PX // 2
+    if y2 - y1 < _MIN_SIDE_PX:
+        c = (y1 + y2) // 2
+        y1, y2 = c - _MIN_SIDE_PX // 2, c + _MIN_SIDE_PX // 2
+    return max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+
+
+def _union(a: BBox, b: BBox) -> BBox:
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _area(b: BBox) -> int:
+    return max(0, b[2] - b[0]) * max(0, b[3] - b[1])
+
+
+def _overlaps(a: BBox, b: BBox) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _center_d2(a: BBox, b: BBox) -> float:
+    return ((a[0] + a[2] - b[0] - b[2]) / 2.0) ** 2 + ((a[1] + a[3] - b[1] - b[3]) / 2.0) ** 2
+
+
+def rois_from_keypoints(kps: Dict[str, Any], frame_hw: Tuple[int, int],
+                        prev_boxes: Sequence[BBox] = (), min_vis: float = OD_POSE_ROI_MIN_VIS,
+                        pad: float = OD_POSE_ROI_PAD) -> List[BBox]:
+    """עד שני אזורים (ידיים / רגליים) בפיקסלים; אזורים חופפים מתמזגים לאחד."""
+    h, w = int(frame_hw[0]), int(frame_hw[1])
+    pad_px = pad * _unit_px(kps, (h, w), min_vis)
+    rois: List[BBox] = []
+    for names in (_HANDS, _FEET):
+        b = _group_box([p for p in (_pt(kps, n, min_vis) for n in names) if p], pad_px, (h, w))
+        if b is not None:
+            rois.append(b)
+    if not rois:
+        return []
+    # תיבות מהדיטקציה הקודמת (מורחבות 10%) מצטרפות לאזור שהן חופפות / הקרוב ביותר
+    for bx in prev_boxes:
+        mx, my = 0.1 * (bx[2] - bx[0]), 0.1 * (bx[3] - bx[1])
+        ex = _clip((int(bx[0] - mx), int(bx[1] - my), int(bx[2] + mx), int(bx[3] + my)), w, h)
+        hit = [i for i, r in enumerate(rois) if _overlaps(r, ex)]
+        i = hit[0] if hit else min(range(len(rois)), key=lambda k: _center_d2(rois[k], ex))
+        rois[i] = _union(rois[i], ex)
+    if len(rois) == 2 and _overlaps(rois[0], rois[1]):
+        rois = [_union(rois[0], rois[1])]
+    return rois
+
+
+class PoseROIPlanner:
+    def __init__(self, enabled: bool = OD_POSE_ROI, full_every: int = OD_POSE_ROI_FULL_EVERY,
+                 max_age_ms: int = OD_POSE_ROI_MAX_AGE_MS, min_vis: float = OD_POSE_ROI_MIN_VIS,
+                 pad: float = OD_POSE_ROI_PAD, max_area: float = OD_POSE_ROI_MAX_AREA):
+        self.enabled = bool(enabled)
+        self.full_every = max(1, int(full_every))
+        self.max_age_ms = int(max_age_ms)
+        self.min_vis = float(min_vis)
+        self.pad = float(pad)
+        self.max_area = float(max_area)
+        self._lock = threading.Lock()
+        self._kps: Optional[Dict[str, Any]] = None
+        self._kps_hw: Optional[Tuple[int, int]] = None
+        self._kps_ts = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self._since_full = self.full_every  # הדיטקציה הראשונה תמיד על כל הפריים
+        self._force_full = True
+        self._prev_boxes: List[BBox] = []
+        self._runs = {"full": 0, "roi": 0, "crops": 0, "truncated": 0}
+        self._roi_px = 0
+        self._frame_px = 0
+
+    # ---- קלט pose (ת'רד הלולאה הראשית) ----
+    def set_keypoints(self, kps: Optional[Dict[str, Any]], frame_hw: Optional[Tuple[int, int]] = None,
+                      ts_ms: int = 0) -> None:
+        with self._lock:
+            self._kps = dict(kps) if kps else None
+            self._kps_hw = None if frame_hw is None else (int(frame_hw[0]), int(frame_hw[1]))
+            self._kps_ts = int(ts_ms)
+
+    # ---- תכנון (ת'רד ה-OD) ----
+    def plan(self, frame_hw: Tuple[int, int], ts_ms: int) -> Optional[List[BBox]]:
+        """רשימת crops לדיטקציה הבאה, או None → full-frame."""
+        if not self.enabled or self._force_full or self._since_full >= self.full_every:
+            return None
+        with self._lock:
+            kps, kps_hw, kps_ts = self._kps, self._kps_hw, self._kps_ts
+        h, w = int(frame_hw[0]), int(frame_hw[1])
+        if not kps or (ts_ms - kps_ts) > self.max_age_ms:
+            return None
+        if kps_hw is not None and kps_hw != (h, w):
+            sx, sy = w / float(kps_hw[1] or w), h / float(kps_hw[0] or h)
+            kps = {k: (v[0] * sx, v[1] * sy) + tuple(v[2:]) for k, v in kps.items() if v is not None}
+        rois = rois_from_keypoints(kps, (h, w), self._prev_boxes, self.min_vis, self.pad)
+        if not rois or sum(_area(r) for r in rois) > self.max_area * h * w:
+            return None
+        return rois
+
+    def note_result(self, boxes: Sequence[BBox], rois: Optional[Sequence[BBox]],
+                    frame_hw: Tuple[int, int]) -> None:
+        """אחרי דיטקציה: זוכר תיבות, סופר, ומסמן full-frame אם תיבה נחתכה בקצה crop פנימי."""
+        h, w = int(frame_hw[0]), int(frame_hw[1])
+        self._prev_boxes = [tuple(int(v) for v in b[:4]) for b in boxes]
+        self._frame_px += h * w
+        if not rois:
+            self._runs["full"] += 1
+            self._since_full = 0
+            self._force_full = False
+            self._roi_px += h * w
+            return
+        self._runs["roi"] += 1
+        self._runs["crops"] += len(rois)
+        self._since_full += 1
+        self._roi_px += sum(_area(r) for r in rois)
+        self._force_full = any(self._truncated(b, r, w, h) for b in self._prev_boxes for r in rois)
+        if self._force_full:
+            self._runs["truncated"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._runs)
+        out["enabled"] = self.enabled
+        out["px_share"] = round(self._roi_px / self._frame_px, 3) if self._frame_px else 1.0
+        return out
+
+    @staticmethod
+    def _truncated(b: BBox, r: BBox, w: int, h: int) -> bool:
+        if not _overlaps(b, r):
+            return False
+        return ((r[0] > 0 and b[0] <= r[0] + _EDGE_PX) or (r[1] > 0 and b[1] <= r[1] + _EDGE_PX)
+                or (r[2] < w and b[2] >= r[2] - _EDGE_PX) or (r[3] < h and b[3] >= r[3] - _EDGE_PX))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# ===============================================================
+# preprocess.py — letterbox + BGR→RGB + /255 + CHW לטנזור קלט קבוע (ONNX)
+# מה הקובץ עושה:
+# 1) גאומטריית letterbox (ratio / גודל אחרי resize / padding) מחושבת פעם אחת
+#    לכל (רזולוציית מקור, גודל קלט) ונשמרת.
+# 2) resize לתוך buffer uint8 קבוע (cv2.resize dst=...).
+# 3) החלפת ערוצים + נרמול + CHW בפעולה אחת לכל ערוץ ישירות לתוך טנזור float32
+#    קבוע [1,3,H,W]; שולי ה-padding ממולאים פעם אחת כשהגאומטריה משתנה.
+#
+# שימוש:
+#   from core.object_detection.preprocess import Letterbox
+#   pre = Letterbox()
+#   tensor, ratio, (left, top) = pre(frame_bgr, (416, 416))
+#   session.run(None, {name: tensor})
+#
+# ⚠️ tensor הוא אותו אובייקט בכל קריאה — לא לשמור אותו מעבר ל-run הנוכחי.
+# תוצאה זהה (bit-exact) ל-_letterbox + bgr_to_rgb + astype/255 + transpose.
+# ===============================================================
+
+from __future__ import annotations
+from typing import Dict, Tuple
+
+import numpy as np
+
+__all__ = ["Letterbox", "letterbox_geometry"]
+
+_PAD_VALUE = 114
+_GEOM_CACHE_MAX = 16
+
+
+def letterbox_geometry(h0: int, w0: int, ih: int, iw: int) -> Tuple[float, int, int, int, int]:
+    """(ratio, new_w, new_h, left, top) — אותן נוסחאות כמו providers._letterbox."""
+    r = min(ih / h0, iw / w0)
+    nw, nh = int(round(w0 * r)), int(round(h0 * r))
+    dw, dh = (iw - nw) / 2.0, (ih - nh) / 2.0
+    return r, nw, nh, int(round(dw - 0.1)), int(round(dh - 0.1))
+
+
+class Letterbox:
+    """preprocess בלי הקצאות לכל פריים (מלבד שינוי רזולוציה / גודל קלט)."""
+
+    def __init__(self) -> None:
+        self._geom: Dict[Tuple[int, int, int, int], Tuple[float, int, int, int, int]] = {}
+        self._tensor = np.empty((1, 3, 0, 0), dtype=np.float32)
+        self._resized = np.empty((0, 0, 3), dtype=np.uint8)
+        self._filled_for: Tuple[int, ...] = ()
+
+    def _geometry(self, h0: int, w0: int, ih: int, iw: int) -> Tuple[float, int, int, int, int]:
+        key = (h0, w0, ih, iw)
+        g = self._geom.get(key)
+        if g is None:
+            if len(self._geom) >= _GEOM_CACHE_MAX:
+                self._geom.clear()
+            g = self._geom[key] = letterbox_geometry(h0, w0, ih, iw)
+        return g
+
+    def __call__(self, frame_bgr: np.ndarray, new_shape: Tuple[int, int]) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        import cv2  # local import to avoid hard dependency if not used
+        ih, iw = int(new_shape[0]), int(new_shape[1])
+        h0, w0 = frame_bgr.shape[:2]
+        r, nw, nh, left, top = self._geometry(h0, w0, ih, iw)
+
+        if self._tensor.shape[2:] != (ih, iw):
+            self._tensor = np.empty((1, 3, ih, iw), dtype=np.float32)
+            self._filled_for = ()
+        if self._filled_for != (nw, nh, left, top):
+            # padding קבוע — מתמלא רק כשהגאומטריה משתנה; הפנים נדרס בכל פריים
+            self._tensor.fill(np.float32(_PAD_VALUE) / np.float32(255.0))
+            self._filled_for = (nw, nh, left, top)
+        if self._resized.shape[:2] != (nh, nw):
+            self._resized = np.empty((nh, nw, 3), dtype=np.uint8)
+
+        src = cv2.resize(frame_bgr, (nw, nh), dst=self._resized, interpolation=cv2.INTER_LINEAR)
+        roi = self._tensor[0, :, top:top + nh, left:left + nw]
+        for c in range(3):  # RGB[c] = BGR[2-c]
+            np.divide(src[..., 2 - c], 255.0, out=roi[c], dtype=np.float32)
+        return self._tensor, r, (left, top)
@@ -12,8 +12,14 @@ import os
 import time
 import math
 
+from concurrent.futures import TimeoutError as FutureTimeout
+
 import numpy as np
 
+from core.object_detection.preprocess import Letterbox
+from core.object_detection.batching import ONNX_BATCH_MAX, ONNX_BATCH_WAIT_MS, shared_batcher
+from core.object_detection.ort_session import make_session
+
 try:
     from loguru import logger
 except Exception:  # pragma: no cover
@@ -128,7 +134,20 @@ class YoloV8Provider:
         if isinstance(imgsz, int) and imgsz > 0:
             self._imgsz = int(imgsz)
 
-    def detect(self, frame_bgr: np.ndarray, threshold: float, overlap: float, max_objects: int, timeout_ms: int):
+    def warmup(self, sizes: Optional[List[int]] = None) -> List[int]:
+        """ריצה אחת על פריים ריק לכל גודל (None → imgsz הנוכחי) — המעבר בין גדלים בזמן ריצה לא נתקע."""
+        ok: List[int] = []
+        for s in ([self._imgsz] if sizes is None else sizes):
+            try:
+                self._model.predict(np.zeros((int(s), int(s), 3), np.uint8), verbose=False,
+                                    device=self._device, imgsz=int(s))
+                ok.append(int(s))
+            except Exception as e:
+                logger.warning("[YOLOv8] warmup imgsz={} failed: {}", s, e)
+        return ok
+
+    def detect(self, frame_bgr: np.ndarray, threshold: float, overlap: float, max_objects: int, timeout_ms: int,
+               imgsz: Optional[int] = None):
         frame_rgb = bgr_to_rgb(frame_bgr)
         results = self._model.predict(
             frame_rgb,
@@ -137,7 +156,7 @@ class YoloV8Provider:
             max_det=int(max_objects),
             verbose=False,
             device=self._device,
-            imgsz=self._imgsz,
+            imgsz=int(imgsz or self._imgsz),
         )[0]
         names = results.names or {}
         outs: List[DetectionItem] = []
@@ -165,6 +184,7 @@ class YoloV8Provider:
 def _sigmoid(x: np.ndarray) -> np.ndarray:
     return 1.0 / (1.0 + np.exp(-x))
 
+# הפניה (reference) — המסלול החם הוא preprocess.Letterbox שמחזיר תוצאה זהה בלי הקצאות
 def _letterbox(im: np.ndarray, new_shape=(640, 640), color=(114, 114, 114), stride=32):
     import cv2  # local import to avoid hard dependency if not used
     h0, w0 = im.shape[:2]
@@ -186,25 +206,69 @@ def _xywh2xyxy(x: np.ndarray) -> np.ndarray:
     y[:, 3] = x[:, 1] + x[:, 3] / 2
     return y
 
-def _nms(boxes: np.ndarray, scores: np.ndarray, iou_th: float = 0.45, top_k: int = 300) -> np.ndarray:
-    x1, y1, x2, y2 = boxes.T
+NMS_PRE_TOPK = int(os.getenv("NMS_PRE_TOPK", "3000"))   # מועמדים מקסימליים לפני NMS (argpartition)
+NMS_BLOCK = int(os.getenv("NMS_BLOCK", "256"))          # גודל בלוק לחישוב IoU
+_NMS_MATRIX_MAX = 128                                   # מתחת לזה — מטריצה בוליאנית לבלוק
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, iou_th: float = 0.45, top_k: int = 300,
+         class_ids: Optional[np.ndarray] = None, pre_k: int = NMS_PRE_TOPK, block: int = NMS_BLOCK) -> np.ndarray:
+    """
+    NMS חמדני מדויק, מוקטר בבלוקים:
+    • מעל pre_k מועמדים — argpartition לפי score (בלי מיון מלא של 8400).
+    • כל בלוק (לפי סדר score) מסונן מול כל מה שכבר נשמר במטריצת IoU אחת [בלוק×נשמרו];
+      בתוך הבלוק — איטרציה לכל תיבה שנשמרת, רק על שורדי הבלוק (לא על כל המועמדים).
+    • class_ids → דיכוי רק בתוך אותה מחלקה (offset קואורדינטות לכל מחלקה).
+    בלי class_ids ועם ≤pre_k מועמדים — אותם אינדקסים ובאותו סדר כמו הלולאה הקודמת.
+    """
+    n = int(scores.shape[0])
+    if n == 0 or top_k <= 0:
+        return np.zeros((0,), dtype=int)
+    if n > pre_k:
+        cand = np.argpartition(-scores, pre_k - 1)[:pre_k]
+        order = cand[scores[cand].argsort()[::-1]]
+    else:
+        order = scores.argsort()[::-1]
+
+    b = boxes[order, :4]
+    if class_ids is not None:
+        # תיבות ממחלקות שונות מוזזות לאזורים זרים → IoU=0 ביניהן
+        span = float(np.max(b)) - min(float(np.min(b)), 0.0) + 1.0
+        b = b.astype(np.float64) + (np.asarray(class_ids)[order] * span)[:, None]
+    x1, y1, x2, y2 = (np.ascontiguousarray(b[:, k]) for k in range(4))
     areas = (x2 - x1) * (y2 - y1)
-    order = scores.argsort()[::-1]
-    keep: List[int] = []
-    while order.size > 0 and len(keep) < top_k:
-        i = int(order[0])
-        keep.append(i)
-        xx1 = np.maximum(x1[i], x1[order[1:]])
-        yy1 = np.maximum(y1[i], y1[order[1:]])
-        xx2 = np.minimum(x2[i], x2[order[1:]])
-        yy2 = np.minimum(y2[i], y2[order[1:]])
-        w = np.maximum(0.0, xx2 - xx1)
-        h = np.maximum(0.0, yy2 - yy1)
+
+    def _ok(a: np.ndarray, k: np.ndarray) -> np.ndarray:
+        """[len(a), len(k)] — IoU<=iou_th; אותו חשבון כמו הלולאה הקודמת (כולל 1e-6)."""
+        w = np.maximum(0.0, np.minimum.outer(x2[a], x2[k]) - np.maximum.outer(x1[a], x1[k]))
+        h = np.maximum(0.0, np.minimum.outer(y2[a], y2[k]) - np.maximum.outer(y1[a], y1[k]))
         inter = w * h
-        ovr = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
-        inds = np.where(ovr <= iou_th)[0]
-        order = order[inds + 1]
-    return np.array(keep, dtype=int)
+        return inter / (np.add.outer(areas[a], areas[k]) - inter + 1e-6) <= iou_th
+
+    keep: List[int] = []  # מיקומים בתוך order
+    step = max(1, int(block))
+    for start in range(0, len(order), step):
+        live = np.arange(start, min(len(order), start + step))
+        if keep:
+            live = live[_ok(live, np.asarray(keep)).all(axis=1)]
+        # חמדני בתוך הבלוק: כל עוד נשארו הרבה — שורה אחת מול השורדים (מדלל מהר בצבירים);
+        # מעט שורדים — מטריצה בוליאנית אחת ואיטרציה זולה לכל תיבה שנשמרת
+        while live.size > _NMS_MATRIX_MAX and len(keep) < top_k:
+            keep.append(int(live[0]))
+            live = live[1:][_ok(live[:1], live[1:])[0]]
+        if live.size and len(keep) < top_k:
+            ok = _ok(live, live)
+            alive = np.ones(live.size, dtype=bool)
+            j = 0
+            while len(keep) < top_k:
+                keep.append(int(live[j]))
+                rest = alive[j + 1:]
+                rest &= ok[j, j + 1:]
+                if not rest.any():
+                    break
+                j += 1 + int(rest.argmax())
+        if len(keep) >= top_k:
+            break
+    return order[np.asarray(keep, dtype=int)]
 
 def _scale_coords_letterbox(boxes: np.ndarray, orig_hw, new_hw, ratio: float, pad) -> np.ndarray:
     (h0, w0) = orig_hw
@@ -245,10 +309,36 @@ class OnnxProvider:
         path = getattr(cfg, "onnx_path", None) or getattr(cfg, "weights", None)
         if not path or not os.path.exists(path):
             raise FileNotFoundError(f"ONNX model not found at: {path}")
-        self._session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        extra = (getattr(cfg, "extra", {}) or {})
+        # sessions עם threads / opt level / arena מה-config + מטמון גרף מאופטם (ort_session.py)
+        self.session_info: Dict[str, Any] = {}
+
+        def _make(p: str) -> Any:
+            sess, info = make_session(ort, p, extra)
+            self.session_info.setdefault("sessions", {})[os.path.basename(p)] = info
+            return sess
+
+        self._make_session = _make
+        # micro-batching: session + batcher משותפים לכל הזרמים של אותו מודל (extra.batch_max / ONNX_BATCH_MAX)
+        self._batcher = None
+        batch_max = int(extra.get("batch_max", ONNX_BATCH_MAX) or 1)
+        if batch_max > 1:
+            self._batcher = shared_batcher(
+                path, lambda: _make(path),
+                batch_max, float(extra.get("batch_wait_ms", ONNX_BATCH_WAIT_MS)))
+            self._session = self._batcher.session
+            if self._batcher.max_batch <= 1:
+                logger.warning("[ONNX] model has a fixed batch dim — micro-batching disabled")
+                self._batcher = None
+        else:
+            self._session = _make(path)
         inp = self._session.get_inputs()[0]
         self._inp_name = inp.name
         ishape = inp.shape
+        try:
+            self._fixed_hw = isinstance(ishape[2], int) and isinstance(ishape[3], int)
+        except Exception:
+            self._fixed_hw = False
         # נסיון להסיק גודל קלט; אם דינמי—ניעזר ב-extra.imgsz (ברירת מחדל 416)
         try:
             self._ih = int(ishape[2]) if isinstance(ishape[2], int) else int((getattr(cfg, "extra", {}) or {}).get("imgsz", 416) or 416)
@@ -269,24 +359,113 @@ class OnnxProvider:
         elif isinstance(cn, dict) and cn:
             max_k = max(map(int, cn.keys()))
             self._class_names = [cn.get(str(i), str(i)) for i in range(max_k + 1)]
-        extra = (getattr(cfg, "extra", {}) or {})
         self._allow_any = bool(extra.get("allow_any_label", False))
         self._save_dump = bool(int(extra.get("debug_dump", 0)))
+        # NMS לפי מחלקה: מוט/צלחת/משקולת חופפים לא מדכאים זה את זה (ברירת מחדל: class-agnostic כמקודם)
+        self._class_aware_nms = bool(int(extra.get("class_aware_nms", 0)))
+        # טנזור קלט + buffer resize קבועים לכל גודל קלט (בלי הקצאות לכל טיק, גם כשמחליפים גודל)
+        self._pres: Dict[Tuple[int, int], Letterbox] = {}
+        # multi-scale: מודל בצורה קבועה → session נפרד לכל גודל (extra.scale_models: {320: path})
+        self._scale_models = {int(k): str(v) for k, v in (extra.get("scale_models") or {}).items()}
+        self._scale_sessions: Dict[int, Tuple[Any, str]] = {}
+        # warmup: ריצות לכל גודל קלט לפני שה-Engine מדווח מוכנות; גודל שחומם לא מחומם שוב
+        self._warmup_runs = max(1, int(extra.get("warmup_runs", 1) or 1))
+        self._warm: Dict[Tuple[int, int], float] = {}
 
     def set_imgsz(self, imgsz: int) -> None:
         if isinstance(imgsz, int) and imgsz > 0:
             self._ih = self._iw = int(imgsz)
 
-    def detect(self, frame_bgr: np.ndarray, threshold: float, overlap: float, max_objects: int, timeout_ms: int):
-        img, ratio, (dw, dh) = _letterbox(frame_bgr, (self._ih, self._iw))
-        img = bgr_to_rgb(img).astype(np.float32) / 255.0
-        img = np.transpose(img, (2, 0, 1))[None, ...]  # [1,3,H,W]
+    def _in_hw(self, imgsz: Optional[int]) -> Tuple[int, int]:
+        return (self._ih, self._iw) if not imgsz else (int(imgsz), int(imgsz))
+
+    def _pre_for(self, hw: Tuple[int, int]) -> Letterbox:
+        pre = self._pres.get(hw)
+        if pre is None:
+            pre = self._pres[hw] = Letterbox()
+        return pre
+
+    def warmup(self, sizes: Optional[List[int]] = None) -> List[int]:
+        """
+        מכין כל גודל מראש: Letterbox משלו + warmup_runs ריצות (ORT מקצה arena ותוכנית צורה
+        בריצה הראשונה). sizes=None → גודל הקלט הנוכחי. מודל בצורה קבועה תומך רק בגודל
+        המקורי ובגדלים עם session נפרד ב-extra.scale_models.
+        """
+        ok: List[int] = []
+        for s in ([None] if sizes is None else [int(v) for v in sizes]):
+            hw = self._in_hw(s)
+            try:
+                if hw not in self._warm:
+                    if s is not None and self._fixed_hw and hw != (self._ih, self._iw) and s not in self._scale_sessions:
+                        path = self._scale_models.get(s)
+                        if not path or not os.path.exists(path):
+                            continue
+                        sess = self._make_session(path)
+                        self._scale_sessions[s] = (sess, sess.get_inputs()[0].name)
+                    t0 = time.perf_counter()
+                    img, _r, _pad = self._pre_for(hw)(np.zeros(hw + (3,), np.uint8), hw)
+                    for _ in range(self._warmup_runs):
+                        self._infer(img, 5000, s)
+                    self._warm[hw] = round((time.perf_counter() - t0) * 1000.0, 1)
+                ok.append(hw[0] if s is None else s)
+            except Exception as e:
+                logger.warning("[ONNX] warmup imgsz={} failed: {}", s, e)
+        self.session_info["warmup_ms"] = {f"{h}x{w}": ms for (h, w), ms in self._warm.items()}
+        logger.info("[ONNX] warmed sizes={} ms={}", ok, self.session_info["warmup_ms"])
+        return ok
+
+    def _infer(self, img: np.ndarray, timeout_ms: int, imgsz: Optional[int] = None) -> np.ndarray:
+        if imgsz in self._scale_sessions:
+            sess, name = self._scale_sessions[imgsz]
+            return sess.run(None, {name: img})[0]
+        if self._batcher is not None:
+            # img הוא ה-buffer המשותף של ה-Letterbox — submit מעתיק אותו ל-slot של ה-batcher
+            fut = self._batcher.submit(img, key=id(self))
+            try:
+                return fut.result(timeout=max(0.05, timeout_ms / 1000.0))[0]
+            except FutureTimeout:
+                fut.cancel()  # עוד בתור → לא ירוץ
+                raise
+        return self._session.run(None, {self._inp_name: img})[0]
+
+    def detect(self, frame_bgr: np.ndarray, threshold: float, overlap: float, max_objects: int, timeout_ms: int,
+               imgsz: Optional[int] = None):
+        hw = self._in_hw(imgsz)
+        img, ratio, (dw, dh) = self._pre_for(hw)(frame_bgr, hw)  # [1,3,H,W] float32, RGB
 
         t0 = time.time()
-        pred_all = self._session.run(None, {self._inp_name: img})
-        pred = pred_all[0]
+        pred = self._infer(img, timeout_ms, imgsz)
         infer_ms = (time.time() - t0) * 1000.0
-
+        return self._postprocess(pred, frame_bgr.shape[:2], ratio, dw, dh, threshold, overlap, max_objects, infer_ms,
+                                 in_hw=hw)
+
+    def detect_batch(self, frames: List[np.ndarray], threshold: float, overlap: float, max_objects: int,
+                     timeout_ms: int, imgsz: Optional[int] = None) -> List[List[DetectionItem]]:
+        """כמה פריימים / crops — מוגשים יחד ויוצאים כבאץ' אחד או יותר (באותו גודל קלט)."""
+        if self._batcher is None or imgsz in self._scale_sessions:
+            return [self.detect(f, threshold, overlap, max_objects, timeout_ms, imgsz) for f in frames]
+        t0 = time.time()
+        jobs = []
+        in_hw = self._in_hw(imgsz)
+        pre = self._pre_for(in_hw)
+        for f in frames:
+            img, ratio, pad = pre(f, in_hw)
+            jobs.append((self._batcher.submit(img, key=id(self)), f.shape[:2], ratio, pad))  # מועתק ב-submit
+        out = []
+        for i, (fut, hw, ratio, (dw, dh)) in enumerate(jobs):
+            try:
+                pred = fut.result(timeout=max(0.05, timeout_ms / 1000.0))[0]
+            except FutureTimeout:
+                for rest in jobs[i:]:
+                    rest[0].cancel()  # מה שעוד בתור לא ירוץ — התוצאה כבר לא תיאסף
+                raise
+            out.append(self._postprocess(pred, hw, ratio, dw, dh, threshold, overlap, max_objects,
+                                         (time.time() - t0) * 1000.0, in_hw=in_hw))
+        return out
+
+    def _postprocess(self, pred: np.ndarray, orig_hw, ratio: float, dw: int, dh: int, threshold: float,
+                     overlap: float, max_objects: int, infer_ms: float,
+                     in_hw: Optional[Tuple[int, int]] = None) -> List[DetectionItem]:
         if self._save_dump:
             try:
                 os.makedirs("app/_debug", exist_ok=True)
@@ -334,9 +513,10 @@ class OnnxProvider:
         if boxes.size == 0:
             return []
 
-        keep_idx = _nms(boxes, confs, iou_th=float(overlap), top_k=int(max_objects) * 3)
+        keep_idx = _nms(boxes, confs, iou_th=float(overlap), top_k=int(max_objects) * 3,
+                        class_ids=class_ids if self._class_aware_nms else None)
         boxes, confs, class_ids = boxes[keep_idx], confs[keep_idx], class_ids[keep_idx]
-        boxes = _scale_coords_letterbox(boxes, frame_bgr.shape[:2], (self._ih, self._iw), float(ratio), (dw, dh))
+        boxes = _scale_coords_letterbox(boxes, orig_hw, in_hw or (self._ih, self._iw), float(ratio), (dw, dh))
 
         outs: List[DetectionItem] = []
         allowed_norm = {_normalize_token(x) for x in (getattr(self._cfg, "allowed_labels", []) or [])}
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# ===============================================================
+# scale_scheduler.py — בחירת גודל קלט לדיטקטור לכל ריצה (multi-scale)
+# מה הקובץ עושה:
+# 1) ברירת מחדל: הגודל הקטן (למשל 320) — רוב הריצות משלמות אינפרנס של תמונה קטנה.
+# 2) הסלמה לגודל הגדול כשבריצה הקטנה יש דיטקציה בביטחון נמוך, אובייקט קטן מדי
+#    (בפיקסלים של קלט הרשת), או פחות אובייקטים ממה שהטרקר מחזיק — ובנוסף probe
+#    מחזורי כל probe_every ריצות קטנות.
+# 3) ירידה חזרה רמה אחת אחרי stable_n ריצות יציבות ברצף: אין ביטחון נמוך, וכל
+#    האובייקטים היו גדולים מספיק גם בגודל שמתחת (היסטרזיס — בלי קפיצות הלוך-חזור).
+#
+# שימוש:
+#   s = ScaleScheduler.from_extra(cfg.extra)     # None אם multiscale כבוי
+#   size = s.next_size()
+#   items = provider.detect(..., imgsz=size)
+#   s.observe(size, items, frame.shape[:2], expected=n_tracks)
+#
+# קונפיג (detector.extra):
+#   multiscale: [320, 640]                       # או dict: {sizes, probe_every, low_conf, small_px, stable_n}
+#   ENV OD_MULTISCALE="320,640" כשאין מפתח ב-YAML.
+# ===============================================================
+
+from __future__ import annotations
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+__all__ = ["ScaleScheduler", "parse_sizes"]
+
+OD_MULTISCALE = os.getenv("OD_MULTISCALE", "")
+OD_SCALE_PROBE_EVERY = int(os.getenv("OD_SCALE_PROBE_EVERY", "15"))
+OD_SCALE_LOW_CONF = float(os.getenv("OD_SCALE_LOW_CONF", "0.45"))
+OD_SCALE_SMALL_PX = float(os.getenv("OD_SCALE_SMALL_PX", "24"))
+OD_SCALE_STABLE_N = int(os.getenv("OD_SCALE_STABLE_N", "3"))
+
+
+def parse_sizes(v: Any) -> List[int]:
+    """'320,640' / [320, 640] / 416 → רשימה ממוינת של גדלים חיוביים (כפולות 32)."""
+    if v is None or v == "":
+        return []
+    if isinstance(v, str):
+        v = [p for p in v.replace(";", ",").split(",") if p.strip()]
+    elif not isinstance(v, (list, tuple, set)):
+        v = [v]
+    out = set()
+    for p in v:
+        try:
+            n = int(str(p).strip().lower().rstrip("p"))
+        except Exception:
+            continue
+        if n > 0:
+            out.add(max(32, (n + 31) // 32 * 32))
+    return sorted(out)
+
+
+class ScaleScheduler:
+    def __init__(self, sizes: Sequence[int], probe_every: int = OD_SCALE_PROBE_EVERY,
+                 low_conf: float = OD_SCALE_LOW_CONF, small_px: float = OD_SCALE_SMALL_PX,
+                 stable_n: int = OD_SCALE_STABLE_N):
+        self.sizes = parse_sizes(list(sizes))
+        if not self.sizes:
+            raise ValueError("ScaleScheduler needs at least one size")
+        self.probe_every = max(0, int(probe_every))   # 0 = בלי probe מחזורי
+        self.low_conf = float(low_conf)
+        self.small_px = float(small_px)
+        self.stable_n = max(1, int(stable_n))
+        self.reset()
+
+    @classmethod
+    def from_extra(cls, extra: Optional[Dict[str, Any]]) -> Optional["ScaleScheduler"]:
+        ms = (extra or {}).get("multiscale", OD_MULTISCALE)
+        opts: Dict[str, Any] = {}
+        if isinstance(ms, dict):
+            opts = {k: ms[k] for k in ("probe_every", "low_conf", "small_px", "stable_n") if k in ms}
+            ms = ms.get("sizes")
+        sizes = parse_sizes(ms)
+        if len(sizes) < 2:
+            return None
+        return cls(sizes, **opts)
+
+    def reset(self) -> None:
+        self._level = 0
+        self._since_probe = 0
+        self._stable = 0
+        self._ref_count = 0           # כמה אובייקטים נראו בריצה הגדולה האחרונה
+        self._runs = {s: 0 for s in self.sizes}
+        self._reasons: Dict[str, int] = {}
+
+    # ---- API ----
+    @property
+    def size(self) -> int:
+        return self.sizes[self._level]
+
+    def next_size(self) -> int:
+        if self._level == 0 and self.probe_every and self._since_probe >= self.probe_every:
+            return self.sizes[-1]
+        return self.sizes[self._level]
+
+    def observe(self, size: int, items: Sequence[Any], frame_hw: Tuple[int, int],
+                expected: Optional[int] = None) -> Optional[str]:
+        """מעדכן מצב אחרי ריצה בגודל size; מחזיר את סיבת ההסלמה (או None)."""
+        size = int(size)
+        self._runs[size] = self._runs.get(size, 0) + 1
+        scale = 1.0 / max(1, max(int(frame_hw[0]), int(frame_hw[1])))
+        top = len(self.sizes) - 1
+        lvl = self.sizes.index(size) if size in self.sizes else self._level
+
+        if lvl == top:
+            self._since_probe = 0
+            self._ref_count = len(items)
+
+        if lvl < top:
+            want = expected if expected is not None else self._ref_count
+            reason = self._trigger(items, size * scale, int(want or 0))
+            if lvl == 0:
+                self._since_probe += 1
+            if reason is not None:
+                self._level, self._stable = top, 0
+                self._reasons[reason] = self._reasons.get(reason, 0) + 1
+                return reason
+            if lvl < self._level:
+                return None
+        # יציבות בגודל הנוכחי: האם הגודל שמתחת היה מסתדר עם מה שנראה עכשיו?
+        if lvl > 0 and lvl == self._level:
+            below = self.sizes[lvl - 1] * scale
+            if self._trigger(items, below, 0) is None:
+                self._stable += 1
+                if self._stable >= self.stable_n:
+                    self._level, self._stable = lvl - 1, 0
+            else:
+                self._stable = 0
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self._runs.values())
+        return {"sizes": list(self.sizes), "size": self.size, "runs": dict(self._runs),
+                "small_share": round(self._runs.get(self.sizes[0], 0) / total, 3) if total else 0.0,
+                "escalations": dict(self._reasons)}
+
+    # ---- internals ----
+    def _trigger(self, items: Sequence[Any], px_per_frame_px: float, expected: int) -> Optional[str]:
+        for d in items:
+            if float(getattr(d, "score", 1.0)) < self.low_conf:
+                return "low_conf"
+        for d in items:
+            x1, y1, x2, y2 = d.box
+            if min(x2 - x1, y2 - y1) * px_per_frame_px < self.small_px:
+                return "small"
+        if len(items) < expected:
+            return "missing"
+        return None
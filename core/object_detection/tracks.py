@@ -7,7 +7,10 @@
 # • החמרת הגנות טיפוסים ונורמליזציה לערכי קונפיג (לא שליליים).
 # • דעיכת score במסלולים "missed" כדי לדחוק מסלולים ישנים כשמופיע חדש.
 # • החלקת תיבה וזווית (EMA) + הגבלת קפיצה — כבעבר, אך עם הערות/ניקיון.
-# • Matching נשאר גרידי מהיר; נוספו שומרי סף קטנים לבטיחות.
+# • Matching: מטריצת עלות ב-NumPy בבת אחת + שיוך אופטימלי (Hungarian) עם gating;
+#   קלט זעיר (עד greedy_max_pairs זוגות) — גרידי כבעבר.
+# • Detect-every-N: Kalman קבוע-מהירות לכל מסלול; predict() מקדם תיבות בפריימים
+#   בלי דיטקציה, conf דועך לכל פריים חזוי ו-needs_detection() מבקש דיטקציה טרייה.
 # -----------------------------------------------------------------------------
 
 from __future__ import annotations
@@ -17,8 +20,10 @@ import math
 import itertools
 import time
 
+import numpy as np
+
 __all__ = [
-    "Obs", "TrackerConfig", "Track", "Tracker"
+    "Obs", "TrackerConfig", "Track", "Tracker", "KalmanBoxCV"
 ]
 
 BBox = Tuple[int, int, int, int]
@@ -52,6 +57,16 @@ class TrackerConfig:
     # שיפורים אופציונליים:
     decay_on_miss: float = 0.98          # דעיכת score לכל פריים "missed" (0.98 ≈ 2% ירידה)
     max_tracks: int = 128                # הגנה רכה — לא חובה, 0/שלילי = ללא הגבלה
+    # Detect-every-N (0 = דיטקטור בכל טיק; N>1 = דיטקטור כל N פריימים, Kalman ביניהם)
+    detect_every_n: int = 0
+    pred_decay: float = 0.90             # דעיכת conf לכל פריים חזוי
+    pred_min_conf: float = 0.35          # conf מתחת לזה → needs_detection()
+    pred_max_sigma: float = 0.35         # אי-ודאות מיקום (σ / גודל תיבה) מעל זה → needs_detection()
+    kf_std_pos: float = 1.0 / 20.0       # רעש תהליך/מדידה יחסי לגודל התיבה (כמו DeepSORT)
+    kf_std_vel: float = 1.0 / 160.0
+    # שיוך: "hungarian" (min-cost אופטימלי) | "greedy"; קלט קטן מזה תמיד גרידי
+    assignment: str = "hungarian"
+    greedy_max_pairs: int = 4
 
 @dataclass
 class Track:
@@ -75,6 +90,66 @@ class Track:
     hits: int = 1
     stale: bool = False
     updated_at_ms: Optional[int] = None
+    conf: Optional[float] = None         # score אחרי דעיכת חיזוי (None = עוד לא חושב)
+    predicted: bool = False              # התיבה הנוכחית מ-Kalman ולא מדיטקציה
+    pred_frames: int = 0                 # פריימים חזויים מאז הדיטקציה האחרונה
+    kf: Optional["KalmanBoxCV"] = field(default=None, repr=False)
+
+# -------------------- Kalman (constant velocity) --------------------
+
+class KalmanBoxCV:
+    """
+    Kalman קבוע-מהירות על (cx, cy, w, h) + מהירויות, ביחידות "פריים".
+    רעש התהליך והמדידה יחסי לגודל התיבה — תיבה גדולה זזה יותר בפיקסלים.
+    """
+
+    _F = np.eye(8)
+    _F[:4, 4:] = np.eye(4)
+    _H = np.eye(4, 8)
+
+    def __init__(self, box: BBox, std_pos: float = 1.0 / 20.0, std_vel: float = 1.0 / 160.0):
+        self.sp, self.sv = float(std_pos), float(std_vel)
+        z = _box_to_cxcywh(box)
+        self.x = np.concatenate([z, np.zeros(4)])
+        w, h = z[2], z[3]
+        std = np.array([2 * self.sp * w, 2 * self.sp * h, 2 * self.sp * w, 2 * self.sp * h,
+                        10 * self.sv * w, 10 * self.sv * h, 10 * self.sv * w, 10 * self.sv * h])
+        self.P = np.diag(std * std)
+
+    def _scale(self) -> Tuple[float, float]:
+        return max(1.0, float(self.x[2])), max(1.0, float(self.x[3]))
+
+    def predict(self, steps: int = 1) -> None:
+        F = self._F
+        for _ in range(max(0, int(steps))):
+            w, h = self._scale()
+            q = np.array([self.sp * w, self.sp * h, self.sp * w, self.sp * h,
+                          self.sv * w, self.sv * h, self.sv * w, self.sv * h])
+            self.x = F @ self.x
+            self.P = F @ self.P @ F.T + np.diag(q * q)
+
+    def update(self, box: BBox) -> None:
+        z = _box_to_cxcywh(box)
+        w, h = self._scale()
+        r = np.array([self.sp * w, self.sp * h, self.sp * w, self.sp * h])
+        H = self._H
+        S = H @ self.P @ H.T + np.diag(r * r)
+        K = np.linalg.solve(S, H @ self.P).T       # P Hᵀ S⁻¹ (S סימטרית)
+        self.x = self.x + K @ (z - H @ self.x)
+        self.P = self.P - K @ H @ self.P
+
+    def box(self) -> BBox:
+        cx, cy, w, h = self.x[:4]
+        w, h = max(1.0, w), max(1.0, h)
+        return _box_to_tuple((int(round(cx - w / 2)), int(round(cy - h / 2)),
+                              int(round(cx + w / 2)), int(round(cy + h / 2))))
+
+    def velocity(self) -> Tuple[float, float]:
+        return float(self.x[4]), float(self.x[5])
+
+    def sigma_rel(self) -> float:
+        """סטיית תקן של המרכז ביחס לגודל התיבה (0 = ודאי)."""
+        return math.sqrt(max(0.0, self.P[0, 0] + self.P[1, 1])) / max(self._scale())
 
 # -------------------- Tracker --------------------
 
@@ -103,16 +178,22 @@ class Tracker:
         except Exception: cfg.max_tracks = 128
         try: cfg.decay_on_miss = float(cfg.decay_on_miss)
         except Exception: cfg.decay_on_miss = 0.98
+        try: cfg.detect_every_n = max(0, int(cfg.detect_every_n))
+        except Exception: cfg.detect_every_n = 0
+        try: cfg.pred_decay = max(0.0, min(1.0, float(cfg.pred_decay)))
+        except Exception: cfg.pred_decay = 0.90
 
         self.cfg = cfg
         self._tracks: List[Track] = []
         self._id_counter = itertools.count(1)
         self._last_frame_size: Optional[Tuple[int, int]] = None
+        self._frame = 0                  # מונה פריימים (update/predict) — בסיס הזמן של ה-Kalman
 
     # --- public API ---
     def update(self, observations: List[Obs], ts_ms: Optional[int] = None) -> List[Track]:
         if ts_ms is None:
             ts_ms = int(time.time() * 1000)
+        self._frame += 1
 
         W, H = self._infer_frame_size(observations) or (None, None)
         if W is not None and H is not None:
@@ -148,49 +229,124 @@ class Tracker:
         # מחזיר את כל המסלולים שאינם expired
         return [t for t in self._tracks if t.state != "expired"]
 
+    def predict(self, ts_ms: Optional[int] = None,
+                frame_size: Optional[Tuple[int, int]] = None) -> List[Track]:
+        """
+        פריים בלי דיטקציה: כל מסלול מתקדם צעד Kalman אחד, התיבה מוחלפת בחיזוי
+        (חתוכה לגבולות הפריים) ו-conf דועך ב-pred_decay. לא נחשב "missed".
+        """
+        if ts_ms is None:
+            ts_ms = int(time.time() * 1000)
+        self._frame += 1
+        if frame_size is not None:
+            self._last_frame_size = (int(frame_size[0]), int(frame_size[1]))
+        W, H = self._last_frame_size or (None, None)
+        for tr in self._tracks:
+            kf = self._kf_advance(tr)
+            box = kf.box()
+            if W and H:
+                box = _clip_box(box, W, H)
+            tr.box = box
+            tr.cx, tr.cy = _center_of_box(box)
+            if W and H:
+                tr.cx_norm, tr.cy_norm = tr.cx / float(W), tr.cy / float(H)
+            tr.vx, tr.vy = kf.velocity()
+            tr.age += 1
+            tr.pred_frames += 1
+            tr.predicted = True
+            tr.conf = (tr.score if tr.conf is None else tr.conf) * self.cfg.pred_decay
+            tr.updated_at_ms = ts_ms
+        return list(self._tracks)
+
+    def needs_detection(self) -> bool:
+        """כלל דעיכת הביטחון: מסלול עם conf נמוך או אי-ודאות מיקום גבוהה → דיטקציה טרייה."""
+        for tr in self._tracks:
+            if tr.conf is not None and tr.conf < self.cfg.pred_min_conf:
+                return True
+            if tr.kf is not None and tr.kf.sigma_rel() > self.cfg.pred_max_sigma:
+                return True
+        return False
+
+    @property
+    def tracks(self) -> List[Track]:
+        return list(self._tracks)
+
+    def _kf_advance(self, tr: Track) -> KalmanBoxCV:
+        """מביא את ה-Kalman של המסלול לפריים הנוכחי (צעד predict לכל פריים שעבר)."""
+        kf = tr.kf
+        if kf is None:
+            kf = tr.kf = KalmanBoxCV(tr.box, self.cfg.kf_std_pos, self.cfg.kf_std_vel)
+            kf_frame = self._frame - 1
+        else:
+            kf_frame = getattr(tr, "_kf_frame", self._frame - 1)
+        kf.predict(self._frame - kf_frame)
+        tr._kf_frame = self._frame
+        return kf
+
     # ------------- matching -------------
 
     def _match(self, obs: List[Obs], tracks: List[Track], frame_size: Optional[Tuple[int, int]]):
         if not obs or not tracks:
             return [], list(range(len(obs))), list(range(len(tracks)))
 
-        W, H = frame_size if frame_size is not None else (None, None)
-        costs: List[List[float]] = []
-        for tr in tracks:
-            row = []
-            for ob in obs:
-                # אילוץ תווית כשמבוקש
-                if self.cfg.enforce_label_match and tr.label and ob.label and tr.label != ob.label:
-                    row.append(1e9)  # מונע התאמה
-                else:
-                    c = self._pair_cost(tr, ob, W, H)
-                    row.append(c if math.isfinite(c) else 1e9)
-            costs.append(row)
-
-        assigned_trk, assigned_obs, assignments = set(), set(), []
-        triples = [(ti, oi, costs[ti][oi]) for ti in range(len(tracks)) for oi in range(len(obs))]
-        triples.sort(key=lambda t: t[2])  # גרידי: מהעלויות הנמוכות לגבוהות
-
-        for ti, oi, c in triples:
-            if c > self.cfg.max_cost_per_match:
-                break
-            if ti in assigned_trk or oi in assigned_obs:
-                continue
-            assigned_trk.add(ti)
-            assigned_obs.add(oi)
-            assignments.append((ti, oi))
+        costs = self._cost_matrix(obs, tracks, frame_size)
+        gate = self.cfg.max_cost_per_match
+        if self.cfg.assignment == "greedy" or costs.size <= self.cfg.greedy_max_pairs:
+            assignments = _greedy_assign(costs, gate)
+        else:
+            assignments = _min_cost_assign(costs, gate)
 
+        assigned_trk = {ti for ti, _ in assignments}
+        assigned_obs = {oi for _, oi in assignments}
         unassigned_obs = [i for i in range(len(obs)) if i not in assigned_obs]
         unassigned_trk = [i for i in range(len(tracks)) if i not in assigned_trk]
         return assignments, unassigned_obs, unassigned_trk
 
-    def _pair_cost(self, tr: Track, ob: Obs, W: Optional[int], H: Optional[int]) -> float:
-        iou = _iou(tr.box, ob.box)
-        di = 1.0 - iou                              # קטן=טוב
-        dc = _norm_centroid_dist(tr.cx, tr.cy, ob.box, W, H)  # 0..1
-        da = _angle_diff_deg(tr.angle_deg, ob.angle_deg) / 180.0  # 0..1
-        # שילוב משקולות
-        return self.cfg.w_iou * di + self.cfg.w_centroid * dc + self.cfg.w_angle * da
+    def _cost_matrix(self, obs: List[Obs], tracks: List[Track],
+                     frame_size: Optional[Tuple[int, int]]) -> np.ndarray:
+        """
+        [tracks × obs]: w_iou·(1−IoU) + w_centroid·מרחק מרכזים מנורמל + w_angle·הפרש זווית/180;
+        זוג אסור (תוויות שונות) = 1e9.
+        """
+        W, H = frame_size if frame_size is not None else (None, None)
+        tb = np.array([t.box for t in tracks], dtype=np.float64).reshape(-1, 4)
+        ob = np.array([_box_to_tuple(o.box) for o in obs], dtype=np.float64).reshape(-1, 4)
+
+        # IoU
+        ix1 = np.maximum(tb[:, None, 0], ob[None, :, 0]); iy1 = np.maximum(tb[:, None, 1], ob[None, :, 1])
+        ix2 = np.minimum(tb[:, None, 2], ob[None, :, 2]); iy2 = np.minimum(tb[:, None, 3], ob[None, :, 3])
+        inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+        ta = np.clip(tb[:, 2] - tb[:, 0], 0, None) * np.clip(tb[:, 3] - tb[:, 1], 0, None)
+        oa = np.clip(ob[:, 2] - ob[:, 0], 0, None) * np.clip(ob[:, 3] - ob[:, 1], 0, None)
+        union = ta[:, None] + oa[None, :] - inter
+        with np.errstate(divide="ignore", invalid="ignore"):
+            iou = np.where((inter > 0) & (union > 0), inter / union, 0.0)
+
+        # מרחק מרכזים מנורמל (מרכז המסלול מול מרכז התצפית)
+        tc = np.array([(t.cx, t.cy) for t in tracks], dtype=np.float64).reshape(-1, 2)
+        oc = (ob[:, :2] + ob[:, 2:]) * 0.5
+        dx = oc[None, :, 0] - tc[:, None, 0]
+        dy = oc[None, :, 1] - tc[:, None, 1]
+        if not W or not H or W <= 1 or H <= 1:
+            dc = np.minimum(1.0, np.hypot(dx, dy) / 640.0)
+        else:
+            dc = np.minimum(1.0, np.hypot(dx / float(W), dy / float(H)) * 4.0)
+
+        # הפרש זוויות (None → 180)
+        ta_deg = np.array([np.nan if t.angle_deg is None else t.angle_deg for t in tracks], dtype=np.float64)
+        oa_deg = np.array([np.nan if o.angle_deg is None else o.angle_deg for o in obs], dtype=np.float64)
+        d = np.abs(np.mod(ta_deg[:, None] - oa_deg[None, :], 180.0))
+        da = np.nan_to_num(np.minimum(d, 180.0 - d), nan=180.0) / 180.0
+
+        cost = self.cfg.w_iou * (1.0 - iou) + self.cfg.w_centroid * dc + self.cfg.w_angle * da
+        cost[~np.isfinite(cost)] = 1e9
+
+        if self.cfg.enforce_label_match:
+            tl = [t.label for t in tracks]
+            ol = [o.label for o in obs]
+            mask = np.array([[bool(a) and bool(b) and a != b for b in ol] for a in tl], dtype=bool)
+            cost[mask] = 1e9
+        return cost
 
     # ------------- track updates -------------
 
@@ -201,6 +357,12 @@ class Tracker:
         tr.stale = False
         tr.updated_at_ms = ts_ms
 
+        # Kalman: מדידה גולמית (לפני ה-EMA) — בסיס לחיזוי בפריימים בלי דיטקציה
+        if tr.kf is not None or self.cfg.detect_every_n > 0:
+            self._kf_advance(tr).update(_box_to_tuple(ob.box))
+        tr.predicted = False
+        tr.pred_frames = 0
+
         if tr.state == "initializing" and tr.hits >= self.cfg.appear_hits:
             tr.state = "confirmed"
         elif tr.state == "missed":
@@ -225,6 +387,8 @@ class Tracker:
         tr.vx = _ema(tr.vx, vx_now, self.cfg.vel_alpha)
         tr.vy = _ema(tr.vy, vy_now, self.cfg.vel_alpha)
         tr._prev_cx, tr._prev_cy = tr.cx, tr.cy
+        if tr.kf is not None:
+            tr.vx, tr.vy = tr.kf.velocity()  # Kalman: מהירות לפריים גם כשהדיטקציות כל N פריימים
 
         # זווית (מוגבלת קפיצה) + מהירות זוויתית (ang_vel)
         if ob.angle_deg is not None:
@@ -249,6 +413,7 @@ class Tracker:
         # ניקוד
         s = float(ob.score or 0.0)
         tr.score = max(tr.score, s) if tr.state != "initializing" else s
+        tr.conf = tr.score
         tr.label = ob.label
 
     def _update_track_missed(self, tr: Track, ts_ms: int):
@@ -256,6 +421,8 @@ class Tracker:
         tr.missed += 1
         tr.stale = True
         tr.updated_at_ms = ts_ms
+        if tr.kf is not None:
+            self._kf_advance(tr)
 
         # העברת מצבים
         if tr.state == "confirmed":
@@ -271,6 +438,8 @@ class Tracker:
         # מחיקה כשהגיע ה-TTL (>= כדי שמשמעות ttl_frames תהיה “מותר לפספס עד N”)
         if tr.missed >= self.cfg.ttl_frames:
             tr.state = "expired"
+        if tr.conf is not None:
+            tr.conf = tr.score
 
     def _spawn_track(self, ob: Obs, ts_ms: int):
         x1, y1, x2, y2 = _box_to_tuple(ob.box)
@@ -294,12 +463,15 @@ class Tracker:
             angle_deg=ob.angle_deg,
             vx=0.0, vy=0.0, ang_vel=0.0,
             age=1, missed=0, hits=1,
-            stale=False, updated_at_ms=ts_ms,
+            stale=False, updated_at_ms=ts_ms, conf=float(ob.score or 0.0),
             angle_quality=(float(ob.angle_quality) if ob.angle_quality is not None else
                            (float(ob.extra["quality"]) if "quality" in ob.extra else None)),
             angle_src=(str(ob.angle_src) if ob.angle_src is not None else
                        (str(ob.extra["ang_src"]) if "ang_src" in ob.extra else None)),
         )
+        if self.cfg.detect_every_n > 0:
+            tr.kf = KalmanBoxCV(tr.box, self.cfg.kf_std_pos, self.cfg.kf_std_vel)
+            tr._kf_frame = self._frame
         self._tracks.append(tr)
 
     def _expire_dead_tracks(self):
@@ -322,45 +494,107 @@ class Tracker:
             H = max(H, self._last_frame_size[1])
         return (W, H)
 
+# ---------------- assignment ----------------
+
+def _greedy_assign(costs: np.ndarray, gate: float) -> List[Tuple[int, int]]:
+    """הזוג הזול ביותר קודם (סדר יציב שורה-עמודה, כמו המיון הישן); עוצר מעל ה-gate."""
+    n_obs = costs.shape[1]
+    flat = costs.ravel()
+    used_t, used_o, out = set(), set(), []
+    for k in np.argsort(flat, kind="stable"):
+        if flat[k] > gate:
+            break
+        ti, oi = divmod(int(k), n_obs)
+        if ti in used_t or oi in used_o:
+            continue
+        used_t.add(ti); used_o.add(oi)
+        out.append((ti, oi))
+    return out
+
+def _min_cost_assign(costs: np.ndarray, gate: float) -> List[Tuple[int, int]]:
+    """
+    Hungarian (shortest augmenting path, O(n²m)) בווקטורים של NumPy.
+    זוגות מעל ה-gate מקבלים עלות גבוהה אחידה — כך שלעולם לא "קונים" התאמה
+    טובה אחת בהתאמה אסורה — ומסוננים בסוף (= לא משויכים).
+    לפני הפתרון: שורות/עמודות בלי אף זוג חוקי יוצאות, וזוג חוקי יחיד הדדי
+    (רכיב מבודד — המקרה הנפוץ) משויך ישירות.
+    """
+    valid = costs <= gate
+    rc, cc = valid.sum(axis=1), valid.sum(axis=0)
+    lone = valid & (rc == 1)[:, None] & (cc == 1)[None, :]
+    out = [(int(t), int(o)) for t, o in zip(*np.nonzero(lone))]
+    rows = np.flatnonzero((rc > 0) & ~lone.any(axis=1))
+    cols = np.flatnonzero((cc > 0) & ~lone.any(axis=0))
+    if rows.size and cols.size:
+        sub = costs[np.ix_(rows, cols)]
+        big = max(1.0, 2.0 * float(gate)) * (1 + min(sub.shape))
+        c = np.where(sub > gate, big, sub)
+        transposed = c.shape[0] > c.shape[1]
+        if transposed:
+            c = c.T
+        for r, col in enumerate(_hungarian(c)):
+            if c[r, col] <= gate:
+                ti, oi = (col, r) if transposed else (r, col)
+                out.append((int(rows[ti]), int(cols[oi])))
+    out.sort()
+    return out
+
+def _hungarian(c: np.ndarray) -> np.ndarray:
+    """c [n×m], n ≤ m → עמודה לכל שורה במינימום עלות כוללת (פוטנציאלים u/v)."""
+    n, m = c.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)      # p[j] = השורה (1-based) ששויכה לעמודה j; 0 = חופשית
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            free[0] = False
+            cur = c[i0 - 1] - u[i0] - v[1:]
+            upd = free[1:] & (cur < minv[1:])
+            minv[1:][upd] = cur[upd]
+            way[1:][upd] = j0
+            masked = np.where(free, minv, np.inf)
+            j1 = int(np.argmin(masked))
+            delta = masked[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    rows = np.empty(n, dtype=np.int64)
+    for j in range(1, m + 1):
+        if p[j]:
+            rows[p[j] - 1] = j - 1
+    return rows
+
 # ---------------- help funcs ----------------
 
-def _iou(a: BBox, b: BBox) -> float:
-    ax1, ay1, ax2, ay2 = a
-    bx1, by1, bx2, by2 = b
-    ix1, iy1 = max(ax1, bx1), max(ay1, by1)
-    ix2, iy2 = min(ax2, bx2), min(ay2, by2)
-    iw, ih = max(0, ix2 - ix1), max(0, iy2 - iy1)
-    inter = iw * ih
-    if inter <= 0:
-        return 0.0
-    a_area = max(0, ax2 - ax1) * max(0, ay2 - ay1)
-    b_area = max(0, bx2 - bx1) * max(0, by2 - by1)
-    union = a_area + b_area - inter
-    if union <= 0:
-        return 0.0
-    return inter / float(union)
+def _box_to_cxcywh(box: BBox) -> np.ndarray:
+    x1, y1, x2, y2 = box
+    return np.array([(x1 + x2) * 0.5, (y1 + y2) * 0.5, max(1.0, x2 - x1), max(1.0, y2 - y1)], dtype=float)
+
+def _clip_box(box: BBox, W: int, H: int) -> BBox:
+    x1, y1, x2, y2 = box
+    x1 = min(max(0, x1), W - 1); x2 = min(max(x1 + 1, x2), W)
+    y1 = min(max(0, y1), H - 1); y2 = min(max(y1 + 1, y2), H)
+    return (x1, y1, x2, y2)
 
 def _center_of_box(box: BBox) -> Tuple[float, float]:
     x1, y1, x2, y2 = box
     return (x1 + x2) * 0.5, (y1 + y2) * 0.5
 
-def _norm_centroid_dist(cx: float, cy: float, box_b: BBox,
-                        W: Optional[int], H: Optional[int]) -> float:
-    bx, by = _center_of_box(box_b)
-    if not W or not H or W <= 1 or H <= 1:
-        d = math.hypot(bx - cx, by - cy)
-        return float(min(1.0, d / 640.0))
-    dx = (bx - cx) / float(W)
-    dy = (by - cy) / float(H)
-    d = math.hypot(dx, dy)
-    return float(min(1.0, d * 4.0))
-
-def _angle_diff_deg(a: Optional[float], b: Optional[float]) -> float:
-    if a is None or b is None:
-        return 180.0
-    d = abs((a - b) % 180.0)
-    return min(d, 180.0 - d)
-
 def _angle_signed_diff(a: float, b: float) -> float:
     d = (a - b) % 180.0
     if d > 90.0:
@@ -0,0 +1,228 @@
+# core/pubsub.py
+# -------------------------------------------------------
+# 📡 Broadcast Hub — fan-out לכל המנויים (SSE ועוד)
+# -------------------------------------------------------
+# • כל אירוע נכנס לטבעת בגודל קבוע עם seq עולה; מסריאלים פעם אחת ב-publish
+#   (JSON + מסגרת SSE מוכנה) — צופה נוסף לא מוסיף עבודה לכל אירוע.
+# • לכל מנוי cursor פרטי → כל מנוי מקבל כל אירוע (אין "גניבה" מתור משותף).
+# • מנוי איטי: אם נפל מאחורי הטבעת — מקבל אירוע gap עם מספר הדילוגים;
+#   אם הפיגור גדול מ-coalesce_after — אירועים עם אותו key מתמזגים לאחרון.
+# • Last-Event-ID: מנוי חדש יכול להמשיך מ-seq שראה (אם עוד בטבעת).
+# • תקרת מנויים (SubscriberGate) — מעבר לה subscribe() זורק HubFull.
+# -------------------------------------------------------
+
+from __future__ import annotations
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+__all__ = ["BroadcastHub", "Subscription", "SubscriberGate", "HubFull", "sse_frame", "parse_last_event_id"]
+
+
+class HubFull(RuntimeError):
+    """נזרק כשמספר המנויים הגיע לתקרה."""
+
+
+def sse_frame(data: str, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """מסגרת SSE אחת (data יכול להכיל שורות מרובות)."""
+    parts: List[str] = []
+    if event_id is not None:
+        parts.append(f"id: {event_id}\n")
+    if event:
+        parts.append(f"event: {event}\n")
+    for line in data.split("\n"):
+        parts.append(f"data: {line}\n")
+    parts.append("\n")
+    return "".join(parts)
+
+
+def parse_last_event_id(headers: Any, args: Any = None) -> Optional[int]:
+    """Last-Event-ID מה-header (reconnect של EventSource) או ?last_event_id= ידני."""
+    raw = None
+    try:
+        raw = headers.get("Last-Event-ID")
+    except Exception:
+        raw = None
+    if not raw and args is not None:
+        try:
+            raw = args.get("last_event_id")
+        except Exception:
+            raw = None
+    try:
+        return int(raw) if raw not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SubscriberGate:
+    """מונה מנויים פעילים עם תקרה (thread-safe)."""
+
+    def __init__(self, max_subscribers: int):
+        self.max_subscribers = max(1, int(max_subscribers))
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._active >= self.max_subscribers:
+                raise HubFull(f"max_subscribers={self.max_subscribers}")
+            self._active += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._active = max(0, self._active - 1)
+
+
+class _Entry:
+    __slots__ = ("seq", "event", "key", "data", "frame", "ts")
+
+    def __init__(self, seq: int, event: Optional[str], key: Optional[str], data: str, ts: float):
+        self.seq = seq
+        self.event = event
+        self.key = key
+        self.data = data
+        self.ts = ts
+        self.frame = sse_frame(data, event, seq)
+
+
+class BroadcastHub:
+    def __init__(self, name: str, capacity: int = 256, max_subscribers: int = 16,
+                 coalesce_after: Optional[int] = None):
+        self.name = name
+        self.capacity = max(8, int(capacity))
+        self.coalesce_after = int(coalesce_after) if coalesce_after else self.capacity // 2
+        self.gate = SubscriberGate(max_subscribers)
+        self._ring: List[Optional[_Entry]] = [None] * self.capacity
+        self._next = 1
+        self._cond = threading.Condition(threading.Lock())
+        self.published = 0
+
+    # ---- כתיבה ----
+    def publish(self, data: Any, event: Optional[str] = None, key: Optional[str] = None) -> int:
+        """
+        data: str (כבר JSON/טקסט) או אובייקט שיסוריאל ל-JSON פעם אחת.
+        key: מזהה coalescing — למנוי איטי נשלח רק האחרון לכל key.
+        """
+        if not isinstance(data, str):
+            data = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._cond:
+            seq = self._next
+            self._ring[seq % self.capacity] = _Entry(seq, event, key, data, now)
+            self._next = seq + 1
+            self.published += 1
+            self._cond.notify_all()
+        return seq
+
+    # ---- מצב ----
+    @property
+    def last_seq(self) -> int:
+        return self._next - 1
+
+    def first_seq(self) -> int:
+        return max(1, self._next - self.capacity)
+
+    def _get(self, seq: int) -> Optional[_Entry]:
+        e = self._ring[seq % self.capacity]
+        return e if e is not None and e.seq == seq else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "subscribers": self.gate.active, "max_subscribers": self.gate.max_subscribers,
+                "last_seq": self.last_seq, "capacity": self.capacity, "published": self.published}
+
+    # ---- מנויים ----
+    def subscribe(self, last_event_id: Optional[int] = None, replay: int = 0) -> "Subscription":
+        """
+        last_event_id: ממשיכים אחרי seq זה (reconnect).
+        replay: אם אין last_event_id — כמה אירועים אחרונים לשלוח מיד.
+        """
+        self.gate.acquire()
+        if last_event_id is not None:
+            cursor = min(int(last_event_id), self.last_seq)
+        else:
+            cursor = max(self.first_seq() - 1, self.last_seq - max(0, int(replay)))
+        return Subscription(self, cursor)
+
+    def _wait(self, cursor: int, timeout: Optional[float]) -> bool:
+        if self._next - 1 > cursor:
+            return True
+        with self._cond:
+            if self._next - 1 > cursor:
+                return True
+            self._cond.wait(timeout)
+            return self._next - 1 > cursor
+
+
+class Subscription:
+    """cursor פרטי לטבעת של hub. לסגור עם close() (או with)."""
+
+    def __init__(self, hub: BroadcastHub, cursor: int):
+        self.hub = hub
+        self.cursor = cursor
+        self.skipped = 0
+        self.coalesced = 0
+        self._closed = False
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self.hub.gate.release()
+
+    def next_frames(self, timeout: Optional[float] = None, max_items: int = 64) -> List[str]:
+        """מסגרות SSE מוכנות (כולל gap אם דולגו אירועים); [] אם timeout."""
+        frames: List[str] = []
+        for e in self.next_entries(timeout, max_items):
+            frames.append(e.frame if isinstance(e, _Entry) else e)
+        return frames
+
+    def next_entries(self, timeout: Optional[float] = None, max_items: int = 64) -> List[Any]:
+        hub = self.hub
+        if not hub._wait(self.cursor, timeout):
+            return []
+        out: List[Any] = []
+        first = hub.first_seq()
+        if self.cursor + 1 < first:
+            lost = first - (self.cursor + 1)
+            self.skipped += lost
+            out.append(sse_frame(json.dumps({"event": "gap", "skipped": lost}), "gap"))
+            self.cursor = first - 1
+
+        end = hub._next
+        lag = end - 1 - self.cursor
+        entries: List[_Entry] = []
+        for sq in range(self.cursor + 1, end):
+            e = hub._get(sq)
+            if e is not None:
+                entries.append(e)
+
+        if lag > hub.coalesce_after:
+            # פיגור גדול — ממזגים לפי key (האחרון לכל key נשאר, בסדר המקורי)
+            last_idx: Dict[str, int] = {}
+            for i, e in enumerate(entries):
+                if e.key is not None:
+                    last_idx[e.key] = i
+            kept = [e for i, e in enumerate(entries) if e.key is None or last_idx[e.key] == i]
+            self.coalesced += len(entries) - len(kept)
+            if len(kept) > max_items:
+                self.skipped += len(kept) - max_items
+                kept = kept[-max_items:]
+            entries = kept
+            self.cursor = end - 1
+        elif len(entries) > max_items:
+            entries = entries[:max_items]
+            self.cursor = entries[-1].seq
+        else:
+            self.cursor = end - 1
+        out.extend(entries)
+        return out
@@ -3,7 +3,7 @@
 # ⏱️ עיבוד סיגנלים טמפורליים למנוע ProCoach (גרסה מוקשחת)
 #
 # מה יש כאן (API תואם לקודם):
-# 1) now_ms                 – זמן נוכחי במילישניות.
+# 1) now_ms                 – זמן נוכחי במילישניות (או זמן המדיה בתוך media_clock).
 # 2) EMA                    – החלקה אקספוננציאלית לערכים (עם reset ותמיכה ב-alpha דינמי).
 # 3) TemporalFilter         – החלקת ערך + חישוב מהירות/תאוצה בזמן אמת (+ dt_ms), עם conf→alpha.
 # 4) HysteresisBool         – היסטרזיס לדגלים בינאריים + min_hold_ms למניעת הבהוב.
@@ -24,6 +24,8 @@
 from __future__ import annotations
 from typing import Optional, Deque, Tuple, Dict, Any, Callable
 from collections import deque
+from contextlib import contextmanager
+import threading
 import time
 import math
 
@@ -51,9 +53,27 @@ def _clamp(x: float, lo: float, hi: float) -> float:
 
 # ------------------------------- זמן -------------------------------
 
+_CLOCK = threading.local()
+
+
 def now_ms() -> int:
-    """זמן מערכת במילישניות (int)."""
-    return int(time.time() * 1000)
+    """זמן מערכת במילישניות (int); בתוך media_clock() — חותמת הזמן של הפריים."""
+    t = getattr(_CLOCK, "ts_ms", None)
+    return int(time.time() * 1000) if t is None else t
+
+
+@contextmanager
+def media_clock(ts_ms: Optional[float]):
+    """
+    כל now_ms() בת'רד הנוכחי מחזיר ts_ms עד היציאה מהבלוק — הפילטרים (dt, hold, jitter, LKG)
+    עובדים לפי זמן הלכידה של הלקוח ולא לפי זמן ההגעה לשרת. None → שעון מערכת.
+    """
+    prev = getattr(_CLOCK, "ts_ms", None)
+    _CLOCK.ts_ms = None if ts_ms is None else int(ts_ms)
+    try:
+        yield
+    finally:
+        _CLOCK.ts_ms = prev
 
 # ------------------------------- EMA -------------------------------
 
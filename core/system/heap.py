@@ -0,0 +1,235 @@
+# core/system/heap.py
+# =============================================================================
+# 🧮 BodyPlus XPro — Heap Growth Tracker (tracemalloc)
+# -----------------------------------------------------------------------------
+# מאתר דליפות בסשנים ארוכים בלי debugger:
+#   • start(frames)        — מפעיל tracemalloc בעומק frames נתון
+#   • snapshot(label)      — צילום מתויג (נשמרים עד HEAP_MAX_SNAPSHOTS אחרונים)
+#   • diff(a, b)           — אתרי ההקצאה שגדלו הכי הרבה בין שני צילומים,
+#                            מקובצים לפי module (או filename/lineno/traceback)
+#   • start_periodic(min)  — thread רקע שמצלם כל N דקות ומדפיס ללוג top-10 diff
+#
+# הערות:
+# • tracemalloc מוסיף תקורת זיכרון/CPU — מופעל רק לפי דרישה (ולא בעליית השרת),
+#   אלא אם HEAP_TRACE_ON_START=1.
+# • צילומים מסוננים מהקצאות של tracemalloc עצמו ושל importlib כדי לחסוך זיכרון.
+# =============================================================================
+from __future__ import annotations
+import os, sys, time, threading, tracemalloc
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from core.logs import logger  # type: ignore
+except Exception:
+    import logging
+    logger = logging.getLogger("heap")
+
+HEAP_MAX_SNAPSHOTS = int(os.getenv("HEAP_MAX_SNAPSHOTS", "8"))
+HEAP_DEFAULT_FRAMES = int(os.getenv("HEAP_TRACE_FRAMES", "10"))
+HEAP_MAX_FRAMES = 64
+
+_GROUPS = ("module", "filename", "lineno", "traceback")
+
+_lock = threading.Lock()
+_snapshots: "OrderedDict[str, Tuple[float, tracemalloc.Snapshot]]" = OrderedDict()
+_periodic_thread: Optional[threading.Thread] = None
+_periodic_stop = threading.Event()
+_periodic_cfg: Dict[str, Any] = {}
+
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+# ----------------------- module mapping -----------------------
+def _module_of(filename: str) -> str:
+    """ממיר נתיב קובץ לשם module (admin_web.state / numpy.core...) לפי sys.path."""
+    best = ""
+    for p in sys.path:
+        if p and filename.startswith(p) and len(p) > len(best):
+            best = p
+    rel = filename[len(best):].lstrip("/\\") if best else os.path.basename(filename)
+    if rel.endswith(".py"):
+        rel = rel[:-3]
+    mod = rel.replace("/", ".").replace("\\", ".")
+    if mod.endswith(".__init__"):
+        mod = mod[: -len(".__init__")]
+    return mod or filename
+
+
+# ----------------------- lifecycle -----------------------
+def status() -> Dict[str, Any]:
+    tracing = tracemalloc.is_tracing()
+    cur, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    with _lock:
+        labels = [{"label": k, "ts": ts} for k, (ts, _) in _snapshots.items()]
+    return {
+        "tracing": tracing,
+        "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+        "traced_mb": round(cur / 1e6, 3),
+        "peak_mb": round(peak / 1e6, 3),
+        "overhead_mb": round(tracemalloc.get_tracemalloc_memory() / 1e6, 3) if tracing else 0.0,
+        "snapshots": labels,
+        "periodic": dict(_periodic_cfg) if _periodic_thread and _periodic_thread.is_alive() else None,
+    }
+
+
+def start(frames: int = HEAP_DEFAULT_FRAMES) -> Dict[str, Any]:
+    frames = max(1, min(int(frames), HEAP_MAX_FRAMES))
+    if tracemalloc.is_tracing():
+        if tracemalloc.get_traceback_limit() == frames:
+            return status()
+        # שינוי עומק דורש הפעלה מחדש; צילומים ישנים לא ניתנים להשוואה
+        tracemalloc.stop()
+        clear()
+    tracemalloc.start(frames)
+    logger.info(f"[heap] tracemalloc started (frames={frames})")
+    return status()
+
+
+def stop() -> Dict[str, Any]:
+    stop_periodic()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("[heap] tracemalloc stopped")
+    clear()
+    return status()
+
+
+def clear() -> None:
+    with _lock:
+        _snapshots.clear()
+
+
+# ----------------------- snapshots -----------------------
+def snapshot(label: Optional[str] = None) -> Dict[str, Any]:
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc_not_running")
+    snap = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    now = time.time()
+    label = str(label or time.strftime("snap-%H%M%S", time.localtime(now)))
+    with _lock:
+        _snapshots.pop(label, None)
+        _snapshots[label] = (now, snap)
+        while len(_snapshots) > max(2, HEAP_MAX_SNAPSHOTS):
+            _snapshots.popitem(last=False)
+    total = sum(st.size for st in snap.statistics("filename"))
+    return {"label": label, "ts": now, "total_mb": round(total / 1e6, 3)}
+
+
+def _get(label: Optional[str], default_index: int) -> Tuple[str, float, tracemalloc.Snapshot]:
+    with _lock:
+        if label:
+            if label not in _snapshots:
+                raise KeyError(label)
+            ts, snap = _snapshots[label]
+            return label, ts, snap
+        if len(_snapshots) < 2:
+            raise KeyError("need_two_snapshots")
+        k = list(_snapshots.keys())[default_index]
+        ts, snap = _snapshots[k]
+        return k, ts, snap
+
+
+def diff(a: Optional[str] = None, b: Optional[str] = None,
+         top: int = 20, group: str = "module") -> Dict[str, Any]:
+    """
+    ההפרש בין צילום a (ישן) ל-b (חדש). ברירת מחדל: שני האחרונים.
+    group=module מקבץ את הסטטיסטיקה לפי module; השאר — לפי tracemalloc key_type.
+    """
+    group = group if group in _GROUPS else "module"
+    la, ta, sa = _get(a, -2)
+    lb, tb, sb = _get(b, -1)
+    key_type = "filename" if group == "module" else group
+    stats = sb.compare_to(sa, key_type)
+
+    rows: List[Dict[str, Any]] = []
+    if group == "module":
+        agg: Dict[str, Dict[str, Any]] = {}
+        for st in stats:
+            mod = _module_of(st.traceback[0].filename)
+            r = agg.setdefault(mod, {"site": mod, "size_diff": 0, "size": 0, "count_diff": 0, "count": 0})
+            r["size_diff"] += st.size_diff
+            r["size"] += st.size
+            r["count_diff"] += st.count_diff
+            r["count"] += st.count
+        rows = list(agg.values())
+    else:
+        for st in stats:
+            site = str(st.traceback[0]) if group != "traceback" else " <- ".join(str(f) for f in st.traceback)
+            rows.append({"site": site, "size_diff": st.size_diff, "size": st.size,
+                         "count_diff": st.count_diff, "count": st.count})
+
+    rows.sort(key=lambda r: r["size_diff"], reverse=True)
+    growing = [r for r in rows if r["size_diff"] > 0][: max(1, int(top))]
+    for r in growing:
+        r["size_diff_kb"] = round(r["size_diff"] / 1024.0, 1)
+        r["size_kb"] = round(r["size"] / 1024.0, 1)
+    return {
+        "ok": True,
+        "a": {"label": la, "ts": ta},
+        "b": {"label": lb, "ts": tb},
+        "interval_sec": round(tb - ta, 1),
+        "group": group,
+        "total_diff_kb": round(sum(r["size_diff"] for r in rows) / 1024.0, 1),
+        "top": growing,
+    }
+
+
+# ----------------------- periodic mode -----------------------
+def _periodic_loop(interval_sec: float, top: int, group: str) -> None:
+    n = 0
+    while not _periodic_stop.wait(interval_sec):
+        try:
+            if not tracemalloc.is_tracing():
+                break
+            n += 1
+            snapshot(f"periodic-{n}")
+            if n < 2:
+                continue
+            d = diff(f"periodic-{n - 1}", f"periodic-{n}", top=top, group=group)
+            lines = [f"{r['site']} +{r['size_diff_kb']}KB ({r['count_diff']:+d} blocks)" for r in d["top"]]
+            logger.info(f"[heap] growth over {d['interval_sec']}s total={d['total_diff_kb']}KB | " + " | ".join(lines))
+            # שומרים רק את האחרון כבסיס להשוואה הבאה
+            with _lock:
+                _snapshots.pop(f"periodic-{n - 1}", None)
+        except Exception as e:
+            logger.warning(f"[heap] periodic diff failed: {e!r}")
+
+
+def start_periodic(minutes: float = 10.0, top: int = 10, group: str = "module",
+                   frames: int = HEAP_DEFAULT_FRAMES) -> Dict[str, Any]:
+    global _periodic_thread
+    stop_periodic()
+    if not tracemalloc.is_tracing():
+        start(frames)
+    interval = max(1.0, float(minutes) * 60.0)
+    _periodic_cfg.clear()
+    _periodic_cfg.update({"minutes": float(minutes), "top": int(top), "group": group})
+    _periodic_stop.clear()
+    _periodic_thread = threading.Thread(target=_periodic_loop, args=(interval, int(top), group),
+                                        daemon=True, name="HeapPeriodic")
+    _periodic_thread.start()
+    logger.info(f"[heap] periodic mode every {minutes}min (top={top}, group={group})")
+    return status()
+
+
+def stop_periodic() -> None:
+    global _periodic_thread
+    _periodic_stop.set()
+    t = _periodic_thread
+    if t is not None and t.is_alive() and t is not threading.current_thread():
+        t.join(timeout=2.0)
+    _periodic_thread = None
+
+
+# הפעלה אוטומטית (לסשנים ארוכים בפרודקשן)
+if os.getenv("HEAP_TRACE_ON_START", "0") == "1":
+    try:
+        start_periodic(float(os.getenv("HEAP_TRACE_PERIOD_MIN", "15")))
+    except Exception:
+        pass
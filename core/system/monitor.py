@@ -1,10 +1,17 @@
 # core/system/monitor.py
 # =============================================================================
 # 🧠 BodyPlus XPro — System Monitor (גרסת EMA + warmup למדידות יציבות)
+# -----------------------------------------------------------------------------
+# • thread רקע (SysMonCollector) דוגם CPU/RAM/תהליך/threads כל
+#   MONITOR_INTERVAL_SEC ושומר טבעת של MONITOR_HISTORY דגימות אחרונות.
+# • בדיקות יכולת (torch/CUDA, NVML, docker, env סטטי) נמדדות פעם אחת בלבד.
+# • get_snapshot() רק קורא את הדגימה האחרונה — handlers לא חוסמים על psutil.
+# • get_history() מחזיר סדרות קצרות לספארקליינים.
 # =============================================================================
 from __future__ import annotations
-import os, time, platform, socket
-from typing import Any, Dict, Optional
+import os, time, platform, socket, threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
 
 import psutil
 
@@ -30,6 +37,15 @@ except Exception:
 _EMA_CPU_TOTAL: Optional[float] = None
 _EMA_CPU_PROC: Optional[float]  = None
 
+# Collector config
+MONITOR_INTERVAL_SEC = max(0.2, float(os.getenv("MONITOR_INTERVAL_SEC", "2.0")))
+MONITOR_HISTORY      = max(2, int(os.getenv("MONITOR_HISTORY", "120")))
+
+try:
+    _CPU_COUNT = max(psutil.cpu_count(logical=True) or 1, 1)
+except Exception:
+    _CPU_COUNT = 1
+
 # קוד קודם שלך
 def _is_docker() -> bool:
     try:
@@ -44,20 +60,28 @@ def _is_docker() -> bool:
         pass
     return False
 
+_ENV_STATIC: Optional[Dict[str, Any]] = None
+_BOOT_TIME: Optional[float] = None
+
 def _env_info() -> Dict[str, Any]:
-    try:
-        boot_time = psutil.boot_time()
-    except Exception:
-        boot_time = None
-    return {
-        "host": socket.gethostname(),
-        "platform": platform.platform(),
-        "os": {"system": platform.system(), "release": platform.release(), "version": platform.version()},
-        "python": platform.python_version(),
-        "pid": os.getpid(),
-        "uptime_sec": (time.time() - boot_time) if boot_time else None,
-        "is_docker": _is_docker(),
-    }
+    """החלק הסטטי (host/platform/docker) נמדד פעם אחת; רק uptime מחושב בכל קריאה."""
+    global _ENV_STATIC, _BOOT_TIME
+    if _ENV_STATIC is None:
+        try:
+            _BOOT_TIME = psutil.boot_time()
+        except Exception:
+            _BOOT_TIME = None
+        _ENV_STATIC = {
+            "host": socket.gethostname(),
+            "platform": platform.platform(),
+            "os": {"system": platform.system(), "release": platform.release(), "version": platform.version()},
+            "python": platform.python_version(),
+            "pid": os.getpid(),
+            "is_docker": _is_docker(),
+        }
+    out = dict(_ENV_STATIC)
+    out["uptime_sec"] = (time.time() - _BOOT_TIME) if _BOOT_TIME else None
+    return out
 
 # ----------------------- GPU (NVML/CUDA אופציונלי) -----------------------
 _HAS_NVML = False
@@ -71,12 +95,18 @@ try:
 except Exception:
     _HAS_NVML = False
 
+_CUDA_CACHED: Optional[bool] = None
+
 def _cuda_available() -> bool:
-    try:
-        import torch  # type: ignore
-        return bool(getattr(torch, "cuda", None) and torch.cuda.is_available())
-    except Exception:
-        return False
+    """import torch יקר — נבדק פעם אחת ונשמר (יכולת לא משתנה בזמן ריצה)."""
+    global _CUDA_CACHED
+    if _CUDA_CACHED is None:
+        try:
+            import torch  # type: ignore
+            _CUDA_CACHED = bool(getattr(torch, "cuda", None) and torch.cuda.is_available())
+        except Exception:
+            _CUDA_CACHED = False
+    return _CUDA_CACHED
 
 def _gpu_info() -> Dict[str, Any]:
     via_cuda = _cuda_available()
@@ -123,8 +153,7 @@ def _proc_info() -> Dict[str, Any]:
     try:
         # cpu_percent של תהליך מחזיר 0..(100*num_cpus). ננרמל ל-0..100.
         raw = _PROC.cpu_percent(interval=None)  # אחוז “מוחלט”
-        n = max(psutil.cpu_count(logical=True) or 1, 1)
-        proc_norm = (raw / float(n))
+        proc_norm = (raw / float(_CPU_COUNT))
         _EMA_CPU_PROC = _ema(_EMA_CPU_PROC, proc_norm)
     except Exception:
         proc_norm = None
@@ -133,9 +162,15 @@ def _proc_info() -> Dict[str, Any]:
         rss_gb = round(mem, 3)
     except Exception:
         rss_gb = None
+    try:
+        num_threads = int(_PROC.num_threads())
+    except Exception:
+        num_threads = None
     return {
         "cpu_percent": round(_EMA_CPU_PROC, 1) if _EMA_CPU_PROC is not None else (round(proc_norm, 1) if proc_norm is not None else None),
-        "rss_gb": rss_gb
+        "rss_gb": rss_gb,
+        "threads": num_threads,
+        "py_threads": threading.active_count(),
     }
 
 # ----------------------- rate helpers -----------------------
@@ -171,18 +206,19 @@ def _try_cpu_temp() -> Optional[float]:
         return None
     return None
 
-# ----------------------- הסנאפשוט הראשי -----------------------
-def get_snapshot() -> Dict[str, Any]:
+# ----------------------- דגימה (רצה ב-thread הרקע) -----------------------
+def _collect() -> Dict[str, Any]:
     """
-    החזר dict עם כל המידע הדרוש לדשבורד/טאב מצב מערכת.
+    דגימה מלאה אחת. נקראת מה-collector כל MONITOR_INTERVAL_SEC, ולכן
+    cpu_percent(interval=None) מודד את כל החלון מאז הדגימה הקודמת.
     עמיד לשגיאות: אם משהו נכשל — תקבלו None באותו שדה.
     """
     global _prev, _EMA_CPU_TOTAL
     now = time.time()
 
-    # ---- CPU (עם דגימה אמיתית + EMA) ----
+    # ---- CPU (החלון = מרווח ה-collector + EMA) ----
     try:
-        cpu_total_raw = psutil.cpu_percent(interval=0.3)  # לא interval=None — אחרת 0%
+        cpu_total_raw = psutil.cpu_percent(interval=None)
         _EMA_CPU_TOTAL = _ema(_EMA_CPU_TOTAL, cpu_total_raw)
         cpu_total = _EMA_CPU_TOTAL
     except Exception:
@@ -288,3 +324,93 @@ def get_snapshot() -> Dict[str, Any]:
         "net": {"recv_bps": recv_bps, "sent_bps": sent_bps},
         "fps": fps,
     }
+
+
+# ----------------------- Collector + ring -----------------------
+_samples: Deque[Dict[str, Any]] = deque(maxlen=MONITOR_HISTORY)
+_samples_lock = threading.Lock()
+_collector: Optional[threading.Thread] = None
+_collector_lock = threading.Lock()
+_collector_stop = threading.Event()
+_first_sample = threading.Event()
+
+
+def _collector_loop(interval: float) -> None:
+    # בדיקות יכולת פעם אחת, מחוץ ל-handlers
+    _cuda_available()
+    _env_info()
+    while not _collector_stop.is_set():
+        t0 = time.time()
+        try:
+            snap = _collect()
+            with _samples_lock:
+                _samples.append(snap)
+            _first_sample.set()
+        except Exception:
+            pass
+        _collector_stop.wait(max(0.05, interval - (time.time() - t0)))
+
+
+def start_collector(interval_sec: float = MONITOR_INTERVAL_SEC) -> None:
+    """מפעיל את thread הדגימה (אידמפוטנטי)."""
+    global _collector
+    with _collector_lock:
+        if _collector is not None and _collector.is_alive():
+            return
+        _collector_stop.clear()
+        _collector = threading.Thread(target=_collector_loop, args=(float(interval_sec),),
+                                      daemon=True, name="SysMonCollector")
+        _collector.start()
+
+
+def stop_collector() -> None:
+    global _collector
+    _collector_stop.set()
+    t = _collector
+    if t is not None and t.is_alive():
+        t.join(timeout=2.0)
+    _collector = None
+
+
+def get_snapshot() -> Dict[str, Any]:
+    """
+    החזר dict עם כל המידע הדרוש לדשבורד/טאב מצב מערכת — הדגימה האחרונה
+    מה-collector (ללא probing בתוך הבקשה). בקריאה הראשונה ממתינים לדגימה
+    הראשונה של ה-collector (עד שנייה) ורק אם לא הגיעה — דוגמים סינכרונית.
+    """
+    start_collector()
+    if not _first_sample.is_set():
+        _first_sample.wait(timeout=1.0)
+    with _samples_lock:
+        last = _samples[-1] if _samples else None
+    if last is None:
+        last = _collect()
+    out = dict(last)
+    out["age_sec"] = round(max(0.0, time.time() - float(last.get("ts", 0.0))), 3)
+    out["interval_sec"] = MONITOR_INTERVAL_SEC
+    return out
+
+
+_HISTORY_FIELDS = {
+    "cpu":      lambda s: (s.get("cpu") or {}).get("percent_total"),
+    "ram":      lambda s: (s.get("ram") or {}).get("percent"),
+    "proc_cpu": lambda s: (s.get("proc") or {}).get("cpu_percent"),
+    "proc_rss": lambda s: (s.get("proc") or {}).get("rss_gb"),
+    "threads":  lambda s: (s.get("proc") or {}).get("threads"),
+    "gpu":      lambda s: (s.get("gpu") or {}).get("percent"),
+    "fps":      lambda s: s.get("fps"),
+}
+
+
+def get_history(n: int = 60, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """סדרות קצרות (עמודות) מהטבעת — {"ts": [...], "cpu": [...], ...}."""
+    start_collector()
+    n = max(1, min(int(n), MONITOR_HISTORY))
+    keys = [f for f in (fields or list(_HISTORY_FIELDS)) if f in _HISTORY_FIELDS]
+    with _samples_lock:
+        rows = list(_samples)[-n:]
+    out: Dict[str, Any] = {"ts": [round(float(r.get("ts", 0.0)), 3) for r in rows]}
+    for k in keys:
+        fn = _HISTORY_FIELDS[k]
+        out[k] = [fn(r) for r in rows]
+    return out
@@ -0,0 +1,190 @@
+# core/system/profiler.py
+# =============================================================================
+# 🔬 BodyPlus XPro — Sampling Profiler (on-demand, in-process)
+# -----------------------------------------------------------------------------
+# דוגם את המחסניות של כל ה-threads דרך sys._current_frames() בקצב קבוע למשך
+# N שניות, ומחזיר:
+#   • collapsed stacks  — פורמט "frame;frame;frame count" (flamegraph.pl / speedscope)
+#   • top functions     — טבלת self/total לפי פונקציה
+#   • threads           — כמה דגימות נפלו על כל thread (MediaPipe/OD/Flask/...)
+#
+# עקרונות:
+# • רק פרופיל אחד בכל רגע (guard לא-חוסם) — קריאה שנייה מקבלת busy.
+# • תקורה חסומה: hz/seconds/depth עם תקרות קשיחות, וה-thread הדוגם לא נדגם.
+# • בלי תלויות חיצוניות וללא צורך בהפעלה מחדש תחת profiler חיצוני.
+# =============================================================================
+from __future__ import annotations
+import os, sys, time, threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# ----------------------- תקרות (ENV) -----------------------
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_MAX_HZ      = int(os.getenv("PROFILE_MAX_HZ", "250"))
+PROFILE_MAX_DEPTH   = int(os.getenv("PROFILE_MAX_DEPTH", "64"))
+PROFILE_DEFAULT_HZ  = int(os.getenv("PROFILE_DEFAULT_HZ", "100"))
+
+# leaf functions שמסמנים thread “ממתין” (לא צורך CPU) — מסוננים כברירת מחדל
+_IDLE_LEAVES = {
+    "wait", "sleep", "select", "poll", "epoll", "accept", "recv", "recv_into",
+    "readinto", "get", "_wait_for_tstate_lock", "acquire", "serve_forever",
+}
+
+_run_lock = threading.Lock()
+_last_result: Optional[Dict[str, Any]] = None
+
+
+def _clamp(v: float, lo: float, hi: float) -> float:
+    return max(lo, min(hi, v))
+
+
+def _frame_label(code) -> str:
+    """module:function:line — קצר ויציב לקיבוץ (בלי נתיב מלא)."""
+    fname = os.path.basename(code.co_filename)
+    if fname.endswith(".py"):
+        fname = fname[:-3]
+    return f"{fname}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _walk_stack(frame, max_depth: int) -> Tuple[str, ...]:
+    """מחזיר מחסנית root→leaf של תוויות, חתוכה ל-max_depth מהעלה."""
+    out: List[str] = []
+    f = frame
+    while f is not None and len(out) < max_depth:
+        out.append(_frame_label(f.f_code))
+        f = f.f_back
+    out.reverse()
+    return tuple(out)
+
+
+def _is_idle(stack: Tuple[str, ...]) -> bool:
+    if not stack:
+        return True
+    leaf_fn = stack[-1].split(":")[1]
+    return leaf_fn in _IDLE_LEAVES
+
+
+def is_running() -> bool:
+    return _run_lock.locked()
+
+
+def last_result() -> Optional[Dict[str, Any]]:
+    return _last_result
+
+
+def profile(
+    seconds: float = 5.0,
+    hz: int = PROFILE_DEFAULT_HZ,
+    *,
+    include_idle: bool = False,
+    max_depth: int = PROFILE_MAX_DEPTH,
+    top: int = 30,
+    thread_filter: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    מריץ דגימה חוסמת (על ה-thread הקורא) ומחזיר dict עם התוצאות.
+    אם כבר רץ פרופיל — מחזיר {"ok": False, "error": "busy"} מיד.
+    thread_filter: substring לשם ה-thread (למשל "OD" / "MediaPipe").
+    """
+    global _last_result
+    if not _run_lock.acquire(blocking=False):
+        return {"ok": False, "error": "busy"}
+    try:
+        seconds = _clamp(float(seconds), 0.1, PROFILE_MAX_SECONDS)
+        hz = int(_clamp(int(hz), 1, PROFILE_MAX_HZ))
+        max_depth = int(_clamp(int(max_depth), 1, PROFILE_MAX_DEPTH))
+        interval = 1.0 / float(hz)
+        me = threading.get_ident()
+
+        stacks: Counter = Counter()
+        per_thread: Counter = Counter()
+        samples = 0
+        idle_skipped = 0
+        sample_cost = 0.0
+
+        t_start = time.perf_counter()
+        t_end = t_start + seconds
+        next_due = t_start
+        while True:
+            now = time.perf_counter()
+            if now >= t_end:
+                break
+            if now < next_due:
+                time.sleep(next_due - now)
+            next_due += interval
+
+            t0 = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                tname = names.get(ident, f"thread-{ident}")
+                if thread_filter and thread_filter not in tname:
+                    continue
+                stack = _walk_stack(frame, max_depth)
+                if not include_idle and _is_idle(stack):
+                    idle_skipped += 1
+                    continue
+                stacks[(tname,) + stack] += 1
+                per_thread[tname] += 1
+            del frames
+            samples += 1
+            sample_cost += time.perf_counter() - t0
+
+        elapsed = time.perf_counter() - t_start
+        result = _summarize(stacks, per_thread, top=top)
+        result.update({
+            "ok": True,
+            "seconds": round(elapsed, 3),
+            "hz": hz,
+            "samples": samples,
+            "idle_skipped": idle_skipped,
+            "overhead_pct": round(100.0 * sample_cost / elapsed, 2) if elapsed > 0 else None,
+            "ts": time.time(),
+        })
+        _last_result = result
+        return result
+    finally:
+        _run_lock.release()
+
+
+def _summarize(stacks: Counter, per_thread: Counter, top: int = 30) -> Dict[str, Any]:
+    total = sum(stacks.values())
+    self_cnt: Counter = Counter()
+    incl_cnt: Counter = Counter()
+    for key, n in stacks.items():
+        frames = key[1:]
+        if not frames:
+            continue
+        self_cnt[frames[-1]] += n
+        for fr in set(frames):  # רקורסיה לא נספרת פעמיים
+            incl_cnt[fr] += n
+
+    def _pct(n: int) -> float:
+        return round(100.0 * n / total, 2) if total else 0.0
+
+    top = max(1, int(top))
+    top_functions = [
+        {"func": fn, "self": n, "self_pct": _pct(n), "total": incl_cnt[fn], "total_pct": _pct(incl_cnt[fn])}
+        for fn, n in self_cnt.most_common(top)
+    ]
+    top_cumulative = [
+        {"func": fn, "total": n, "total_pct": _pct(n)}
+        for fn, n in incl_cnt.most_common(top)
+    ]
+    return {
+        "total_samples": total,
+        "collapsed": to_collapsed(stacks),
+        "top_functions": top_functions,
+        "top_cumulative": top_cumulative,
+        "threads": [{"name": k, "samples": v, "pct": _pct(v)} for k, v in per_thread.most_common()],
+    }
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """פורמט Brendan Gregg: 'thread;root;...;leaf count' — שורה לכל מחסנית."""
+    lines = []
+    for key, n in sorted(stacks.items(), key=lambda kv: -kv[1]):
+        lines.append(";".join(s.replace(";", ",") for s in key) + f" {n}")
+    return "\n".join(lines)
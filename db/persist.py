@@ -9,6 +9,7 @@
 #   init(default_user_name="Amit")
 #   ...
 #   persist_report(report)  # אחרי שקיבלת דו"ח מ-run_once
+#   subscribe_reports()     # או: כל דו"ח שמתפרסם ב-BUS("report") נשמר ברקע
 # -----------------------------------------------------------------------------
 
 from __future__ import annotations
@@ -160,3 +161,15 @@ def persist_report(report: Dict[str, Any]) -> Optional[int]:
     except Exception as e:
         logger.warning(f"[persist] persist_report failed: {e}")
         return None
+
+
+def subscribe_reports(bus=None):
+    """
+    רושם את persist_report כמנוי (ת'רד משלו) ל-BUS("report") — כתיבת DB לא חוסמת
+    את מי שמפיק את הדו"ח. None אם אין DB.
+    """
+    if not AVAILABLE:
+        return None
+    if bus is None:
+        from core.event_bus import BUS as bus  # type: ignore
+    return bus.subscribe("report", persist_report, name="db_persist", maxlen=64)
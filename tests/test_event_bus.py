@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/event_bus.py — מסירה inline/ת'רד, תיבת דואר מלאה, forwarder מרוכז, חיבור ל-state.
+הרצה:
+    python -m unittest -v tests.test_event_bus
+"""
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from core.event_bus import BUS, EventBus, start_forwarder
+
+
+def _wait(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestEventBus(unittest.TestCase):
+    def test_inline_and_threaded_delivery(self):
+        bus = EventBus()
+        inline, threaded = [], []
+        s1 = bus.subscribe("payload", inline.append, inline=True)
+        s2 = bus.subscribe("payload", threaded.append)
+        self.assertEqual(bus.publish("payload", {"n": 1}), 2)
+        self.assertEqual(inline, [{"n": 1}])  # באותו ת'רד, לפני החזרה
+        self.assertTrue(_wait(lambda: threaded == [{"n": 1}]))
+        s1.close(); s2.close()
+        self.assertEqual(bus.publish("payload", {"n": 2}), 0)
+        with self.assertRaises(ValueError):
+            bus.publish("nope", {})
+
+    def test_full_mailbox_drops_oldest_without_blocking(self):
+        bus = EventBus()
+        gate, busy = threading.Event(), threading.Event()
+        got = []
+
+        def slow(ev):
+            busy.set()
+            gate.wait(2.0)
+            got.append(ev)
+
+        sub = bus.subscribe("report", slow, maxlen=2)
+        bus.publish("report", 0)
+        self.assertTrue(busy.wait(2.0))  # המנוי תקוע על 0; התור ריק
+        t0 = time.monotonic()
+        for i in range(1, 6):
+            bus.publish("report", i)
+        self.assertLess(time.monotonic() - t0, 0.5)  # המפרסם לא נחסם
+        gate.set()
+        self.assertTrue(_wait(lambda: len(got) == 3))
+        self.assertEqual(got, [0, 4, 5])  # 1..3 נזרקו — האחרונים שרדו
+        self.assertEqual(sub.dropped, 3)
+        sub.close()
+
+    def test_forwarder_batches_ndjson(self):
+        bus = EventBus()
+        posted = []
+        gate = threading.Event()
+
+        def post(url, body, timeout):
+            gate.wait(2.0)
+            posted.append(body)
+
+        fwd = start_forwarder("http://remote/api/payload_push/batch", bus=bus, post=post, period_ms=0)
+        for i in range(5):
+            bus.publish("payload", {"ts_ms": i})
+        gate.set()
+        self.assertTrue(_wait(lambda: sum(b.count(b"\n") for b in posted) == 5))
+        lines = [json.loads(x) for b in posted for x in b.splitlines()]
+        self.assertEqual([x["ts_ms"] for x in lines], [0, 1, 2, 3, 4])
+        self.assertLess(len(posted), 5)  # לפחות batch אחד עם כמה אירועים
+        fwd.close()
+
+    def test_forwarder_failure_logged_once(self):
+        bus = EventBus()
+
+        def post(url, body, timeout):
+            raise ConnectionError("down")
+
+        with mock.patch("core.event_bus.logger") as log:
+            fwd = start_forwarder("http://remote/api/payload_push/batch", bus=bus, post=post, period_ms=0)
+            for i in range(3):
+                bus.publish("payload", {"ts_ms": i})
+                self.assertTrue(_wait(lambda: fwd.errors == i + 1))
+            fwd.close()
+        self.assertEqual(log.warning.call_count, 1)  # אותו סוג שגיאה בתוך 5 שניות — לוג אחד
+        log.exception.assert_not_called()
+
+    def test_admin_state_is_a_payload_subscriber(self):
+        from admin_web import state
+        BUS.publish("payload", {"ts_ms": 4242, "view_mode": "bus_test"})
+        self.assertEqual(state.get_payload_snapshot().data["ts_ms"], 4242)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-admin_web/routes_ingest.py + admission — רשומות בינאריות, פריים ישן, תקציב, /api/ingest_stream.
+הרצה:
+    python -m unittest -v tests.test_frame_ingest
+"""
+import io
+import unittest
+
+from admin_web import routes_ingest as ri
+from admin_web.admission import ADMISSION_LEVELS, AdmissionController
+from admin_web.server import create_app
+
+_JPEG = b"\xff\xd8\xff\xe0" + b"x" * 64 + b"\xff\xd9"
+
+
+class TestRecords(unittest.TestCase):
+    def test_pack_unpack_and_stream(self):
+        rec = ri.pack_record(_JPEG, 1234.5)
+        self.assertEqual(ri.unpack_record(rec), (1234.5, _JPEG))
+        stream = io.BytesIO(rec + ri.pack_record(b"y" * 20, 1300.0))
+        self.assertEqual([ts for ts, _ in ri.iter_records(stream)], [1234.5, 1300.0])
+        with self.assertRaises(ri.BadRecord):
+            list(ri.iter_records(io.BytesIO(rec[:-3])))
+        with self.assertRaises(ri.BadRecord):
+            ri.unpack_record(rec + b"extra")
+        for bad in (float("nan"), float("inf")):
+            with self.assertRaises(ri.BadRecord):
+                ri.unpack_record(ri.pack_record(_JPEG, bad))
+            with self.assertRaises(ri.BadRecord):
+                list(ri.iter_records(io.BytesIO(ri.pack_record(_JPEG, bad))))
+
+    def test_nan_ts_does_not_disable_stale_drop(self):
+        got = []
+        with ri.IngestChannel("test", ingest=got.append) as a:
+            a.handle(200.0, _JPEG)
+            a.handle(float("nan"), _JPEG)
+            a.handle(100.0, _JPEG)
+            self.assertEqual((a.frames, a.dropped, a.last_ts_ms), (1, 2, 200.0))
+
+    def test_stale_frames_dropped(self):
+        got = []
+        with ri.IngestChannel("test", ingest=got.append) as a:
+            a.handle(200.0, _JPEG)
+            a.handle(100.0, _JPEG)  # ישן מהאחרון — לא מגיע ל-streamer
+            self.assertEqual((a.frames, a.dropped, len(got)), (1, 1, 1))
+            flow = a.flow(force=True)
+            self.assertEqual(flow["ack"], 2)
+            self.assertIn("max_width", flow)
+
+    def test_ws_reply_turns_failures_into_error_frames(self):
+        def boom(_jpeg):
+            raise RuntimeError("streamer_unavailable")
+
+        with ri.IngestChannel("test", ingest=boom) as ch:
+            self.assertIsNone(ri.ws_reply(ch, "hello"))
+            self.assertEqual(ri.ws_reply(ch, b"xx"), {"t": "error", "err": "short_header", "ack": 1})
+            self.assertEqual(ri.ws_reply(ch, ri.pack_record(_JPEG, 10.0)),
+                             {"t": "error", "err": "streamer_unavailable", "ack": 2})
+            self.assertEqual((ch.dropped, ch.errors), (2, 1))
+            ch._ingest = lambda _jpeg: None
+            self.assertEqual(ri.ws_reply(ch, ri.pack_record(_JPEG, 20.0))["t"], "flow")
+
+
+class TestAdmission(unittest.TestCase):
+    def _ctl(self, cpu):
+        load = {"cpu": cpu}
+        ctl = AdmissionController(node_fps=60, max_fps=30, fps_cap=lambda: 30.0,
+                                  load=lambda: load["cpu"], burst=2.0)
+        return ctl, load
+
+    def test_budget_shared_between_producers(self):
+        ctl, _ = self._ctl(10.0)
+        self.assertEqual(ctl.budget("a")["fps"], 30.0)
+        ctl.budget("b"); ctl.budget("c")
+        self.assertEqual(ctl.budget("a")["fps"], 20.0)
+
+    def test_over_budget_rejected_and_load_steps_down(self):
+        ctl, load = self._ctl(10.0)
+        results = [ctl.admit("a")[0] for _ in range(5)]  # burst=2 באותו רגע
+        self.assertEqual(results, [True, True, False, False, False])
+        load["cpu"] = 99.0
+        ctl._next_eval = 0.0
+        b = ctl.budget("a")
+        self.assertEqual(b["level"], 1)
+        self.assertLess(b["max_width"], ADMISSION_LEVELS[0][0])
+        self.assertLess(b["fps"], 30.0)
+
+
+class TestIngestStreamRoute(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app = create_app()
+        app.testing = True
+        cls.client = app.test_client()
+
+    def test_chunked_stream(self):
+        body = b"".join(ri.pack_record(_JPEG, t) for t in (1.0, 2.0, 3.0))
+        r = self.client.post("/api/ingest_stream", data=body, content_type="application/octet-stream")
+        self.assertEqual(r.status_code, 200)
+        j = r.get_json()
+        # שלושה פריימים באותו רגע: burst של ה-admission מקבל 2, השלישי נזרק לפני פענוח
+        self.assertEqual(j["frames"] + j["over_budget"], 3)
+        self.assertGreaterEqual(j["frames"], 2)
+        self.assertEqual(j["ack"], 3)
+        self.assertEqual(self.client.get("/api/ingest/stats").get_json()["channels"], [])
+
+    def test_truncated_stream_is_400(self):
+        r = self.client.post("/api/ingest_stream", data=ri.pack_record(_JPEG, 1.0)[:-5])
+        self.assertEqual(r.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/landmark_codec.py — round-trip של q16/q16b64 ו-/payload?lm=.
+הרצה:
+    python -m unittest -v tests.test_landmark_codec
+"""
+import json
+import unittest
+
+from admin_web import state
+from admin_web.server import create_app
+from core.landmark_codec import compact_mp, decode_points, encode_points
+
+_PTS = [{"x": i / 33.0, "y": 1.0 - i / 33.0, "visibility": (i % 10) / 10.0} for i in range(33)]
+
+
+class TestLandmarkCodec(unittest.TestCase):
+    def test_roundtrip_both_formats(self):
+        for fmt in ("q16", "q16b64"):
+            out = decode_points(encode_points(_PTS, fmt))
+            self.assertEqual(len(out), 33)
+            for a, b in zip(_PTS, out):
+                self.assertAlmostEqual(a["x"], b["x"], delta=1e-4)
+                self.assertAlmostEqual(a["y"], b["y"], delta=1e-4)
+                self.assertAlmostEqual(a["visibility"], b["visibility"], delta=0.005)
+
+    def test_clamps_and_nan(self):
+        enc = encode_points([{"x": -1.0, "y": 2.0, "visibility": float("nan")}])
+        self.assertEqual(enc["xy"], [0, 65535])
+        self.assertEqual(enc["v"], [0])
+
+    def test_compact_mp_is_smaller_and_keeps_source(self):
+        mp = {"landmarks": _PTS, "hands": [_PTS[:21]], "mirror_x": True}
+        c = compact_mp(mp, "q16b64")
+        self.assertIn("landmarks", mp)
+        self.assertNotIn("landmarks", c)
+        self.assertEqual(c["mirror_x"], True)
+        self.assertEqual(len(c["hands_q"]), 1)
+        self.assertLess(len(json.dumps(c)), len(json.dumps(mp)) / 3)
+
+    def test_pixel_hands_normalized_by_frame(self):
+        # הצורה של mediapipe_runner: פיקסלים, בלי visibility
+        px = [{"x": 640.0 + i, "y": 360.0 - i} for i in range(21)]
+        mp = {"landmarks": _PTS, "hands": [px]}
+        c = compact_mp(mp, "q16", frame_wh=(1280, 720))
+        back = decode_points(c["hands_q"][0])
+        self.assertAlmostEqual(back[3]["x"] * 1280, 643.0, delta=0.1)
+        self.assertAlmostEqual(back[3]["y"] * 720, 357.0, delta=0.1)
+        # בלי גודל פריים — לא מקודדים (clamp היה הופך הכול ל-1.0)
+        c = compact_mp(mp, "q16")
+        self.assertIs(c["hands"], mp["hands"])
+        self.assertNotIn("hands_q", c)
+        self.assertIn("landmarks_q", c)
+
+
+class TestPayloadCompactRoute(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app = create_app()
+        app.testing = True
+        cls.client = app.test_client()
+
+    def test_opt_in_only(self):
+        state.set_payload({"mp": {"landmarks": _PTS}})
+        legacy = json.loads(self.client.get("/payload").data)
+        self.assertEqual(len(legacy["mp"]["landmarks"]), 33)
+        compact = json.loads(self.client.get("/payload?lm=b64").data)
+        self.assertNotIn("landmarks", compact["mp"])
+        self.assertEqual(compact["mp"]["landmarks_q"]["fmt"], "q16b64")
+        self.assertEqual(len(decode_points(compact["mp"]["landmarks_q"])), 33)
+
+    def test_compact_form_has_own_etag(self):
+        state.set_payload({"mp": {"landmarks": _PTS}})
+        etag = self.client.get("/payload").headers["ETag"]
+        r = self.client.get("/payload?lm=q16", headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("landmarks_q", json.loads(r.data)["mp"])
+        q_etag = r.headers["ETag"]
+        self.assertNotEqual(q_etag, etag)
+        self.assertEqual(self.client.get("/payload?lm=q16", headers={"If-None-Match": q_etag}).status_code, 304)
+        self.assertEqual(self.client.get("/payload", headers={"If-None-Match": q_etag}).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
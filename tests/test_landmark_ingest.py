@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/kinematics/landmark_input.py ו-/api/ingest_landmarks — kinematics בלי MediaPipe.
+הרצה:
+    python -m unittest -v tests.test_landmark_ingest
+"""
+import json
+import unittest
+
+from admin_web import state
+from admin_web.server import create_app
+from core.kinematics import KinematicsComputer
+from core.kinematics.landmark_input import results_from_landmarks
+from core.landmark_codec import encode_points
+from core.signals import now_ms
+
+
+def _standing_pose():
+    """33 נקודות מנורמלות של עמידה זקופה מול המצלמה."""
+    pts = [{"x": 0.5, "y": 0.15, "z": 0.0, "visibility": 0.99} for _ in range(33)]
+
+    def put(i, x, y):
+        pts[i] = {"x": x, "y": y, "z": 0.0, "visibility": 0.99}
+
+    put(11, 0.42, 0.30); put(12, 0.58, 0.30)   # shoulders
+    put(13, 0.40, 0.42); put(14, 0.60, 0.42)   # elbows
+    put(15, 0.40, 0.54); put(16, 0.60, 0.54)   # wrists
+    put(23, 0.45, 0.55); put(24, 0.55, 0.55)   # hips
+    put(25, 0.45, 0.72); put(26, 0.55, 0.72)   # knees
+    put(27, 0.45, 0.90); put(28, 0.55, 0.90)   # ankles
+    put(29, 0.45, 0.92); put(30, 0.55, 0.92)   # heels
+    put(31, 0.47, 0.93); put(32, 0.53, 0.93)   # toes
+    return pts
+
+
+class TestLandmarkAdapter(unittest.TestCase):
+    def test_adapter_shape_and_formats(self):
+        hand = [[0.4, 0.5, 0.0, 1.0]] * 21
+        rp, rh = results_from_landmarks(_standing_pose(), [{"label": "left", "points": hand}])
+        self.assertAlmostEqual(rp.pose_landmarks.landmark[25].y, 0.72)
+        self.assertEqual(rh.multi_handedness[0].classification[0].label, "Left")
+        self.assertEqual(len(rh.multi_hand_landmarks[0].landmark), 21)
+        rp_q, _ = results_from_landmarks(encode_points(_standing_pose(), "q16b64"))
+        self.assertAlmostEqual(rp_q.pose_landmarks.landmark[25].y, 0.72, places=4)
+        self.assertEqual(results_from_landmarks(_standing_pose()[:10]), (None, None))
+
+    def test_compute_from_landmarks_matches_knee_geometry(self):
+        out = KinematicsComputer().compute_from_landmarks((720, 1280), _standing_pose())
+        self.assertTrue(out["meta"]["detected"])
+        self.assertGreater(out["knee_left_deg"], 170.0)
+
+    def test_client_ts_is_filter_time_base(self):
+        kin = KinematicsComputer()
+        for t in (1000, 1040):
+            out = kin.compute_from_landmarks((720, 1280), _standing_pose(), ts_ms=t)
+            self.assertEqual(out["meta"]["updated_at_ms"], t)
+            self.assertEqual(kin.last_keypoints()[2], t)
+        self.assertGreater(now_ms(), 10 ** 12)  # מחוץ ל-compute — שוב שעון המערכת
+
+
+class TestLandmarkIngestRoute(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app = create_app()
+        app.testing = True
+        cls.client = app.test_client()
+
+    def test_batch_publishes_latest(self):
+        frames = [{"client": "t1", "ts_ms": t, "w": 1280, "h": 720, "pose": _standing_pose()}
+                  for t in (2000.0, 1000.0)]
+        r = self.client.post("/api/ingest_landmarks", json=frames)
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertEqual(r.get_json()["frames"], 2)
+        snap = state.get_payload_snapshot()
+        self.assertEqual(snap.data["ts_ms"], 2000)
+        self.assertEqual(snap.data["source"], "landmarks")
+        self.assertEqual(len(snap.data["mp"]["landmarks"]), 33)
+        json.loads(snap.json_bytes())  # JSON תקין (בלי NaN)
+
+        r = self.client.post("/api/ingest_landmarks", json={"client": "t1"})
+        self.assertEqual(r.status_code, 400)
+
+    def test_q16_pose_fills_skeleton(self):
+        frame = {"client": "t2", "ts_ms": 1000.0, "w": 1280, "h": 720,
+                 "pose": encode_points(_standing_pose(), "q16b64")}
+        r = self.client.post("/api/ingest_landmarks", json=frame)
+        self.assertEqual(r.status_code, 200, r.data)
+        mp = state.get_payload_snapshot().data["mp"]
+        self.assertNotIn("landmarks_q", mp)
+        self.assertEqual(len(mp["landmarks"]), 33)
+        self.assertAlmostEqual(mp["landmarks"][25]["y"], 0.72, places=4)
+
+    def test_stale_frames_dropped(self):
+        frame = {"client": "t3", "ts_ms": 3000.0, "w": 1280, "h": 720, "pose": _standing_pose()}
+        self.assertEqual(self.client.post("/api/ingest_landmarks", json=frame).get_json()["frames"], 1)
+        stale = [dict(frame, ts_ms=t) for t in (2000.0, 3000.0)]
+        body = self.client.post("/api/ingest_landmarks", json=stale).get_json()
+        self.assertEqual((body["ok"], body["frames"], body["dropped"]), (True, 0, 2))
+        body = self.client.post("/api/ingest_landmarks", json=stale + [dict(frame, ts_ms=3040.0)]).get_json()
+        self.assertEqual((body["frames"], body["dropped"]), (1, 2))
+        self.assertEqual(state.get_payload_snapshot().data["ts_ms"], 3040)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-admin_web/routes_live.py — פרסום רק בשינוי גרסה ומצב התחלתי בחיבור SSE.
+הרצה:
+    python -m unittest -v tests.test_live_status
+"""
+import json
+import unittest
+
+from admin_web import state
+from admin_web.routes_live import LIVE_HUB, SAMPLER
+from admin_web.server import create_app
+
+
+class TestLiveSampler(unittest.TestCase):
+    def test_payload_published_once_per_version(self):
+        state.set_payload({"metrics": {"a": 1}})
+        self.assertTrue(SAMPLER.sample("payload"))
+        self.assertFalse(SAMPLER.sample("payload"))
+        state.set_payload({"metrics": {"a": 2}})
+        self.assertTrue(SAMPLER.sample("payload"))
+        self.assertIn("event: payload", SAMPLER.topics["payload"].frame)
+
+    def test_unchanged_status_is_not_republished(self):
+        SAMPLER.sample("session")
+        before = LIVE_HUB.last_seq
+        # רק ts משתנה בין דגימות → אין פרסום
+        self.assertFalse(SAMPLER.sample("session"))
+        self.assertEqual(LIVE_HUB.last_seq, before)
+
+
+class TestLiveStream(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app = create_app()
+        app.testing = True
+        cls.client = app.test_client()
+
+    def test_stream_sends_current_state_first(self):
+        state.set_payload({"metrics": {"knee": 90}})
+        SAMPLER.sample("payload")
+        resp = self.client.get("/api/live/stream?topics=payload", buffered=False)
+        try:
+            self.assertEqual(resp.status_code, 200)
+            first = next(resp.response)
+            first = first.decode() if isinstance(first, bytes) else first
+            self.assertTrue(first.startswith("id: "))
+            self.assertIn("event: payload", first)
+            data = json.loads(first.split("data: ", 1)[1])
+            self.assertEqual(data["metrics"], {"knee": 90})
+        finally:
+            resp.close()
+        self.assertEqual(LIVE_HUB.gate.active, 0)
+
+    def test_delta_mode_starts_with_keyframe(self):
+        snap = state.set_payload({"metrics": {"knee": 91}})
+        SAMPLER.sample("payload")
+        resp = self.client.get("/api/live/stream?topics=payload&payload=delta", buffered=False)
+        try:
+            first = next(resp.response)
+            first = first.decode() if isinstance(first, bytes) else first
+            self.assertIn("event: payload_delta", first)
+            msg = json.loads(first.split("data: ", 1)[1])
+            self.assertTrue(msg["key"])
+            self.assertEqual(msg["v"], snap.version)
+        finally:
+            resp.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-LogRing (core/logs.py) — seq מונוטוני, cursor, אינדקס רמות ו-since לפי ts.
+הרצה:
+    python -m unittest -v tests.test_log_ring
+"""
+import threading
+import unittest
+
+from core.event_bus import BUS, EventBus
+from core.logs import LOG_RING, LogRing
+
+
+def _fill(ring: LogRing, n: int, start_ts: float = 100.0):
+    for i in range(n):
+        lvl = "ERROR" if i % 3 == 0 else "WARNING"
+        ring.append(start_ts + i, lvl, f"m{i}", "mod|fn|")
+
+
+class TestLogRing(unittest.TestCase):
+    def test_seq_and_wraparound(self):
+        ring = LogRing(capacity=16)
+        _fill(ring, 40)
+        self.assertEqual(ring.last_seq, 40)
+        self.assertEqual(len(ring), 16)
+        seqs = [r.seq for r in ring.read()]
+        self.assertEqual(seqs, list(range(25, 41)))
+
+    def test_cursor_read_and_limits(self):
+        ring = LogRing(capacity=32)
+        _fill(ring, 20)
+        head = ring.read(5, limit=3, tail=False)
+        self.assertEqual([r.seq for r in head], [6, 7, 8])
+        tail = ring.read(5, limit=3, tail=True)
+        self.assertEqual([r.seq for r in tail], [18, 19, 20])
+
+    def test_level_index(self):
+        ring = LogRing(capacity=16)
+        _fill(ring, 50)
+        errs = ring.read(0, level="error")
+        self.assertTrue(errs)
+        self.assertTrue(all(r.level == "ERROR" for r in errs))
+        self.assertTrue(all(r.seq >= ring.first_seq() for r in errs))
+        self.assertEqual([r.seq for r in errs], [s for s in range(ring.first_seq(), 51) if (s - 1) % 3 == 0])
+
+    def test_since_ts(self):
+        ring = LogRing(capacity=64)
+        _fill(ring, 10, start_ts=100.0)
+        recs = ring.read_since_ts(104.0)
+        self.assertEqual([r.msg for r in recs], ["m5", "m6", "m7", "m8", "m9"])
+        self.assertEqual(len(ring.read_since_ts(0)), 10)
+
+    def test_clear_keeps_seq_monotonic(self):
+        ring = LogRing(capacity=16)
+        _fill(ring, 5)
+        self.assertEqual(ring.clear(), 5)
+        self.assertEqual(len(ring), 0)
+        self.assertEqual(ring.read(), [])
+        rec = ring.append(1.0, "INFO", "x", "")
+        self.assertEqual(rec.seq, 6)
+
+    def test_wait_wakes_reader(self):
+        ring = LogRing(capacity=16)
+        got = []
+        t = threading.Thread(target=lambda: got.append(ring.wait(0, timeout=2.0)))
+        t.start()
+        ring.append(1.0, "INFO", "x", "")
+        t.join()
+        self.assertEqual(got, [True])
+        self.assertFalse(ring.wait(1, timeout=0.01))
+
+
+class TestLogRingBus(unittest.TestCase):
+    def test_records_published_to_log_topic(self):
+        bus = EventBus()
+        ring = LogRing(capacity=16, bus_topic="log", bus=bus)
+        got = []
+
+        def on_log(rec):
+            got.append((rec.seq, rec.level, rec.msg))
+            ring.append(0.0, "ERROR", "from subscriber", "t")  # לא מפרסם שוב (reentrancy)
+
+        bus.subscribe("log", on_log, inline=True)
+        ring.append(1.0, "WARNING", "hello", "mod|fn|")
+        self.assertEqual(got, [(1, "WARNING", "hello")])
+        self.assertEqual(len(ring), 2)
+        LogRing(capacity=16, bus=bus).append(2.0, "ERROR", "local", "t")  # בלי bus_topic — שקט
+        self.assertEqual(len(got), 1)
+
+    def test_global_ring_feeds_bus(self):
+        got = []
+        sub = BUS.subscribe("log", got.append, name="test_log", inline=True)
+        try:
+            rec = LOG_RING.append(3.0, "ERROR", "to bus", "t")
+        finally:
+            sub.close()
+        self.assertEqual(got, [rec])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-angle.py — באץ' מול החישוב הבודד, ומטמון זווית לכל אובייקט.
+הרצה:
+    python -m unittest -v tests.test_od_angle_cache
+"""
+import unittest
+
+import cv2
+import numpy as np
+
+from core.object_detection.angle import (
+    AngleCache, AngleConfig, compute_angle_for_box, compute_angles_batch,
+)
+
+
+def _scene(n=6, seed=0):
+    """מוטות בזוויות אקראיות על רקע רועש; מחזיר (frame, boxes)."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((480, 960, 3), 80, np.uint8)
+    boxes = []
+    for _ in range(n):
+        cx, cy = rng.uniform(120, 840), rng.uniform(120, 360)
+        a, half = rng.uniform(0, np.pi), rng.uniform(50, 110)
+        p1 = (int(cx - half * np.cos(a)), int(cy - half * np.sin(a)))
+        p2 = (int(cx + half * np.cos(a)), int(cy + half * np.sin(a)))
+        cv2.line(frame, p1, p2, (235, 235, 235), 5)
+        boxes.append((min(p1[0], p2[0]) - 8, min(p1[1], p2[1]) - 8, max(p1[0], p2[0]) + 8, max(p1[1], p2[1]) + 8))
+    frame = cv2.add(frame, rng.integers(0, 15, frame.shape, dtype=np.uint8))
+    return frame, boxes
+
+
+class TestAngleBatch(unittest.TestCase):
+    def test_batch_matches_single(self):
+        frame, boxes = _scene()
+        boxes = boxes + [(5, 5, 6, 6), None]
+        for cfg in (AngleConfig(), AngleConfig(max_roi_px=40 * 40)):
+            got = compute_angles_batch(frame, boxes, cfg)
+            for box, g in zip(boxes, got):
+                ref = compute_angle_for_box(frame, box, cfg) if box is not None else g
+                self.assertEqual(g.ang_src, ref.ang_src)
+                self.assertAlmostEqual(g.quality, ref.quality, places=6)
+                if ref.angle_deg is not None:
+                    self.assertAlmostEqual(g.angle_deg, ref.angle_deg, places=4)
+
+
+class TestAngleCache(unittest.TestCase):
+    def test_reuse_until_moved_or_stale(self):
+        frame, boxes = _scene(n=3, seed=3)
+        cfg = AngleConfig(cache_min_quality=0.0, cache_max_age=3)
+        cache = AngleCache(cfg)
+        first = cache.estimate(frame, boxes)
+        self.assertEqual(cache.stats()["full"], 3)
+
+        nudged = [(x1 + 2, y1, x2 + 2, y2) for x1, y1, x2, y2 in boxes]
+        again = cache.estimate(frame, nudged)
+        self.assertEqual(cache.stats()["reused"], 3)
+        for a, b in zip(first, again):
+            self.assertEqual(b.angle_deg is None, a.angle_deg is None)
+            if a.angle_deg is not None:
+                self.assertEqual(b.ang_src, "cached")
+                self.assertAlmostEqual(b.angle_deg, a.angle_deg)  # אותו גודל תיבה → אותה זווית
+
+        x1, y1, x2, y2 = boxes[0]
+        moved = [(x1 + 200, y1, x2 + 200, y2)] + nudged[1:]
+        cache.estimate(frame, moved)
+        self.assertEqual(cache.stats()["full"], 4)  # IoU נמוך → אובייקט חדש
+        cache.estimate(frame, moved)
+        cache.estimate(frame, moved)
+        self.assertEqual(cache.stats()["full"], 6)  # cache_max_age=3 → חישוב מלא לשניים הישנים
+
+    def test_incremental_follows_box_diagonal_and_keys(self):
+        frame = np.zeros((200, 200, 3), np.uint8)
+        cv2.line(frame, (40, 60), (160, 140), (255, 255, 255), 3)
+        cfg = AngleConfig(cache_min_quality=0.0, cache_scale_frac=0.5)
+        cache = AngleCache(cfg)
+        (r0,) = cache.estimate(frame, [(30, 50, 170, 150)], keys=[7])
+        self.assertIsNotNone(r0.angle_deg)
+        (r1,) = cache.estimate(frame, [(30, 50, 170, 160)], keys=[7])
+        self.assertEqual(r1.ang_src, "cached")
+        self.assertGreater(r1.angle_deg, r0.angle_deg)  # תיבה גבוהה יותר → מוט תלול יותר
+        (r2,) = cache.estimate(frame, [(30, 50, 170, 160)], keys=[8])
+        self.assertNotEqual(r2.ang_src, "cached")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
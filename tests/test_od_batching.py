@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/object_detection/batching.py — באצ'ים דינמיים, פיזור תוצאות, ממד batch קבוע.
+הרצה:
+    python -m unittest -v tests.test_od_batching
+"""
+import threading
+import unittest
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.object_detection.batching import InferenceBatcher
+from core.object_detection.providers import OnnxProvider
+
+
+class _FakeSession:
+    """פלט [N, 1] = סכום כל טנזור; רושם את גודל כל באץ'."""
+
+    def __init__(self, dim0="batch"):
+        self.dim0 = dim0
+        self.sizes = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="images", shape=[self.dim0, 3, 8, 8])]
+
+    def run(self, _names, feeds):
+        x = feeds["images"]
+        self.sizes.append(len(x))
+        return [x.reshape(len(x), -1).sum(axis=1, keepdims=True)]
+
+
+class TestInferenceBatcher(unittest.TestCase):
+    def test_concurrent_streams_share_batches(self):
+        sess = _FakeSession()
+        b = InferenceBatcher(sess, max_batch=8, max_wait_ms=50)
+        results = {}
+
+        def stream(k):
+            for j in range(5):
+                x = np.full((1, 3, 8, 8), k * 10 + j, np.float32)
+                results[(k, j)] = float(b.submit(x, key=k).result(timeout=5)[0][0, 0])
+
+        threads = [threading.Thread(target=stream, args=(k,)) for k in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        b.close()
+        self.assertEqual(results, {(k, j): (k * 10 + j) * 192.0 for k in range(4) for j in range(5)})
+        self.assertEqual(sum(sess.sizes), 20)
+        self.assertLess(len(sess.sizes), 20)  # לפחות באץ' אחד עם כמה זרמים
+        self.assertLessEqual(max(sess.sizes), 8)
+
+    def test_queued_frames_batch_and_shapes_split(self):
+        sess = _FakeSession()
+        b = InferenceBatcher(sess, max_batch=4, max_wait_ms=0)
+        futs = [b.submit(np.ones((1, 3, 8, 8), np.float32) * i) for i in range(6)]
+        odd = b.submit(np.ones((1, 3, 4, 4), np.float32))
+        self.assertEqual([f.result(5)[0][0, 0] for f in futs], [i * 192.0 for i in range(6)])
+        self.assertEqual(odd.result(5)[0][0, 0], 48.0)
+        b.close()
+        self.assertEqual(sum(sess.sizes), 7)
+
+    def test_submit_copies_so_caller_can_reuse_buffer(self):
+        sess = _FakeSession()
+        b = InferenceBatcher(sess, max_batch=4, max_wait_ms=0)
+        gate = threading.Event()
+        run = sess.run
+        sess.run = lambda names, feeds: (gate.wait(5), run(names, feeds))[1]
+        shared = np.empty((1, 3, 8, 8), np.float32)  # כמו ה-buffer של ה-Letterbox
+        futs = []
+        for i in range(5):
+            shared[:] = i
+            futs.append(b.submit(shared))
+        shared[:] = 99.0
+        gate.set()
+        self.assertEqual([f.result(5)[0][0, 0] for f in futs], [i * 192.0 for i in range(5)])
+        pooled = sum(len(v) for v in b._slots.values())
+        for f in [b.submit(shared) for _ in range(3)]:
+            f.result(5)
+        b.close()
+        self.assertEqual(sum(len(v) for v in b._slots.values()), pooled)  # slots חוזרים למאגר
+
+    def test_fixed_batch_dim_disables_batching(self):
+        b = InferenceBatcher(_FakeSession(dim0=1), max_batch=8)
+        self.assertEqual(b.max_batch, 1)
+        b.close()
+
+
+class _StuckBatcher:
+    """batcher שלא מסיים אף Future — רושם מה הוגש."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, tensor, key=None):
+        fut = Future()
+        self.submitted.append((tensor, fut))
+        return fut
+
+
+def _stuck_provider():
+    prov = object.__new__(OnnxProvider)  # בלי ORT: רק המסלול של ה-batcher
+    prov._batcher = _StuckBatcher()
+    prov._scale_sessions = {}
+    prov._pres = {}
+    prov._ih, prov._iw = 32, 32
+    return prov
+
+
+class TestOnnxBatcherTimeouts(unittest.TestCase):
+    def test_infer_submits_without_copy_and_cancels(self):
+        prov = _stuck_provider()
+        img = np.ones((1, 3, 32, 32), np.float32)
+        with self.assertRaises(FutureTimeout):
+            prov._infer(img, timeout_ms=1)
+        tensor, fut = prov._batcher.submitted[0]
+        self.assertIs(tensor, img)  # ההעתקה באחריות ה-batcher (slot מוקצה מראש)
+        self.assertTrue(fut.cancelled())
+
+    def test_detect_batch_cancels_remaining_on_timeout(self):
+        prov = _stuck_provider()
+        frames = [np.zeros((24, 40, 3), np.uint8) for _ in range(3)]
+        with self.assertRaises(FutureTimeout):
+            prov.detect_batch(frames, 0.5, 0.45, 10, timeout_ms=1)
+        self.assertEqual(len(prov._batcher.submitted), 3)
+        self.assertTrue(all(f.cancelled() for _t, f in prov._batcher.submitted))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
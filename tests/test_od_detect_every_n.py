@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-Detect-every-N — חיזוי Kalman בין דיטקציות, דעיכת ביטחון, שילוב במנוע.
+הרצה:
+    python -m unittest -v tests.test_od_detect_every_n
+"""
+import unittest
+
+import numpy as np
+
+from core.object_detection.angle import AngleConfig
+from core.object_detection.detector import DetectionItem, ObjectDetectionConfig
+from core.object_detection.engine import ObjectDetectionEngine
+from core.object_detection.features import FeatureConfig
+from core.object_detection.tracks import KalmanBoxCV, Obs, Tracker, TrackerConfig
+
+
+def _box(x, y=100, w=40, h=60):
+    return (x, y, x + w, y + h)
+
+
+class _MovingDetector:
+    """קופסה אחת שזזה 10px לפריים; סופר קריאות."""
+
+    def __init__(self):
+        self.calls = 0
+        self.frame = 0
+
+    def detect(self, frame, ts_ms=None):
+        self.calls += 1
+        return [DetectionItem(label="barbell", score=0.9, box=_box(50 + 10 * self.frame))]
+
+
+class TestKalmanPropagation(unittest.TestCase):
+    def test_constant_velocity_is_learned(self):
+        kf = KalmanBoxCV(_box(0))
+        for i in range(1, 8):
+            kf.predict()
+            kf.update(_box(10 * i))
+        self.assertAlmostEqual(kf.velocity()[0], 10.0, delta=1.5)
+        s0 = kf.sigma_rel()
+        kf.predict(3)
+        self.assertAlmostEqual(kf.box()[0], 100, delta=6)
+        self.assertGreater(kf.sigma_rel(), s0)  # אי-הוודאות גדלה בלי מדידות
+
+    def test_tracker_predict_and_confidence_decay(self):
+        trk = Tracker(TrackerConfig(detect_every_n=3, min_score=0.1, appear_hits=1,
+                                    pred_decay=0.5, pred_min_conf=0.3, max_jump_px=1000, smooth_alpha=1.0))
+        for i in range(6):
+            tracks = trk.update([Obs(label="barbell", score=0.9, box=_box(50 + 10 * i))], ts_ms=i)
+        self.assertEqual(len(tracks), 1)
+        t = trk.predict(ts_ms=7, frame_size=(640, 480))[0]
+        self.assertTrue(t.predicted)
+        self.assertEqual(t.missed, 0)
+        self.assertAlmostEqual(t.box[0], 110, delta=5)
+        self.assertAlmostEqual(t.conf, 0.45)
+        self.assertFalse(trk.needs_detection())
+        trk.predict(ts_ms=8)
+        self.assertTrue(trk.needs_detection())  # 0.9 * 0.5² < 0.3
+        t = trk.update([Obs(label="barbell", score=0.9, box=_box(130))], ts_ms=9)[0]
+        self.assertEqual((t.predicted, t.pred_frames, t.conf), (False, 0, 0.9))
+
+
+class TestEngineDetectEveryN(unittest.TestCase):
+    def test_detector_runs_every_n_frames(self):
+        eng = ObjectDetectionEngine(ObjectDetectionConfig(provider="onnx"), AngleConfig(),
+                                    TrackerConfig(detect_every_n=4, min_score=0.1, appear_hits=1,
+                                                  pred_decay=0.99, max_jump_px=1000, smooth_alpha=1.0),
+                                    FeatureConfig())
+        eng._started = True
+        det = eng.detector = _MovingDetector()
+        frame = np.zeros((480, 640, 3), np.uint8)
+        predicted = []
+        for i in range(12):
+            det.frame = i
+            eng.update_frame(frame, ts_ms=i)
+            _tracks, payload = eng.tick()
+            self.assertEqual(len(payload["objects"]), 1)  # OD בכל פריים
+            predicted.append(bool(payload["detector_state"].get("predicted")))
+        self.assertEqual(det.calls, 3)
+        self.assertEqual(predicted[:5], [False, True, True, True, False])
+        obj = payload["objects"][0]
+        self.assertTrue(obj["predicted"])
+        self.assertAlmostEqual(obj["box"][0], 50 + 10 * 11, delta=12)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
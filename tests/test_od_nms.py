@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-providers._nms — זהות מול הלולאה הקודמת, דיכוי לפי מחלקה, prefilter.
+בנצ'מרק: python tools/dev/bench_nms.py
+הרצה:
+    python -m unittest -v tests.test_od_nms
+"""
+import unittest
+
+import numpy as np
+
+from core.object_detection.providers import _nms
+
+
+def _nms_loop(boxes, scores, iou_th=0.45, top_k=300):
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0 and len(keep) < top_k:
+        i = int(order[0])
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.maximum(0.0, xx2 - xx1) * np.maximum(0.0, yy2 - yy1)
+        ovr = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
+        order = order[np.where(ovr <= iou_th)[0] + 1]
+    return np.array(keep, dtype=int)
+
+
+def _boxes(n, clusters, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(60, 580, (clusters, 2))
+    k = rng.integers(0, clusters, n)
+    c = centers[k] + rng.normal(0, 10, (n, 2))
+    wh = rng.uniform(20, 160, (n, 2))
+    boxes = np.concatenate([c - wh / 2, c + wh / 2], axis=1).astype(np.float32)
+    return boxes, rng.uniform(0, 1, n).astype(np.float32)
+
+
+class TestNms(unittest.TestCase):
+    def test_matches_previous_loop(self):
+        for seed, (n, clusters, top_k, iou) in enumerate([(50, 5, 300, 0.45), (900, 12, 30, 0.45),
+                                                          (2500, 400, 300, 0.5), (600, 80, 7, 0.3)]):
+            boxes, scores = _boxes(n, clusters, seed)
+            np.testing.assert_array_equal(_nms(boxes, scores, iou, top_k), _nms_loop(boxes, scores, iou, top_k))
+            np.testing.assert_array_equal(_nms(boxes, scores, iou, top_k, block=7),
+                                          _nms_loop(boxes, scores, iou, top_k))
+
+    def test_class_aware(self):
+        boxes = np.array([[0, 0, 100, 100], [2, 2, 100, 100], [1, 1, 99, 101]], np.float32)
+        scores = np.array([0.9, 0.8, 0.7], np.float32)
+        self.assertEqual(_nms(boxes, scores, 0.45).tolist(), [0])
+        self.assertEqual(_nms(boxes, scores, 0.45, class_ids=np.array([1, 0, 1])).tolist(), [0, 1])
+
+    def test_prefilter_keeps_best(self):
+        boxes, scores = _boxes(5000, 3000, 1)
+        got = _nms(boxes, scores, 0.45, 20, pre_k=500)
+        self.assertEqual(int(got[0]), int(scores.argmax()))
+        self.assertTrue(np.all(np.diff(scores[got]) <= 0))
+        self.assertEqual(len(_nms(boxes[:0], scores[:0])), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
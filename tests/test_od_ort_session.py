@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-ort_session — SessionOptions מה-config, מטמון גרף מאופטם (שמירה / שימוש / בנייה מחדש), warmup לפני מוכנות.
+הרצה:
+    python -m unittest -v tests.test_od_ort_session
+"""
+import os
+import tempfile
+import time
+import types
+import unittest
+
+from core.object_detection.angle import AngleConfig
+from core.object_detection.detector import ObjectDetectionConfig
+from core.object_detection.engine import ObjectDetectionEngine
+from core.object_detection.features import FeatureConfig
+from core.object_detection.ort_session import make_session, session_options
+from core.object_detection.tracks import TrackerConfig
+
+
+class _SessionOptions:
+    def __init__(self):
+        self.entries = {}
+        self.optimized_model_filepath = ""
+
+    def add_session_config_entry(self, k, v):
+        self.entries[k] = v
+
+
+def _fake_ort():
+    """ממשק ORT מינימלי: InferenceSession רושם טעינות וכותב optimized_model_filepath כמו ORT."""
+    ort = types.SimpleNamespace(__version__="1.17.0", SessionOptions=_SessionOptions, loads=[], broken=set())
+    ort.ExecutionMode = types.SimpleNamespace(ORT_SEQUENTIAL="seq", ORT_PARALLEL="par")
+    ort.GraphOptimizationLevel = types.SimpleNamespace(ORT_DISABLE_ALL=0, ORT_ENABLE_BASIC=1,
+                                                       ORT_ENABLE_EXTENDED=2, ORT_ENABLE_ALL=99)
+
+    def InferenceSession(path, sess_options=None, providers=None):
+        if path in ort.broken:
+            raise RuntimeError("corrupt model")
+        ort.loads.append((os.path.basename(path), sess_options.graph_optimization_level))
+        if sess_options.optimized_model_filepath:
+            with open(sess_options.optimized_model_filepath, "w") as f:
+                f.write("optimized")
+        return types.SimpleNamespace(path=path, options=sess_options)
+
+    ort.InferenceSession = InferenceSession
+    return ort
+
+
+class TestSessionOptions(unittest.TestCase):
+    def test_options_from_extra(self):
+        ort = _fake_ort()
+        so, info = session_options(ort, {"ort_intra_threads": 3, "ort_inter_threads": 2,
+                                         "ort_execution_mode": "parallel", "ort_graph_opt": "basic",
+                                         "ort_mem_arena": 0, "ort_spin": 1})
+        self.assertEqual((so.intra_op_num_threads, so.inter_op_num_threads), (3, 2))
+        self.assertEqual((so.execution_mode, so.graph_optimization_level), ("par", 1))
+        self.assertEqual((so.enable_cpu_mem_arena, so.enable_mem_pattern), (False, True))
+        self.assertEqual(so.entries["session.intra_op.allow_spinning"], "1")
+        so, info = session_options(ort, {"ort_graph_opt": "bogus"})
+        self.assertEqual((info["graph_opt"], info["inter_threads"], info["spin"]), ("all", 1, False))
+        self.assertTrue(1 <= info["intra_threads"] <= 4)
+
+
+class TestOptimizedGraphCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model = os.path.join(self.tmp.name, "best.onnx")
+        with open(self.model, "w") as f:
+            f.write("model")
+        os.utime(self.model, (time.time() - 100, time.time() - 100))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_then_reuse_then_rebuild(self):
+        ort = _fake_ort()
+        _s, info = make_session(ort, self.model, {})
+        self.assertEqual(info["cache"], "saved")
+        cache = info["cache_path"]
+        self.assertTrue(os.path.exists(cache))
+        self.assertEqual(os.listdir(os.path.dirname(cache)), [os.path.basename(cache)])  # בלי קבצי tmp
+
+        sess, info = make_session(ort, self.model, {})
+        self.assertEqual(info["cache"], "hit")
+        self.assertEqual(sess.path, cache)
+        self.assertEqual(ort.loads[-1], (os.path.basename(cache), 0))  # offline: בלי אופטימיזציה חוזרת
+
+        os.utime(self.model, None)  # מודל חדש יותר מהמטמון
+        os.utime(cache, (time.time() - 50, time.time() - 50))
+        self.assertEqual(make_session(ort, self.model, {})[1]["cache"], "saved")
+
+        ort.broken.add(cache)  # מטמון פגום → בונים מחדש מהמודל
+        sess, info = make_session(ort, self.model, {})
+        self.assertEqual((info["cache"], sess.path), ("saved", self.model))
+
+    def test_cache_off_and_custom_dir(self):
+        ort = _fake_ort()
+        _s, info = make_session(ort, self.model, {"ort_cache_dir": "off"})
+        self.assertEqual(info["cache"], "off")
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, ".ort_cache")))
+        d = os.path.join(self.tmp.name, "cache")
+        _s, info = make_session(ort, self.model, {"ort_cache_dir": d, "ort_graph_opt": "extended"})
+        self.assertEqual(os.path.dirname(info["cache_path"]), d)
+        self.assertIn(".extended.ort1_17_0.", info["cache_path"])
+
+
+class _WarmProvider:
+    name = "warm"
+
+    def __init__(self):
+        self.calls = []
+
+    def warmup(self, sizes=None):
+        self.calls.append(sizes)
+        return [416] if sizes is None else list(sizes)
+
+    def detect(self, frame_bgr, threshold, overlap, max_objects, timeout_ms, imgsz=None):
+        return []
+
+
+class TestWarmupBeforeReady(unittest.TestCase):
+    def test_engine_start_warms_each_configured_size(self):
+        eng = ObjectDetectionEngine(ObjectDetectionConfig(provider="onnx", extra={"roi_imgsz": 320}),
+                                    AngleConfig(), TrackerConfig(), FeatureConfig())
+        prov = eng.detector._provider = _WarmProvider()
+        eng.detector._roi_imgsz = 320
+        self.assertFalse(eng._started)
+        eng.start()
+        self.assertTrue(eng._started)
+        self.assertEqual(prov.calls, [None, [320]])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-pose_roi — אזורים סביב ידיים/רגליים, קצב full-frame, מיפוי crops חזרה לפריים, חיווט במנוע.
+הרצה:
+    python -m unittest -v tests.test_od_pose_roi
+"""
+import unittest
+
+import numpy as np
+
+from core.object_detection.angle import AngleConfig
+from core.object_detection.detector import DetectionItem, DetectorService, ObjectDetectionConfig
+from core.object_detection.engine import ObjectDetectionEngine
+from core.object_detection.features import FeatureConfig
+from core.object_detection.pose_roi import PoseROIPlanner, rois_from_keypoints
+from core.object_detection.tracks import TrackerConfig
+
+HW = (720, 1280)
+KPS = {
+    "left_shoulder": (600, 200, 0.9), "right_shoulder": (680, 200, 0.9),
+    "left_wrist": (560, 300, 0.9), "right_wrist": (720, 300, 0.9),
+    "left_ankle": (610, 620, 0.9), "right_ankle": (670, 620, 0.8),
+    "left_heel": (600, 640, 0.2),  # נראות נמוכה → מתעלמים
+}
+
+
+class _BlobProvider:
+    """מחזיר תיבה סביב הפיקסלים הבהירים בתמונה שקיבל (crop או פריים)."""
+    name = "blob"
+
+    def __init__(self, batch=True):
+        self.shapes = []
+        self.batches = 0
+        if not batch:
+            self.detect_batch = None
+
+    def detect(self, frame_bgr, threshold, overlap, max_objects, timeout_ms, imgsz=None):
+        self.shapes.append(frame_bgr.shape[:2])
+        ys, xs = np.nonzero(frame_bgr[..., 0] > 128)
+        if xs.size == 0:
+            return []
+        return [DetectionItem(label="dumbbell", score=0.9,
+                              box=(int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1))]
+
+    def detect_batch(self, frames, threshold, overlap, max_objects, timeout_ms, imgsz=None):
+        self.batches += 1
+        return [self.detect(f, threshold, overlap, max_objects, timeout_ms, imgsz) for f in frames]
+
+
+class TestPoseROIs(unittest.TestCase):
+    def test_regions_from_keypoints(self):
+        hands, feet = rois_from_keypoints(KPS, HW, pad=1.0)
+        self.assertEqual(hands, (480, 220, 800, 380))  # wrists ± רוחב כתפיים (80px)
+        self.assertEqual(feet, (530, 540, 750, 700))
+        # תיבה קודמת של מוט ארוך מצטרפת לאזור הידיים
+        (hands2, _feet2) = rois_from_keypoints(KPS, HW, prev_boxes=[(300, 280, 1000, 320)], pad=1.0)
+        self.assertEqual(hands2, (230, 220, 1070, 380))
+        # ריפוד גדול → האזורים חופפים ומתמזגים לאחד
+        self.assertEqual(len(rois_from_keypoints(KPS, HW, pad=3.0)), 1)
+        self.assertEqual(rois_from_keypoints({"nose": (5, 5, 1.0)}, HW), [])
+
+    def test_planner_cadence_truncation_and_staleness(self):
+        pl = PoseROIPlanner(enabled=True, full_every=3, max_age_ms=100, pad=1.0)
+        pl.set_keypoints(KPS, HW, ts_ms=1000)
+        self.assertIsNone(pl.plan(HW, 1000))  # הראשונה תמיד full-frame
+        pl.note_result([], None, HW)
+        kinds = []
+        for t in range(1001, 1008):
+            pl.set_keypoints(KPS, HW, ts_ms=t)
+            rois = pl.plan(HW, t)
+            kinds.append("full" if rois is None else len(rois))
+            pl.note_result([], rois, HW)
+        self.assertEqual(kinds, [2, 2, 2, "full", 2, 2, 2])
+        self.assertLess(pl.stats()["px_share"], 0.5)
+        # תיבה שנוגעת בקצה פנימי של crop → full-frame בטיק הבא
+        pl.note_result([], None, HW)
+        rois = pl.plan(HW, 1007)
+        pl.note_result([(rois[0][0], 250, rois[0][0] + 40, 300)], rois, HW)
+        self.assertIsNone(pl.plan(HW, 1007))
+        self.assertEqual(pl.stats()["truncated"], 1)
+        pl.note_result([], None, HW)
+        self.assertIsNotNone(pl.plan(HW, 1050))
+        self.assertIsNone(pl.plan(HW, 1200))  # pose ישן
+        # pose בגודל תמונה אחר → מוגדל לפריים
+        pl.set_keypoints({k: (v[0] / 2, v[1] / 2, v[2]) for k, v in KPS.items()}, (360, 640), ts_ms=1200)
+        self.assertEqual(pl.plan(HW, 1200)[0], (480, 220, 800, 380))
+
+
+class TestDetectROIs(unittest.TestCase):
+    def _frame(self):
+        f = np.zeros(HW + (3,), np.uint8)
+        f[600:640, 700:730] = 255  # "קטלבל" ליד הרגליים
+        return f
+
+    def test_detect_rois_maps_back_and_batches(self):
+        for batch in (True, False):
+            svc = DetectorService(ObjectDetectionConfig(provider="devnull", threshold=0.1))
+            prov = svc._provider = _BlobProvider(batch=batch)
+            items = svc.detect_rois(self._frame(), [(480, 220, 800, 380), (530, 540, 750, 700)], ts_ms=1)
+            self.assertEqual([d.box for d in items], [(700, 600, 730, 640)])
+            self.assertEqual(prov.shapes, [(160, 320), (160, 220)])
+            self.assertEqual(prov.batches, 1 if batch else 0)
+            self.assertEqual(svc.detect(self._frame())[0].box, (700, 600, 730, 640))
+
+    def test_engine_uses_pose_rois(self):
+        eng = ObjectDetectionEngine(ObjectDetectionConfig(provider="onnx", threshold=0.1), AngleConfig(),
+                                    TrackerConfig(), FeatureConfig())
+        eng._started = True
+        prov = eng.detector._provider = _BlobProvider()
+        eng._pose_roi = PoseROIPlanner(enabled=True, full_every=4, pad=1.0)
+        self.assertTrue(eng.update_simple({"pose_roi": True})["pose_roi"])
+        frame = self._frame()
+        for i in range(6):
+            eng.set_pose_keypoints(KPS, HW, ts_ms=i)
+            eng.update_frame(frame, ts_ms=i)
+            _tracks, payload = eng.tick()
+            self.assertEqual(payload["objects"][0]["box"], (700, 600, 730, 640))
+            self.assertEqual("rois" in payload["detector_state"], i not in (0, 5))
+        full = [s for s in prov.shapes if s == HW]
+        self.assertEqual(len(full), 2)
+        st = eng.worker_stats()["pose_roi"]
+        self.assertEqual((st["full"], st["roi"], st["crops"]), (2, 4, 8))
+
+    def test_engine_stale_keypoints_fall_back_to_full_frame(self):
+        eng = ObjectDetectionEngine(ObjectDetectionConfig(provider="onnx", threshold=0.1), AngleConfig(),
+                                    TrackerConfig(), FeatureConfig())
+        eng._started = True
+        prov = eng.detector._provider = _BlobProvider()
+        eng._pose_roi = PoseROIPlanner(enabled=True, full_every=100, pad=1.0, max_age_ms=400)
+        eng.update_simple({"pose_roi": True})
+        frame = self._frame()
+        # נקודות עם חותמת הזמן של ה-pose (ולא של פריים ה-OD) — ישנות מ-max_age → פריים מלא
+        eng.set_pose_keypoints(KPS, HW, ts_ms=1000)
+        for ts, roi in ((1100, False), (1200, True), (1500, False)):  # הראשון תמיד מלא
+            eng.update_frame(frame, ts_ms=ts)
+            _tracks, payload = eng.tick()
+            self.assertEqual("rois" in payload["detector_state"], roi, ts)
+        self.assertEqual(prov.shapes[-1], HW)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/object_detection/preprocess.py — זהות מול המסלול הישן + שימוש חוזר ב-buffers.
+הרצה:
+    python -m unittest -v tests.test_od_preprocess
+"""
+import unittest
+
+import numpy as np
+
+try:
+    import cv2  # noqa: F401
+    _CV2 = True
+except Exception:
+    _CV2 = False
+
+from core.object_detection.preprocess import Letterbox
+
+
+def _reference(frame, shape):
+    from core.object_detection.providers import _letterbox, bgr_to_rgb
+    img, r, pad = _letterbox(frame, shape)
+    img = bgr_to_rgb(img).astype(np.float32) / 255.0
+    return np.transpose(img, (2, 0, 1))[None, ...], r, pad
+
+
+@unittest.skipUnless(_CV2, "opencv not installed")
+class TestLetterbox(unittest.TestCase):
+    def test_matches_reference_bit_exact(self):
+        rng = np.random.default_rng(0)
+        pre = Letterbox()
+        for shp in [(720, 1280, 3), (480, 640, 3), (416, 416, 3), (300, 1000, 3), (720, 1280, 3)]:
+            frame = rng.integers(0, 256, shp, dtype=np.uint8)
+            got, r, pad = pre(frame, (416, 416))
+            ref, r_ref, pad_ref = _reference(frame, (416, 416))
+            self.assertTrue(np.array_equal(got, ref), shp)
+            self.assertEqual((r, pad), (r_ref, pad_ref))
+
+    def test_buffers_reused_between_frames(self):
+        pre = Letterbox()
+        a = np.zeros((720, 1280, 3), np.uint8)
+        t1, _, _ = pre(a, (416, 416))
+        ptr = t1.ctypes.data
+        t2, _, _ = pre(a + 255, (416, 416))
+        self.assertIs(t1, t2)
+        self.assertEqual(t2.ctypes.data, ptr)
+        self.assertTrue(t2.flags["C_CONTIGUOUS"])
+        self.assertEqual(float(t2[0, 0, 0, 0]), np.float32(114) / np.float32(255))  # padding
+        self.assertEqual(float(t2[0, 0, 208, 208]), 1.0)
+        self.assertEqual(pre(a, (320, 320))[0].shape, (1, 3, 320, 320))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
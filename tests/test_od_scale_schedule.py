@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-multi-scale — הסלמה (ביטחון נמוך / קטן / חסר / probe), ירידה עם היסטרזיס, חיווט ב-DetectorService.
+הרצה:
+    python -m unittest -v tests.test_od_scale_schedule
+"""
+import unittest
+
+import numpy as np
+
+from core.object_detection.detector import DetectionItem, DetectorService, ObjectDetectionConfig
+from core.object_detection.scale_scheduler import ScaleScheduler, parse_sizes
+
+HW = (480, 640)
+
+
+def _item(score=0.9, side=120, x=100):
+    return DetectionItem(label="dumbbell", score=score, box=(x, 100, x + side, 100 + side))
+
+
+class _ScaledProvider:
+    """provider מזויף: רושם את הגודל בכל ריצה; תיבה קטנה נראית רק בגודל הגדול."""
+    name = "fake"
+
+    def __init__(self):
+        self.sizes = []
+        self.warmed = None
+
+    def warmup(self, sizes):
+        self.warmed = list(sizes)
+        return [s for s in sizes if s != 480]  # כאילו 480 לא נתמך
+
+    def detect(self, frame_bgr, threshold, overlap, max_objects, timeout_ms, imgsz=None):
+        self.sizes.append(imgsz)
+        out = [DetectionItem(label="barbell", score=0.9, box=(10, 10, 400, 200))]
+        if imgsz == 640:
+            out.append(DetectionItem(label="dumbbell", score=0.8, box=(500, 300, 540, 340)))
+        return out
+
+
+class TestScaleScheduler(unittest.TestCase):
+    def test_parse_and_config(self):
+        self.assertEqual(parse_sizes("640, 320p,320"), [320, 640])
+        self.assertEqual(parse_sizes([300]), [320])
+        self.assertIsNone(ScaleScheduler.from_extra({"multiscale": [416]}))
+        s = ScaleScheduler.from_extra({"multiscale": {"sizes": [320, 640], "probe_every": 4}})
+        self.assertEqual((s.sizes, s.probe_every), ([320, 640], 4))
+
+    def test_escalate_reasons_and_hysteresis(self):
+        s = ScaleScheduler([320, 640], probe_every=0, low_conf=0.5, small_px=24, stable_n=2)
+        self.assertEqual(s.next_size(), 320)
+        self.assertIsNone(s.observe(320, [_item()], HW))
+        self.assertEqual(s.observe(320, [_item(score=0.3)], HW), "low_conf")
+        self.assertEqual(s.next_size(), 640)
+        # 640: תיבה של 40px → 20px ב-320 — עדיין קטנה מדי לגודל שמתחת, נשארים למעלה
+        for _ in range(4):
+            s.observe(640, [_item(side=40)], HW)
+        self.assertEqual(s.next_size(), 640)
+        s.observe(640, [_item(side=80)], HW)
+        self.assertEqual(s.next_size(), 640)
+        s.observe(640, [_item(side=80)], HW)
+        self.assertEqual(s.next_size(), 320)  # stable_n=2 → יורדים
+        self.assertEqual(s.observe(320, [_item(side=30)], HW), "small")  # 30 * 320/640 = 15px
+        for _ in range(2):
+            s.observe(640, [_item(), _item(x=300)], HW)
+        self.assertEqual(s.observe(320, [_item()], HW), "missing")  # הגדול ראה שניים
+        for _ in range(2):
+            s.observe(640, [_item()], HW)
+        self.assertIsNone(s.observe(320, [_item()], HW, expected=1))
+        self.assertEqual(s.observe(320, [], HW, expected=1), "missing")
+        self.assertEqual(s.stats()["escalations"], {"low_conf": 1, "small": 1, "missing": 2})
+
+    def test_periodic_probe(self):
+        s = ScaleScheduler([320, 640], probe_every=3)
+        sizes = []
+        for _ in range(8):
+            size = s.next_size()
+            sizes.append(size)
+            s.observe(size, [], HW)
+        self.assertEqual(sizes, [320, 320, 320, 640, 320, 320, 320, 640])
+        self.assertEqual(s.stats()["small_share"], 0.75)
+
+
+class TestDetectorServiceMultiscale(unittest.TestCase):
+    def test_service_uses_warmed_sizes_and_recovers_small_object(self):
+        svc = DetectorService(ObjectDetectionConfig(provider="devnull", threshold=0.1,
+                                                    extra={"multiscale": {"sizes": [320, 480, 640],
+                                                                          "probe_every": 5, "stable_n": 2}}))
+        self.assertIsNone(svc.scale_stats())  # devnull לא מחמם גדלים → כבוי
+        prov = svc._provider = _ScaledProvider()
+        svc._scales = svc._init_scales(svc.cfg)
+        self.assertEqual(prov.warmed, [320, 480, 640])
+        self.assertEqual(svc.scale_stats()["sizes"], [320, 640])
+
+        frame = np.zeros((480, 640, 3), np.uint8)
+        counts = [len(svc.detect(frame, ts_ms=i)) for i in range(12)]
+        # 320 ×5 → probe ב-640 מוצא משקולת → ה-320 הבא "חסר" → 640 עד שיציב... המשקולת (40px) קטנה ב-320
+        self.assertEqual(prov.sizes[:7], [320] * 5 + [640, 320])
+        self.assertEqual(prov.sizes[7:], [640] * 5)
+        self.assertEqual(counts[5], 2)
+        self.assertEqual(svc.scale_stats()["escalations"], {"missing": 1})
+        self.assertIn("multiscale", svc.get_runtime_params())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות לשיוך ב-Tracker — מטריצת עלות מוקטרת מול עלויות שחושבו ביד, Hungarian מול brute force, gating.
+הרצה:
+    python -m unittest -v tests.test_od_tracker_assign
+"""
+import itertools
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.object_detection.tracks import (
+    Obs, Tracker, TrackerConfig, _greedy_assign, _min_cost_assign,
+)
+
+
+def _best(costs, gate):
+    """brute force: מקסימום זוגות חוקיים, ואז עלות מינימלית."""
+    n, m = costs.shape
+    k = min(n, m)
+    best = None
+    for rows in itertools.permutations(range(n), k):
+        for cols in itertools.permutations(range(m), k):
+            pairs = [(i, j) for i, j in zip(rows, cols) if costs[i, j] <= gate]
+            key = (-len(pairs), sum(costs[i, j] for i, j in pairs))
+            best = key if best is None or key < best else best
+    return best
+
+
+class TestTrackerAssignment(unittest.TestCase):
+    def test_cost_matrix_hand_computed(self):
+        # משקולות ברירת מחדל: 0.6·(1−IoU) + 0.3·מרחק מרכזים + 0.1·הפרש זווית/180
+        trk = Tracker(TrackerConfig(enforce_label_match=True))
+        tracks = [SimpleNamespace(box=(0, 0, 100, 100), cx=50.0, cy=50.0, angle_deg=10.0, label="barbell"),
+                  SimpleNamespace(box=(400, 250, 500, 350), cx=450.0, cy=300.0, angle_deg=None, label="barbell")]
+        obs = [Obs(label="barbell", score=0.9, box=(50, 0, 150, 100), angle_deg=40.0),
+               Obs(label="dumbbell", score=0.9, box=(0, 0, 100, 100), angle_deg=None),
+               Obs(label="", score=0.9, box=(400, 250, 500, 350), angle_deg=100.0)]
+        # A×0: IoU=1/3, מרכז זז 50px מתוך W=1000 → 0.05·4=0.2, זווית 30°
+        # A×2: IoU=0, מרחק (0.4, 0.5)·4 → תקרה 1, זווית 90°
+        # B×0: IoU=0, מרחק → 1, זווית None → 180°;  B×2: אותה תיבה, רק הזווית חסרה
+        want = np.array([[0.6 * 2 / 3 + 0.3 * 0.2 + 0.1 * 30 / 180, 1e9, 0.6 + 0.3 + 0.1 * 0.5],
+                         [0.6 + 0.3 + 0.1, 1e9, 0.1]])
+        np.testing.assert_allclose(trk._cost_matrix(obs, tracks, (1000, 500)), want, atol=1e-12)
+        # בלי גודל פריים — מרחק בפיקסלים / 640
+        got = trk._cost_matrix(obs[:1], tracks[:1], None)
+        self.assertAlmostEqual(float(got[0, 0]), 0.6 * 2 / 3 + 0.3 * 50 / 640 + 0.1 * 30 / 180, places=12)
+
+    def test_hungarian_is_optimal_with_gating(self):
+        rng = np.random.default_rng(1)
+        for _ in range(60):
+            n, m = (int(v) for v in rng.integers(1, 6, 2))
+            costs = rng.uniform(0.0, 1.0, (n, m))
+            gate = float(rng.uniform(0.2, 0.7))
+            pairs = _min_cost_assign(costs, gate)
+            self.assertTrue(all(costs[i, j] <= gate for i, j in pairs))
+            self.assertEqual(len({i for i, _ in pairs}), len(pairs))
+            self.assertEqual(len({j for _, j in pairs}), len(pairs))
+            key = (-len(pairs), sum(costs[i, j] for i, j in pairs))
+            ref = _best(costs, gate)
+            self.assertEqual(key[0], ref[0])
+            self.assertAlmostEqual(key[1], ref[1])
+
+    def test_optimal_beats_greedy_and_tiny_inputs_stay_greedy(self):
+        costs = np.array([[0.10, 0.20, 0.90],
+                          [0.15, 0.90, 0.90],
+                          [0.90, 0.90, 0.30]])
+        self.assertEqual(_greedy_assign(costs, 0.85), [(0, 0), (2, 2)])
+        self.assertEqual(_min_cost_assign(costs, 0.85), [(0, 1), (1, 0), (2, 2)])
+
+        trk = Tracker(TrackerConfig(min_score=0.0))
+        a, b = (10, 10, 50, 50), (60, 10, 100, 50)
+        trk.update([Obs(label="x", score=0.9, box=a), Obs(label="x", score=0.9, box=b)], ts_ms=0)
+        ids = {t.box: t.track_id for t in trk._tracks}
+        tracks = trk.update([Obs(label="x", score=0.9, box=b), Obs(label="x", score=0.9, box=a)], ts_ms=1)
+        self.assertEqual({t.box: t.track_id for t in tracks}, ids)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
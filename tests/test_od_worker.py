@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-worker הקבוע של ObjectDetectionEngine — latest-wins, תוצאות בגרסה, מצב pull, עצירה.
+הרצה:
+    python -m unittest -v tests.test_od_worker
+"""
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from core.object_detection.angle import AngleConfig
+from core.object_detection.detector import ObjectDetectionConfig
+from core.object_detection.engine import ObjectDetectionEngine
+from core.object_detection.features import FeatureConfig
+from core.object_detection.tracks import TrackerConfig
+
+
+class _SlowDetector:
+    """detect איטי שמחזיק את ה-worker עד שמשחררים; רושם את ערך הפריים שעובד."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+        self.seen = []
+
+    def detect(self, frame, ts_ms=None):
+        self.entered.set()
+        self.gate.wait(5)
+        self.seen.append(int(frame[0, 0, 0]))
+        return []
+
+
+def _engine(period_ms=0):
+    eng = ObjectDetectionEngine(ObjectDetectionConfig(provider="onnx", period_ms=period_ms),
+                                AngleConfig(), TrackerConfig(), FeatureConfig())
+    eng._started = True
+    return eng
+
+
+def _frame(v):
+    return np.full((8, 8, 3), v, np.uint8)
+
+
+class TestODWorker(unittest.TestCase):
+    def setUp(self):
+        self.eng = _engine()
+        self.det = self.eng.detector = _SlowDetector()
+
+    def tearDown(self):
+        self.det.gate.set()
+        self.eng.stop()
+
+    def test_latest_wins_and_versions(self):
+        self.assertEqual(self.eng.latest_result().version, 0)
+        self.eng.start_worker(period_ms=0)
+        self.eng.submit_frame(_frame(1), ts_ms=1)
+        self.assertTrue(self.det.entered.wait(2))
+        for v in (2, 3, 4):  # ה-worker עסוק — רק האחרון שורד
+            self.eng.submit_frame(_frame(v), ts_ms=v)
+        self.det.gate.set()
+        res = self.eng.wait_result(after_version=1, timeout=2)
+        self.assertIsNotNone(res)
+        self.assertEqual(self.det.seen, [1, 4])
+        self.assertEqual((res.version, res.ts_ms, res.frame_seq, res.frame_hw), (2, 4, 4, (8, 8)))
+        st = self.eng.worker_stats()
+        self.assertEqual((st["submitted"], st["processed"], st["dropped"]), (4, 2, 2))
+        self.assertIs(self.eng.latest_result(), res)
+        self.assertIsNone(self.eng.wait_result(after_version=2, timeout=0.05))
+
+    def test_pull_source_and_listener(self):
+        self.det.gate.set()
+        frames = [_frame(7)]
+        got = []
+        self.eng.add_result_listener(got.append)
+        self.eng.start_worker(period_ms=0, source=lambda: frames[0])
+        res = self.eng.wait_result(0, timeout=2)
+        time.sleep(0.05)
+        self.assertEqual(self.det.seen, [7])  # אותו אובייקט לא מעובד פעמיים
+        frames[0] = _frame(9)
+        self.eng.wait_result(res.version, timeout=2)
+        self.assertEqual(self.det.seen, [7, 9])
+        self.assertEqual([r.version for r in got[:2]], [1, 2])
+
+    def test_stop_and_tick_compat(self):
+        self.det.gate.set()
+        self.eng.start_worker(period_ms=0)
+        self.assertTrue(self.eng.worker_running)
+        self.eng.stop_worker()
+        self.assertFalse(self.eng.worker_running)
+        # tick() סינכרוני עדיין עובד ומפרסם גרסה
+        self.eng.update_frame(_frame(5), ts_ms=5)
+        tracks, payload = self.eng.tick()
+        self.assertEqual((tracks, payload["objects"]), ([], []))
+        self.assertEqual(self.eng.latest_result().version, 1)
+        # tick_nonblocking מעלה את ה-worker במקום ת'רד לכל טיק
+        self.eng.submit_frame(_frame(6))
+        self.eng.tick_nonblocking()
+        self.assertIsNotNone(self.eng.wait_result(1, timeout=2))
+        self.assertEqual(self.det.seen, [5, 6])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
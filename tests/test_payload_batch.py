@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-/api/payload_push/batch (admin_web/ingest.py) — NDJSON, רק החדש נשמר, queue.
+הרצה:
+    python -m unittest -v tests.test_payload_batch
+"""
+import json
+import unittest
+
+from admin_web import ingest
+from admin_web import server as srv
+from admin_web import state
+from core.event_bus import BUS
+
+
+def _ndjson(*items):
+    return "\n".join(i if isinstance(i, str) else json.dumps(i) for i in items) + "\n"
+
+
+class TestPayloadBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = srv.app.test_client()
+
+    def test_newest_stored_and_bad_lines_rejected(self):
+        body = _ndjson(
+            {"ts": 2000.0, "detections": [], "metrics": {"n": 2}},
+            {"ts": 3000.0, "detections": [], "metrics": {"n": 3}},
+            "{not json",
+            {"ts": 2500.0, "detections": [{"bbox": [1, 2]}]},
+            {"ts": 1000.0, "detections": [], "metrics": {"n": 1}},
+        )
+        r = self.client.post("/api/payload_push/batch", data=body,
+                             content_type="application/x-ndjson")
+        self.assertEqual(r.status_code, 200)
+        j = r.get_json()
+        self.assertEqual(j["accepted"], 3)
+        self.assertEqual(sorted(x["err"] for x in j["rejected"]), ["bad_bbox", "invalid_json"])
+        self.assertEqual(srv.LAST_PAYLOAD["metrics"], {"n": 3})
+
+        # באץ' ישן יותר לא דורס את ה-state החי
+        r = self.client.post("/api/payload_push/batch",
+                             data=_ndjson({"ts": 10.0, "detections": []}))
+        self.assertFalse(r.get_json()["stored"])
+        self.assertEqual(srv.LAST_PAYLOAD["metrics"], {"n": 3})
+
+    def test_queue_publishes_all_in_ts_order(self):
+        got = []
+        sub = BUS.subscribe("ingest", lambda p: got.append(p["ts"]), name="test_batch", inline=True)
+        try:
+            arr = [{"ts": 5002.0, "detections": []}, {"ts": 5001.0, "detections": []}]
+            r = self.client.post("/api/payload_push/batch?queue=1", json=arr)
+            self.assertEqual(r.get_json()["queued"], 2)
+            self.assertEqual(got, [5001.0, 5002.0])
+        finally:
+            sub.close()
+
+    def test_stale_batch_with_queue_leaves_live_state(self):
+        got = []
+        sub = BUS.subscribe("ingest", lambda p: got.append(p["ts"]), name="test_stale", inline=True)
+        try:
+            with srv.LAST_PAYLOAD_LOCK:
+                srv.LAST_PAYLOAD = None  # בסיס ידוע — לא תלוי ב-ts שבדיקות אחרות דחפו
+            r = self.client.post("/api/payload_push/batch?queue=1",
+                                 json=[{"ts": 9000.0, "detections": [], "metrics": {"n": 9}}])
+            self.assertTrue(r.get_json()["stored"])
+            live = state.get_payload_snapshot()
+            self.assertEqual(live.data["ts"], 9000.0)
+
+            r = self.client.post("/api/payload_push/batch?queue=1",
+                                 json=[{"ts": 5.0, "detections": [], "metrics": {"n": 0}}])
+            j = r.get_json()
+            self.assertEqual((j["stored"], j["queued"]), (False, 1))
+            self.assertEqual(got, [9000.0, 5.0])  # צרכני ingest מקבלים הכול
+            self.assertIs(state.get_payload_snapshot(), live)  # בלי גרסה חדשה, בלי דריסה
+        finally:
+            sub.close()
+
+    def test_limits(self):
+        r = self.client.post("/api/payload_push/batch", data="\n\n")
+        self.assertEqual(r.status_code, 400)
+        with self.assertRaises(ingest.BatchTooLarge):
+            ingest.parse_batch(_ndjson(*[{}] * 3).encode(), limit=2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-admin_web/payload_delta.py — delta/keyframe, כימות landmarks ו-/api/payload/delta.
+הרצה:
+    python -m unittest -v tests.test_payload_delta
+"""
+import json
+import unittest
+from unittest import mock
+
+from admin_web import payload_delta as pd
+from admin_web import state
+from admin_web.server import create_app
+
+
+def _payload(knee: float, lm_x: float = 0.123456):
+    return {
+        "metrics": {"knee_left_deg": knee, "video.width": 640},
+        "mp": {"landmarks": [{"x": lm_x, "y": 0.5, "visibility": 0.98765}]},
+        "meta": {"a/b": 1},
+    }
+
+
+class TestPayloadDelta(unittest.TestCase):
+    def test_flatten_roundtrip_with_special_keys(self):
+        d = {"metrics": {"video.width": 640, "a/b": {"c~d": 1}}, "empty": {}, "lst": [1, 2]}
+        flat = pd.flatten(d)
+        self.assertIn("/metrics/a~1b/c~0d", flat)
+        self.assertEqual(pd.unflatten(flat), d)
+
+    # בלי גבול keyframe מחזורי בין שתי הגרסאות — לא תלוי בכמה גרסאות בדיקות אחרות יצרו
+    @mock.patch.object(pd, "DELTA_KEYFRAME_EVERY", 10 ** 9)
+    def test_delta_contains_only_changed_keys_and_applies(self):
+        s1 = state.set_payload(_payload(90.0))
+        s2 = state.set_payload(_payload(91.0, lm_x=0.12346))  # ריצוד מתחת לכימות
+        msg = pd.encode(s2, s1.version)
+        self.assertFalse(msg.get("key"))
+        self.assertEqual(msg["base"], s1.version)
+        self.assertIn("/metrics/knee_left_deg", msg["set"])
+        self.assertNotIn("/metrics/video.width", msg["set"])
+        self.assertNotIn("/mp/landmarks", msg["set"])
+        # משותף לכל הלקוחות עם אותו בסיס
+        self.assertIs(pd.encode_bytes(s2, s1.version), pd.encode_bytes(s2, s1.version))
+
+        flat = pd.apply_delta({}, pd.keyframe(s1))
+        pd.apply_delta(flat, msg)
+        self.assertEqual(pd.unflatten(flat)["metrics"]["knee_left_deg"], 91.0)
+
+    def test_keyframe_when_base_unknown_and_landmarks_quantized(self):
+        snap = state.set_payload(_payload(90.0))
+        msg = pd.encode(snap, None)
+        self.assertTrue(msg["key"])
+        lm = msg["full"]["mp"]["landmarks"][0]
+        self.assertEqual(lm["x"], 0.1235)
+        self.assertEqual(lm["visibility"], 0.99)
+        self.assertTrue(pd.encode(snap, snap.version + 5)["key"])
+
+    def test_periodic_keyframe(self):
+        every = pd.DELTA_KEYFRAME_EVERY
+        snap = state.set_payload(_payload(90.0))
+        base = snap.version
+        while (snap.version // every) == (base // every):
+            snap = state.set_payload(_payload(90.0))
+        self.assertTrue(pd.encode(snap, base)["key"])
+
+
+class TestPayloadDeltaRoute(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app = create_app()
+        app.testing = True
+        cls.client = app.test_client()
+
+    def test_since_current_is_304(self):
+        snap = state.set_payload(_payload(95.0))
+        r = self.client.get(f"/api/payload/delta?since={snap.version}")
+        self.assertEqual(r.status_code, 304)
+        r = self.client.get("/api/payload/delta")
+        self.assertEqual(r.status_code, 200)
+        body = json.loads(r.data)
+        self.assertTrue(body["key"])
+        self.assertEqual(body["v"], snap.version)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-snapshot המגורסן של admin_web.state — COW, מטמון לפי גרסה ו-ETag/304.
+הרצה:
+    python -m unittest -v tests.test_payload_snapshot
+"""
+import json
+import unittest
+
+from admin_web import state
+from admin_web.server import create_app
+
+
+class TestPayloadSnapshot(unittest.TestCase):
+    def test_versions_and_cow(self):
+        src = {"metrics": {"a": 1}, "mp": {"landmarks": [{"x": 0.5}]}}
+        s1 = state.set_payload(src)
+        s2 = state.set_payload(src)
+        self.assertGreater(s2.version, s1.version)
+        self.assertNotEqual(s1.etag, s2.etag)
+        self.assertIs(state.get_payload_snapshot(), s2)
+        # הסניטציה לא משנה את ה-dict של המפיק
+        self.assertNotIn("objdet", src)
+        self.assertIsNot(s2.data["mp"], src["mp"])
+
+    def test_derive_is_memoized_per_version(self):
+        snap = state.set_payload({"metrics": {"a": 1}})
+        calls = []
+        fn = lambda d: calls.append(1) or len(d)
+        self.assertEqual(snap.derive("n", fn), snap.derive("n", fn))
+        self.assertEqual(len(calls), 1)
+        self.assertIs(snap.json_bytes(), snap.json_bytes())
+        self.assertEqual(json.loads(snap.json_bytes())["metrics"], {"a": 1})
+
+
+class TestPayloadEtag(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app = create_app()
+        app.testing = True
+        cls.client = app.test_client()
+
+    def test_304_until_next_version(self):
+        state.set_payload({"metrics": {"knee": {"left": 90.0}}})
+        for url in ("/payload", "/api/payload_last", "/api/metrics"):
+            r1 = self.client.get(url)
+            self.assertEqual(r1.status_code, 200, url)
+            etag = r1.headers["ETag"]
+            r2 = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(r2.status_code, 304, url)
+            self.assertEqual(r2.data, b"")
+        names = [m["name"] for m in json.loads(self.client.get("/api/metrics").data)["metrics"]]
+        self.assertIn("knee.left", names)
+
+        state.set_payload({"metrics": {"knee": {"left": 91.0}}})
+        r3 = self.client.get("/payload", headers={"If-None-Match": etag})
+        self.assertEqual(r3.status_code, 200)
+        self.assertNotEqual(r3.headers["ETag"], etag)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
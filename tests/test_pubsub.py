@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/pubsub.py — fan-out לכל המנויים, Last-Event-ID, gap/coalescing ותקרת מנויים.
+הרצה:
+    python -m unittest -v tests.test_pubsub
+"""
+import json
+import threading
+import unittest
+
+from core.pubsub import BroadcastHub, HubFull, parse_last_event_id
+
+
+def _data(frame: str):
+    line = [ln for ln in frame.splitlines() if ln.startswith("data: ")][0]
+    return json.loads(line[len("data: "):])
+
+
+class TestBroadcastHub(unittest.TestCase):
+    def test_every_subscriber_gets_every_event(self):
+        hub = BroadcastHub("t", capacity=64)
+        subs = [hub.subscribe() for _ in range(3)]
+        got = [[] for _ in subs]
+
+        def _reader(i):
+            while len(got[i]) < 20:
+                got[i].extend(_data(f)["i"] for f in subs[i].next_frames(timeout=1.0))
+
+        ths = [threading.Thread(target=_reader, args=(i,)) for i in range(3)]
+        for t in ths:
+            t.start()
+        for i in range(20):
+            hub.publish({"i": i})
+        for t in ths:
+            t.join(timeout=2.0)
+        for g in got:
+            self.assertEqual(g, list(range(20)))
+        for s in subs:
+            s.close()
+        self.assertEqual(hub.gate.active, 0)
+
+    def test_last_event_id_resume(self):
+        hub = BroadcastHub("t", capacity=64)
+        for i in range(5):
+            hub.publish({"i": i})
+        with hub.subscribe(last_event_id=3) as sub:
+            frames = sub.next_frames(timeout=0.1)
+        self.assertEqual([_data(f)["i"] for f in frames], [3, 4])
+        self.assertTrue(frames[0].startswith("id: 4\n"))
+
+    def test_gap_and_coalescing_for_slow_subscriber(self):
+        hub = BroadcastHub("t", capacity=16, coalesce_after=4)
+        sub = hub.subscribe()
+        for i in range(40):
+            hub.publish({"i": i}, key="state")
+        frames = sub.next_frames(timeout=0.1)
+        self.assertTrue(frames[0].startswith("event: gap"))
+        self.assertEqual(_data(frames[0])["skipped"], 24)
+        self.assertEqual([_data(f)["i"] for f in frames[1:]], [39])
+        self.assertEqual(sub.next_frames(timeout=0.01), [])
+        sub.close()
+
+    def test_subscriber_cap(self):
+        hub = BroadcastHub("t", max_subscribers=2)
+        a, b = hub.subscribe(), hub.subscribe()
+        with self.assertRaises(HubFull):
+            hub.subscribe()
+        a.close()
+        a.close()  # idempotent
+        hub.subscribe().close()
+        b.close()
+        self.assertEqual(hub.gate.active, 0)
+
+    def test_parse_last_event_id(self):
+        self.assertEqual(parse_last_event_id({"Last-Event-ID": "12"}), 12)
+        self.assertEqual(parse_last_event_id({}, {"last_event_id": "7"}), 7)
+        self.assertIsNone(parse_last_event_id({"Last-Event-ID": "x"}))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-admin_web/shm_state.py — seqlock, טבעת פריימים, כתיבה מתהליך אחר, state במצב shm.
+הרצה:
+    python -m unittest -v tests.test_shm_state
+"""
+import json
+import multiprocessing as mp
+import os
+import unittest
+
+import numpy as np
+
+from admin_web import state
+from admin_web.shm_state import SharedState
+
+_SIZES = dict(payload_bytes=4096, status_bytes=1024, frame_slots=2, frame_bytes=4 * 4 * 3, jpeg_bytes=256)
+
+
+def _child_publish(prefix, q):
+    st = SharedState(prefix, **_SIZES)
+    v, _ = st.payload.publish(lambda v: json.dumps({"ts_ms": 77, "from": os.getpid()}).encode())
+    st.frames.write(np.full((4, 4, 3), 9, np.uint8), (4, 4, 3, 0))
+    st.close()
+    q.put(v)
+
+
+class TestSharedState(unittest.TestCase):
+    def setUp(self):
+        self.prefix = f"bp_test_{os.getpid()}_{id(self) & 0xFFFF:x}"
+        self.st = SharedState(self.prefix, **_SIZES)
+
+    def tearDown(self):
+        self.st.close()
+        self.st.unlink()
+
+    def test_seqlock_and_torn_writer(self):
+        blob = self.st.payload
+        self.assertIsNone(blob.read())
+        self.assertEqual(blob.publish(lambda v: b"a")[0], 1)
+        self.assertEqual(blob.publish(lambda v: b"bb")[0], 2)
+        seq, version, _ts, data = blob.read()
+        self.assertEqual((version, data, seq % 2), (2, b"bb", 0))
+        # כותב שמת באמצע: seq אי-זוגי → קוראים לא מקבלים נתון קרוע; הכתיבה הבאה מתקנת
+        blob.region.seg.buf[blob.region.off] = (seq + 1) & 0xFF
+        self.assertIsNone(blob.read())
+        blob.publish(lambda v: b"ccc")
+        self.assertEqual(blob.read()[3], b"ccc")
+        with self.assertRaises(ValueError):
+            blob.publish(lambda v: b"x" * 5000)
+
+    def test_ring_latest_across_process(self):
+        ctx = mp.get_context("fork")
+        q = ctx.Queue()
+        p = ctx.Process(target=_child_publish, args=(self.prefix, q))
+        p.start(); p.join(10)
+        self.assertEqual(q.get(timeout=5), 1)
+        self.assertEqual(json.loads(self.st.payload.read()[3])["ts_ms"], 77)
+        n, _ts, meta, data = self.st.frames.latest()
+        self.assertEqual((n, meta[:3], data[:2]), (1, (4, 4, 3), b"\x09\x09"))
+        self.assertEqual(self.st.frames.write(b"\x01" * 48, (4, 4, 3, 0)), 2)
+        self.assertEqual(self.st.frames.latest()[3][:1], b"\x01")
+
+    def test_state_reads_other_workers_payload(self):
+        other = SharedState(self.prefix, **_SIZES)  # "worker" נוסף מעל אותו segment
+        old = state._SHM
+        state._SHM = self.st
+        try:
+            mine = state.set_payload({"ts_ms": 1, "metrics": {}})
+            self.assertIs(state.get_payload_snapshot(), mine)
+            other.payload.publish(lambda v: json.dumps({"ts_ms": 2, "metrics": {"x": 1.0}}).encode())
+            snap = state.get_payload_snapshot()
+            self.assertEqual((snap.version, snap.data["ts_ms"]), (mine.version + 1, 2))
+            self.assertEqual(snap.etag.split("-")[0], mine.etag.split("-")[0])  # אותו tag בין workers
+            self.assertIs(state.get_payload_snapshot_at(mine.version), mine)
+
+            state.push_frame_np(np.zeros((4, 4, 3), np.uint8))
+            other.frames.write(np.ones((4, 4, 3), np.uint8), (4, 4, 3, 0))
+            self.assertEqual(int(state.get_frame().sum()), 48)
+        finally:
+            state._SHM = old
+            other.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
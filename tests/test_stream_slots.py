@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-admin_web/stream_slots.py — תקרה משותפת לחיבורים ארוכים (SSE / chunked ingest), 503 + retry, שחרור בסגירה.
+הרצה:
+    python -m unittest -v tests.test_stream_slots
+"""
+import unittest
+from unittest import mock
+
+from admin_web import routes_ingest as ri
+from admin_web import state, stream_slots
+from admin_web.routes_live import LIVE_HUB, SAMPLER
+from admin_web.server import create_app
+from core.pubsub import SubscriberGate
+
+
+class TestStreamSlots(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app = create_app()
+        app.testing = True
+        cls.client = app.test_client()
+
+    def setUp(self):
+        p = mock.patch.object(stream_slots, "STREAM_SLOTS", SubscriberGate(1))
+        p.start()
+        self.addCleanup(p.stop)
+        state.set_payload({"metrics": {"knee": 1}})
+        SAMPLER.sample("payload")
+
+    def _open_live(self):
+        return self.client.get("/api/live/stream?topics=payload", buffered=False)
+
+    def _assert_busy(self, r):
+        self.assertEqual(r.status_code, 503)
+        j = r.get_json()
+        self.assertEqual((j["error"], j["max"]), ("too_many_streams", 1))
+        self.assertEqual(j["retry_ms"], stream_slots.STREAM_RETRY_MS)
+        self.assertGreaterEqual(int(r.headers["Retry-After"]), 1)
+
+    def test_live_stream_capped_and_released_on_close(self):
+        first = self._open_live()
+        try:
+            self.assertEqual(first.status_code, 200)
+            next(first.response)
+            self.assertEqual(stream_slots.stats()["active"], 1)
+            self._assert_busy(self._open_live())
+            # מאגר מלא → גם ingest ב-chunked נדחה (לא תופס ת'רד)
+            r = self.client.post("/api/ingest_stream", data=ri.pack_record(b"\xff\xd8" + b"x" * 16, 1.0))
+            self._assert_busy(r)
+        finally:
+            first.close()
+        self.assertEqual((stream_slots.STREAM_SLOTS.active, LIVE_HUB.gate.active), (0, 0))
+        again = self._open_live()
+        try:
+            self.assertEqual(again.status_code, 200)
+        finally:
+            again.close()
+        self.assertEqual(stream_slots.STREAM_SLOTS.active, 0)
+
+    def test_chunked_ingest_releases_slot(self):
+        r = self.client.post("/api/ingest_stream", data=ri.pack_record(b"\xff\xd8" + b"x" * 16, 1.0)[:-3])
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(stream_slots.STREAM_SLOTS.active, 0)
+        self.assertIn("streams", self.client.get("/api/live/stats").get_json())
+
+    def test_slot_release_is_idempotent(self):
+        slot = stream_slots.acquire_slot("test")
+        self.assertIsNone(stream_slots.acquire_slot("test"))
+        slot.release()
+        slot.release()
+        self.assertEqual(stream_slots.STREAM_SLOTS.active, 0)
+        self.assertEqual(stream_slots.stats()["by_kind"].get("test"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/system/heap.py — צילומי tracemalloc מתויגים ו-diff מקובץ לפי module.
+הרצה:
+    python -m unittest -v tests.test_system_heap
+"""
+import unittest
+
+from core.system import heap
+
+_LEAK = []
+
+
+class TestHeapTracker(unittest.TestCase):
+    def tearDown(self):
+        heap.stop()
+        _LEAK.clear()
+
+    def test_snapshot_requires_tracing(self):
+        heap.stop()
+        with self.assertRaises(RuntimeError):
+            heap.snapshot("x")
+
+    def test_diff_reports_growing_module(self):
+        heap.start(frames=5)
+        heap.snapshot("before")
+        _LEAK.extend(bytearray(1024) for _ in range(500))
+        heap.snapshot("after")
+        d = heap.diff("before", "after", top=5, group="module")
+        self.assertTrue(d["ok"])
+        self.assertGreater(d["total_diff_kb"], 400)
+        self.assertTrue(d["top"][0]["site"].endswith("test_system_heap"))
+
+    def test_default_diff_uses_last_two(self):
+        heap.start(frames=1)
+        with self.assertRaises(KeyError):
+            heap.diff()
+        heap.snapshot("a")
+        heap.snapshot("b")
+        d = heap.diff(group="lineno")
+        self.assertEqual((d["a"]["label"], d["b"]["label"]), ("a", "b"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
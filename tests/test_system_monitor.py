@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/system/monitor.py — collector ברקע, טבעת דגימות, חלון היסטוריה, ו-?history ב-/api/system.
+הרצה:
+    python -m unittest -v tests.test_system_monitor
+"""
+import itertools
+import time
+import unittest
+from collections import deque
+from unittest import mock
+
+from flask import Flask
+
+from admin_web.routes_system import bp_system
+from core.system import monitor
+
+RING = 5
+
+
+def _wait(cond, timeout=2.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return cond()
+
+
+class _MonitorCase(unittest.TestCase):
+    """collector אמיתי (interval קצר) על _collect מזויף וטבעת בגודל RING."""
+
+    def setUp(self):
+        monitor.stop_collector()
+        monitor._first_sample.clear()
+        seq = itertools.count(1)
+
+        def fake_collect():
+            i = next(seq)
+            return {"ts": 1000.0 + i, "cpu": {"percent_total": float(i)}, "ram": {"percent": 50.0},
+                    "proc": {"cpu_percent": 1.0, "threads": 3}, "fps": 30.0}
+
+        for p in (mock.patch.object(monitor, "_collect", fake_collect),
+                  mock.patch.object(monitor, "_samples", deque(maxlen=RING)),
+                  mock.patch.object(monitor, "MONITOR_HISTORY", RING),
+                  mock.patch.object(monitor, "MONITOR_INTERVAL_SEC", 0.05)):
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(monitor.stop_collector)
+
+    def _fill(self):
+        monitor.start_collector(0.01)
+        self.assertTrue(_wait(lambda: len(monitor._samples) == RING))
+
+
+class TestCollector(_MonitorCase):
+    def test_start_is_idempotent_and_ring_is_bounded(self):
+        monitor.start_collector(0.01)
+        t = monitor._collector
+        monitor.start_collector(0.01)
+        self.assertIs(monitor._collector, t)
+        self.assertTrue(_wait(lambda: monitor._samples and monitor._samples[-1]["ts"] > 1000.0 + RING + 2))
+        self.assertEqual(len(monitor._samples), RING)  # הישנים נזרקו
+        snap = monitor.get_snapshot()
+        self.assertGreater(snap["ts"], 1000.0 + RING)
+        self.assertIn("age_sec", snap)
+
+    def test_history_window_and_fields(self):
+        self._fill()
+        monitor.stop_collector()  # טבעת קפואה — חלון דטרמיניסטי
+        h = monitor.get_history(3, ["cpu", "fps", "nope"])
+        self.assertEqual(sorted(h), ["cpu", "fps", "ts"])
+        self.assertEqual(h["ts"], [r["ts"] for r in list(monitor._samples)[-3:]])
+        self.assertEqual(h["cpu"], [r["cpu"]["percent_total"] for r in list(monitor._samples)[-3:]])
+        self.assertEqual(len(monitor.get_history(10 ** 6)["ts"]), RING)
+        self.assertEqual(len(monitor.get_history(0)["ts"]), 1)
+
+
+class TestSystemRoute(_MonitorCase):
+    def setUp(self):
+        super().setUp()
+        app = Flask(__name__)
+        app.register_blueprint(bp_system)
+        self.client = app.test_client()
+        self._fill()
+        monitor.stop_collector()
+        monitor._first_sample.set()
+
+    def test_history_param(self):
+        r = self.client.get("/api/system?history=2")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.get_json()["history"]["ts"]), 2)
+        r = self.client.get("/api/system?history=999999")
+        self.assertEqual(len(r.get_json()["history"]["ts"]), RING)
+        self.assertNotIn("history", self.client.get("/api/system").get_json())
+        for bad in ("abc", "1.5", "%20"):
+            r = self.client.get(f"/api/system?history={bad}")
+            self.assertEqual(r.status_code, 400, bad)
+            self.assertEqual(r.get_json()["error"], "bad_params")
+        self.assertEqual(self.client.get("/api/system/history?n=x").status_code, 400)
+        r = self.client.get("/api/system/history?n=-4&fields=cpu")
+        self.assertEqual((r.status_code, len(r.get_json()["cpu"])), (200, 1))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+בדיקות ל-core/system/profiler.py — דגימת מחסניות, פורמט collapsed ו-guard לריצה יחידה.
+הרצה:
+    python -m unittest -v tests.test_system_profiler
+"""
+import threading
+import time
+import unittest
+
+from core.system import profiler
+
+
+def _busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_samples_busy_thread(self):
+        stop = threading.Event()
+        t = threading.Thread(target=_busy_worker, args=(stop,), name="BusyWorker", daemon=True)
+        t.start()
+        try:
+            res = profiler.profile(seconds=0.3, hz=200, thread_filter="BusyWorker")
+        finally:
+            stop.set()
+            t.join(timeout=1.0)
+        self.assertTrue(res["ok"])
+        self.assertGreater(res["samples"], 0)
+        self.assertGreater(res["total_samples"], 0)
+        self.assertIn("_busy_worker", res["collapsed"])
+        self.assertTrue(res["collapsed"].splitlines()[0].startswith("BusyWorker;"))
+        self.assertEqual(res["threads"][0]["name"], "BusyWorker")
+        funcs = [r["func"] for r in res["top_cumulative"]]
+        self.assertTrue(any(":_busy_worker:" in f for f in funcs))
+
+    def test_single_run_guard(self):
+        out = {}
+        t = threading.Thread(target=lambda: out.setdefault("r", profiler.profile(seconds=0.4, hz=20)))
+        t.start()
+        time.sleep(0.1)
+        busy = profiler.profile(seconds=0.1, hz=10)
+        t.join()
+        self.assertFalse(busy["ok"])
+        self.assertEqual(busy["error"], "busy")
+        self.assertTrue(out["r"]["ok"])
+
+    def test_params_are_clamped(self):
+        res = profiler.profile(seconds=0.01, hz=100000)
+        self.assertTrue(res["ok"])
+        self.assertLessEqual(res["hz"], profiler.PROFILE_MAX_HZ)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# bench_nms.py — מיקרו-בנצ'מרק ל-providers._nms מול הלולאה הישנה (class-agnostic)
+# -----------------------------------------------------------------------------
+# הרצה:
+#   python tools/dev/bench_nms.py
+#   python tools/dev/bench_nms.py --counts 100 1000 8400 --iou 0.45 --top-k 30 --repeat 20
+# מדפיס לכל כמות מועמדים: ms ללולאה הישנה / ms לגרסה המוקטרת / class-aware,
+# ומוודא שהאינדקסים זהים (class-agnostic).
+# -----------------------------------------------------------------------------
+from __future__ import annotations
+import sys, argparse, time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+
+def _add_project_root() -> Path:
+    here = Path(__file__).resolve()
+    project_root = here.parents[2]  # tools/dev/ -> BodyPlus_XPro/
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+    return project_root
+
+
+def nms_loop(boxes: np.ndarray, scores: np.ndarray, iou_th: float = 0.45, top_k: int = 300) -> np.ndarray:
+    """הגרסה הקודמת של providers._nms — מעבר NumPy אחד לכל תיבה שנשמרת."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep: List[int] = []
+    while order.size > 0 and len(keep) < top_k:
+        i = int(order[0])
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        w = np.maximum(0.0, xx2 - xx1)
+        h = np.maximum(0.0, yy2 - yy1)
+        inter = w * h
+        ovr = inter / (areas[i] + areas[order[1:]] - inter + 1e-6)
+        inds = np.where(ovr <= iou_th)[0]
+        order = order[inds + 1]
+    return np.array(keep, dtype=int)
+
+
+def synth(n: int, seed: int = 0, img: int = 640, clusters: int = 12):
+    """מועמדים בסגנון YOLOv8: צבירים סביב מעט אובייקטים + רעש, scores רציפים."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(60, img - 60, (clusters, 2))
+    sizes = rng.uniform(30, 200, (clusters, 2))
+    k = rng.integers(0, clusters, n)
+    c = centers[k] + rng.normal(0, 8, (n, 2))
+    wh = sizes[k] * rng.uniform(0.8, 1.2, (n, 2))
+    boxes = np.concatenate([c - wh / 2, c + wh / 2], axis=1).astype(np.float32)
+    scores = rng.uniform(0.0, 1.0, n).astype(np.float32)
+    class_ids = rng.integers(0, 3, n)
+    return boxes, scores, class_ids
+
+
+def _time(fn, repeat: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000.0
+
+
+def main() -> int:
+    _add_project_root()
+    from core.object_detection.providers import _nms
+
+    parser = argparse.ArgumentParser(description="NMS micro-benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 500, 1000, 2000, 4000, 8400])
+    parser.add_argument("--iou", type=float, default=0.45)
+    parser.add_argument("--top-k", type=int, default=300)
+    parser.add_argument("--threshold", type=float, default=0.0, help="סינון score לפני NMS")
+    parser.add_argument("--clusters", type=int, default=12, help="מעט אובייקטים (12) / סצנה מפוזרת (400)")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'n':>6} {'kept':>5} {'loop_ms':>9} {'vec_ms':>8} {'class_ms':>9} {'speedup':>8}  same")
+    for n in args.counts:
+        boxes, scores, cls = synth(n, clusters=args.clusters)
+        m = scores >= args.threshold
+        boxes, scores, cls = boxes[m], scores[m], cls[m]
+        ref = nms_loop(boxes, scores, args.iou, args.top_k)
+        got = _nms(boxes, scores, args.iou, args.top_k)
+        t_loop = _time(lambda: nms_loop(boxes, scores, args.iou, args.top_k), args.repeat)
+        t_vec = _time(lambda: _nms(boxes, scores, args.iou, args.top_k), args.repeat)
+        t_cls = _time(lambda: _nms(boxes, scores, args.iou, args.top_k, class_ids=cls), args.repeat)
+        same = np.array_equal(ref, got)
+        print(f"{len(scores):>6} {len(got):>5} {t_loop:>9.2f} {t_vec:>8.2f} {t_cls:>9.2f} {t_loop / max(t_vec, 1e-9):>7.1f}x  {same}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())